@@ -1,27 +1,25 @@
 import logging
 from typing import List, Dict, Any
 from datetime import datetime
-import json
 import uuid
 
-from services import DataLakeService
+import services
 from config import get_settings
+from rules import build_viability_engine
+from schemas.panel_row import PanelRow, get_field_table
+from utils import json_codec
+from utils.cost_ledger import sum_totals
+from utils.lazy import LazyService
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
-datalake = DataLakeService()
+datalake = LazyService(lambda: services.DataLakeService(), "datalake")
+viability_engine = build_viability_engine(settings)
 
 
 def panel_fields_to_dict(panel_fields: List[Dict]) -> Dict[str, Any]:
     """Convierte la lista PanelFields a un diccionario clave -> valor."""
-    result = {}
-    for item in panel_fields:
-        name = item["InternalName"]
-        if item["Type"] == "Text":
-            result[name] = item.get("TextValue")
-        else:  # Number
-            result[name] = item.get("NumberValue")
-    return result
+    return PanelRow.from_panel_fields(panel_fields).to_dict()
 
 
 def add_prefix_to_panel_fields(panel_fields: List[Dict], prefix: str = "3_") -> List[Dict]:
@@ -29,12 +27,18 @@ def add_prefix_to_panel_fields(panel_fields: List[Dict], prefix: str = "3_") ->
     Agrega el prefijo a los InternalName de cada PanelField.
     Ej: 'VIV_PrestamoDireccionMatricula' → '3_VIV_PrestamoDireccionMatricula'
     """
-    prefixed = []
-    for field in panel_fields:
-        new_field = field.copy()
-        new_field["InternalName"] = prefix + field["InternalName"]
-        prefixed.append(new_field)
-    return prefixed
+    return PanelRow.from_panel_fields(panel_fields).to_panel_fields(prefix=prefix)
+
+
+def construir_filas(resultados: List[Dict]) -> List[PanelRow]:
+    """Construye una PanelRow por resultado, indexada con la tabla de su tipo."""
+    return [
+        PanelRow.from_panel_fields(
+            res["datos"].get("PanelFields", []),
+            get_field_table(res["tipo"]),
+        )
+        for res in resultados
+    ]
 
 
 def activity_leer_resultados_intermedios(caso_id: str) -> List[Dict[str, Any]]:
@@ -55,13 +59,13 @@ def activity_leer_resultados_intermedios(caso_id: str) -> List[Dict[str, Any]]:
         try:
             archivos = datalake.list_files(container, directorio, extension=".json")
         except Exception as e:
-            logger.warning(f"No se pudo listar archivos en {directorio}: {e}")
+            logger.warning("No se pudo listar archivos en %s: %s", directorio, e)
             archivos = []
 
         for ruta in archivos:
             try:
                 contenido = datalake.read_file(container, ruta)
-                datos_json = json.loads(contenido)
+                datos_json = json_codec.loads(contenido)
                 # Extraemos los datos relevantes (dentro de 'datos_extraidos')
                 extraidos = datos_json.get("datos_extraidos", {})
                 resultados.append({
@@ -71,27 +75,27 @@ def activity_leer_resultados_intermedios(caso_id: str) -> List[Dict[str, Any]]:
                     "caso_id": datos_json.get("metadata", {}).get("caso_id"),
                 })
             except Exception as e:
-                logger.error(f"Error leyendo {ruta}: {e}", exc_info=True)
+                logger.error("Error leyendo %s: %s", ruta, e, exc_info=True)
 
     return resultados
 
 
-def calcular_confianza(resultados: List[Dict]) -> float:
+def calcular_confianza(resultados: List[Dict], filas: List[PanelRow] = None) -> float:
     """
     Calcula un porcentaje de confianza promedio basado en la presencia de campos clave.
     Utiliza los pesos definidos en settings.confidence_weights.
+    Si se reciben las filas ya construidas (una por resultado) no se reconstruyen.
     """
     pesos = settings.confidence_weights
     total_peso = 0.0
     total_aciertos = 0.0
 
-    for res in resultados:
-        datos = res["datos"]
-        panel = datos.get("PanelFields", [])
-        field_dict = panel_fields_to_dict(panel)
+    if filas is None:
+        filas = construir_filas(resultados)
 
+    for fila in filas:
         for campo, peso in pesos.items():
-            if campo in field_dict and field_dict[campo]:
+            if fila.get(campo):
                 total_aciertos += peso
             total_peso += peso
 
@@ -104,125 +108,12 @@ def calcular_confianza(resultados: List[Dict]) -> float:
 def evaluar_viabilidad(resultados: List[Dict], field_dicts: Dict[str, Dict]) -> Dict:
     """
     Evalúa la viabilidad del préstamo según reglas de negocio configurables.
+    Las reglas se definen en rules/viability_rules.py (y settings) y se
+    compilan una sola vez al cargar el módulo. field_dicts mapea tipo de
+    documento a sus campos (dict o PanelRow).
     Retorna un dict con status, reasons y un log de la decisión.
     """
-    status = "APPROVED"
-    reasons = []
-    decision_log = []
-
-    estudio_dict = field_dicts.get("estudio_titulos", {})
-
-    # -------------------------------------------------
-    # Regla 0: Documento ilegible (dummy, podrías implementarlo)
-    # -------------------------------------------------
-    # for res in resultados:
-    #     if not res.get("datos", {}).get("is_legible", True):
-    #         status = "REJECTED"
-    #         reasons.append({
-    #             "code": "DOC_INVALID",
-    #             "message": "Documento ilegible"
-    #         })
-    #         decision_log.append("Regla 0: Documento ilegible detectado → RECHAZADO")
-    #         break
-
-    # -------------------------------------------------
-    # Regla 1: Matrícula obligatoria
-    # -------------------------------------------------
-    if not estudio_dict.get("VIV_PrestamoDireccionMatricula"):
-        status = "REJECTED"
-        reasons.append({
-            "code": "MISSING_MATRICULA",
-            "message": "No se encontró matrícula inmobiliaria en el estudio de títulos"
-        })
-        decision_log.append("Regla 1: Matrícula ausente → RECHAZADO")
-
-    # -------------------------------------------------
-    # Regla 2: Concepto jurídico
-    # -------------------------------------------------
-    concepto = estudio_dict.get("VIV_conceptoJuridico", "").lower()
-
-    if "desfavorable" in concepto:
-        status = "REJECTED"
-        reasons.append({
-            "code": "CONCEPTO_DESFAVORABLE",
-            "message": "El concepto jurídico del estudio de títulos es desfavorable"
-        })
-        decision_log.append("Regla 2: Concepto desfavorable → RECHAZADO")
-
-    elif "favorable" not in concepto and status != "REJECTED":
-        status = "CONDITIONAL"
-        reasons.append({
-            "code": "CONCEPTO_NO_CLARO",
-            "message": "El concepto jurídico no es claro o no se encontró"
-        })
-        decision_log.append("Regla 2: Concepto no claro → CONDICIONAL")
-
-    # -------------------------------------------------
-    # Regla 3: Gravámenes vigentes
-    # -------------------------------------------------
-    if settings.reject_if_encumbrances:
-        gravamenes = estudio_dict.get("VIV_gravamenes", "")
-        if gravamenes and "embargo" in gravamenes.lower() and "cancelado" not in gravamenes.lower():
-            status = "REJECTED"
-            reasons.append({
-                "code": "EMBARGO_VIGENTE",
-                "message": "Existe un embargo vigente sobre el inmueble"
-            })
-            decision_log.append("Regla 3: Embargo vigente detectado → RECHAZADO")
-
-    # -------------------------------------------------
-    # Regla 4: Edad fuera de rango (si existiera)
-    # -------------------------------------------------
-    edad_str = estudio_dict.get("VIV_edadSolicitante")
-    min_age = getattr(settings, "min_age", 18)      # valores por defecto si no están en settings
-    max_age = getattr(settings, "max_age", 75)
-
-    try:
-        if edad_str:
-            edad = int(edad_str)
-            if edad < min_age or edad > max_age:
-                status = "REJECTED"
-                reasons.append({
-                    "code": "AGE_LIMIT",
-                    "message": "Edad fuera de rango"
-                })
-                decision_log.append(
-                    f"Regla 4: Edad {edad} fuera de rango "
-                    f"({min_age}-{max_age}) → RECHAZADO"
-                )
-    except (ValueError, TypeError):
-        pass
-
-    # -------------------------------------------------
-    # Regla 5: Score insuficiente (si existiera)
-    # -------------------------------------------------
-    score_str = estudio_dict.get("VIV_creditScore")
-    min_score = getattr(settings, "min_credit_score", 600)
-
-    try:
-        if score_str:
-            score = int(score_str)
-            if score < min_score:
-                status = "REJECTED"
-                reasons.append({
-                    "code": "CREDIT_SCORE_LOW",
-                    "message": "Score insuficiente"
-                })
-                decision_log.append(
-                    f"Regla 5: Score {score} < mínimo "
-                    f"({min_score}) → RECHAZADO"
-                )
-    except (ValueError, TypeError):
-        pass
-
-    if status == "APPROVED":
-        decision_log.append("Todas las reglas se cumplieron → APROBADO")
-
-    return {
-        "status": status,
-        "reasons": reasons,
-        "decision_log": decision_log
-    }
+    return viability_engine.evaluate(field_dicts)
 
 
 def activity_sintetizar_resultados(resultados: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -234,7 +125,7 @@ def activity_sintetizar_resultados(resultados: List[Dict[str, Any]]) -> Dict[str
 
     Retorna un diccionario con las rutas de los archivos generados.
     """
-    logger.info(f"Sintetizando {len(resultados)} documentos")
+    logger.info("Sintetizando %s documentos", len(resultados))
 
     if not resultados:
         logger.warning("No hay resultados para sintetizar")
@@ -246,22 +137,24 @@ def activity_sintetizar_resultados(resultados: List[Dict[str, Any]]) -> Dict[str
         # Intentar extraer del nombre de archivo o usar un valor por defecto
         caso_id = "desconocido"
 
-    # Recolectar field_dicts por tipo
-    field_dicts = {}
-    panel_fields_por_tipo = {}
+    # Construir una fila compacta por resultado (una sola vez) y agrupar por tipo
+    filas = construir_filas(resultados)
+    filas_por_tipo = {}
 
-    for res in resultados:
-        tipo = res["tipo"]
-        datos = res["datos"]
-        panel = datos.get("PanelFields", [])
-        field_dicts[tipo] = panel_fields_to_dict(panel)
-        panel_fields_por_tipo[tipo] = panel  # guardamos los originales sin prefijo
+    for res, fila in zip(resultados, filas):
+        filas_por_tipo[res["tipo"]] = fila  # sin prefijo; el último resultado por tipo prevalece
 
     # Calcular confianza (global, basada en todos los documentos)
-    confianza = calcular_confianza(resultados)
+    confianza = calcular_confianza(resultados, filas)
 
     # Evaluar viabilidad (solo usando estudio_titulos)
-    decision = evaluar_viabilidad(resultados, field_dicts)
+    decision = evaluar_viabilidad(resultados, filas_por_tipo)
+
+    # Costos acumulados de los documentos del caso
+    costos_caso = sum_totals(
+        [(res["datos"].get("_procesamiento") or {}).get("costos") for res in resultados],
+        settings.cost_prices,
+    )
 
     # Fecha de síntesis
     fecha_sintesis = datetime.utcnow().isoformat() + "Z"
@@ -275,13 +168,12 @@ def activity_sintetizar_resultados(resultados: List[Dict[str, Any]]) -> Dict[str
     tipos_a_procesar = ["estudio_titulos", "minuta_cancelacion", "minuta_constitucion"]
 
     for tipo in tipos_a_procesar:
-        if tipo not in panel_fields_por_tipo:
-            logger.warning(f"No se encontraron datos para {tipo}, se omite")
+        if tipo not in filas_por_tipo:
+            logger.warning("No se encontraron datos para %s, se omite", tipo)
             continue
 
-        panel_original = panel_fields_por_tipo[tipo]
         # Agregar prefijo "3_" a cada InternalName
-        panel_con_prefijo = add_prefix_to_panel_fields(panel_original)
+        panel_con_prefijo = filas_por_tipo[tipo].to_panel_fields(prefix="3_")
 
         # Construir el objeto base
         master_obj = {
@@ -296,7 +188,8 @@ def activity_sintetizar_resultados(resultados: List[Dict[str, Any]]) -> Dict[str
                 "caso_id": caso_id,
                 "fecha_sintesis": fecha_sintesis,
                 "confianza": confianza,
-                "reasons": decision.get("reasons", [])
+                "reasons": decision.get("reasons", []),
+                "costos": costos_caso,
             }
 
         # Definir ruta en gold (y silver)
@@ -313,7 +206,7 @@ def activity_sintetizar_resultados(resultados: List[Dict[str, Any]]) -> Dict[str
             "silver": silver_path
         }
 
-        logger.info(f"Master JSON para {tipo} guardado en gold: {gold_path}")
+        logger.info("Master JSON para %s guardado en gold: %s", tipo, gold_path)
 
     return rutas_generadas
 
@@ -0,0 +1,385 @@
+"""
+Re-extracción (backfill) desde artefactos OCR guardados en Silver.
+
+Cuando cambia el prompt o el schema de un procesador, recorre los artefactos
+``.ocrb`` de cada tipo, descarta los documentos cuyo JSON ya tiene la versión
+de extracción actual y vuelve a extraer el resto en paralelo, sin llamar a
+Document Intelligence. El resultado se persiste con persistir_resultados
+sobre el mismo caso_id/process_id.
+
+El progreso se guarda en un checkpoint en Silver cada pocos documentos, así
+que una ejecución interrumpida se reanuda donde quedó. Los artefactos se
+listan una sola vez por ejecución (``<run_id>.artefactos.json`` junto al
+checkpoint) y cada lote avanza un cursor sobre esa lista, sin volver a
+recorrer el Data Lake. Los errores quedan en el checkpoint con su número de
+intentos: se reintentan al terminar la lista y, al llegar a
+BACKFILL_MAX_ATTEMPTS, se omiten (``--reintentar-errores`` los vuelve a
+habilitar).
+
+Uso:
+    python backfill.py --concurrency 8 --tipo EstudioTitulos
+"""
+
+import argparse
+import hashlib
+import logging
+import posixpath
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from config import get_settings
+from services.ocr_artifact import load_ocr_ranged, FILE_EXTENSION as OCR_EXTENSION
+from utils import json_codec
+from utils.cost_ledger import CostLedger
+
+import function_app
+
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_DIR = "conecta/vivienda/_backfill"
+
+# Estados por documento
+ESTADO_REEXTRAIDO = "reextraido"
+ESTADO_AL_DIA = "al_dia"
+ESTADO_ERROR = "error"
+
+
+@dataclass(frozen=True)
+class BackfillItem:
+    """Un artefacto OCR candidato a re-extracción."""
+    tipo_key: str
+    ocr_path: str
+    json_path: str
+    caso_id: str
+    process_id: str
+
+
+# =========================================================
+# Versiones y enumeración
+# =========================================================
+
+def versiones_actuales(tipos: Iterable[str]) -> Dict[str, str]:
+    """Versión de extracción vigente por tipo (hash de prompt + schema)."""
+    versiones = {}
+    for tipo_key in tipos:
+        processor_cls = function_app.BLOB_TIPO_MAP[tipo_key][1]
+        versiones[tipo_key] = processor_cls().extraction_version
+    return versiones
+
+
+def run_id_para(versiones: Dict[str, str]) -> str:
+    """Id de ejecución estable para un conjunto de versiones: relanzar reanuda."""
+    firma = ";".join(f"{k}={v}" for k, v in sorted(versiones.items()))
+    return hashlib.sha256(firma.encode("utf-8")).hexdigest()[:12]
+
+
+def _item(tipo_key: str, ocr_path: str) -> BackfillItem:
+    base = ocr_path[: -len(OCR_EXTENSION)]
+    return BackfillItem(
+        tipo_key=tipo_key,
+        ocr_path=ocr_path,
+        json_path=f"{base}.json",
+        caso_id=posixpath.basename(posixpath.dirname(ocr_path)),
+        process_id=posixpath.basename(base),
+    )
+
+
+def enumerar_artefactos(tipos: Iterable[str]) -> List[BackfillItem]:
+    """Lista los artefactos .ocrb de los tipos indicados."""
+    items = []
+    for tipo_key in tipos:
+        subpath = function_app.BLOB_TIPO_MAP[tipo_key][3]
+        paths = function_app.datalake.list_files(
+            container=function_app.settings.datalake_container_silver,
+            directory_path=subpath,
+            extension=OCR_EXTENSION,
+        )
+        items.extend(_item(tipo_key, ocr_path) for ocr_path in sorted(paths))
+    return items
+
+
+def artefactos_de_la_ejecucion(run_id: str, tipos: Iterable[str]) -> List[BackfillItem]:
+    """
+    Artefactos de una ejecución: se listan en el primer lote y se guardan
+    junto al checkpoint; los lotes siguientes leen esa lista. Los artefactos
+    creados después ya salen del blob trigger con la versión vigente.
+    """
+    container = function_app.settings.datalake_container_silver
+    path = f"{CHECKPOINT_DIR}/{run_id}.artefactos.json"
+    if function_app.datalake.file_exists(container, path):
+        data = json_codec.loads(function_app.datalake.read_file(container, path))
+        return [_item(tipo_key, ocr_path) for tipo_key, ocr_path in data["artefactos"]]
+    items = enumerar_artefactos(tipos)
+    function_app.datalake.write_json(
+        container=container,
+        file_path=path,
+        data={"run_id": run_id, "artefactos": [[i.tipo_key, i.ocr_path] for i in items]},
+    )
+    return items
+
+
+# =========================================================
+# Checkpoint
+# =========================================================
+
+class BackfillCheckpoint:
+    """Progreso de una ejecución, persistido como JSON en Silver."""
+
+    def __init__(self, run_id: str, versiones: Dict[str, str]):
+        self.run_id = run_id
+        self.path = f"{CHECKPOINT_DIR}/{run_id}.json"
+        self.versiones = versiones
+        self.completados: Dict[str, str] = {}
+        # ocr_path -> {"error": último mensaje, "intentos": n}
+        self.errores: Dict[str, Dict[str, Any]] = {}
+        # Posición en la lista de artefactos de la ejecución hasta la que ya se repartieron lotes
+        self.cursor = 0
+
+    @classmethod
+    def cargar(cls, run_id: str, versiones: Dict[str, str],
+               reintentar_errores: bool = False) -> "BackfillCheckpoint":
+        checkpoint = cls(run_id, versiones)
+        container = function_app.settings.datalake_container_silver
+        if function_app.datalake.file_exists(container, checkpoint.path):
+            data = json_codec.loads(function_app.datalake.read_file(container, checkpoint.path))
+            checkpoint.completados = data.get("completados", {})
+            checkpoint.cursor = data.get("cursor", 0)
+            # Checkpoints anteriores guardaban solo el mensaje
+            checkpoint.errores = {
+                path: e if isinstance(e, dict) else {"error": e, "intentos": 1}
+                for path, e in data.get("errores", {}).items()
+            }
+            if reintentar_errores:
+                # Quedan como errores (el cursor ya pasó por ellos) pero sin intentos
+                for error in checkpoint.errores.values():
+                    error["intentos"] = 0
+            logger.info(
+                "Reanudando backfill %s: %s documentos ya procesados, %s con error",
+                run_id, len(checkpoint.completados), len(checkpoint.errores),
+            )
+        return checkpoint
+
+    def intentos(self, item: BackfillItem) -> int:
+        return self.errores.get(item.ocr_path, {}).get("intentos", 0)
+
+    def registrar(self, item: BackfillItem, estado: str, error: Optional[str] = None) -> None:
+        if estado == ESTADO_ERROR:
+            self.errores[item.ocr_path] = {"error": error or "", "intentos": self.intentos(item) + 1}
+        else:
+            self.completados[item.ocr_path] = estado
+            self.errores.pop(item.ocr_path, None)
+
+    def guardar(self) -> None:
+        function_app.datalake.write_json(
+            container=function_app.settings.datalake_container_silver,
+            file_path=self.path,
+            data={
+                "run_id": self.run_id,
+                "versiones": self.versiones,
+                "actualizado": datetime.now().isoformat(),
+                "cursor": self.cursor,
+                "completados": self.completados,
+                "errores": self.errores,
+            },
+        )
+
+
+# =========================================================
+# Re-extracción
+# =========================================================
+
+_local = threading.local()
+
+
+def _processor_para(tipo_key: str):
+    """Un procesador por hilo y tipo (el contador de tokens es por instancia)."""
+    processors = getattr(_local, "processors", None)
+    if processors is None:
+        processors = _local.processors = {}
+    if tipo_key not in processors:
+        processors[tipo_key] = function_app.BLOB_TIPO_MAP[tipo_key][1]()
+    return processors[tipo_key]
+
+
+def _leer_metadata(json_path: str) -> Optional[dict]:
+    container = function_app.settings.datalake_container_silver
+    if not function_app.datalake.file_exists(container, json_path):
+        return None
+    return json_codec.loads(function_app.datalake.read_file(container, json_path)).get("metadata", {})
+
+
+def _leer_ocr(item: BackfillItem, detail: str):
+    """Artefacto OCR con el nivel de detalle del procesador (párrafos si selecciona páginas)."""
+    container = function_app.settings.datalake_container_silver
+    return load_ocr_ranged(
+        lambda offset, length: function_app.datalake.read_range(container, item.ocr_path, offset, length),
+        detail,
+    )
+
+
+def reextraer(item: BackfillItem, version: str) -> str:
+    """
+    Re-extrae un documento si su JSON no está en la versión actual.
+
+    Returns:
+        str: ESTADO_AL_DIA o ESTADO_REEXTRAIDO.
+    """
+    metadata = _leer_metadata(item.json_path) or {}
+    if metadata.get("version_extraccion") == version:
+        return ESTADO_AL_DIA
+
+    tipo_corto, _, _, subpath = function_app.BLOB_TIPO_MAP[item.tipo_key]
+    processor = _processor_para(item.tipo_key)
+    ocr_result = _leer_ocr(item, processor.ocr_detail)
+
+    archivo_origen = metadata.get("archivo_origen") or item.ocr_path
+    extracted_data = processor.process_ocr_result(ocr_result, archivo_origen)
+
+    caso_id = metadata.get("caso_id") or item.caso_id
+    costos = CostLedger.from_dict(extracted_data.get("_procesamiento", {}).get("costos"))
+    function_app.persistir_resultados(
+        extracted_data=extracted_data,
+        caso_id=caso_id,
+        process_id=item.process_id,
+        tipo_documento=tipo_corto,
+        archivo_origen=archivo_origen,
+        processor_name=processor.__class__.__name__,
+        subpath=subpath,
+        version_extraccion=version,
+        origen="backfill",
+        costos=costos,
+    )
+    function_app.registrar_costos(costos, caso_id, tipo_corto, process_id=item.process_id)
+    return ESTADO_REEXTRAIDO
+
+
+def run_backfill(
+    tipos: Optional[List[str]] = None,
+    concurrency: Optional[int] = None,
+    max_documents: Optional[int] = None,
+    run_id: Optional[str] = None,
+    reintentar_errores: bool = False,
+) -> dict:
+    """
+    Ejecuta (o reanuda) la re-extracción.
+
+    Cada llamada toma el lote siguiente de la lista de artefactos de la
+    ejecución (ver artefactos_de_la_ejecucion) a partir del cursor del
+    checkpoint. Los documentos con error se reintentan al terminar la lista,
+    y con BACKFILL_MAX_ATTEMPTS errores dejan de considerarse pendientes
+    (quedan como ``agotados``).
+
+    Args:
+        tipos: Claves de BLOB_TIPO_MAP a procesar (por defecto, todas).
+        concurrency: Llamadas simultáneas al LLM (BACKFILL_CONCURRENCY).
+        max_documents: Máximo de documentos a intentar en esta llamada;
+            permite trocear el backfill en varias actividades.
+        run_id: Id del checkpoint; por defecto se deriva de las versiones.
+        reintentar_errores: Olvida los intentos fallidos del checkpoint.
+
+    Returns:
+        dict: Resumen con conteos por estado y documentos pendientes.
+    """
+    settings = get_settings()
+    tipos = tipos or list(function_app.BLOB_TIPO_MAP)
+    concurrency = concurrency or settings.backfill_concurrency
+
+    versiones = versiones_actuales(tipos)
+    run_id = run_id or run_id_para(versiones)
+    checkpoint = BackfillCheckpoint.cargar(run_id, versiones, reintentar_errores)
+
+    max_intentos = settings.backfill_max_attempts
+    items = artefactos_de_la_ejecucion(run_id, tipos)
+    sin_completar = [i for i in items if i.ocr_path not in checkpoint.completados]
+    pendientes = [i for i in sin_completar if checkpoint.intentos(i) < max_intentos]
+    agotados = len(sin_completar) - len(pendientes)
+
+    # Primero los que siguen al cursor; recorrida la lista, los reintentos
+    # (un error no vuelve a encabezar cada lote)
+    limite = max_documents or len(items)
+    lote = []
+    cursor = checkpoint.cursor
+    while cursor < len(items) and len(lote) < limite:
+        item = items[cursor]
+        cursor += 1
+        if item.ocr_path not in checkpoint.completados and checkpoint.intentos(item) < max_intentos:
+            lote.append(item)
+    if cursor == len(items) and len(lote) < limite:
+        en_lote = {i.ocr_path for i in lote}
+        reintentos = sorted((i for i in pendientes if i.ocr_path not in en_lote), key=checkpoint.intentos)
+        lote.extend(reintentos[:limite - len(lote)])
+    logger.info(
+        "Backfill %s: %s pendientes, procesando %s con concurrencia %s",
+        run_id, len(pendientes), len(lote), concurrency,
+    )
+
+    conteos = {ESTADO_REEXTRAIDO: 0, ESTADO_AL_DIA: 0, ESTADO_ERROR: 0}
+    sin_guardar = 0
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {executor.submit(reextraer, item, versiones[item.tipo_key]): item for item in lote}
+        for future in as_completed(futures):
+            item = futures[future]
+            try:
+                estado = future.result()
+                checkpoint.registrar(item, estado)
+            except Exception as e:
+                estado = ESTADO_ERROR
+                checkpoint.registrar(item, estado, str(e))
+                logger.error("Error re-extrayendo %s (intento %s): %s",
+                             item.ocr_path, checkpoint.intentos(item), e)
+                if checkpoint.intentos(item) >= max_intentos:
+                    agotados += 1
+            conteos[estado] += 1
+            sin_guardar += 1
+            if sin_guardar >= settings.backfill_checkpoint_every:
+                checkpoint.guardar()
+                sin_guardar = 0
+
+    # El cursor avanza solo con el lote completo: si se interrumpe, los
+    # documentos sin terminar se vuelven a repartir
+    checkpoint.cursor = cursor
+    checkpoint.guardar()
+
+    resumen = {
+        "run_id": run_id,
+        "versiones": versiones,
+        "procesados": len(lote),
+        "reextraidos": conteos[ESTADO_REEXTRAIDO],
+        "al_dia": conteos[ESTADO_AL_DIA],
+        "errores": conteos[ESTADO_ERROR],
+        "agotados": agotados,
+        "pendientes": len(sin_completar) - conteos[ESTADO_REEXTRAIDO] - conteos[ESTADO_AL_DIA] - agotados,
+    }
+    logger.info("Backfill %s terminado: %s", run_id, resumen)
+    return resumen
+
+
+def main(argv: Optional[List[str]] = None) -> dict:
+    parser = argparse.ArgumentParser(description="Re-extracción desde artefactos OCR en Silver")
+    parser.add_argument("--tipo", action="append", choices=sorted(function_app.BLOB_TIPO_MAP),
+                        help="Tipo a procesar (repetible; por defecto todos)")
+    parser.add_argument("--concurrency", type=int, default=None,
+                        help="Llamadas simultáneas al LLM (por defecto BACKFILL_CONCURRENCY)")
+    parser.add_argument("--max-documents", type=int, default=None)
+    parser.add_argument("--run-id", default=None, help="Reanudar un checkpoint concreto")
+    parser.add_argument("--reintentar-errores", action="store_true",
+                        help="Vuelve a intentar los documentos que agotaron BACKFILL_MAX_ATTEMPTS")
+    args = parser.parse_args(argv)
+
+    resumen = run_backfill(
+        tipos=args.tipo,
+        concurrency=args.concurrency,
+        max_documents=args.max_documents,
+        run_id=args.run_id,
+        reintentar_errores=args.reintentar_errores,
+    )
+    print(json_codec.dumps_str(resumen, indent=True))
+    return resumen
+
+
+if __name__ == "__main__":
+    main()
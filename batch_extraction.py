@@ -0,0 +1,343 @@
+"""
+Extracción batch (diferida) desde artefactos OCR guardados en Silver.
+
+Para backlogs nocturnos, en lugar de consumir la cuota síncrona (TPM), las
+solicitudes de extracción se escriben en archivos JSONL con el formato del
+endpoint batch de Azure OpenAI (``/chat/completions``), se procesan de
+forma asíncrona y luego se ingieren:
+
+1. ``preparar``: por cada artefacto ``.ocrb`` desactualizado, una línea por
+   fragmento con ``custom_id`` estable (``<tipo>:<caso_id>:<process_id>:<n>``)
+   en ``entrada-NNNN.jsonl``, más un manifiesto con los documentos.
+2. Los archivos se envían al endpoint batch y las salidas se dejan como
+   ``salida-*.jsonl`` en la misma carpeta. ``ejecutar-local`` las genera
+   llamando al despliegue síncrono, para pruebas y reproducción local.
+3. ``ingerir``: agrupa las respuestas por documento, las valida contra el
+   schema (con la reparación local de utils/json_repair.py) y persiste con
+   persistir_resultados. Los documentos con respuestas incompletas quedan
+   como error y los recoge el siguiente backfill.
+
+Uso:
+    python batch_extraction.py preparar --tipo EstudioTitulos
+    python batch_extraction.py ejecutar-local --run-id <run_id>
+    python batch_extraction.py ingerir --run-id <run_id>
+"""
+
+import argparse
+import logging
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from backfill import (
+    BackfillItem, _leer_metadata, _leer_ocr, _processor_para, enumerar_artefactos, run_id_para,
+    versiones_actuales,
+)
+from config import get_settings
+from utils import json_codec
+from utils.cost_ledger import CostLedger
+
+import function_app
+
+
+logger = logging.getLogger(__name__)
+
+BATCH_DIR = "conecta/vivienda/_batch"
+BATCH_URL = "/chat/completions"
+ENTRADA_PREFIX = "entrada-"
+SALIDA_PREFIX = "salida-"
+
+ESTADO_INGERIDO = "ingerido"
+
+
+def documento_id(item: BackfillItem) -> str:
+    return f"{item.tipo_key}:{item.caso_id}:{item.process_id}"
+
+
+def custom_id(item: BackfillItem, fragmento: int) -> str:
+    return f"{documento_id(item)}:{fragmento}"
+
+
+def documento_de(custom_id: str) -> tuple:
+    """(clave del documento, número de fragmento) de un custom_id."""
+    documento, _, fragmento = custom_id.rpartition(":")
+    return documento, int(fragmento)
+
+
+def _run_dir(run_id: str) -> str:
+    return f"{BATCH_DIR}/{run_id}"
+
+
+def _leer_jsonl(path: str) -> List[dict]:
+    container = function_app.settings.datalake_container_silver
+    content = function_app.datalake.read_file(container, path)
+    return [json_codec.loads(line) for line in content.splitlines() if line.strip()]
+
+
+def _escribir_jsonl(path: str, lines: Iterable[dict]) -> None:
+    content = b"".join(json_codec.dumps(line) + b"\n" for line in lines)
+    function_app.datalake.write_bytes(function_app.settings.datalake_container_silver, path, content)
+
+
+def _archivos(run_id: str, prefix: str) -> List[str]:
+    paths = function_app.datalake.list_files(
+        container=function_app.settings.datalake_container_silver,
+        directory_path=_run_dir(run_id),
+        extension=".jsonl",
+    )
+    return sorted(p for p in paths if posixpath.basename(p).startswith(prefix))
+
+
+# =========================================================
+# Preparación
+# =========================================================
+
+def preparar_lote(
+    tipos: Optional[List[str]] = None,
+    max_documents: Optional[int] = None,
+    run_id: Optional[str] = None,
+) -> dict:
+    """
+    Escribe las solicitudes batch de los documentos desactualizados.
+
+    Returns:
+        dict: run_id, archivos de entrada y conteos de documentos y solicitudes.
+    """
+    settings = get_settings()
+    tipos = tipos or list(function_app.BLOB_TIPO_MAP)
+    versiones = versiones_actuales(tipos)
+    run_id = run_id or f"batch-{run_id_para(versiones)}-{datetime.now():%Y%m%d%H%M}"
+
+    documentos: Dict[str, dict] = {}
+    lineas: List[dict] = []
+    al_dia = 0
+    for item in enumerar_artefactos(tipos):
+        if max_documents and len(documentos) >= max_documents:
+            break
+        metadata = _leer_metadata(item.json_path) or {}
+        if metadata.get("version_extraccion") == versiones[item.tipo_key]:
+            al_dia += 1
+            continue
+        processor = _processor_para(item.tipo_key)
+        bodies = processor.batch_requests(_leer_ocr(item, processor.ocr_detail))
+        documentos[documento_id(item)] = {
+            "tipo_key": item.tipo_key,
+            "ocr_path": item.ocr_path,
+            "json_path": item.json_path,
+            "caso_id": metadata.get("caso_id") or item.caso_id,
+            "process_id": item.process_id,
+            "archivo_origen": metadata.get("archivo_origen") or item.ocr_path,
+            "fragmentos": len(bodies),
+        }
+        lineas.extend(
+            {"custom_id": custom_id(item, i), "method": "POST", "url": BATCH_URL, "body": body}
+            for i, body in enumerate(bodies)
+        )
+
+    por_archivo = max(1, settings.batch_max_requests_per_file)
+    archivos = []
+    for n, start in enumerate(range(0, len(lineas), por_archivo), start=1):
+        path = f"{_run_dir(run_id)}/{ENTRADA_PREFIX}{n:04d}.jsonl"
+        _escribir_jsonl(path, lineas[start:start + por_archivo])
+        archivos.append(path)
+
+    function_app.datalake.write_json(
+        container=settings.datalake_container_silver,
+        file_path=f"{_run_dir(run_id)}/manifiesto.json",
+        data={
+            "run_id": run_id,
+            "versiones": versiones,
+            "creado": datetime.now().isoformat(),
+            "archivos": archivos,
+            "documentos": documentos,
+        },
+    )
+    resumen = {
+        "run_id": run_id,
+        "archivos": archivos,
+        "documentos": len(documentos),
+        "solicitudes": len(lineas),
+        "al_dia": al_dia,
+    }
+    logger.info("Batch %s preparado: %s", run_id, resumen)
+    return resumen
+
+
+# =========================================================
+# Ejecución local (sustituto del endpoint batch)
+# =========================================================
+
+def _a_dict(obj: Any) -> Any:
+    """Respuesta del SDK como JSON (lo que devuelve el endpoint batch en response.body)."""
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    if isinstance(obj, (list, tuple)):
+        return [_a_dict(v) for v in obj]
+    if hasattr(obj, "__dict__"):
+        return {k: _a_dict(v) for k, v in vars(obj).items()}
+    return obj
+
+
+def ejecutar_local(run_id: str, concurrency: Optional[int] = None) -> dict:
+    """
+    Procesa los archivos de entrada con el despliegue síncrono y escribe las
+    salidas en el formato del endpoint batch (salida-NNNN.jsonl).
+    """
+    from services import AzureOpenAIService
+
+    settings = get_settings()
+    client = AzureOpenAIService()._client
+    concurrency = concurrency or settings.batch_local_concurrency
+
+    def ejecutar(linea: dict) -> dict:
+        try:
+            response = client.chat.completions.create(**linea["body"])
+            return {
+                "custom_id": linea["custom_id"],
+                "response": {"status_code": 200, "body": _a_dict(response)},
+                "error": None,
+            }
+        except Exception as e:
+            logger.error("Error en solicitud %s: %s", linea["custom_id"], e)
+            return {"custom_id": linea["custom_id"], "response": None, "error": {"message": str(e)}}
+
+    solicitudes = errores = 0
+    for entrada in _archivos(run_id, ENTRADA_PREFIX):
+        lineas = _leer_jsonl(entrada)
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            salidas = list(executor.map(ejecutar, lineas))
+        salida = entrada.replace(f"/{ENTRADA_PREFIX}", f"/{SALIDA_PREFIX}")
+        _escribir_jsonl(salida, salidas)
+        solicitudes += len(salidas)
+        errores += sum(1 for s in salidas if s["error"])
+
+    resumen = {"run_id": run_id, "solicitudes": solicitudes, "errores": errores}
+    logger.info("Batch %s ejecutado localmente: %s", run_id, resumen)
+    return resumen
+
+
+# =========================================================
+# Ingesta
+# =========================================================
+
+def _respuestas_por_documento(run_id: str) -> Dict[str, Dict[int, Optional[dict]]]:
+    """Cuerpos de respuesta por documento y fragmento (None si la solicitud falló)."""
+    respuestas: Dict[str, Dict[int, Optional[dict]]] = {}
+    for salida in _archivos(run_id, SALIDA_PREFIX):
+        for linea in _leer_jsonl(salida):
+            documento, fragmento = documento_de(linea["custom_id"])
+            response = linea.get("response") or {}
+            ok = not linea.get("error") and response.get("status_code") == 200
+            respuestas.setdefault(documento, {})[fragmento] = response.get("body") if ok else None
+    return respuestas
+
+
+def ingerir_documento(documento: dict, bodies: List[dict], version: str) -> None:
+    """Valida las respuestas de un documento y persiste el resultado."""
+    item = BackfillItem(
+        tipo_key=documento["tipo_key"],
+        ocr_path=documento["ocr_path"],
+        json_path=documento["json_path"],
+        caso_id=documento["caso_id"],
+        process_id=documento["process_id"],
+    )
+    tipo_corto, _, _, subpath = function_app.BLOB_TIPO_MAP[item.tipo_key]
+    processor = _processor_para(item.tipo_key)
+    extracted_data = processor.process_ocr_result(
+        _leer_ocr(item, processor.ocr_detail), documento["archivo_origen"], batch_responses=bodies
+    )
+
+    costos = CostLedger.from_dict(extracted_data.get("_procesamiento", {}).get("costos"))
+    function_app.persistir_resultados(
+        extracted_data=extracted_data,
+        caso_id=item.caso_id,
+        process_id=item.process_id,
+        tipo_documento=tipo_corto,
+        archivo_origen=documento["archivo_origen"],
+        processor_name=processor.__class__.__name__,
+        subpath=subpath,
+        version_extraccion=version,
+        origen="batch",
+        costos=costos,
+    )
+    function_app.registrar_costos(costos, item.caso_id, tipo_corto, process_id=item.process_id)
+
+
+def ingerir_lote(run_id: str) -> dict:
+    """
+    Ingiere las salidas de un lote. Un documento se ingiere solo si todos
+    sus fragmentos tienen respuesta; el estado queda en estado.json y volver
+    a ingerir omite los documentos ya ingeridos.
+    """
+    container = function_app.settings.datalake_container_silver
+    manifiesto = json_codec.loads(
+        function_app.datalake.read_file(container, f"{_run_dir(run_id)}/manifiesto.json")
+    )
+    estado_path = f"{_run_dir(run_id)}/estado.json"
+    estado = {"ingeridos": {}, "errores": {}}
+    if function_app.datalake.file_exists(container, estado_path):
+        estado = json_codec.loads(function_app.datalake.read_file(container, estado_path))
+        estado["errores"] = {}
+
+    respuestas = _respuestas_por_documento(run_id)
+    for clave, documento in manifiesto["documentos"].items():
+        if clave in estado["ingeridos"]:
+            continue
+        recibidas = respuestas.get(clave, {})
+        bodies = [recibidas.get(i) for i in range(documento["fragmentos"])]
+        if any(body is None for body in bodies):
+            faltan = sum(1 for body in bodies if body is None)
+            estado["errores"][clave] = f"{faltan}/{documento['fragmentos']} fragmentos sin respuesta"
+            continue
+        try:
+            ingerir_documento(documento, bodies, manifiesto["versiones"][documento["tipo_key"]])
+            estado["ingeridos"][clave] = ESTADO_INGERIDO
+        except Exception as e:
+            logger.error("Error ingiriendo %s: %s", clave, e)
+            estado["errores"][clave] = str(e)
+
+    estado["actualizado"] = datetime.now().isoformat()
+    function_app.datalake.write_json(container=container, file_path=estado_path, data=estado)
+
+    resumen = {
+        "run_id": run_id,
+        "documentos": len(manifiesto["documentos"]),
+        "ingeridos": len(estado["ingeridos"]),
+        "errores": len(estado["errores"]),
+    }
+    logger.info("Batch %s ingerido: %s", run_id, resumen)
+    return resumen
+
+
+def main(argv: Optional[List[str]] = None) -> dict:
+    parser = argparse.ArgumentParser(description="Extracción batch desde artefactos OCR en Silver")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    preparar = sub.add_parser("preparar", help="Escribe los archivos JSONL de solicitudes")
+    preparar.add_argument("--tipo", action="append", choices=sorted(function_app.BLOB_TIPO_MAP),
+                          help="Tipo a procesar (repetible; por defecto todos)")
+    preparar.add_argument("--max-documents", type=int, default=None)
+    preparar.add_argument("--run-id", default=None)
+
+    local = sub.add_parser("ejecutar-local", help="Genera las salidas con el despliegue síncrono")
+    local.add_argument("--run-id", required=True)
+    local.add_argument("--concurrency", type=int, default=None,
+                       help="Llamadas simultáneas (por defecto BATCH_LOCAL_CONCURRENCY)")
+
+    ingerir = sub.add_parser("ingerir", help="Valida y persiste las salidas del lote")
+    ingerir.add_argument("--run-id", required=True)
+
+    args = parser.parse_args(argv)
+    if args.comando == "preparar":
+        resumen = preparar_lote(tipos=args.tipo, max_documents=args.max_documents, run_id=args.run_id)
+    elif args.comando == "ejecutar-local":
+        resumen = ejecutar_local(args.run_id, concurrency=args.concurrency)
+    else:
+        resumen = ingerir_lote(args.run_id)
+    print(json_codec.dumps_str(resumen, indent=True))
+    return resumen
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+"""
+Microbenchmarks del pipeline. Se ejecutan como módulos desde la raíz del repo:
+
+    python -m benchmarks.bench_json_cleaner
+"""
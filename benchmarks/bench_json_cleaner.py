@@ -0,0 +1,137 @@
+"""
+Microbenchmark de JsonCleaner.clean_dict frente a la implementación recursiva
+anterior (patrones sin compilar y re.sub por cada cadena).
+
+    python -m benchmarks.bench_json_cleaner [--repeat N]
+"""
+
+import argparse
+import re
+import timeit
+
+from utils.json_cleaner import JsonCleaner
+
+
+# =========================================================
+# Implementación anterior (referencia)
+# =========================================================
+
+def _legacy_clean_string(value):
+    if not value:
+        return None
+    cleaned = re.sub(r'\s+', ' ', str(value))
+    cleaned = cleaned.strip()
+    return cleaned if cleaned else None
+
+
+def _legacy_clean_dict(data, deep=True):
+    cleaned = {}
+    for key, value in data.items():
+        if value is None:
+            cleaned[key] = None
+        elif isinstance(value, str):
+            cleaned[key] = _legacy_clean_string(value)
+        elif isinstance(value, dict) and deep:
+            cleaned[key] = _legacy_clean_dict(value, deep=True)
+        elif isinstance(value, list) and deep:
+            cleaned[key] = _legacy_clean_list(value, deep=True)
+        else:
+            cleaned[key] = value
+    return cleaned
+
+
+def _legacy_clean_list(data, deep=True):
+    cleaned = []
+    for item in data:
+        if item is None:
+            continue
+        elif isinstance(item, str):
+            clean_item = _legacy_clean_string(item)
+            if clean_item:
+                cleaned.append(clean_item)
+        elif isinstance(item, dict) and deep:
+            cleaned.append(_legacy_clean_dict(item, deep=True))
+        elif isinstance(item, list) and deep:
+            cleaned.append(_legacy_clean_list(item, deep=True))
+        else:
+            cleaned.append(item)
+    return cleaned
+
+
+# =========================================================
+# Datos sintéticos
+# =========================================================
+
+_ANOTACION = (
+    "ANOTACION: Nro {n} Fecha: 12-03-2015 Radicacion: 2015-{n}  "
+    "ESPECIFICACION: HIPOTECA ABIERTA SIN LIMITE DE CUANTIA\n"
+    "DE: PEREZ GOMEZ JUAN CC 12345678  A: BANCO EJEMPLO S.A. NIT 890.903.938-8 "
+)
+
+
+def build_payload(anotaciones: int = 400, dirty: bool = True) -> dict:
+    """Extracción de estudio de títulos con textos largos (gravámenes, documentos)."""
+    largo = "".join(_ANOTACION.format(n=i) for i in range(anotaciones))
+    if not dirty:
+        largo = " ".join(largo.split())
+    campos = [
+        ("VIV_PrestamoDireccionMatricula", "050C-12345678"),
+        ("VIV_fechaExpedicionMatricula", "15/03/2023"),
+        ("VIV_PrestamoDireccion", "CALLE 10 # 43A - 25 APTO 501"),
+        ("VIV_Compradores", "JUAN PÉREZ; MARÍA GÓMEZ"),
+        ("VIV_gravamenes", largo),
+        ("VIV_documentosRevisados", largo),
+        ("VIV_tenencia", "  Propietario inscrito  "),
+    ]
+    return {
+        "PanelFields": [
+            {"InternalName": n, "Type": "Text", "TextValue": v, "NumberValue": None}
+            for n, v in campos
+        ] + [{"InternalName": "VIV_avaluo_comercial", "Type": "Number",
+              "TextValue": None, "NumberValue": 350000000.0}],
+    }
+
+
+def build_deep(depth: int = 5000) -> dict:
+    """Estructura anidada más profunda que el límite de recursión por defecto."""
+    root = {"v": "  x  "}
+    node = root
+    for _ in range(depth):
+        node["child"] = {"v": "a  b"}
+        node = node["child"]
+    return root
+
+
+def _bench(label: str, fn, payload, repeat: int) -> float:
+    best = min(timeit.repeat(lambda: fn(payload), number=repeat, repeat=5)) / repeat
+    print(f"  {label:<28} {best * 1e3:9.3f} ms/op")
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    for nombre, payload in (
+        ("payload con espacios", build_payload(dirty=True)),
+        ("payload ya limpio", build_payload(dirty=False)),
+    ):
+        assert JsonCleaner.clean_dict(payload) == _legacy_clean_dict(payload)
+        print(f"{nombre}:")
+        legacy = _bench("recursivo (anterior)", _legacy_clean_dict, payload, args.repeat)
+        actual = _bench("pila explícita (actual)", JsonCleaner.clean_dict, payload, args.repeat)
+        print(f"  speedup: {legacy / actual:.2f}x")
+
+    profundo = build_deep()
+    try:
+        _legacy_clean_dict(profundo)
+        print("anidamiento profundo: implementación anterior OK")
+    except RecursionError:
+        print("anidamiento profundo: implementación anterior -> RecursionError")
+    JsonCleaner.clean_dict(profundo)
+    print("anidamiento profundo: implementación actual OK")
+
+
+if __name__ == "__main__":
+    main()
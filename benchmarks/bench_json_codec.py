@@ -0,0 +1,94 @@
+"""
+Benchmark del codec JSON en cada punto de uso, por backend disponible:
+
+- DataLakeService.write_json (resultado de silver, con y sin indentación)
+- activity_leer_resultados_intermedios (lectura de silver desde bytes)
+- AzureOpenAIService._extract_single (respuesta del modelo como str)
+- construcción del prompt (schema JSON embebido como texto)
+
+    python -m benchmarks.bench_json_codec [--repeat N]
+"""
+
+import argparse
+import timeit
+
+from utils import json_codec
+from benchmarks.bench_json_cleaner import build_payload
+
+
+# Forma de EstudioTitulosPlano.model_json_schema()
+SCHEMA = {
+    "$defs": {
+        "PanelField": {
+            "properties": {
+                "InternalName": {"title": "Internalname", "type": "string"},
+                "Type": {"title": "Type", "type": "string"},
+                "TextValue": {"anyOf": [{"type": "string"}, {"type": "null"}],
+                              "default": None, "title": "Textvalue"},
+                "NumberValue": {"anyOf": [{"type": "number"}, {"type": "integer"}, {"type": "null"}],
+                                "default": None, "title": "Numbervalue"},
+            },
+            "required": ["InternalName", "Type"],
+            "title": "PanelField",
+            "type": "object",
+        }
+    },
+    "properties": {
+        "PanelFields": {"items": {"$ref": "#/$defs/PanelField"}, "title": "Panelfields", "type": "array"}
+    },
+    "required": ["PanelFields"],
+    "title": "EstudioTitulosPlano",
+    "type": "object",
+}
+
+
+def _silver_document() -> dict:
+    return {
+        "metadata": {
+            "fecha_procesamiento": "2026-01-01T10:00:00",
+            "proceso_id": "VIV-514.2_1901-0000",
+            "caso_id": "caso-123",
+            "tipo_documento": "estudio_titulos",
+            "archivo_origen": "bronze/conecta/vivienda/1/estudio_de_titulos.pdf",
+        },
+        "datos_extraidos": build_payload(anotaciones=150, dirty=False),
+    }
+
+
+def _time(fn, repeat: int) -> float:
+    return min(timeit.repeat(fn, number=repeat, repeat=5)) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    documento = _silver_document()
+    silver_bytes = json_codec.get_codec().dumps(documento, indent=True)
+    respuesta_llm = json_codec.dumps_str({"PanelFields": documento["datos_extraidos"]["PanelFields"]})
+
+    casos = [
+        ("write_json (indent)", lambda c: c.dumps(documento, indent=True)),
+        ("write_json (compacto)", lambda c: c.dumps(documento)),
+        ("leer_resultados (bytes)", lambda c: c.loads(silver_bytes)),
+        ("_extract_single (str)", lambda c: c.loads(respuesta_llm)),
+        ("prompt schema (str)", lambda c: c.dumps_str(SCHEMA, indent=True)),
+    ]
+
+    backends = json_codec.available_backends()
+    print(f"{'punto de uso':<26}" + "".join(f"{b:>14}" for b in backends) + "   speedup")
+    for nombre, fn in casos:
+        tiempos = []
+        for backend in backends:
+            codec = json_codec.set_backend(backend)
+            tiempos.append(_time(lambda: fn(codec), args.repeat))
+        fila = "".join(f"{t * 1e6:11.1f} us" for t in tiempos)
+        speedup = tiempos[backends.index("stdlib")] / min(tiempos)
+        print(f"{nombre:<26}{fila}   {speedup:5.2f}x")
+
+    json_codec.set_backend("auto")
+
+
+if __name__ == "__main__":
+    main()
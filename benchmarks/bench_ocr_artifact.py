@@ -0,0 +1,69 @@
+"""
+Benchmark de persistencia de artefactos OCR: contenedor binario (.ocrb)
+frente a JSON del formato anterior (to_dict), en tamaño y tiempo de carga.
+
+    python -m benchmarks.bench_ocr_artifact [--pages N]
+"""
+
+import argparse
+import os
+import tempfile
+import timeit
+
+from utils import json_codec
+from services.ocr_result import OcrResult
+from services.ocr_artifact import dump_ocr, load_ocr, load_ocr_file, read_ocr_text
+from benchmarks.ocr_fixtures import build_analyze_result
+
+
+def _time(fn, number: int = 5) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=3)) / number
+
+
+def _touch_layout(result) -> int:
+    return sum(len(p.lines) for p in result.pages) + len(result.paragraphs) + len(result.tables)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=100)
+    args = parser.parse_args()
+
+    ocr = OcrResult.from_analyze_result(build_analyze_result(pages=args.pages))
+    legacy = ocr.to_dict()
+
+    json_indent = json_codec.dumps(legacy, indent=True)
+    json_compact = json_codec.dumps(legacy)
+    binario = dump_ocr(ocr)
+
+    print(f"{args.pages} páginas, backend JSON: {json_codec.get_codec().name}")
+    print("tamaño:")
+    print(f"  JSON indentado   {len(json_indent) / 1024:10.1f} KiB")
+    print(f"  JSON compacto    {len(json_compact) / 1024:10.1f} KiB")
+    print(f"  binario .ocrb    {len(binario) / 1024:10.1f} KiB "
+          f"({len(json_compact) / len(binario):.1f}x menor que JSON compacto)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, "doc.ocrb")
+        with open(ruta, "wb") as handle:
+            handle.write(binario)
+
+        print("carga solo texto:")
+        t_json = _time(lambda: json_codec.loads(json_compact)["content"])
+        t_bin = _time(lambda: read_ocr_text(binario))
+        t_mmap = _time(lambda: read_ocr_text(ruta))
+        print(f"  JSON             {t_json * 1e3:10.3f} ms")
+        print(f"  binario (bytes)  {t_bin * 1e3:10.3f} ms ({t_json / t_bin:.0f}x)")
+        print(f"  binario (mmap)   {t_mmap * 1e3:10.3f} ms ({t_json / t_mmap:.0f}x)")
+
+        print("carga layout completo (páginas, líneas, párrafos, tablas):")
+        t_json = _time(lambda: len(json_codec.loads(json_compact)["pages"]))
+        t_bin = _time(lambda: _touch_layout(load_ocr(binario)))
+        t_mmap = _time(lambda: _touch_layout(load_ocr_file(ruta)))
+        print(f"  JSON             {t_json * 1e3:10.3f} ms")
+        print(f"  binario (bytes)  {t_bin * 1e3:10.3f} ms")
+        print(f"  binario (mmap)   {t_mmap * 1e3:10.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
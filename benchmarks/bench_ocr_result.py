@@ -0,0 +1,76 @@
+"""
+Benchmark de la materialización del resultado de OCR: conversión eager
+anterior (dict por línea, dict por punto de polígono) frente a OcrResult
+perezoso, para un documento escaneado de 100 páginas.
+
+    python -m benchmarks.bench_ocr_result [--pages N]
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from services.ocr_result import OcrResult, DETAIL_CONTENT, DETAIL_PARAGRAPHS, DETAIL_LAYOUT
+from benchmarks.ocr_fixtures import build_analyze_result
+
+
+def _legacy_process(result) -> dict:
+    extracted = {"content": result.content, "pages": [], "tables": [], "paragraphs": []}
+    for page in result.pages or []:
+        page_data = {"page_number": page.page_number, "width": page.width,
+                     "height": page.height, "lines": []}
+        for line in page.lines or []:
+            page_data["lines"].append({
+                "content": line.content,
+                "polygon": [{"x": p.x, "y": p.y} for p in line.polygon] if line.polygon else [],
+            })
+        extracted["pages"].append(page_data)
+    for table in result.tables or []:
+        table_data = {"row_count": table.row_count, "column_count": table.column_count, "cells": []}
+        for cell in table.cells:
+            table_data["cells"].append({
+                "row_index": cell.row_index, "column_index": cell.column_index,
+                "content": cell.content, "is_header": cell.kind == "columnHeader",
+            })
+        extracted["tables"].append(table_data)
+    for paragraph in result.paragraphs or []:
+        extracted["paragraphs"].append({"content": paragraph.content, "role": paragraph.role})
+    return extracted
+
+
+def _measure(label: str, fn) -> None:
+    tracemalloc.start()
+    start = time.perf_counter()
+    keep = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del keep
+    print(f"  {label:<38} {elapsed * 1e3:9.2f} ms   pico {peak / 1024:9.1f} KiB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=100)
+    args = parser.parse_args()
+
+    result = build_analyze_result(pages=args.pages)
+    print(f"{args.pages} páginas:")
+
+    _measure("eager anterior (uso: content + pages)",
+             lambda: (lambda d: (d["content"], len(d["pages"])))(_legacy_process(result)))
+    _measure("OcrResult content",
+             lambda: (lambda r: (r.content, r.page_count))(OcrResult.from_analyze_result(result, DETAIL_CONTENT)))
+    _measure("OcrResult paragraphs",
+             lambda: OcrResult.from_analyze_result(result, DETAIL_PARAGRAPHS).paragraphs)
+
+    def layout_completo():
+        r = OcrResult.from_analyze_result(result, DETAIL_LAYOUT)
+        return [p.lines for p in r.pages], r.tables, r.paragraphs
+
+    _measure("OcrResult layout (todo accedido)", layout_completo)
+    _measure("eager anterior (todo)", lambda: _legacy_process(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark del armado del prompt de extracción: construcción anterior
+(model_json_schema + json.dumps(indent=2) por llamada, documento antes del
+schema) frente al prompt precompilado y cacheado.
+
+Reporta tiempo por llamada y tamaño del prefijo estático (caracteres y una
+estimación de tokens a ~4 caracteres por token).
+
+    python -m benchmarks.bench_prompt [--repeat N]
+"""
+
+import argparse
+import json
+import timeit
+
+from prompts import ESTUDIO_TITULOS_SYSTEM_PROMPT
+from prompts.extraction_prompt import get_extraction_prompt
+from benchmarks.bench_json_codec import SCHEMA
+
+
+class _SchemaStub:
+    """Sustituto de EstudioTitulosPlano: model_json_schema() con el mismo costo de copia."""
+
+    @classmethod
+    def model_json_schema(cls):
+        return json.loads(json.dumps(SCHEMA))
+
+
+def _legacy_prompt(text: str, schema: dict) -> str:
+    return f"""
+Analiza el siguiente documento y extrae la información estructurada según el schema JSON proporcionado.
+
+## DOCUMENTO:
+{text}
+
+## SCHEMA JSON ESPERADO:
+{json.dumps(schema, indent=2, ensure_ascii=False)}
+
+## INSTRUCCIONES:
+1. Extrae TODA la información relevante del documento que coincida con los campos del schema.
+2. Si un campo no se encuentra, usa null o cadena vacía.
+3. Para listas, incluye todos los elementos encontrados.
+4. Mantén los formatos originales.
+5. Responde UNICAMENTE con el JSON estructurado.
+
+## RESPUESTA JSON:
+"""
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    texto = "ANOTACION: Nro 1 Fecha: 12-03-2015 HIPOTECA ABIERTA " * 200
+
+    def legacy():
+        user = _legacy_prompt(texto, _SchemaStub.model_json_schema())
+        return [{"role": "system", "content": ESTUDIO_TITULOS_SYSTEM_PROMPT},
+                {"role": "user", "content": user}]
+
+    def actual():
+        return get_extraction_prompt(ESTUDIO_TITULOS_SYSTEM_PROMPT, _SchemaStub).messages(texto)
+
+    t_legacy = min(timeit.repeat(legacy, number=args.repeat, repeat=5)) / args.repeat
+    t_actual = min(timeit.repeat(actual, number=args.repeat, repeat=5)) / args.repeat
+    print(f"armado anterior:  {t_legacy * 1e6:8.1f} us/llamada")
+    print(f"precompilado:     {t_actual * 1e6:8.1f} us/llamada  ({t_legacy / t_actual:.1f}x)")
+
+    schema_anterior = json.dumps(SCHEMA, indent=2, ensure_ascii=False)
+    schema_actual = get_extraction_prompt(ESTUDIO_TITULOS_SYSTEM_PROMPT, _SchemaStub).schema_text
+    print(f"schema anterior:  {len(schema_anterior):6d} chars (~{len(schema_anterior) // 4} tokens)")
+    print(f"schema compacto:  {len(schema_actual):6d} chars (~{len(schema_actual) // 4} tokens)")
+
+    prefijo = get_extraction_prompt(ESTUDIO_TITULOS_SYSTEM_PROMPT, _SchemaStub).system_message
+    print(f"prefijo estático cacheable: {len(prefijo)} chars (~{len(prefijo) // 4} tokens)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""
+Dobles de los servicios de Azure con latencia configurable, para simular el
+pipeline sin conexión (ver benchmarks/sim_pipeline.py).
+
+Cada fake expone los mismos métodos que usa el código del servicio real.
+La latencia sigue una distribución log-normal definida por mediana y p95.
+Con probabilidad ``throttle_rate`` una llamada recibe un 429: el fake espera
+``retry_after_ms`` y reintenta, como hacen los reintentos de los SDKs.
+Los tiempos por etapa se registran en un ``StageRecorder``.
+"""
+
+import math
+import random
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional
+
+from benchmarks.ocr_fixtures import build_analyze_result
+from schemas.panel_row import get_field_table
+from services.ocr_result import OcrResult, DETAIL_LAYOUT
+
+
+# =========================================================
+# Latencia y métricas
+# =========================================================
+
+@dataclass
+class LatencyModel:
+    """Latencia log-normal (mediana/p95 en ms) con tasa de 429."""
+    median_ms: float = 50.0
+    p95_ms: float = 150.0
+    throttle_rate: float = 0.0
+    retry_after_ms: float = 1000.0
+    max_retries: int = 3
+
+    def sample(self, rng: random.Random, scale: float = 1.0) -> float:
+        """Latencia en segundos; scale multiplica la mediana (p. ej. por página)."""
+        if self.median_ms <= 0:
+            return 0.0
+        sigma = math.log(max(self.p95_ms, self.median_ms) / self.median_ms) / 1.645
+        return rng.lognormvariate(math.log(self.median_ms * scale / 1000.0), sigma)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LatencyModel":
+        return cls(**data)
+
+
+class StageRecorder:
+    """Duraciones por etapa y conteo de 429, seguro entre hilos."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.durations: Dict[str, List[float]] = {}
+        self.throttles: Dict[str, int] = {}
+
+    def add(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.durations.setdefault(stage, []).append(seconds)
+
+    def throttled(self, stage: str) -> None:
+        with self._lock:
+            self.throttles[stage] = self.throttles.get(stage, 0) + 1
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def percentiles(self, stage: str) -> Dict[str, float]:
+        values = sorted(self.durations.get(stage, []))
+        if not values:
+            return {"n": 0}
+
+        def pct(p: float) -> float:
+            return values[min(len(values) - 1, int(math.ceil(p * len(values))) - 1)]
+
+        return {"n": len(values), "p50": pct(0.50), "p95": pct(0.95), "p99": pct(0.99)}
+
+
+class ThrottledError(Exception):
+    """429 que agotó los reintentos simulados."""
+
+
+class _FakeService:
+    """Base de los fakes: latencia con reintentos ante 429 y registro por etapa."""
+
+    stage_name = ""
+
+    def __init__(self, latency: LatencyModel, recorder: StageRecorder,
+                 time_scale: float = 1.0, seed: Optional[int] = None):
+        self.latency = latency
+        self.recorder = recorder
+        self.time_scale = time_scale
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+
+    def _wait(self, scale: float = 1.0, stage: Optional[str] = None) -> None:
+        stage = stage or self.stage_name
+        with self.recorder.stage(stage):
+            for _ in range(self.latency.max_retries + 1):
+                with self._rng_lock:
+                    throttled = self._rng.random() < self.latency.throttle_rate
+                    delay = self.latency.sample(self._rng, scale)
+                if not throttled:
+                    time.sleep(delay * self.time_scale)
+                    return
+                self.recorder.throttled(stage)
+                time.sleep(self.latency.retry_after_ms / 1000.0 * self.time_scale)
+            raise ThrottledError(f"{stage}: 429 tras {self.latency.max_retries} reintentos")
+
+    def health_check(self) -> bool:
+        return True
+
+
+# =========================================================
+# Fakes de servicios
+# =========================================================
+
+class FakeDocumentIntelligenceService(_FakeService):
+    """OCR sintético; la latencia escala con el número de páginas."""
+
+    stage_name = "ocr"
+
+    def __init__(self, latency: LatencyModel, recorder: StageRecorder, time_scale: float = 1.0,
+                 seed: Optional[int] = None, pages: int = 10, lines_per_page: int = 60, tables: int = 2):
+        super().__init__(latency, recorder, time_scale, seed)
+        self.pages = pages
+        self._result = build_analyze_result(pages=pages, lines_per_page=lines_per_page, tables=tables)
+
+    def analyze_document(self, pdf_bytes: bytes, detail: str = DETAIL_LAYOUT,
+                         pages: Optional[str] = None) -> OcrResult:
+        self._wait(scale=max(1.0, self.pages / 10.0))
+        return OcrResult.from_analyze_result(self._result, detail=detail)
+
+    def get_full_text(self, pdf_bytes: bytes) -> str:
+        return self.analyze_document(pdf_bytes).content
+
+
+_SCHEMA_TIPOS = {
+    "EstudioTitulosPlano": "estudio_titulos",
+    "MinutaCancelacionPlano": "minuta_cancelacion",
+    "MinutaConstitucionPlano": "minuta_constitucion",
+}
+
+
+class FakeAzureOpenAIService(_FakeService):
+    """Extracción sintética: PanelFields completos del tipo, con uso de tokens estimado."""
+
+    stage_name = "llm"
+
+    def __init__(self, latency: LatencyModel, recorder: StageRecorder, time_scale: float = 1.0,
+                 seed: Optional[int] = None, chars_per_token: float = 4.0,
+                 completion_tokens: int = 1500):
+        super().__init__(latency, recorder, time_scale, seed)
+        self.chars_per_token = chars_per_token
+        self.completion_tokens = completion_tokens
+        self.reset_token_usage()
+
+    def get_token_usage(self) -> dict:
+        return dict(self._token_usage)
+
+    def reset_token_usage(self) -> None:
+        self._token_usage = {"llamadas": 0, "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0}
+
+    def extract_structured_data(self, document_text: str, system_prompt: str, schema_class,
+                                temperature: float = 0.1, max_tokens: int = 4096, context: str = "",
+                                field_table=None, deployment=None) -> dict:
+        prompt_tokens = int((len(context) + len(document_text) + len(system_prompt)) / self.chars_per_token)
+        # La latencia crece con el prompt (referencia: 10k tokens)
+        self._wait(scale=max(1.0, prompt_tokens / 10000.0))
+        self._token_usage["llamadas"] += 1
+        self._token_usage["prompt_tokens"] += prompt_tokens
+        self._token_usage["completion_tokens"] += self.completion_tokens
+
+        table = get_field_table(_SCHEMA_TIPOS.get(schema_class.__name__, ""))
+        fields = []
+        for name, field_type in zip(table.names, table.types):
+            if field_type == "Number":
+                fields.append({"InternalName": name, "Type": "Number", "TextValue": None, "NumberValue": 1000})
+            else:
+                fields.append({"InternalName": name, "Type": "Text", "TextValue": f"valor {name}", "NumberValue": None})
+        return {"PanelFields": fields}
+
+
+class FakeDataLakeService(_FakeService):
+    """Data Lake en memoria; cada operación registra su propia etapa (datalake.<op>)."""
+
+    stage_name = "datalake"
+
+    def __init__(self, latency: LatencyModel, recorder: StageRecorder,
+                 time_scale: float = 1.0, seed: Optional[int] = None):
+        super().__init__(latency, recorder, time_scale, seed)
+        self._files: Dict[str, Dict[str, bytes]] = {}
+        self._lock = threading.Lock()
+
+    def _container(self, container: str) -> Dict[str, bytes]:
+        with self._lock:
+            return self._files.setdefault(container, {})
+
+    def read_file(self, container: str, file_path: str) -> bytes:
+        self._wait(stage="datalake.read")
+        return self._container(container)[file_path]
+
+    def read_range(self, container: str, file_path: str, offset: int, length: int) -> bytes:
+        self._wait(stage="datalake.read")
+        return self._container(container)[file_path][offset:offset + length]
+
+    def write_bytes(self, container: str, file_path: str, content_bytes: bytes) -> str:
+        self._wait(scale=max(1.0, len(content_bytes) / (1024 * 1024)), stage="datalake.write")
+        self._container(container)[file_path] = bytes(content_bytes)
+        return f"{container}/{file_path}"
+
+    def write_json(self, container: str, file_path: str, data: dict) -> str:
+        from utils import json_codec
+        return self.write_bytes(container, file_path, json_codec.dumps(data))
+
+    def file_exists(self, container: str, file_path: str) -> bool:
+        self._wait(stage="datalake.read")
+        return file_path in self._container(container)
+
+    def list_files(self, container: str, directory_path: str, extension: str = None) -> list:
+        self._wait(stage="datalake.list")
+        prefix = directory_path.rstrip("/") + "/"
+        return [
+            p for p in list(self._container(container))
+            if p.startswith(prefix) and (extension is None or p.lower().endswith(extension.lower()))
+        ]
+
+    def delete_file(self, container: str, file_path: str) -> bool:
+        self._wait(stage="datalake.write")
+        return self._container(container).pop(file_path, None) is not None
+
+    def stored_bytes(self) -> int:
+        with self._lock:
+            return sum(len(v) for files in self._files.values() for v in files.values())
+
+
+class FakeCosmosDBService(_FakeService):
+    """Contenedor Cosmos en memoria particionado por tipoDocumento."""
+
+    stage_name = "cosmos"
+    # Sin modelo de RU: persistir_resultados registra 0
+    last_request_charge = 0.0
+
+    def __init__(self, latency: LatencyModel, recorder: StageRecorder,
+                 time_scale: float = 1.0, seed: Optional[int] = None):
+        super().__init__(latency, recorder, time_scale, seed)
+        self._items: Dict[tuple, dict] = {}
+        self._lock = threading.Lock()
+
+    def upsert_document(self, document: Dict[str, Any], partition_key: str,
+                        if_match: Optional[str] = None) -> str:
+        self._wait()
+        document["tipoDocumento"] = partition_key
+        with self._lock:
+            self._items[(partition_key, document["id"])] = dict(document)
+        return document["id"]
+
+    def create_document(self, document: Dict[str, Any], partition_key: str) -> str:
+        from azure.cosmos.exceptions import CosmosResourceExistsError
+
+        self._wait()
+        document["tipoDocumento"] = partition_key
+        with self._lock:
+            if (partition_key, document["id"]) in self._items:
+                raise CosmosResourceExistsError(status_code=409, message="Entity already exists")
+            self._items[(partition_key, document["id"])] = dict(document)
+        return document["id"]
+
+    def get_document(self, doc_id: str, partition_key: str) -> Optional[Dict[str, Any]]:
+        self._wait()
+        with self._lock:
+            item = self._items.get((partition_key, doc_id))
+        return dict(item) if item is not None else None
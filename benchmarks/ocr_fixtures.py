@@ -0,0 +1,66 @@
+"""
+AnalyzeResult sintético con la misma forma que el del SDK de Document
+Intelligence (páginas con líneas y polígonos, párrafos con roles y spans,
+tablas con celdas), para benchmarks y simulaciones sin Azure.
+"""
+
+from types import SimpleNamespace as NS
+
+
+_LINEAS = (
+    "ANOTACION: Nro {n} Fecha: 12-03-2015 Radicacion: 2015-{n}",
+    "ESPECIFICACION: HIPOTECA ABIERTA SIN LIMITE DE CUANTIA",
+    "DE: PEREZ GOMEZ JUAN CC 12345678",
+    "A: BANCO EJEMPLO S.A. NIT 890.903.938-8",
+    "MATRICULA INMOBILIARIA 050C-{n:08d}",
+    "La validez de este documento podra verificarse en la pagina certificados.supernotariado.gov.co",
+)
+
+
+def _polygon(i: int):
+    y = 0.2 * i
+    return [NS(x=0.5, y=y), NS(x=7.5, y=y), NS(x=7.5, y=y + 0.15), NS(x=0.5, y=y + 0.15)]
+
+
+def build_analyze_result(pages: int = 100, lines_per_page: int = 60, tables: int = 10) -> NS:
+    contenido = []
+    sdk_pages = []
+    paragraphs = []
+    offset = 0
+    for p in range(1, pages + 1):
+        lines = []
+        for i in range(lines_per_page):
+            text = _LINEAS[i % len(_LINEAS)].format(n=p * 1000 + i)
+            span = NS(offset=offset, length=len(text))
+            lines.append(NS(content=text, polygon=_polygon(i), spans=[span]))
+            role = "pageHeader" if i == 0 else ("pageFooter" if i == lines_per_page - 1 else None)
+            paragraphs.append(NS(
+                content=text,
+                role=role,
+                spans=[span],
+                bounding_regions=[NS(page_number=p, polygon=_polygon(i))],
+            ))
+            contenido.append(text)
+            offset += len(text) + 1
+        sdk_pages.append(NS(page_number=p, width=8.5, height=11.0, unit="inch", lines=lines))
+
+    sdk_tables = []
+    for t in range(tables):
+        cells = [
+            NS(
+                row_index=r,
+                column_index=c,
+                content=f"celda {r}-{c}",
+                kind="columnHeader" if r == 0 else "content",
+                bounding_regions=[NS(page_number=1 + t % pages, polygon=_polygon(r))],
+            )
+            for r in range(8) for c in range(4)
+        ]
+        sdk_tables.append(NS(row_count=8, column_count=4, cells=cells))
+
+    return NS(
+        content="\n".join(contenido),
+        pages=sdk_pages,
+        paragraphs=paragraphs,
+        tables=sdk_tables,
+    )
@@ -0,0 +1,226 @@
+"""
+Simulador de throughput del pipeline completo sin Azure.
+
+Sustituye Document Intelligence, Azure OpenAI, Data Lake y Cosmos DB por los
+fakes de benchmarks/fakes.py (latencia log-normal, tasa de 429, tamaño del
+OCR configurables), llega documentos a ``process_blob`` a una tasa fija
+(llegadas abiertas, como el Blob Trigger) y, tras cada documento, ejecuta
+las actividades de síntesis del caso. Reporta docs/min, p50/p95/p99 por
+etapa, 429 recibidos y memoria pico.
+
+    python -m benchmarks.sim_pipeline --docs 200 --rate 120 --workers 8 --time-scale 0.05
+    python -m benchmarks.sim_pipeline --profile perfil.json
+
+``--time-scale`` multiplica todas las latencias simuladas (no el trabajo de
+CPU) para acortar las corridas; docs/min y percentiles se reportan en tiempo
+real de la corrida. El perfil JSON sobrescribe, por servicio, los campos de
+``LatencyModel`` (median_ms, p95_ms, throttle_rate, retry_after_ms,
+max_retries).
+"""
+
+import argparse
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict
+
+from benchmarks.fakes import (
+    FakeAzureOpenAIService,
+    FakeCosmosDBService,
+    FakeDataLakeService,
+    FakeDocumentIntelligenceService,
+    LatencyModel,
+    StageRecorder,
+)
+from utils import json_codec
+
+
+# Latencias por defecto (ms). OCR por cada 10 páginas, LLM por cada 10k tokens de prompt.
+DEFAULT_PROFILE: Dict[str, Dict[str, Any]] = {
+    "document_intelligence": {"median_ms": 4000, "p95_ms": 12000, "throttle_rate": 0.01},
+    "openai": {"median_ms": 8000, "p95_ms": 20000, "throttle_rate": 0.02, "retry_after_ms": 5000},
+    "datalake": {"median_ms": 30, "p95_ms": 120},
+    "cosmos": {"median_ms": 10, "p95_ms": 40},
+}
+
+# Nombre de archivo que detectar_tipo_por_nombre asocia a cada tipo
+_NOMBRES = {
+    "EstudioTitulos": "estudio_de_titulos",
+    "MinutaCancelacion": "minuta_cancelacion",
+    "MinutaConstitucion": "minuta_constitucion",
+}
+
+# Configuración mínima para cargar Settings sin credenciales reales
+_PLACEHOLDER_ENV = (
+    "DATALAKE_ACCOUNT_NAME", "DATALAKE_ACCOUNT_KEY",
+    "DOCUMENT_INTELLIGENCE_ENDPOINT", "DOCUMENT_INTELLIGENCE_KEY",
+    "AZURE_OPENAI_ENDPOINT", "AZURE_OPENAI_KEY",
+    "COSMOS_ENDPOINT", "COSMOS_KEY",
+)
+
+
+class SimBlob:
+    """Equivalente mínimo de func.InputStream."""
+
+    def __init__(self, name: str, content: bytes):
+        self.name = name
+        self._content = content
+
+    def read(self) -> bytes:
+        return self._content
+
+
+def install_fakes(profile: Dict[str, Dict[str, Any]], recorder: StageRecorder,
+                  time_scale: float, pages: int, seed: int = 7):
+    """
+    Reemplaza los servicios por fakes en el paquete services (de donde los
+    toman los procesadores) y en los módulos function_app y activities.
+
+    Returns:
+        tuple: (function_app, activities, fakes)
+    """
+    for name in _PLACEHOLDER_ENV:
+        os.environ.setdefault(name, "sim")
+
+    models = {k: LatencyModel.from_dict({**DEFAULT_PROFILE[k], **profile.get(k, {})})
+              for k in DEFAULT_PROFILE}
+    fakes = {
+        "datalake": FakeDataLakeService(models["datalake"], recorder, time_scale, seed),
+        "cosmos": FakeCosmosDBService(models["cosmos"], recorder, time_scale, seed + 1),
+    }
+
+    def doc_intelligence():
+        return FakeDocumentIntelligenceService(models["document_intelligence"], recorder,
+                                               time_scale, seed + 2, pages=pages)
+
+    def openai():
+        return FakeAzureOpenAIService(models["openai"], recorder, time_scale, seed + 3)
+
+    import services
+    services.DataLakeService = lambda: fakes["datalake"]
+    services.CosmosDBService = lambda: fakes["cosmos"]
+    services.create_cosmos_service = lambda: fakes["cosmos"]
+    services.DocumentIntelligenceService = doc_intelligence
+    services.AzureOpenAIService = openai
+
+    import processors.base_processor as base_processor
+    import function_app
+    import activities
+
+    base_processor.DocumentIntelligenceService = doc_intelligence
+    base_processor.AzureOpenAIService = openai
+    function_app.datalake = fakes["datalake"]
+    function_app.cosmos = fakes["cosmos"]
+    activities.datalake = fakes["datalake"]
+    return function_app, activities, fakes
+
+
+def simulate(function_app, activities, recorder: StageRecorder, docs: int, rate_per_min: float,
+             workers: int, pdf_bytes: bytes, synthesis: bool = True) -> Dict[str, Any]:
+    """Llegadas a tasa fija sobre un pool de `workers` (instancias concurrentes)."""
+    tipos = list(function_app.BLOB_TIPO_MAP)
+    errores = []
+    lock = threading.Lock()
+
+    def documento(i: int, llegada: float) -> None:
+        tipo_key = tipos[i % len(tipos)]
+        blob = SimBlob(f"bronze/conecta/vivienda/1/{_NOMBRES[tipo_key]}_{i:06d}.pdf", pdf_bytes)
+        caso_id = os.path.basename(blob.name).replace(".pdf", "").replace("_", "-")
+        try:
+            with recorder.stage("process_blob"):
+                function_app.process_blob(blob, tipo_key)
+            if synthesis:
+                with recorder.stage("sintesis"):
+                    resultados = activities.activity_leer_resultados_intermedios(caso_id)
+                    activities.activity_generar_resumen_reducido(resultados)
+            recorder.add("e2e", time.perf_counter() - llegada)
+        except Exception as e:
+            with lock:
+                errores.append(f"{blob.name}: {e}")
+
+    intervalo = 60.0 / rate_per_min if rate_per_min > 0 else 0.0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for i in range(docs):
+            llegada = start + i * intervalo
+            espera = llegada - time.perf_counter()
+            if espera > 0:
+                time.sleep(espera)
+            executor.submit(documento, i, llegada)
+    elapsed = time.perf_counter() - start
+
+    completados = docs - len(errores)
+    return {
+        "documentos": docs,
+        "completados": completados,
+        "errores": len(errores),
+        "ejemplo_errores": errores[:3],
+        "segundos": round(elapsed, 3),
+        "docs_min": round(completados / elapsed * 60.0, 2) if elapsed else 0.0,
+    }
+
+
+def _peak_rss_mib() -> float:
+    # ru_maxrss está en KiB en Linux y en bytes en macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Simulador de throughput del pipeline")
+    parser.add_argument("--docs", type=int, default=60)
+    parser.add_argument("--rate", type=float, default=60.0, help="Llegadas por minuto")
+    parser.add_argument("--workers", type=int, default=4, help="Documentos procesados en paralelo")
+    parser.add_argument("--pages", type=int, default=10, help="Páginas por documento (tamaño del OCR)")
+    parser.add_argument("--pdf-kb", type=int, default=500, help="Tamaño del PDF de entrada")
+    parser.add_argument("--time-scale", type=float, default=1.0)
+    parser.add_argument("--profile", default=None, help="JSON con latencias por servicio")
+    parser.add_argument("--no-synthesis", action="store_true")
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="Medir memoria pico de Python (más lento)")
+    args = parser.parse_args()
+
+    profile = {}
+    if args.profile:
+        with open(args.profile, "rb") as handle:
+            profile = json_codec.loads(handle.read())
+
+    import logging
+    logging.disable(logging.WARNING)
+
+    recorder = StageRecorder()
+    function_app, activities, fakes = install_fakes(profile, recorder, args.time_scale, args.pages)
+
+    if args.tracemalloc:
+        tracemalloc.start()
+    resumen = simulate(
+        function_app, activities, recorder, args.docs, args.rate, args.workers,
+        pdf_bytes=b"%PDF" + b"\x00" * (args.pdf_kb * 1024), synthesis=not args.no_synthesis,
+    )
+    if args.tracemalloc:
+        resumen["python_pico_mib"] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 1)
+        tracemalloc.stop()
+    resumen["rss_pico_mib"] = round(_peak_rss_mib(), 1)
+    resumen["datalake_mib"] = round(fakes["datalake"].stored_bytes() / (1024 * 1024), 1)
+
+    print(f"{resumen['completados']}/{resumen['documentos']} documentos en {resumen['segundos']}s "
+          f"-> {resumen['docs_min']} docs/min (llegada {args.rate}/min, {args.workers} workers)")
+    for error in resumen["ejemplo_errores"]:
+        print(f"  error: {error}")
+    print(f"{'etapa':<16}{'n':>6}{'p50 ms':>12}{'p95 ms':>12}{'p99 ms':>12}{'429':>6}")
+    for stage in sorted(recorder.durations):
+        p = recorder.percentiles(stage)
+        print(f"{stage:<16}{p['n']:>6}{p['p50'] * 1e3:>12.1f}{p['p95'] * 1e3:>12.1f}"
+              f"{p['p99'] * 1e3:>12.1f}{recorder.throttles.get(stage, 0):>6}")
+    memoria = f"memoria pico: RSS {resumen['rss_pico_mib']} MiB"
+    if "python_pico_mib" in resumen:
+        memoria += f", Python {resumen['python_pico_mib']} MiB"
+    print(f"{memoria}; Data Lake simulado {resumen['datalake_mib']} MiB")
+
+
+if __name__ == "__main__":
+    main()
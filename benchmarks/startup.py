@@ -0,0 +1,158 @@
+"""
+Benchmark de arranque en frío: tiempo de importar function_app y latencia de
+la primera (y segunda) invocación de cada trigger, cada escenario en un
+proceso nuevo.
+
+    python -m benchmarks.startup [--repeat 5] [--triggers timer http blob activity]
+
+Data Lake usa el backend local y Cosmos el sustituto SQLite (sin red). En el
+trigger de blob, Document Intelligence y Azure OpenAI se construyen de
+verdad (importación del SDK y cliente) y luego se reemplazan por fakes sin
+latencia para la llamada, así la medición incluye el costo de carga pero no
+la red.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+TRIGGERS = ("timer", "http", "blob", "activity")
+
+# Configuración mínima para cargar Settings sin credenciales reales
+_PLACEHOLDER_ENV = {
+    "DATALAKE_ACCOUNT_NAME": "startup",
+    "DATALAKE_ACCOUNT_KEY": "c3RhcnR1cA==",
+    "DOCUMENT_INTELLIGENCE_ENDPOINT": "https://startup.invalid/",
+    "DOCUMENT_INTELLIGENCE_KEY": "startup",
+    "AZURE_OPENAI_ENDPOINT": "https://startup.invalid/",
+    "AZURE_OPENAI_KEY": "startup",
+    "COSMOS_ENDPOINT": "https://startup.invalid/",
+    "COSMOS_KEY": "c3RhcnR1cA==",
+}
+
+
+# =========================================================
+# Proceso hijo: un escenario
+# =========================================================
+
+def _invoke(function_app, trigger: str) -> None:
+    if trigger == "timer":
+        function_app.cleanup_bronze_timer(None)
+    elif trigger == "activity":
+        function_app.leer_resultados_intermedios_activity("caso-startup")
+    elif trigger == "http":
+        import asyncio
+
+        import azure.functions as func
+
+        class _Client:
+            async def start_new(self, *args, **kwargs):
+                return None
+
+            def create_check_status_response(self, req, instance_id):
+                return func.HttpResponse(instance_id, status_code=202)
+
+        req = func.HttpRequest(method="POST", url="/api/orquestar/sintesis/caso-startup",
+                               route_params={"caso_id": "caso-startup"}, body=b"")
+        # El decorador de Durable construye el cliente desde JSON; se llama a la función original
+        start_sintesis = function_app.start_sintesis._function._func.__wrapped__
+        asyncio.run(start_sintesis(req, _Client()))
+    elif trigger == "blob":
+        from benchmarks.fakes import (
+            FakeAzureOpenAIService, FakeDocumentIntelligenceService, LatencyModel, StageRecorder,
+        )
+        from benchmarks.sim_pipeline import SimBlob
+
+        tipo_corto, processor_cls, prefijo, subpath = function_app.BLOB_TIPO_MAP["EstudioTitulos"]
+        processor = processor_cls()  # importa el SDK y construye los clientes reales
+        recorder, sin_latencia = StageRecorder(), LatencyModel(median_ms=0)
+        processor._doc_intelligence = FakeDocumentIntelligenceService(sin_latencia, recorder, pages=5)
+        processor._openai = FakeAzureOpenAIService(sin_latencia, recorder)
+        function_app.BLOB_TIPO_MAP["EstudioTitulos"] = (tipo_corto, lambda: processor, prefijo, subpath)
+        try:
+            blob = SimBlob("bronze/conecta/vivienda/1/caso-startup/estudio_de_titulos.pdf", b"%PDF-1.7")
+            function_app.process_blob(blob, "EstudioTitulos")
+        finally:
+            function_app.BLOB_TIPO_MAP["EstudioTitulos"] = (tipo_corto, processor_cls, prefijo, subpath)
+    else:
+        raise ValueError(f"Trigger desconocido: {trigger}")
+
+
+def _child(trigger: str) -> None:
+    start = time.perf_counter()
+    import function_app
+    import_ms = (time.perf_counter() - start) * 1000.0
+    modules_import = len(sys.modules)
+    if trigger == "blob":
+        import benchmarks.sim_pipeline  # noqa: F401 - fakes fuera de la medición
+    modules_before = len(sys.modules)
+
+    tiempos = []
+    for _ in range(2):
+        start = time.perf_counter()
+        _invoke(function_app, trigger)
+        tiempos.append((time.perf_counter() - start) * 1000.0)
+
+    print(json.dumps({
+        "import_ms": import_ms,
+        "first_ms": tiempos[0],
+        "second_ms": tiempos[1],
+        "modules_import": modules_import,
+        "modules_first": len(sys.modules) - modules_before,
+    }))
+
+
+# =========================================================
+# Proceso principal
+# =========================================================
+
+def _run(trigger: str, workdir: str) -> dict:
+    env = {
+        **_PLACEHOLDER_ENV,
+        **os.environ,
+        "DATALAKE_BACKEND": "local",
+        "DATALAKE_LOCAL_ROOT": os.path.join(workdir, "datalake"),
+        "COSMOS_BACKEND": "sqlite",
+        "COSMOS_SQLITE_PATH": os.path.join(workdir, "cosmos.db"),
+        "LOG_LEVEL": "WARNING",
+    }
+    proc = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup", "--child", trigger],
+        env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"El escenario {trigger} falló:\n{proc.stderr}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--triggers", nargs="+", choices=TRIGGERS, default=list(TRIGGERS))
+    parser.add_argument("--child", choices=TRIGGERS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.child)
+        return
+
+    print(f"{'trigger':<10}{'import ms':>11}{'1ra ms':>10}{'2da ms':>10}{'módulos':>10}{'+1ra':>7}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for trigger in args.triggers:
+            runs = [_run(trigger, workdir) for _ in range(args.repeat)]
+
+            def med(key: str) -> float:
+                return statistics.median(r[key] for r in runs)
+
+            print(f"{trigger:<10}{med('import_ms'):>11.0f}{med('first_ms'):>10.1f}{med('second_ms'):>10.1f}"
+                  f"{med('modules_import'):>10.0f}{med('modules_first'):>7.0f}")
+    print(f"mediana de {args.repeat} procesos por trigger")
+
+
+if __name__ == "__main__":
+    main()
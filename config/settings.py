@@ -19,6 +19,33 @@ class Settings(BaseSettings):
     datalake_container_silver: str = "silver"
     datalake_container_gold: str = "gold"
 
+    # Backend de almacenamiento: azure (Data Lake Gen2) o local (directorio en disco)
+    datalake_backend: str = Field(
+        default="azure",
+        alias="DATALAKE_BACKEND"
+    )
+    datalake_local_root: str = Field(
+        default=".datalake",
+        alias="DATALAKE_LOCAL_ROOT"
+    )
+    # fsync en cada escritura local (más lento, durable ante cortes de energía)
+    datalake_local_fsync: bool = Field(
+        default=False,
+        alias="DATALAKE_LOCAL_FSYNC"
+    )
+
+    # Indentar los JSON escritos en el Data Lake (False = compacto)
+    datalake_json_indent: bool = Field(
+        default=True,
+        alias="DATALAKE_JSON_INDENT"
+    )
+
+    # Backend JSON: auto (orjson si está instalado), orjson o stdlib
+    json_codec_backend: str = Field(
+        default="auto",
+        alias="JSON_CODEC_BACKEND"
+    )
+
     # Azure Document Intelligence
     document_intelligence_endpoint: str = Field(alias="DOCUMENT_INTELLIGENCE_ENDPOINT")
     document_intelligence_key: str = Field(alias="DOCUMENT_INTELLIGENCE_KEY")
@@ -38,6 +65,165 @@ class Settings(BaseSettings):
         default="2024-02-15-preview",
         alias="AZURE_OPENAI_API_VERSION"
     )
+    # Despliegue rápido para documentos bajo los umbrales del procesador ("" = siempre el grande)
+    azure_openai_fast_deployment: str = Field(
+        default="",
+        alias="AZURE_OPENAI_FAST_DEPLOYMENT"
+    )
+    # Despliegue para la extracción batch ("" = AZURE_OPENAI_DEPLOYMENT)
+    azure_openai_batch_deployment: str = Field(
+        default="",
+        alias="AZURE_OPENAI_BATCH_DEPLOYMENT"
+    )
+    # Umbrales por procesador: {"minuta_cancelacion": {"max_characters": 20000, "max_pages": 10}}
+    model_routing_thresholds: dict = Field(
+        default={},
+        alias="MODEL_ROUTING_THRESHOLDS"
+    )
+    # Structured outputs (json_schema estricto); si el despliegue no lo soporta se usa json_object
+    azure_openai_structured_outputs: bool = Field(
+        default=True,
+        alias="AZURE_OPENAI_STRUCTURED_OUTPUTS"
+    )
+    # Re-consultas al modelo por fragmento, solo con los campos que no se pudieron reparar
+    llm_repair_retries: int = Field(
+        default=1,
+        alias="LLM_REPAIR_RETRIES"
+    )
+
+    # Guardar el resultado de OCR en silver (artefacto binario .ocrb)
+    ocr_artifacts_enabled: bool = Field(
+        default=True,
+        alias="OCR_ARTIFACTS_ENABLED"
+    )
+
+    # Re-extracción (backfill) desde artefactos OCR guardados
+    backfill_concurrency: int = Field(
+        default=4,
+        alias="BACKFILL_CONCURRENCY"
+    )
+    backfill_checkpoint_every: int = Field(
+        default=10,
+        alias="BACKFILL_CHECKPOINT_EVERY"
+    )
+    # Intentos por documento antes de omitirlo en los lotes siguientes
+    backfill_max_attempts: int = Field(
+        default=3,
+        alias="BACKFILL_MAX_ATTEMPTS"
+    )
+
+    # Extracción batch (archivos JSONL para el endpoint asíncrono)
+    batch_max_requests_per_file: int = Field(
+        default=50000,
+        alias="BATCH_MAX_REQUESTS_PER_FILE"
+    )
+    # Llamadas simultáneas del ejecutor local de archivos batch
+    batch_local_concurrency: int = Field(
+        default=4,
+        alias="BATCH_LOCAL_CONCURRENCY"
+    )
+
+    # Precios (USD) para el costo estimado por documento (ver utils/cost_ledger.py)
+    cost_prices: dict = Field(
+        default={
+            "prompt_1k": 0.0025,
+            "cached_1k": 0.00125,
+            "completion_1k": 0.01,
+            "ocr_page": 0.01,
+            "ru_1m": 0.25,
+            "batch_factor": 0.5,
+        },
+        alias="COST_PRICES"
+    )
+
+    # Telemetría (OpenTelemetry): none, console o file
+    telemetry_exporter: str = Field(
+        default="none",
+        alias="TELEMETRY_EXPORTER"
+    )
+    telemetry_file_path: str = Field(
+        default="telemetry.jsonl",
+        alias="TELEMETRY_FILE_PATH"
+    )
+    telemetry_service_name: str = Field(
+        default="conecta-estudio-titulos",
+        alias="TELEMETRY_SERVICE_NAME"
+    )
+    telemetry_metrics_interval_ms: int = Field(
+        default=60000,
+        alias="TELEMETRY_METRICS_INTERVAL_MS"
+    )
+
+    # Logging: text o json; cola en segundo plano y límite por plantilla de mensaje
+    log_level: str = Field(
+        default="INFO",
+        alias="LOG_LEVEL"
+    )
+    log_format: str = Field(
+        default="text",
+        alias="LOG_FORMAT"
+    )
+    log_queue: bool = Field(
+        default=True,
+        alias="LOG_QUEUE"
+    )
+    log_rate_limit: int = Field(
+        default=0,
+        alias="LOG_RATE_LIMIT"
+    )
+    log_rate_window_s: float = Field(
+        default=60.0,
+        alias="LOG_RATE_WINDOW_S"
+    )
+
+    # Clasificación por contenido (primera página) de blobs sin tipo en el nombre
+    classifier_enabled: bool = Field(
+        default=True,
+        alias="CLASSIFIER_ENABLED"
+    )
+    classifier_min_score: float = Field(
+        default=0.3,
+        alias="CLASSIFIER_MIN_SCORE"
+    )
+    classifier_min_margin: float = Field(
+        default=0.1,
+        alias="CLASSIFIER_MIN_MARGIN"
+    )
+    # Mínimo de caracteres de la capa de texto; con menos se usa OCR de la página 1
+    classifier_min_text_chars: int = Field(
+        default=200,
+        alias="CLASSIFIER_MIN_TEXT_CHARS"
+    )
+    classifier_ocr_fallback: bool = Field(
+        default=True,
+        alias="CLASSIFIER_OCR_FALLBACK"
+    )
+    classifier_quarantine_path: str = Field(
+        default="conecta/vivienda/cuarentena",
+        alias="CLASSIFIER_QUARANTINE_PATH"
+    )
+
+    # Selección de páginas relevantes antes de la extracción (procesadores con términos definidos)
+    page_selection_enabled: bool = Field(
+        default=True,
+        alias="PAGE_SELECTION_ENABLED"
+    )
+    page_selection_token_budget: int = Field(
+        default=30000,
+        alias="PAGE_SELECTION_TOKEN_BUDGET"
+    )
+
+    # Pre-extracción con reglas regex
+    preextraction_enabled: bool = Field(
+        default=True,
+        alias="PREEXTRACTION_ENABLED"
+    )
+    # Omitir el LLM si las reglas resuelven todos los campos del tipo (desactivado: las reglas
+    # no distinguen qué escritura es cuál, el modelo sí)
+    preextraction_skip_llm: bool = Field(
+        default=False,
+        alias="PREEXTRACTION_SKIP_LLM"
+    )
 
     # Límites para chunking
     chunk_max_characters: int = Field(
@@ -48,6 +234,53 @@ class Settings(BaseSettings):
         default=1000,
         alias="CHUNK_OVERLAP"
     )
+    # Extracción incremental: cada ola de fragmentos solo pide los campos aún vacíos
+    chunk_incremental: bool = Field(
+        default=True,
+        alias="CHUNK_INCREMENTAL"
+    )
+    # Fragmentos por ola (llamadas en paralelo); 1 = en orden, uno a uno
+    chunk_wave_size: int = Field(
+        default=1,
+        alias="CHUNK_WAVE_SIZE"
+    )
+    # Map-reduce para documentos muy largos: notas condensadas por fragmento y una extracción final
+    mapreduce_enabled: bool = Field(
+        default=True,
+        alias="MAPREDUCE_ENABLED"
+    )
+    mapreduce_min_characters: int = Field(
+        default=300000,
+        alias="MAPREDUCE_MIN_CHARACTERS"
+    )
+    # Presupuesto de la fase map: caracteres de entrada y tokens de salida por fragmento
+    mapreduce_chunk_characters: int = Field(
+        default=40000,
+        alias="MAPREDUCE_CHUNK_CHARACTERS"
+    )
+    mapreduce_map_max_tokens: int = Field(
+        default=1500,
+        alias="MAPREDUCE_MAP_MAX_TOKENS"
+    )
+    mapreduce_concurrency: int = Field(
+        default=8,
+        alias="MAPREDUCE_CONCURRENCY"
+    )
+    # Presupuesto de la fase reduce: caracteres de notas; por encima se condensan de nuevo
+    mapreduce_reduce_max_characters: int = Field(
+        default=60000,
+        alias="MAPREDUCE_REDUCE_MAX_CHARACTERS"
+    )
+    mapreduce_max_levels: int = Field(
+        default=3,
+        alias="MAPREDUCE_MAX_LEVELS"
+    )
+
+    # Política de fusión de fragmentos por InternalName: first, longest, concat o most_frequent
+    merge_policies: dict = Field(
+        default={},
+        alias="MERGE_POLICIES"
+    )
 
     # Azure Cosmos DB
     cosmos_endpoint: str = Field(alias="COSMOS_ENDPOINT")
@@ -61,6 +294,32 @@ class Settings(BaseSettings):
         alias="COSMOS_CONTAINER_NAME"
     )
 
+    # Backend de Cosmos: azure o sqlite (archivo local que emula el contenedor)
+    cosmos_backend: str = Field(
+        default="azure",
+        alias="COSMOS_BACKEND"
+    )
+    cosmos_sqlite_path: str = Field(
+        default=".cosmos.sqlite3",
+        alias="COSMOS_SQLITE_PATH"
+    )
+
+    # Aprovisionamiento (provision_cosmos.py): manual, autoscale o serverless.
+    # En autoscale COSMOS_THROUGHPUT es el máximo de RU/s.
+    cosmos_throughput_mode: str = Field(
+        default="manual",
+        alias="COSMOS_THROUGHPUT_MODE"
+    )
+    cosmos_throughput: int = Field(
+        default=400,
+        alias="COSMOS_THROUGHPUT"
+    )
+    # Lee las propiedades del contenedor al iniciar para fallar de inmediato si falta
+    cosmos_verify_on_start: bool = Field(
+        default=False,
+        alias="COSMOS_VERIFY_ON_START"
+    )
+
     # Duración de archivos en bronze (días) para eliminación automática
     bronze_retention_days: int = Field(
         default=7,
@@ -81,6 +340,32 @@ class Settings(BaseSettings):
         alias="REJECT_IF_ENCUMBRANCES"
     )
 
+    # Rango de edad y score mínimo del solicitante
+    min_age: int = Field(
+        default=18,
+        alias="MIN_AGE"
+    )
+    max_age: int = Field(
+        default=75,
+        alias="MAX_AGE"
+    )
+    min_credit_score: int = Field(
+        default=600,
+        alias="MIN_CREDIT_SCORE"
+    )
+
+    # Reglas de viabilidad adicionales (lista JSON de definiciones, ver rules/)
+    viability_rules_extra: list = Field(
+        default=[],
+        alias="VIABILITY_RULES_EXTRA"
+    )
+
+    # Medir tiempo de evaluación por regla (diagnóstico; apagado en producción)
+    viability_rules_timing: bool = Field(
+        default=False,
+        alias="VIABILITY_RULES_TIMING"
+    )
+
     # Pesos para cálculo de confianza
     confidence_weights: dict = Field(
         default={
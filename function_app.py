@@ -13,31 +13,32 @@ import uuid
 import datetime
 from datetime import datetime as dt
 import os
+import time
 from typing import List, Dict, Any, Union
 
-from azure.storage.filedatalake import DataLakeServiceClient
-
-from processors import (
-    EstudioTitulosProcessor,
-    MinutaCancelacionProcessor,
-    MinutaConstitucionProcessor,
-)
-
-from services import DataLakeService, CosmosDBService
+import services
+from services.ocr_artifact import dump_ocr, FILE_EXTENSION as OCR_EXTENSION
 from config import get_settings
 from utils.business_days import business_days_between as business_days
+from utils import json_codec, telemetry, configure_logging
+from utils.cost_ledger import CostLedger, add_to_aggregate
+from utils.document_classifier import Classification, TfidfClassifier, native_first_page_text
+from utils.lazy import LazyImport, LazyService
 
 
 # =========================================================
 # Configuración
 # =========================================================
 
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
-
 settings = get_settings()
-datalake = DataLakeService()
-cosmos = CosmosDBService()
+configure_logging(settings)
+logger = logging.getLogger(__name__)
+json_codec.set_backend(settings.json_codec_backend)
+telemetry.configure_telemetry(settings)
+# Los clientes se crean en el primer uso: importar este módulo no hace
+# llamadas de red y los triggers que no usan un servicio no lo cargan
+datalake = LazyService(lambda: services.DataLakeService(), "datalake")
+cosmos = LazyService(lambda: services.create_cosmos_service(), "cosmos")
 
 # Usamos DFApp para habilitar durable functions
 app = df.DFApp()
@@ -48,15 +49,28 @@ app = df.DFApp()
 # =========================================================
 
 @app.activity_trigger(input_name="caso_id")
-def leer_resultados_intermedios_activity(caso_id: str):
+def leer_resultados_intermedios_activity(caso_id: Union[str, Dict[str, Any]]):
     from activities import activity_leer_resultados_intermedios
-    return activity_leer_resultados_intermedios(caso_id)
+    caso_id, carrier = telemetry.unwrap_payload(caso_id)
+    with telemetry.extract_context(carrier), telemetry.bind_context(caso_id=caso_id), \
+            telemetry.stage_span("activity.leer_resultados"):
+        return activity_leer_resultados_intermedios(caso_id)
 
 
 @app.activity_trigger(input_name="resultados")
-def generar_resumen_activity(resultados: List[Dict[str, Any]]):
+def generar_resumen_activity(resultados: Union[List[Dict[str, Any]], Dict[str, Any]]):
     from activities import activity_generar_resumen_reducido
-    return activity_generar_resumen_reducido(resultados)
+    resultados, carrier = telemetry.unwrap_payload(resultados)
+    caso_id = resultados[0].get("caso_id") if resultados else None
+    with telemetry.extract_context(carrier), telemetry.bind_context(caso_id=caso_id), \
+            telemetry.stage_span("activity.sintetizar", documentos=len(resultados)):
+        return activity_generar_resumen_reducido(resultados)
+
+
+@app.activity_trigger(input_name="params")
+def backfill_reextraccion_activity(params: Dict[str, Any]):
+    from backfill import run_backfill
+    return run_backfill(**params)
 
 
 # =========================================================
@@ -68,23 +82,62 @@ def sintetizar_caso_orchestrator(context: df.DurableOrchestrationContext):
     """
     Orquestador que, dado un caso_id, lee todos los resultados intermedios
     (de silver) y genera los archivos maestros en gold.
+
+    El contexto de traza del starter (si viene) se reenvía a las actividades;
+    el orquestador no abre spans porque se re-ejecuta en cada replay.
     """
-    caso_id = context.get_input()
+    caso_id, carrier = telemetry.unwrap_payload(context.get_input())
     if not caso_id:
         return {"error": "No se proporcionó caso_id"}
 
     # 1. Leer todos los resultados intermedios
-    resultados = yield context.call_activity("leer_resultados_intermedios_activity", caso_id)
+    resultados = yield context.call_activity(
+        "leer_resultados_intermedios_activity",
+        {"payload": caso_id, telemetry.TRACE_KEY: carrier or {}},
+    )
 
     if not resultados:
         return {"error": f"No se encontraron documentos para el caso {caso_id}"}
 
     # 2. Sintetizar y generar master JSON
-    rutas = yield context.call_activity("generar_resumen_activity", resultados)
+    rutas = yield context.call_activity(
+        "generar_resumen_activity",
+        {"payload": resultados, telemetry.TRACE_KEY: carrier or {}},
+    )
 
     return rutas
 
 
+@app.orchestration_trigger(context_name="context")
+def backfill_reextraccion_orchestrator(context: df.DurableOrchestrationContext):
+    """
+    Orquestador del backfill de re-extracción: llama a la actividad con un
+    lote de max_documents y, si quedan pendientes, se reinicia con
+    continue_as_new para que el historial no crezca con cada lote. Cada lote
+    guarda su checkpoint, por lo que un reinicio continúa donde quedó; los
+    documentos que fallan BACKFILL_MAX_ATTEMPTS veces dejan de contar como
+    pendientes.
+
+    Devuelve el resumen del último lote y, en "acumulado", los conteos de
+    todos los lotes de la ejecución.
+    """
+    params = dict(context.get_input() or {})
+    acumulado = params.pop("acumulado", None) or {"lotes": 0}
+    params.setdefault("max_documents", 50)
+
+    resumen = yield context.call_activity("backfill_reextraccion_activity", params)
+    acumulado["lotes"] += 1
+    for clave in ("procesados", "reextraidos", "al_dia", "errores"):
+        acumulado[clave] = acumulado.get(clave, 0) + resumen[clave]
+    if resumen["pendientes"] == 0 or resumen["procesados"] == 0:
+        return {**resumen, "acumulado": acumulado}
+
+    params["run_id"] = resumen["run_id"]
+    # Solo el primer lote olvida los intentos fallidos
+    params.pop("reintentar_errores", None)
+    context.continue_as_new({**params, "acumulado": acumulado})
+
+
 # =========================================================
 # HTTP Starter
 # =========================================================
@@ -101,7 +154,40 @@ async def start_sintesis(req: func.HttpRequest, client):
         return func.HttpResponse("Debe proporcionar un caso_id", status_code=400)
 
     instance_id = f"sintesis-{caso_id}-{uuid.uuid4()}"
-    await client.start_new("sintetizar_caso_orchestrator", instance_id, caso_id)
+    with telemetry.bind_context(caso_id=caso_id), telemetry.stage_span("orquestacion.inicio"):
+        await client.start_new("sintetizar_caso_orchestrator", instance_id, telemetry.wrap_payload(caso_id))
+
+    return client.create_check_status_response(req, instance_id)
+
+
+@app.route(route="orquestar/backfill", methods=["POST"])
+@app.durable_client_input(client_name="client")
+async def start_backfill(req: func.HttpRequest, client):
+    """
+    Inicia la re-extracción desde artefactos OCR.
+    Ejemplo: POST /orquestar/backfill?tipo=EstudioTitulos&concurrency=8
+    (``reintentar_errores=true`` vuelve a intentar los documentos agotados)
+    """
+    params: Dict[str, Any] = {}
+    tipo = req.params.get("tipo")
+    if tipo:
+        if tipo not in BLOB_TIPO_MAP:
+            return func.HttpResponse(f"Tipo desconocido: {tipo}", status_code=400)
+        params["tipos"] = [tipo]
+    if req.params.get("concurrency"):
+        try:
+            params["concurrency"] = int(req.params["concurrency"])
+        except ValueError:
+            params["concurrency"] = 0
+        if params["concurrency"] < 1:
+            return func.HttpResponse(
+                f"concurrency debe ser un entero positivo: {req.params['concurrency']}", status_code=400
+            )
+    if req.params.get("reintentar_errores", "").lower() in ("1", "true"):
+        params["reintentar_errores"] = True
+
+    instance_id = f"backfill-{uuid.uuid4()}"
+    await client.start_new("backfill_reextraccion_orchestrator", instance_id, params)
 
     return client.create_check_status_response(req, instance_id)
 
@@ -110,22 +196,23 @@ async def start_sintesis(req: func.HttpRequest, client):
 # Configuración de tipos
 # =========================================================
 
+# Los procesadores (y sus SDKs) se importan al instanciarlos
 BLOB_TIPO_MAP = {
     "EstudioTitulos": (
         "estudio_titulos",
-        EstudioTitulosProcessor,
+        LazyImport("processors.estudio_titulos_processor:EstudioTitulosProcessor"),
         "VIV-514.2_1901",
         "conecta/vivienda/estudio-titulos",
     ),
     "MinutaCancelacion": (
         "minuta_cancelacion",
-        MinutaCancelacionProcessor,
+        LazyImport("processors.minuta_cancelacion_processor:MinutaCancelacionProcessor"),
         "VIV-514.2_1903",
         "conecta/vivienda/minuta-cancelacion",
     ),
     "MinutaConstitucion": (
         "minuta_constitucion",
-        MinutaConstitucionProcessor,
+        LazyImport("processors.minuta_constitucion_processor:MinutaConstitucionProcessor"),
         "VIV-514.2_1902",
         "conecta/vivienda/minuta-constitucion",
     ),
@@ -160,6 +247,58 @@ def detectar_tipo_por_nombre(nombre_archivo: str) -> str | None:
     return None
 
 
+_clasificador: TfidfClassifier | None = None
+_ocr_clasificacion = LazyService(lambda: services.DocumentIntelligenceService(), "ocr_clasificacion")
+
+
+def clasificar_por_contenido(pdf_bytes: bytes) -> Classification:
+    """
+    Clasifica un PDF por el texto de su primera página (TF-IDF local, sin LLM).
+
+    Usa la capa de texto nativa; si tiene menos de CLASSIFIER_MIN_TEXT_CHARS
+    caracteres (PDF escaneado) y CLASSIFIER_OCR_FALLBACK está activo, hace OCR
+    solo de la página 1.
+    """
+    global _clasificador
+    if _clasificador is None:
+        _clasificador = TfidfClassifier(
+            min_score=settings.classifier_min_score,
+            min_margin=settings.classifier_min_margin,
+        )
+
+    with telemetry.stage_span("classification") as span:
+        texto, fuente = native_first_page_text(pdf_bytes), "texto"
+        if len(texto.strip()) < settings.classifier_min_text_chars and settings.classifier_ocr_fallback:
+            from services.ocr_result import DETAIL_CONTENT
+            texto = _ocr_clasificacion.analyze_document(pdf_bytes, detail=DETAIL_CONTENT, pages="1").content
+            fuente = "ocr"
+        clasificacion = _clasificador.classify(texto, source=fuente)
+        telemetry.set_attributes(
+            span, fuente=fuente, tipo=clasificacion.tipo_key, score=round(clasificacion.score, 4),
+        )
+    return clasificacion
+
+
+def poner_en_cuarentena(pdf_bytes: bytes, blob_name: str, clasificacion: Classification | None) -> str:
+    """
+    Copia un PDF que no se pudo enrutar a la ruta de cuarentena de Bronze,
+    junto a un JSON con los puntajes, para revisión manual. Conserva la ruta
+    relativa a la carpeta del trigger, para que dos blobs con el mismo nombre
+    en subcarpetas distintas no se pisen.
+    """
+    container = settings.datalake_container_bronze
+    relativa = blob_name[len(BLOB_TRIGGER_PREFIX):] if blob_name.startswith(BLOB_TRIGGER_PREFIX) \
+        else blob_name.split("/", 1)[-1]
+    ruta = f"{settings.classifier_quarantine_path}/{relativa}"
+    datalake.write_bytes(container, ruta, pdf_bytes)
+    datalake.write_json(container, f"{ruta}.clasificacion.json", {
+        "archivo_origen": blob_name,
+        "fecha": dt.now().isoformat(),
+        "clasificacion": clasificacion.to_dict() if clasificacion else None,
+    })
+    return ruta
+
+
 # =========================================================
 # Persistencia
 # =========================================================
@@ -171,11 +310,23 @@ def persistir_resultados(
     tipo_documento: str,
     archivo_origen: str,
     processor_name: str,
-    subpath: str
+    subpath: str,
+    version_extraccion: str | None = None,
+    origen: str = "blob",
+    costos: CostLedger | None = None,
 ) -> str:
     """
     Persiste los resultados extraídos en Data Lake (Silver) y Cosmos DB.
+
+    version_extraccion identifica el prompt + schema usados, para que el
+    backfill sepa qué documentos están desactualizados.
+
+    Los costos del procesamiento (_procesamiento.costos, o el registro que
+    se pase en costos) se completan con las escrituras; el llamador los
+    registra después con registrar_costos.
     """
+    if costos is None:
+        costos = CostLedger.from_dict((extracted_data.get("_procesamiento") or {}).get("costos"))
 
     json_result = {
         "metadata": {
@@ -184,19 +335,22 @@ def persistir_resultados(
             "caso_id": caso_id,
             "tipo_documento": tipo_documento,
             "archivo_origen": archivo_origen,
+            "version_extraccion": version_extraccion,
         },
         "datos_extraidos": extracted_data,
     }
 
     silver_relative_path = f"{subpath}/{caso_id}/{process_id}.json"
 
+    write_start = time.perf_counter()
     silver_full_path = datalake.write_json(
         container="silver",
         file_path=silver_relative_path,
         data=json_result,
     )
+    costos.record("datalake.write", latency_ms=(time.perf_counter() - write_start) * 1000.0)
 
-    logger.info(f"Resultado guardado en Data Lake: {silver_full_path}")
+    logger.info("Resultado guardado en Data Lake: %s", silver_full_path)
 
     cosmos_document = {
         "id": process_id,
@@ -205,25 +359,106 @@ def persistir_resultados(
         "tipoDocumento": tipo_documento,
         "fechaProcesamiento": dt.now().isoformat(),
         "archivoOrigen": archivo_origen,
+        "versionExtraccion": version_extraccion,
         "rutasDataLake": {"silver": silver_full_path},
         "datosExtraidos": extracted_data,
+        "costos": costos.to_dict(settings.cost_prices),
         "_etiquetas": {
             "sistema": "conecta",
             "procesador": processor_name,
-            "origen": "blob",
+            "origen": origen,
         },
     }
 
+    upsert_start = time.perf_counter()
     cosmos.upsert_document(
         document=cosmos_document,
         partition_key=tipo_documento,
     )
+    costos.record(
+        "cosmos.upsert",
+        # last_request_charge es por hilo: no lo pisa otra invocación concurrente
+        request_units=cosmos.last_request_charge,
+        latency_ms=(time.perf_counter() - upsert_start) * 1000.0,
+    )
 
-    logger.info(f"Documento guardado en Cosmos DB con id: {process_id}")
+    logger.info("Documento guardado en Cosmos DB con id: %s", process_id)
 
     return silver_relative_path
 
 
+COSTOS_PARTITION = "costos"
+
+
+def registrar_costos(costos: CostLedger, caso_id: str, tipo_documento: str, fecha: str | None = None,
+                     process_id: str | None = None) -> None:
+    """
+    Guarda los costos de un procesamiento como un registro inmutable en la
+    partición de costos, con el caso, el día y los grupos del desglose
+    (tipo de documento, configuración de chunking y nivel de modelo:
+    rapido, grande o escalado; la tasa de escalamiento sale de ahí).
+
+    Cada procesamiento escribe su propio documento con un create, así que
+    las invocaciones concurrentes no compiten por un agregado compartido;
+    los totales por caso y por día se calculan al leer (consultar_costos).
+    Un fallo solo se registra.
+    """
+    fecha = fecha or dt.now().date().isoformat()
+    registro = {
+        "id": f"costos-{uuid.uuid4()}",
+        "tipo": "costos_documento",
+        "casoId": caso_id,
+        "procesoId": process_id,
+        "fecha": fecha,
+        "grupos": {
+            "tipo_documento": tipo_documento,
+            "chunking": costos.info.get("chunking", "sin_llm"),
+            "ruteo": costos.info.get("ruteo", "grande"),
+        },
+        "costos": costos.to_dict(),
+    }
+    try:
+        cosmos.create_document(registro, partition_key=COSTOS_PARTITION)
+    except Exception as e:
+        logger.warning("No se pudieron registrar costos de %s: %s", caso_id, e)
+
+
+def consultar_costos(caso_id: str | None = None, fecha: str | None = None) -> Dict[str, Any]:
+    """
+    Suma los registros de costos de un caso o de un día (AAAA-MM-DD), con
+    desglose por tipo de documento (por_tipo_documento), chunking
+    (por_chunking) y nivel de modelo (por_ruteo). Los precios son los de
+    COST_PRICES al momento de la consulta.
+    """
+    if (caso_id is None) == (fecha is None):
+        raise ValueError("Indicar caso_id o fecha")
+    filtros = {"casoId": caso_id} if caso_id is not None else {"fecha": fecha}
+    agregado: Dict[str, Any] = {"tipo": "costos", **({"caso_id": caso_id} if caso_id is not None else {"fecha": fecha})}
+    for registro in cosmos.query_documents({**filtros, "tipo": "costos_documento"}, partition_key=COSTOS_PARTITION):
+        add_to_aggregate(agregado, CostLedger.from_dict(registro["costos"]), settings.cost_prices, registro["grupos"])
+    return agregado
+
+
+def persistir_ocr(ocr_result, caso_id: str, process_id: str, subpath: str) -> str | None:
+    """
+    Guarda el resultado de OCR en Silver como artefacto binario, junto al
+    resultado JSON, para reprocesar sin volver a llamar a Document Intelligence.
+    Un fallo aquí no detiene el procesamiento del documento.
+    """
+    ocr_relative_path = f"{subpath}/{caso_id}/{process_id}{OCR_EXTENSION}"
+    try:
+        datalake.write_bytes(
+            container=settings.datalake_container_silver,
+            file_path=ocr_relative_path,
+            content_bytes=dump_ocr(ocr_result),
+        )
+        logger.info("Artefacto OCR guardado en Data Lake: %s", ocr_relative_path)
+        return ocr_relative_path
+    except Exception as e:
+        logger.warning("No se pudo guardar el artefacto OCR %s: %s", ocr_relative_path, e)
+        return None
+
+
 # =========================================================
 # Procesamiento de Blob
 # =========================================================
@@ -231,19 +466,14 @@ def persistir_resultados(
 def process_blob(
     blob: func.InputStream,
     tipo_key: str,  # Cambiado: ahora recibimos el string key directamente
+    pdf_bytes: bytes | None = None,
 ):
 
     blob_name = blob.name
-    logger.info(f"Blob Trigger activado: {blob_name} (tipo: {tipo_key})")
+    logger.info("Blob Trigger activado: %s (tipo: %s)", blob_name, tipo_key)
 
     if not blob_name.lower().endswith(".pdf"):
-        logger.warning(f"Saltando archivo no-PDF: {blob_name}")
-        return
-
-    pdf_bytes = blob.read()
-
-    if len(pdf_bytes) == 0:
-        logger.error(f"Blob vacío recibido: {blob_name}")
+        logger.warning("Saltando archivo no-PDF: %s", blob_name)
         return
 
     # Obtenemos la configuración del tipo de documento
@@ -253,41 +483,66 @@ def process_blob(
     caso_id = nombre_base.replace(".pdf", "").replace("_", "-")
     process_id = f"{prefijo_id}-{uuid.uuid4()}"
 
-    logger.info(f"Iniciando procesamiento: process_id={process_id}, caso={caso_id}")
+    with telemetry.bind_context(caso_id=caso_id, process_id=process_id, tipo_documento=tipo_corto), \
+            telemetry.stage_span("process_blob", archivo=blob_name):
 
-    try:
-        # Instanciamos el procesador correspondiente
-        processor = processor_cls()
+        if pdf_bytes is None:
+            with telemetry.stage_span("blob.read") as span:
+                pdf_bytes = blob.read()
+                telemetry.set_attributes(span, bytes=len(pdf_bytes))
 
-        extracted_data = processor.process(pdf_bytes, blob_name)
+        if len(pdf_bytes) == 0:
+            logger.error("Blob vacío recibido: %s", blob_name)
+            return
 
-        logger.info(f"Procesamiento completado exitosamente para {blob_name}")
+        logger.info("Iniciando procesamiento: process_id=%s, caso=%s", process_id, caso_id)
 
-        persistir_resultados(
-            extracted_data=extracted_data,
-            caso_id=caso_id,
-            process_id=process_id,
-            tipo_documento=tipo_corto,
-            archivo_origen=blob_name,
-            processor_name=processor.__class__.__name__,
-            subpath=subpath,
-        )
+        try:
+            # Instanciamos el procesador correspondiente
+            processor = processor_cls()
 
-    except Exception as e:
-        logger.error(
-            f"Error procesando {tipo_key} ({blob_name}): {str(e)}",
-            exc_info=True
-        )
-        raise
+            on_ocr = (
+                (lambda ocr_result: persistir_ocr(ocr_result, caso_id, process_id, subpath))
+                if settings.ocr_artifacts_enabled else None
+            )
+
+            extracted_data = processor.process(pdf_bytes, blob_name, on_ocr=on_ocr)
+
+            logger.info("Procesamiento completado exitosamente para %s", blob_name)
+
+            costos = CostLedger.from_dict(extracted_data.get("_procesamiento", {}).get("costos"))
+            persistir_resultados(
+                extracted_data=extracted_data,
+                caso_id=caso_id,
+                process_id=process_id,
+                tipo_documento=tipo_corto,
+                archivo_origen=blob_name,
+                processor_name=processor.__class__.__name__,
+                subpath=subpath,
+                version_extraccion=processor.extraction_version,
+                costos=costos,
+            )
+            registrar_costos(costos, caso_id, tipo_corto, process_id=process_id)
+
+        except Exception as e:
+            logger.error(
+                "Error procesando %s (%s): %s", tipo_key, blob_name, e,
+                exc_info=True
+            )
+            raise
 
 
 # =========================================================
 # Blob Trigger principal
 # =========================================================
 
+# Carpeta (con el contenedor) que vigila el trigger
+BLOB_TRIGGER_PREFIX = "bronze/conecta/vivienda/1/"
+
+
 @app.blob_trigger(
     arg_name="blob",
-    path="bronze/conecta/vivienda/1/{name}",
+    path=f"{BLOB_TRIGGER_PREFIX}{{name}}",
     connection="AzureWebJobsStorage",
 )
 def procesar_documento_blob(blob: func.InputStream):
@@ -297,19 +552,43 @@ def procesar_documento_blob(blob: func.InputStream):
     """
 
     blob_name = blob.name
-    logger.info(f"Blob Trigger activado (raíz): {blob_name}")
+    logger.info("Blob Trigger activado (raíz): %s", blob_name)
 
     nombre_archivo = os.path.basename(blob_name)
     tipo_key = detectar_tipo_por_nombre(nombre_archivo)
 
-    if not tipo_key:
+    if tipo_key:
+        # Llamamos a process_blob con el tipo_key
+        process_blob(blob, tipo_key)
+        return
+
+    if not settings.classifier_enabled or not blob_name.lower().endswith(".pdf"):
         logger.error(
-            f"No se pudo determinar el tipo de documento para {blob_name}. Se omite."
+            "No se pudo determinar el tipo de documento para %s. Se omite.", blob_name
+        )
+        return
+
+    # Respaldo: clasificar por el contenido de la primera página
+    pdf_bytes = blob.read()
+    clasificacion = None
+    try:
+        clasificacion = clasificar_por_contenido(pdf_bytes)
+    except Exception as e:
+        logger.warning("No se pudo clasificar %s por contenido: %s", blob_name, e)
+
+    if clasificacion is not None and clasificacion.tipo_key:
+        logger.info(
+            "Tipo de %s detectado por contenido: %s (score=%.3f, margen=%.3f, fuente=%s)",
+            blob_name, clasificacion.tipo_key, clasificacion.score, clasificacion.margin, clasificacion.source,
         )
+        process_blob(blob, clasificacion.tipo_key, pdf_bytes=pdf_bytes)
         return
 
-    # Llamamos a process_blob con el tipo_key
-    process_blob(blob, tipo_key)
+    ruta = poner_en_cuarentena(pdf_bytes, blob_name, clasificacion)
+    logger.warning(
+        "No se pudo determinar el tipo de documento para %s; copiado a cuarentena: %s",
+        blob_name, ruta,
+    )
 
 
 # =========================================================
@@ -332,25 +611,12 @@ def cleanup_bronze_timer(myTimer: func.TimerRequest) -> None:
     try:
         retention_days = settings.bronze_retention_days
         now_utc = datetime.datetime.now(datetime.timezone.utc)
+        container = settings.datalake_container_bronze
 
-        account_url = f"https://{settings.datalake_account_name}.dfs.core.windows.net"
-        data_lake_client = DataLakeServiceClient(
-            account_url=account_url,
-            credential=settings.datalake_account_key
-        )
-
-        file_system_client = data_lake_client.get_file_system_client(
-            settings.datalake_container_bronze
-        )
-
-        paths = file_system_client.get_paths(recursive=True)
         deleted_count = 0
 
-        for path in paths:
-            if path.is_directory:
-                continue
-
-            last_modified = path.last_modified
+        for stored in datalake.list_file_properties(container):
+            last_modified = stored.last_modified
             if not last_modified:
                 continue
 
@@ -366,23 +632,21 @@ def cleanup_bronze_timer(myTimer: func.TimerRequest) -> None:
             days_elapsed = business_days(last_modified, now_utc)
 
             if days_elapsed >= retention_days:
-                file_client = file_system_client.get_file_client(path.name)
-                file_client.delete_file()
+                datalake.delete_file(container, stored.name)
 
                 logger.info(
-                    f"Eliminado archivo: {path.name} | "
-                    f"Días hábiles transcurridos: {days_elapsed}"
+                    "Eliminado archivo: %s | Días hábiles transcurridos: %s", stored.name, days_elapsed
                 )
 
                 deleted_count += 1
 
         logger.info(
-            f"Limpieza completada. {deleted_count} archivos eliminados."
+            "Limpieza completada. %s archivos eliminados.", deleted_count
         )
 
     except Exception as e:
         logger.error(
-            f"Error en limpieza automática: {str(e)}",
+            "Error en limpieza automática: %s", e,
             exc_info=True
         )
         raise
\ No newline at end of file
@@ -2,10 +2,11 @@ import logging
 import azure.functions as func
 
 from processors import EstudioTitulosProcessor
-from utils import setup_logging
+from config import get_settings
+from utils import configure_logging
 
 # Configurar logging
-setup_logging()
+configure_logging(get_settings())
 logger = logging.getLogger(__name__)
 
 
@@ -23,19 +24,19 @@ def process_estudio_titulos(blob: func.InputStream) -> None:
     """
     try:
         blob_name = blob.name
-        logger.info(f"Blob trigger activated for Estudio de Titulos: {blob_name}")
+        logger.info("Blob trigger activated for Estudio de Titulos: %s", blob_name)
 
         # Validar que sea un archivo PDF
         if not blob_name.lower().endswith('.pdf'):
-            logger.warning(f"Skipping non-PDF file: {blob_name}")
+            logger.warning("Skipping non-PDF file: %s", blob_name)
             return
 
         # Leer contenido del blob
         pdf_bytes = blob.read()
-        logger.info(f"Read {len(pdf_bytes)} bytes from blob")
+        logger.info("Read %s bytes from blob", len(pdf_bytes))
 
         if len(pdf_bytes) == 0:
-            logger.error(f"Empty blob received: {blob_name}")
+            logger.error("Empty blob received: %s", blob_name)
             return
 
         # Procesar documento
@@ -45,8 +46,8 @@ def process_estudio_titulos(blob: func.InputStream) -> None:
             source_path=blob_name
         )
 
-        logger.info(f"Processing completed successfully. Output: {output_path}")
+        logger.info("Processing completed successfully. Output: %s", output_path)
 
     except Exception as e:
-        logger.exception(f"Error processing Estudio de Titulos: {blob.name}")
+        logger.exception("Error processing Estudio de Titulos: %s", blob.name)
         raise
@@ -1,11 +1,13 @@
-from .base_processor import BaseDocumentProcessor
-from .estudio_titulos_processor import EstudioTitulosProcessor
-from .minuta_cancelacion_processor import MinutaCancelacionProcessor
-from .minuta_constitucion_processor import MinutaConstitucionProcessor
+from utils.lazy import lazy_exports
 
-__all__ = [
-    "BaseDocumentProcessor",
-    "EstudioTitulosProcessor",
-    "MinutaCancelacionProcessor",
-    "MinutaConstitucionProcessor",
-]
+# Cada procesador importa los SDKs de OCR y OpenAI: se cargan al pedirlo
+_EXPORTS = {
+    "BaseDocumentProcessor": ".base_processor",
+    "EstudioTitulosProcessor": ".estudio_titulos_processor",
+    "MinutaCancelacionProcessor": ".minuta_cancelacion_processor",
+    "MinutaConstitucionProcessor": ".minuta_constitucion_processor",
+}
+
+__getattr__ = lazy_exports(__name__, _EXPORTS)
+
+__all__ = list(_EXPORTS)
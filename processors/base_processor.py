@@ -1,21 +1,44 @@
 from abc import ABC, abstractmethod
 from datetime import datetime
 import logging
-from typing import Type
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Type
 from pydantic import BaseModel
 
 from services import DocumentIntelligenceService, AzureOpenAIService
+from services.ocr_result import OcrResult, DETAIL_CONTENT, DETAIL_LAYOUT
 from config import get_settings
+from schemas.panel_row import PanelRow, get_field_table
+from prompts.extraction_prompt import get_extraction_prompt, known_fields_context
+from utils import telemetry
+from utils.cost_ledger import CostLedger
+from utils.model_routing import BATCH, FAST, RoutingDecision, RoutingPolicy, missing_critical, route
+from utils.page_selector import PageSelection, PageSelector
+from utils.regex_extractor import (
+    FieldMatch, FieldRule, RegexPreExtractor, covers_table, hint_values, merge_into_panel_fields,
+    resolved_values,
+)
 
 
 class BaseDocumentProcessor(ABC):
     """Procesador base abstracto para documentos PDF."""
 
+    # Secciones del OCR que necesita el procesador (ver services/ocr_result.py)
+    ocr_detail: str = DETAIL_CONTENT
+    # Términos clave para seleccionar páginas antes de la extracción (None = texto completo)
+    page_selection_terms: Optional[Dict[str, float]] = None
+    # Reglas regex de pre-extracción para campos con formato fijo (ver utils/regex_extractor.py)
+    preextraction_rules: Sequence[FieldRule] = ()
+    # Umbrales para el despliegue rápido y campos críticos que fuerzan escalar (ver utils/model_routing.py)
+    model_routing: Optional[RoutingPolicy] = None
+
     def __init__(self):
         self.logger = logging.getLogger(self.__class__.__name__)
         self._settings = get_settings()
         self._doc_intelligence = DocumentIntelligenceService()
         self._openai = AzureOpenAIService()
+        # Precompila el prompt de extracción (prefijo estático + schema compacto)
+        get_extraction_prompt(self.system_prompt, self.schema_class)
 
     @property
     @abstractmethod
@@ -32,49 +55,248 @@ class BaseDocumentProcessor(ABC):
     def schema_class(self) -> Type[BaseModel]:
         pass
 
-    def process(self, pdf_bytes: bytes, source_path: str) -> dict:
+    @property
+    def extraction_version(self) -> str:
+        """Versión (hash de prompt + schema) con la que este procesador extrae."""
+        return get_extraction_prompt(self.system_prompt, self.schema_class).version
+
+    def process(
+        self,
+        pdf_bytes: bytes,
+        source_path: str,
+        on_ocr: Optional[Callable[[OcrResult], None]] = None,
+    ) -> dict:
         """
         Procesa un documento PDF y retorna los datos estructurados.
+
+        Si se recibe on_ocr, se invoca con el resultado de OCR completo
+        (layout) antes de la extracción, p. ej. para persistirlo.
         """
         try:
-            self.logger.info(f"Procesando {self.system_name}: {source_path}")
-            start = datetime.now()
+            self.logger.info("Procesando %s: %s", self.system_name, source_path)
 
-            # OCR con Document Intelligence
-            ocr_result = self._doc_intelligence.analyze_document(pdf_bytes)
-            document_text = ocr_result.get("content", "")
-            if not document_text.strip():
-                raise ValueError("Document Intelligence devolvió contenido vacío")
-
-            # Extracción con OpenAI (incluye chunking automático)
-            extracted_data = self._openai.extract_structured_data(
-                document_text=document_text,
-                system_prompt=self.system_prompt,
-                schema_class=self.schema_class
+            # OCR con Document Intelligence (se cobra por página analizada)
+            detail = DETAIL_LAYOUT if on_ocr else self.ocr_detail
+            ocr_start = time.perf_counter()
+            ocr_result = self._doc_intelligence.analyze_document(pdf_bytes, detail=detail)
+            ledger = CostLedger()
+            ledger.record(
+                "ocr",
+                ocr_pages=ocr_result.page_count,
+                latency_ms=(time.perf_counter() - ocr_start) * 1000.0,
             )
+            if on_ocr:
+                on_ocr(ocr_result)
+
+        except Exception as e:
+            self.logger.error("Error procesando %s: %s", source_path, e)
+            raise
+
+        return self.process_ocr_result(ocr_result, source_path, ledger=ledger)
+
+    def process_ocr_result(
+        self,
+        ocr_result: OcrResult,
+        source_path: str,
+        ledger: Optional[CostLedger] = None,
+        batch_responses: Optional[List[Optional[dict]]] = None,
+    ) -> dict:
+        """
+        Extrae, limpia y valida a partir de un resultado de OCR ya disponible
+        (recién calculado o cargado desde un artefacto .ocrb), sin llamar a
+        Document Intelligence. Los consumos se suman a ledger (o a uno nuevo).
+
+        Con batch_responses (respuestas del endpoint batch para las
+        solicitudes de batch_requests, en orden) no se llama al LLM.
+        """
+        try:
+            start = datetime.now()
+            self._openai.reset_token_usage()
+            ledger = ledger if ledger is not None else CostLedger()
+
+            table = get_field_table(self.system_name)
+            document_text, matches, seleccion = self._prepare_extraction(ocr_result, ledger)
+
+            # Extracción con OpenAI (incluye chunking automático), en el despliegue según el tamaño
+            if batch_responses is not None:
+                deployments = {r.get("model") for r in batch_responses if r}
+                ruteo = RoutingDecision(BATCH, ", ".join(sorted(d for d in deployments if d)), "batch")
+            else:
+                ruteo = self._route_model(document_text, ocr_result.page_count)
+            cleaned_data = self._extract(document_text, ocr_result, matches, ruteo, ledger, batch_responses)
+            # Fila compacta de PanelFields, construida una sola vez para las validaciones
+            panel = PanelRow.from_panel_fields(cleaned_data.get("PanelFields", []), table)
 
-            # Limpieza genérica
-            cleaned_data = self._clean_extracted_data(extracted_data)
+            # Escalamiento: faltan campos críticos tras la extracción rápida
+            faltantes = missing_critical(panel, self.model_routing.critical_fields) if ruteo.tier == FAST else []
+            if faltantes:
+                self.logger.warning(
+                    "Faltan campos críticos con %s (%s); se escala a %s",
+                    ruteo.deployment, ", ".join(faltantes), self._settings.azure_openai_deployment,
+                )
+                ledger.stages["extraction.descartada"] = ledger.stages.pop("extraction")
+                ruteo.escalate(self._settings.azure_openai_deployment, faltantes)
+                cleaned_data = self._extract(document_text, ocr_result, matches, ruteo, ledger)
+                panel = PanelRow.from_panel_fields(cleaned_data.get("PanelFields", []), table)
+            ledger.info["ruteo"] = ruteo.label
 
             # Enriquecer con metadatos (sin guardar, solo para retorno)
-            enriched = self._enrich_metadata(cleaned_data, source_path, ocr_result)
+            enriched = self._enrich_metadata(
+                cleaned_data, source_path, ocr_result, ledger, seleccion, matches, ruteo
+            )
 
             # Validaciones específicas
-            validated = self._validate_extracted_data(enriched)
+            with telemetry.stage_span("validation"):
+                validated = self._validate_extracted_data(enriched, panel)
 
-            self.logger.info(f"Procesado en {(datetime.now()-start).total_seconds():.2f}s")
+            self.logger.info("Procesado en %.2fs", (datetime.now()-start).total_seconds())
             return validated
 
         except Exception as e:
-            self.logger.error(f"Error procesando {source_path}: {e}")
+            self.logger.error("Error procesando %s: %s", source_path, e)
             raise
 
+    def _route_model(self, document_text: str, pages: int) -> RoutingDecision:
+        """Despliegue para la extracción según model_routing y MODEL_ROUTING_THRESHOLDS."""
+        policy = self.model_routing
+        if policy is not None:
+            policy = policy.with_overrides(self._settings.model_routing_thresholds.get(self.system_name))
+        ruteo = route(
+            policy, len(document_text), pages,
+            self._settings.azure_openai_fast_deployment, self._settings.azure_openai_deployment,
+        )
+        self.logger.info("Ruteo de modelo: %s (%s)", ruteo.deployment, ruteo.reason)
+        return ruteo
+
+    def _prepare_extraction(self, ocr_result: OcrResult, ledger: CostLedger
+                            ) -> Tuple[str, Dict[str, FieldMatch], Optional[PageSelection]]:
+        """Texto para el LLM, campos pre-extraídos y selección de páginas."""
+        document_text = ocr_result.content
+        if not document_text.strip():
+            raise ValueError("Document Intelligence devolvió contenido vacío")
+
+        # Pre-extracción determinista sobre el texto completo
+        matches = self._pre_extract(ocr_result.content)
+
+        # Un documento que por su largo va a map-reduce se envía completo: la
+        # decisión se toma sobre el OCR, no sobre el texto ya seleccionado
+        if self._settings.mapreduce_enabled and len(document_text) >= self._settings.mapreduce_min_characters:
+            self.logger.info("Documento de %d caracteres: map-reduce sin selección de páginas", len(document_text))
+            return document_text, matches, None
+
+        # Solo las páginas relevantes, dentro del presupuesto de tokens
+        seleccion = self._select_pages(ocr_result)
+        if seleccion is not None:
+            document_text = seleccion.text
+            ledger.info["tokens_ahorrados_seleccion"] = seleccion.tokens_saved
+        return document_text, matches, seleccion
+
+    def batch_requests(self, ocr_result: OcrResult) -> List[dict]:
+        """
+        Cuerpos de /chat/completions para extraer el documento en batch (uno
+        por fragmento); vacío si la pre-extracción resuelve todos los campos.
+        Las respuestas se pasan luego a process_ocr_result(batch_responses=...).
+        """
+        document_text, matches, _ = self._prepare_extraction(ocr_result, CostLedger())
+        if self._settings.preextraction_skip_llm and covers_table(matches, get_field_table(self.system_name)):
+            return []
+        return self._openai.batch_request_bodies(
+            document_text,
+            self.system_prompt,
+            self.schema_class,
+            context=known_fields_context(resolved_values(matches), hint_values(matches)),
+        )
+
+    def _extract(self, document_text: str, ocr_result: OcrResult, matches: Dict[str, FieldMatch],
+                 ruteo: RoutingDecision, ledger: CostLedger,
+                 batch_responses: Optional[List[Optional[dict]]] = None) -> dict:
+        """Extracción con el LLM en el despliegue de ruteo, fusión con la pre-extracción y limpieza."""
+        table = get_field_table(self.system_name)
+        with telemetry.stage_span(
+            "extraction", pages=ocr_result.page_count, characters=len(document_text),
+            deployment=ruteo.deployment, escalated=ruteo.escalated,
+        ) as span:
+            before = self._openai.get_token_usage()
+            llm_start = time.perf_counter()
+            if batch_responses is not None:
+                extracted_data = self._openai.extract_from_batch(batch_responses, self.schema_class, table)
+            elif self._settings.preextraction_skip_llm and covers_table(matches, table):
+                self.logger.info("Todos los campos resueltos por reglas; se omite el LLM")
+                extracted_data = {"PanelFields": []}
+            else:
+                extracted_data = self._openai.extract_structured_data(
+                    document_text=document_text,
+                    system_prompt=self.system_prompt,
+                    schema_class=self.schema_class,
+                    context=known_fields_context(resolved_values(matches), hint_values(matches)),
+                    field_table=table,
+                    deployment=ruteo.deployment,
+                )
+            # Solo lo consumido en esta extracción (con escalamiento hay dos)
+            usage = {k: v - before.get(k, 0) for k, v in self._openai.get_token_usage().items()}
+            telemetry.set_attributes(span, **usage)
+        ledger.record_tokens("extraction", usage, latency_ms=(time.perf_counter() - llm_start) * 1000.0)
+        ledger.info.update({
+            "llamadas_llm": self._openai.get_token_usage().get("llamadas", 0),
+            "chunking": f"{self._settings.chunk_max_characters}/{self._settings.chunk_overlap}",
+        })
+        if matches:
+            extracted_data["PanelFields"] = merge_into_panel_fields(
+                extracted_data.get("PanelFields", []), matches, table
+            )
+
+        # Limpieza genérica
+        with telemetry.stage_span("cleaning"):
+            return self._clean_extracted_data(extracted_data)
+
+    def _pre_extract(self, text: str) -> Dict[str, FieldMatch]:
+        """Campos encontrados por preextraction_rules (vacío si no hay reglas)."""
+        if not self.preextraction_rules or not self._settings.preextraction_enabled:
+            return {}
+        with telemetry.stage_span("preextraction") as span:
+            matches = RegexPreExtractor(self.preextraction_rules).extract(text)
+            resolved = sum(1 for m in matches.values() if m.confident)
+            telemetry.set_attributes(span, resolved=resolved, hints=len(matches) - resolved)
+        if matches:
+            self.logger.info(
+                "Pre-extracción: %d campos resueltos, %d con candidatos", resolved, len(matches) - resolved
+            )
+        return matches
+
+    def _select_pages(self, ocr_result: OcrResult) -> Optional[PageSelection]:
+        """Páginas relevantes según page_selection_terms; None si no aplica."""
+        if not self.page_selection_terms or not self._settings.page_selection_enabled:
+            return None
+        with telemetry.stage_span("page_selection", pages=ocr_result.page_count) as span:
+            seleccion = PageSelector(
+                self.page_selection_terms,
+                token_budget=self._settings.page_selection_token_budget,
+            ).select(ocr_result)
+            if seleccion is None:
+                return None
+            telemetry.set_attributes(
+                span,
+                kept=len(seleccion.kept),
+                summarized=len(seleccion.summarized),
+                dropped=len(seleccion.dropped),
+                tokens_saved=seleccion.tokens_saved,
+            )
+        self.logger.info(
+            "Selección de páginas: %d conservadas, %d resumidas, %d descartadas; ~%d tokens ahorrados",
+            len(seleccion.kept), len(seleccion.summarized), len(seleccion.dropped), seleccion.tokens_saved,
+        )
+        return seleccion
+
     def _clean_extracted_data(self, data: dict) -> dict:
         # Implementar limpieza común, por ejemplo usando JsonCleaner
         from utils import JsonCleaner
         return JsonCleaner.clean_dict(data)
 
-    def _enrich_metadata(self, data: dict, source_path: str, ocr_result: dict) -> dict:
+    def _enrich_metadata(self, data: dict, source_path: str, ocr_result: OcrResult,
+                         ledger: Optional[CostLedger] = None,
+                         seleccion: Optional[PageSelection] = None,
+                         preextraccion: Optional[Dict[str, FieldMatch]] = None,
+                         ruteo: Optional[RoutingDecision] = None) -> dict:
         file_name = source_path.split("/")[-1]
         processing_metadata = {
             "_procesamiento": {
@@ -82,13 +304,24 @@ class BaseDocumentProcessor(ABC):
                 "archivo_origen": file_name,
                 "ruta_origen": source_path,
                 "sistema": self.system_name,
-                "paginas_procesadas": len(ocr_result.get("pages", [])),
-                "caracteres_extraidos": len(ocr_result.get("content", ""))
+                "paginas_procesadas": ocr_result.page_count,
+                "caracteres_extraidos": len(ocr_result.content),
+                "tokens": self._openai.get_token_usage(),
+                "version_extraccion": self.extraction_version,
+                "costos": (ledger or CostLedger()).to_dict(self._settings.cost_prices),
             }
         }
+        if seleccion is not None:
+            processing_metadata["_procesamiento"]["seleccion_paginas"] = seleccion.to_dict()
+        if ruteo is not None:
+            processing_metadata["_procesamiento"]["ruteo_modelo"] = ruteo.to_dict()
+        if preextraccion:
+            processing_metadata["_procesamiento"]["preextraccion"] = {
+                name: match.to_dict() for name, match in preextraccion.items()
+            }
         return {**data, **processing_metadata}
 
-    def _validate_extracted_data(self, data: dict) -> dict:
+    def _validate_extracted_data(self, data: dict, panel: PanelRow) -> dict:
         # Por defecto, retorna igual
         return data
     
\ No newline at end of file
@@ -2,7 +2,13 @@ from typing import Type
 from pydantic import BaseModel
 from .base_processor import BaseDocumentProcessor
 from schemas.panel_schemas import EstudioTitulosPlano
+from schemas.panel_row import PanelRow
 from prompts import ESTUDIO_TITULOS_SYSTEM_PROMPT
+from services.ocr_result import DETAIL_PARAGRAPHS
+from utils import regex_extractor as rx
+from utils.model_routing import RoutingPolicy
+from utils.page_selector import CERTIFICADO_TERMS
+from utils.regex_extractor import FieldRule
 
 class EstudioTitulosProcessor(BaseDocumentProcessor):
     """
@@ -12,6 +18,19 @@ class EstudioTitulosProcessor(BaseDocumentProcessor):
     EstudioTitulosPlano.
     """
 
+    # Párrafos con rol y página para seleccionar las páginas del certificado
+    ocr_detail = DETAIL_PARAGRAPHS
+    page_selection_terms = CERTIFICADO_TERMS
+    preextraction_rules = (
+        FieldRule("VIV_PrestamoDireccionMatricula", rx.MATRICULA, normalize=rx.normalize_matricula),
+    )
+    # Certificados con anotaciones: solo el despliegue rápido si son muy cortos
+    model_routing = RoutingPolicy(
+        max_characters=12000,
+        max_pages=4,
+        critical_fields=("VIV_PrestamoDireccionMatricula", "VIV_Compradores"),
+    )
+
     @property
     def system_name(self) -> str:
         return "estudio_titulos"
@@ -24,18 +43,15 @@ class EstudioTitulosProcessor(BaseDocumentProcessor):
     def schema_class(self) -> Type[BaseModel]:
         return EstudioTitulosPlano
 
-    def _validate_extracted_data(self, data: dict) -> dict:
-        # Convertir PanelFields a dict para fácil acceso
-        field_dict = {item['InternalName']: item.get('TextValue') or item.get('NumberValue')
-                      for item in data.get('PanelFields', [])}
+    def _validate_extracted_data(self, data: dict, panel: PanelRow) -> dict:
         # Validar campos críticos
-        if not field_dict.get('VIV_PrestamoDireccionMatricula'):
+        if not panel.get('VIV_PrestamoDireccionMatricula'):
             self.logger.warning("No se encontró matrícula inmobiliaria en el documento")
-        if not field_dict.get('VIV_Compradores'):
+        if not panel.get('VIV_Compradores'):
             self.logger.warning("No se encontraron propietarios")
         # Agregar resumen simple (opcional)
         data['_resumen'] = {
-            'matricula': field_dict.get('VIV_PrestamoDireccionMatricula'),
-            'propietarios': field_dict.get('VIV_Compradores'),
+            'matricula': panel.get('VIV_PrestamoDireccionMatricula'),
+            'propietarios': panel.get('VIV_Compradores'),
         }
         return data
\ No newline at end of file
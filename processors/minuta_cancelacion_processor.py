@@ -2,7 +2,11 @@ from typing import Type
 from pydantic import BaseModel
 from .base_processor import BaseDocumentProcessor
 from schemas.panel_schemas import MinutaCancelacionPlano
+from schemas.panel_row import PanelRow
 from prompts import MINUTA_CANCELACION_SYSTEM_PROMPT
+from utils import regex_extractor as rx
+from utils.model_routing import RoutingPolicy
+from utils.regex_extractor import FieldRule
 
 class MinutaCancelacionProcessor(BaseDocumentProcessor):
     """
@@ -11,6 +15,27 @@ class MinutaCancelacionProcessor(BaseDocumentProcessor):
     detalles de la escritura pública de cancelación, y la información del inmueble afectado. Devuelve la información 
     estructurada según el esquema definido en MinutaCancelacionPlano.
     """
+
+    # La escritura, fecha y notaría de la minuta suelen ser las de la hipoteca que se
+    # cancela (la de cancelación aún está en blanco), y la resolución puede ser otra:
+    # solo pistas, el modelo decide cuál es la de CANCELACION
+    preextraction_rules = (
+        FieldRule("VIV_resolucionNombramiento", rx.RESOLUCION, hint_only=True),
+        FieldRule("VIV_numeroEscrituraPublica", rx.ESCRITURA, normalize=rx.digits, hint_only=True),
+        FieldRule("VIV_fechaEscrituraPublica", rx.FECHA_ESCRITURA, hint_only=True),
+        FieldRule("VIV_notariaEscrituraPublica", rx.NOTARIA, hint_only=True),
+        FieldRule("VIV_folioMatriculaInmobiliaria", rx.MATRICULA, normalize=rx.normalize_matricula),
+        FieldRule("VIV_oficinaMatriculaInmobiliaria", rx.OFICINA_REGISTRO),
+        FieldRule("VIV_direccionInmueble", rx.DIRECCION),
+    )
+    # Minutas cortas al despliegue rápido; sin matrícula se repite con el grande. La
+    # escritura de cancelación no es crítica: en el borrador suele venir en blanco
+    model_routing = RoutingPolicy(
+        max_characters=30000,
+        max_pages=15,
+        critical_fields=("VIV_folioMatriculaInmobiliaria",),
+    )
+
     @property
     def system_name(self) -> str:
         return "minuta_cancelacion"
@@ -23,9 +48,7 @@ class MinutaCancelacionProcessor(BaseDocumentProcessor):
     def schema_class(self) -> Type[BaseModel]:
         return MinutaCancelacionPlano
 
-    def _validate_extracted_data(self, data: dict) -> dict:
-        field_dict = {item['InternalName']: item.get('TextValue') or item.get('NumberValue')
-                      for item in data.get('PanelFields', [])}
-        if not field_dict.get('VIV_numeroEscrituraPublica'):
+    def _validate_extracted_data(self, data: dict, panel: PanelRow) -> dict:
+        if not panel.get('VIV_numeroEscrituraPublica'):
             self.logger.warning("No se encontró número de escritura de cancelación")
         return data
\ No newline at end of file
@@ -2,14 +2,31 @@ from typing import Type
 from pydantic import BaseModel
 from .base_processor import BaseDocumentProcessor
 from schemas.panel_schemas import MinutaConstitucionPlano
+from schemas.panel_row import PanelRow
 from prompts import MINUTA_CONSTITUCION_SYSTEM_PROMPT
+from utils import regex_extractor as rx
+from utils.model_routing import RoutingPolicy
+from utils.regex_extractor import FieldRule
 
 class MinutaConstitucionProcessor(BaseDocumentProcessor):
     """
     Procesador especializado en extracción de información de minutas de constitución de hipotecas en Colombia. 
     Utiliza un sistema prompt detallado para guiar la extracción de datos relevantes sobre la resolución de nombramiento, 
     detalles de la escritura pública de constitución, información del inmueble afectado,"""
-    
+
+    # Las cédulas/NIT son de varias personas (vendedor, compradores, apoderados): solo pistas
+    preextraction_rules = (
+        FieldRule("VIV_gradoHipoteca", rx.GRADO_HIPOTECA, normalize=rx.normalize_grado),
+        FieldRule("VIV_identificacionCompradores", rx.CEDULA, normalize=rx.digits, hint_only=True),
+        FieldRule("VIV_identificacionCompradores", rx.NIT, hint_only=True),
+    )
+    # Minutas cortas al despliegue rápido; sin compradores o valor se repite con el grande
+    model_routing = RoutingPolicy(
+        max_characters=30000,
+        max_pages=15,
+        critical_fields=("VIV_Compradores", "TPC_ValorComercial"),
+    )
+
     @property
     def system_name(self) -> str:
         return "minuta_constitucion"
@@ -22,11 +39,9 @@ class MinutaConstitucionProcessor(BaseDocumentProcessor):
     def schema_class(self) -> Type[BaseModel]:
         return MinutaConstitucionPlano
 
-    def _validate_extracted_data(self, data: dict) -> dict:
-        field_dict = {item['InternalName']: item.get('TextValue') or item.get('NumberValue')
-                      for item in data.get('PanelFields', [])}
-        if not field_dict.get('VIV_Compradores'):
+    def _validate_extracted_data(self, data: dict, panel: PanelRow) -> dict:
+        if not panel.get('VIV_Compradores'):
             self.logger.warning("No se encontraron compradores")
-        if not field_dict.get('TPC_ValorComercial'):
+        if not panel.get('TPC_ValorComercial'):
             self.logger.warning("No se encontró valor de compraventa")
         return data
\ No newline at end of file
@@ -1,9 +1,12 @@
 from .estudio_titulos_prompt import ESTUDIO_TITULOS_SYSTEM_PROMPT
 from .minuta_cancelacion_prompt import MINUTA_CANCELACION_SYSTEM_PROMPT
 from .minuta_constitucion_prompt import MINUTA_CONSTITUCION_SYSTEM_PROMPT
+from .extraction_prompt import ExtractionPrompt, get_extraction_prompt
 
 __all__ = [
     "ESTUDIO_TITULOS_SYSTEM_PROMPT",
     "MINUTA_CANCELACION_SYSTEM_PROMPT",
     "MINUTA_CONSTITUCION_SYSTEM_PROMPT",
+    "ExtractionPrompt",
+    "get_extraction_prompt",
 ]
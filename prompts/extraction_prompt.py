@@ -0,0 +1,152 @@
+"""
+Prompt de extracción precompilado por (system prompt, schema).
+
+La parte estática (system prompt del procesador, instrucciones y schema JSON
+compacto) se construye una sola vez y va primero, en el mensaje de sistema;
+el texto del documento va al final, en el mensaje de usuario. Así el prefijo
+es idéntico entre llamadas del mismo procesador y el proveedor puede
+reutilizarlo con prompt caching.
+
+Junto al prompt se precalcula el ``response_format`` de structured outputs
+(``json_schema`` estricto generado desde el schema pydantic), para los
+despliegues que lo soportan.
+"""
+
+import hashlib
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from utils import json_codec
+
+
+EXTRACTION_INSTRUCTIONS = """## INSTRUCCIONES DE EXTRACCIÓN:
+1. Extrae TODA la información relevante del documento que coincida con los campos del schema.
+2. Si un campo no se encuentra, usa null o cadena vacía.
+3. Para listas, incluye todos los elementos encontrados.
+4. Mantén los formatos originales.
+5. Responde UNICAMENTE con el JSON estructurado.
+
+## SCHEMA JSON ESPERADO:
+"""
+
+DOCUMENT_HEADER = "## DOCUMENTO:\n"
+DOCUMENT_FOOTER = "\n\n## RESPUESTA JSON:"
+
+RESOLVED_HEADER = "## CAMPOS YA EXTRAÍDOS (no los incluyas en la respuesta):\n"
+HINTS_HEADER = "## CANDIDATOS DETECTADOS (verifícalos contra el documento):\n"
+PENDING_HEADER = "## CAMPOS PENDIENTES (devuelve solo estos en PanelFields; omite los demás):\n"
+
+# Claves cuyo valor es un mapeo de nombres (no se eliminan sus "title")
+_NAME_MAPPINGS = ("properties", "$defs", "definitions")
+
+
+def compact_schema(schema: Any, _in_names: bool = False) -> Any:
+    """
+    Elimina los "title" autogenerados por pydantic, que no aportan al modelo.
+
+    Los nombres dentro de "properties"/"$defs" se conservan aunque alguno se
+    llame "title".
+    """
+    if isinstance(schema, dict):
+        result = {}
+        for key, value in schema.items():
+            if key == "title" and not _in_names and isinstance(value, str):
+                continue
+            result[key] = compact_schema(value, _in_names=key in _NAME_MAPPINGS and not _in_names)
+        return result
+    if isinstance(schema, list):
+        return [compact_schema(item) for item in schema]
+    return schema
+
+
+class _NotStrict(Exception):
+    pass
+
+
+def strict_json_schema(schema: Any) -> Optional[Dict[str, Any]]:
+    """
+    Versión estricta del schema para structured outputs: todo objeto con
+    ``additionalProperties: false`` y todas sus propiedades en ``required``
+    (las opcionales ya admiten null), sin valores por defecto.
+
+    None si el schema no es representable en modo estricto (p. ej. un
+    diccionario libre como NotasFragmento.inmueble).
+    """
+
+    def walk(node: Any, in_names: bool = False) -> Any:
+        if isinstance(node, list):
+            return [walk(item) for item in node]
+        if not isinstance(node, dict):
+            return node
+        if in_names:
+            return {name: walk(sub) for name, sub in node.items()}
+        result = {
+            key: walk(value, in_names=key in _NAME_MAPPINGS)
+            for key, value in node.items() if key != "default"
+        }
+        if result.get("type") == "object" or "properties" in result:
+            if result.get("additionalProperties") not in (None, False):
+                raise _NotStrict
+            result["additionalProperties"] = False
+            result["required"] = list(result.get("properties", {}))
+        return result
+
+    try:
+        return walk(schema)
+    except _NotStrict:
+        return None
+
+
+class ExtractionPrompt:
+    """Mensajes de extracción con prefijo estático precalculado."""
+
+    __slots__ = ("system_message", "schema_text", "version", "response_format")
+
+    def __init__(self, system_prompt: str, schema: Dict[str, Any]):
+        compact = compact_schema(schema)
+        self.schema_text = json_codec.dumps_str(compact)
+        self.system_message = (
+            f"{system_prompt.strip()}\n\n{EXTRACTION_INSTRUCTIONS}{self.schema_text}"
+        )
+        # Hash de prompt + schema: cambia cuando cambia cualquiera de los dos
+        self.version = hashlib.sha256(self.system_message.encode("utf-8")).hexdigest()[:12]
+        # response_format de structured outputs; None si el schema no admite modo estricto
+        strict = strict_json_schema(compact)
+        self.response_format = None if strict is None else {
+            "type": "json_schema",
+            "json_schema": {"name": schema.get("title") or "extraccion", "strict": True, "schema": strict},
+        }
+
+    def user_message(self, text: str, context: str = "") -> str:
+        return f"{context}{DOCUMENT_HEADER}{text}{DOCUMENT_FOOTER}"
+
+    def messages(self, text: str, context: str = "") -> List[Dict[str, str]]:
+        return [
+            {"role": "system", "content": self.system_message},
+            {"role": "user", "content": self.user_message(text, context)},
+        ]
+
+
+def known_fields_context(resolved: Dict[str, Any], hints: Dict[str, List[str]]) -> str:
+    """
+    Sección previa al documento con los campos ya resueltos (que el modelo
+    no debe devolver) y los candidatos a verificar. Va en el mensaje de
+    usuario para no alterar el prefijo cacheable del mensaje de sistema.
+    """
+    parts = []
+    if resolved:
+        parts.append(RESOLVED_HEADER + "".join(f"- {k}: {v}\n" for k, v in resolved.items()))
+    if hints:
+        parts.append(HINTS_HEADER + "".join(f"- {k}: {' | '.join(v)}\n" for k, v in hints.items()))
+    return "".join(p + "\n" for p in parts)
+
+
+@lru_cache(maxsize=32)
+def get_extraction_prompt(system_prompt: str, schema_class: type) -> ExtractionPrompt:
+    """Prompt precompilado; model_json_schema() se calcula una vez por schema."""
+    return ExtractionPrompt(system_prompt, schema_class.model_json_schema())
+
+
+def pending_fields_context(names: List[str]) -> str:
+    """Sección que limita la respuesta a los campos aún sin valor (extracción incremental por fragmentos)."""
+    return PENDING_HEADER + "".join(f"- {name}\n" for name in names) + "\n"
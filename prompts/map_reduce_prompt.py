@@ -0,0 +1,26 @@
+"""
+Prompts de la extracción map-reduce para documentos muy largos.
+
+La fase map condensa cada fragmento (o un grupo de notas ya condensadas) en
+``NotasFragmento``; la fase reduce usa el prompt normal del procesador sobre
+las notas combinadas, precedidas por ``REDUCE_HEADER``.
+"""
+
+MAP_SYSTEM_PROMPT = """
+Eres un experto en derecho inmobiliario colombiano. Recibes un fragmento de un documento (certificado de tradición y libertad, estudio de títulos o minuta) o notas ya condensadas de varios fragmentos. Condénsalo en notas compactas: solo datos, sin repetir texto legal.
+
+- inmueble: matrícula, dirección, tipo de predio, linderos, avalúo y fecha de expedición del certificado (solo los que aparezcan).
+- propietarios: personas que adquieren el dominio, con identificación, título (escritura, fecha, notaría), fecha y número de anotación.
+- gravamenes: hipotecas y otros gravámenes, con beneficiario, fecha, anotación y si siguen vigentes o la anotación que los cancela.
+- medidas_cautelares: embargos, demandas, prohibiciones y similares, con los mismos datos.
+- limitaciones: limitaciones y afectaciones al dominio (patrimonio de familia, afectación a vivienda familiar, usufructo, servidumbres).
+- otros: hasta 5 datos relevantes que no encajen arriba, una línea cada uno.
+
+Usa fechas AAAA-MM-DD cuando sea posible. Omite listas vacías. No inventes datos.
+"""
+
+REDUCE_HEADER = (
+    "## NOTAS CONDENSADAS DEL DOCUMENTO\n"
+    "El documento original es muy extenso; estas notas resumen todos sus fragmentos en orden "
+    "(propietarios, gravámenes, medidas cautelares y limitaciones con su anotación y vigencia).\n\n"
+)
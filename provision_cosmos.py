@@ -0,0 +1,219 @@
+"""
+Aprovisionamiento de Cosmos DB (una sola vez por entorno, fuera del runtime).
+
+Crea la base de datos y el contenedor si no existen, o actualiza el
+contenedor existente. Aplica la política de indexación del pipeline y el
+modo de throughput configurado. La aplicación no hace llamadas al plano de
+control: enlaza el contenedor directamente y falla con
+CosmosNotProvisionedError si falta.
+
+La política indexa solo las rutas por las que se consulta (caso, proceso,
+tipo, fecha, versión de extracción y claves de los agregados de costos) y
+excluye el resto del documento. ``datosExtraidos`` es grande y no se
+consulta, así que indexarlo solo encarece cada escritura.
+
+Uso:
+    python provision_cosmos.py                # crea o actualiza
+    python provision_cosmos.py --dry-run      # muestra lo que aplicaría
+    python provision_cosmos.py --check        # verifica que exista (exit 1 si no)
+"""
+
+import argparse
+import logging
+import sys
+from typing import Any, Dict, List, Optional
+
+from azure.cosmos import CosmosClient, PartitionKey, ThroughputProperties, exceptions
+
+from config import get_settings
+from utils import configure_logging, json_codec
+
+
+logger = logging.getLogger(__name__)
+
+PARTITION_KEY_PATH = "/tipoDocumento"
+
+# Rutas consultadas por el pipeline (query_documents, get_documents_by_caso, agregados)
+INDEXED_PATHS = (
+    "casoId",
+    "procesoId",
+    "tipoDocumento",
+    "fechaProcesamiento",
+    "versionExtraccion",
+    "tipo",
+    "caso_id",
+    "fecha",
+)
+
+THROUGHPUT_MODES = ("manual", "autoscale", "serverless")
+
+
+def build_indexing_policy(paths=INDEXED_PATHS) -> Dict[str, Any]:
+    """Política consistente que indexa solo ``paths``."""
+    return {
+        "indexingMode": "consistent",
+        "automatic": True,
+        "includedPaths": [{"path": f"/{path}/?"} for path in paths],
+        "excludedPaths": [{"path": "/*"}, {"path": '/"_etag"/?'}],
+        # get_documents_by_caso filtra por caso y ordena por fecha
+        "compositeIndexes": [[
+            {"path": "/casoId", "order": "ascending"},
+            {"path": "/fechaProcesamiento", "order": "ascending"},
+        ]],
+    }
+
+
+def build_throughput(mode: str, throughput: int) -> Optional[ThroughputProperties]:
+    """Throughput del contenedor; None en serverless."""
+    mode = mode.lower()
+    if mode not in THROUGHPUT_MODES:
+        raise ValueError(f"Modo de throughput desconocido: {mode} (use {', '.join(THROUGHPUT_MODES)})")
+    if mode == "serverless":
+        return None
+    if mode == "autoscale":
+        return ThroughputProperties(auto_scale_max_throughput=throughput)
+    return ThroughputProperties(offer_throughput=throughput)
+
+
+def _describe(throughput: Optional[ThroughputProperties]) -> str:
+    if throughput is None:
+        return "serverless"
+    if throughput.auto_scale_max_throughput:
+        return f"autoscale (máx {throughput.auto_scale_max_throughput} RU/s)"
+    return f"manual ({throughput.offer_throughput} RU/s)"
+
+
+def provision(settings=None, client: Optional[CosmosClient] = None, dry_run: bool = False) -> List[str]:
+    """
+    Crea o actualiza la base de datos y el contenedor.
+
+    Returns:
+        list: Acciones aplicadas (o que se aplicarían con dry_run).
+    """
+    settings = settings or get_settings()
+    client = client or CosmosClient(url=settings.cosmos_endpoint, credential=settings.cosmos_key)
+    indexing_policy = build_indexing_policy()
+    throughput = build_throughput(settings.cosmos_throughput_mode, settings.cosmos_throughput)
+    db_name, container_name = settings.cosmos_database_name, settings.cosmos_container_name
+    acciones: List[str] = []
+
+    database = client.get_database_client(db_name)
+    try:
+        database.read()
+    except exceptions.CosmosResourceNotFoundError:
+        acciones.append(f"crear base de datos {db_name}")
+        if not dry_run:
+            database = client.create_database_if_not_exists(id=db_name)
+
+    container = database.get_container_client(container_name)
+    try:
+        properties = container.read()
+    except exceptions.CosmosResourceNotFoundError:
+        properties = None
+
+    if properties is None:
+        acciones.append(f"crear contenedor {container_name} ({PARTITION_KEY_PATH}, {_describe(throughput)})")
+        if not dry_run:
+            kwargs = {"offer_throughput": throughput} if throughput is not None else {}
+            database.create_container_if_not_exists(
+                id=container_name,
+                partition_key=PartitionKey(path=PARTITION_KEY_PATH),
+                indexing_policy=indexing_policy,
+                **kwargs,
+            )
+        return acciones
+
+    paths = properties.get("partitionKey", {}).get("paths", [])
+    if paths != [PARTITION_KEY_PATH]:
+        raise RuntimeError(
+            f"El contenedor {container_name} tiene partition key {paths}; se esperaba {PARTITION_KEY_PATH}. "
+            "La clave de partición no se puede cambiar: cree un contenedor nuevo y migre los datos."
+        )
+
+    if _policy_differs(properties.get("indexingPolicy", {}), indexing_policy):
+        acciones.append(f"actualizar política de indexación de {container_name}")
+        if not dry_run:
+            database.replace_container(
+                container_name,
+                partition_key=PartitionKey(path=PARTITION_KEY_PATH),
+                indexing_policy=indexing_policy,
+            )
+
+    if throughput is not None:
+        acciones.extend(_apply_throughput(container, throughput, dry_run))
+    return acciones
+
+
+def _policy_differs(actual: Dict[str, Any], deseada: Dict[str, Any]) -> bool:
+    def paths(policy: Dict[str, Any], key: str) -> set:
+        return {p["path"] for p in policy.get(key, [])}
+
+    return (
+        actual.get("indexingMode", "consistent").lower() != deseada["indexingMode"]
+        or paths(actual, "includedPaths") != paths(deseada, "includedPaths")
+        or paths(actual, "excludedPaths") != paths(deseada, "excludedPaths")
+        or len(actual.get("compositeIndexes", [])) != len(deseada["compositeIndexes"])
+    )
+
+
+def _apply_throughput(container, throughput: ThroughputProperties, dry_run: bool) -> List[str]:
+    try:
+        actual = container.get_throughput()
+    except exceptions.CosmosHttpResponseError:
+        # Contenedor sin throughput propio (compartido en la base o cuenta serverless)
+        logger.warning("El contenedor no tiene throughput dedicado; no se modifica")
+        return []
+
+    autoscale_actual = bool(actual.auto_scale_max_throughput)
+    autoscale_deseado = bool(throughput.auto_scale_max_throughput)
+    if autoscale_actual != autoscale_deseado:
+        logger.warning(
+            "El contenedor está en %s y se pidió %s: el cambio de modo se hace con la migración "
+            "de throughput del portal o la CLI de Azure, no se aplica aquí",
+            _describe(actual), _describe(throughput),
+        )
+        return []
+
+    if autoscale_deseado:
+        if actual.auto_scale_max_throughput == throughput.auto_scale_max_throughput:
+            return []
+    elif actual.offer_throughput == throughput.offer_throughput:
+        return []
+
+    accion = f"cambiar throughput de {_describe(actual)} a {_describe(throughput)}"
+    if not dry_run:
+        container.replace_throughput(throughput)
+    return [accion]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Aprovisionamiento de Cosmos DB")
+    parser.add_argument("--dry-run", action="store_true", help="Mostrar las acciones sin aplicarlas")
+    parser.add_argument("--check", action="store_true", help="Solo verificar que el contenedor exista")
+    args = parser.parse_args(argv)
+
+    settings = get_settings()
+    configure_logging(settings)
+
+    if args.check:
+        from services.cosmos_db_service import CosmosDBService, CosmosNotProvisionedError
+        try:
+            properties = CosmosDBService().verify_provisioning()
+        except CosmosNotProvisionedError as e:
+            print(e, file=sys.stderr)
+            return 1
+        print(json_codec.dumps_str({
+            "contenedor": properties.get("id"),
+            "partitionKey": properties.get("partitionKey", {}).get("paths"),
+            "indexingPolicy": properties.get("indexingPolicy"),
+        }, indent=True))
+        return 0
+
+    acciones = provision(settings, dry_run=args.dry_run)
+    for accion in acciones or ["sin cambios"]:
+        print(("[dry-run] " if args.dry_run else "") + accion)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,10 @@
+from .engine import RuleEngine, RuleSpec, CompiledRule
+from .viability_rules import DEFAULT_VIABILITY_RULES, build_viability_engine
+
+__all__ = [
+    "RuleEngine",
+    "RuleSpec",
+    "CompiledRule",
+    "DEFAULT_VIABILITY_RULES",
+    "build_viability_engine",
+]
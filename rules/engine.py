@@ -0,0 +1,340 @@
+"""
+Motor de reglas declarativo para la evaluación de viabilidad.
+
+Las reglas se definen como diccionarios (campo, operador, umbral, estado,
+código de razón) y se validan y compilan una sola vez en objetos predicado.
+La evaluación sobre uno o muchos casos no vuelve a consultar settings ni a
+interpretar la definición de cada regla.
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+
+STATUS_APPROVED = "APPROVED"
+STATUS_CONDITIONAL = "CONDITIONAL"
+STATUS_REJECTED = "REJECTED"
+
+# Orden de severidad: una regla nunca puede mejorar el estado ya alcanzado.
+STATUS_RANK = {
+    STATUS_APPROVED: 0,
+    STATUS_CONDITIONAL: 1,
+    STATUS_REJECTED: 2,
+}
+
+_STATUS_BY_RANK = {rank: status for status, rank in STATUS_RANK.items()}
+
+
+def _to_int(value: Any) -> Optional[int]:
+    """Convierte el valor a entero; None si no es interpretable."""
+    if value is None or value == "":
+        return None
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return None
+
+
+def _to_text(value: Any) -> str:
+    return str(value).lower() if value else ""
+
+
+# Cada operador recibe el umbral ya resuelto y devuelve:
+#   (tipo de valor que necesita, función predicado(valor_normalizado) -> bool)
+def _op_missing(threshold: Any) -> Tuple[str, Callable[[Any], bool]]:
+    return "raw", lambda value: not value
+
+
+def _op_present(threshold: Any) -> Tuple[str, Callable[[Any], bool]]:
+    return "raw", lambda value: bool(value)
+
+
+def _op_contains(threshold: Any) -> Tuple[str, Callable[[Any], bool]]:
+    needle = str(threshold).lower()
+    return "text", lambda value: needle in value
+
+
+def _op_not_contains(threshold: Any) -> Tuple[str, Callable[[Any], bool]]:
+    needle = str(threshold).lower()
+    return "text", lambda value: needle not in value
+
+
+def _op_lt(threshold: Any) -> Tuple[str, Callable[[Any], bool]]:
+    limit = int(threshold)
+    return "int", lambda value: value < limit
+
+
+def _op_gt(threshold: Any) -> Tuple[str, Callable[[Any], bool]]:
+    limit = int(threshold)
+    return "int", lambda value: value > limit
+
+
+def _op_outside_range(threshold: Any) -> Tuple[str, Callable[[Any], bool]]:
+    if not isinstance(threshold, (list, tuple)) or len(threshold) != 2:
+        raise ValueError("outside_range requiere un umbral [minimo, maximo]")
+    low, high = int(threshold[0]), int(threshold[1])
+    return "int", lambda value: value < low or value > high
+
+
+OPERATORS: Dict[str, Callable[[Any], Tuple[str, Callable[[Any], bool]]]] = {
+    "missing": _op_missing,
+    "present": _op_present,
+    "contains": _op_contains,
+    "not_contains": _op_not_contains,
+    "lt": _op_lt,
+    "gt": _op_gt,
+    "outside_range": _op_outside_range,
+}
+
+_NO_THRESHOLD = {"missing", "present"}
+
+
+@dataclass(frozen=True)
+class RuleSpec:
+    """Definición declarativa y validada de una regla de viabilidad."""
+
+    id: str
+    field: str
+    status: str
+    code: str
+    message: str
+    conditions: Tuple[Tuple[str, Any], ...]
+    log: str = ""
+    document: str = "estudio_titulos"
+    enabled_by: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, spec: Mapping[str, Any]) -> "RuleSpec":
+        """
+        Valida una definición de regla.
+
+        Acepta un único par ``operator``/``threshold`` o una lista
+        ``conditions`` de pares que deben cumplirse todos.
+
+        Raises:
+            ValueError: Si falta una clave o el operador/estado no existe.
+        """
+        for key in ("id", "field", "status", "code", "message"):
+            if not spec.get(key):
+                raise ValueError(f"Regla inválida, falta '{key}': {dict(spec)}")
+
+        status = spec["status"]
+        if status not in STATUS_RANK or status == STATUS_APPROVED:
+            raise ValueError(f"Regla {spec['id']}: estado no soportado '{status}'")
+
+        raw_conditions = spec.get("conditions")
+        if raw_conditions is None:
+            raw_conditions = [{"operator": spec.get("operator"), "threshold": spec.get("threshold")}]
+        if not raw_conditions:
+            raise ValueError(f"Regla {spec['id']}: debe definir al menos una condición")
+
+        conditions = []
+        for cond in raw_conditions:
+            operator = cond.get("operator")
+            if operator not in OPERATORS:
+                raise ValueError(f"Regla {spec['id']}: operador desconocido '{operator}'")
+            threshold = cond.get("threshold")
+            if threshold is None and operator not in _NO_THRESHOLD:
+                raise ValueError(f"Regla {spec['id']}: el operador '{operator}' requiere threshold")
+            conditions.append((operator, threshold))
+
+        return cls(
+            id=spec["id"],
+            field=spec["field"],
+            status=status,
+            code=spec["code"],
+            message=spec["message"],
+            conditions=tuple(conditions),
+            log=spec.get("log", ""),
+            document=spec.get("document", "estudio_titulos"),
+            enabled_by=spec.get("enabled_by"),
+        )
+
+
+@dataclass
+class RuleStats:
+    """Contadores de una regla compilada."""
+
+    evaluations: int = 0
+    hits: int = 0
+    total_ns: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        avg_us = (self.total_ns / self.evaluations / 1000) if self.evaluations else 0.0
+        return {
+            "evaluations": self.evaluations,
+            "hits": self.hits,
+            "total_ms": round(self.total_ns / 1e6, 4),
+            "avg_us": round(avg_us, 4),
+        }
+
+
+@dataclass
+class CompiledRule:
+    """Regla lista para evaluar: umbrales resueltos y predicados construidos."""
+
+    spec: RuleSpec
+    value_kind: str
+    predicates: Tuple[Callable[[Any], bool], ...]
+    thresholds: Tuple[Any, ...]
+    rank: int
+    stats: RuleStats = field(default_factory=RuleStats)
+
+    def matches(self, value: Any) -> bool:
+        for predicate in self.predicates:
+            if not predicate(value):
+                return False
+        return True
+
+
+def _resolve_threshold(threshold: Any, settings: Any) -> Any:
+    """Resuelve referencias ``{"setting": nombre, "default": valor}``."""
+    if isinstance(threshold, Mapping) and "setting" in threshold:
+        return getattr(settings, threshold["setting"], threshold.get("default"))
+    if isinstance(threshold, (list, tuple)):
+        return [_resolve_threshold(item, settings) for item in threshold]
+    return threshold
+
+
+def compile_rule(spec: RuleSpec, settings: Any = None) -> CompiledRule:
+    """Compila una RuleSpec en un CompiledRule."""
+    kinds = set()
+    predicates = []
+    thresholds = []
+    for operator, threshold in spec.conditions:
+        resolved = _resolve_threshold(threshold, settings)
+        try:
+            kind, predicate = OPERATORS[operator](resolved)
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"Regla {spec.id}: umbral inválido {resolved!r} ({e})") from e
+        kinds.add(kind)
+        predicates.append(predicate)
+        thresholds.append(resolved)
+
+    if len(kinds) != 1:
+        raise ValueError(f"Regla {spec.id}: no se pueden mezclar operadores de texto y numéricos")
+
+    return CompiledRule(
+        spec=spec,
+        value_kind=kinds.pop(),
+        predicates=tuple(predicates),
+        thresholds=tuple(thresholds),
+        rank=STATUS_RANK[spec.status],
+    )
+
+
+class RuleEngine:
+    """
+    Evalúa reglas compiladas sobre los field_dicts de un caso.
+
+    Un caso es un mapeo tipo_documento -> campos (dict o cualquier objeto con
+    ``get``). Las reglas se evalúan en el orden en que se definieron; una regla
+    cuyo estado es menos severo que el ya alcanzado no se evalúa.
+    """
+
+    def __init__(self, rules: Iterable[CompiledRule], timed: bool = False):
+        self._rules: List[CompiledRule] = list(rules)
+        self._timed = timed
+
+    @classmethod
+    def from_specs(
+        cls,
+        specs: Iterable[Mapping[str, Any]],
+        settings: Any = None,
+        timed: bool = False,
+    ) -> "RuleEngine":
+        """
+        Valida y compila definiciones declarativas.
+
+        Las reglas con ``enabled_by`` se descartan en compilación si el
+        setting indicado es falso.
+        """
+        compiled = []
+        seen = set()
+        for raw in specs:
+            spec = RuleSpec.from_dict(raw)
+            if spec.id in seen:
+                raise ValueError(f"Regla duplicada: {spec.id}")
+            seen.add(spec.id)
+            if spec.enabled_by and not getattr(settings, spec.enabled_by, False):
+                continue
+            compiled.append(compile_rule(spec, settings))
+        return cls(compiled, timed=timed)
+
+    @property
+    def rules(self) -> List[CompiledRule]:
+        return list(self._rules)
+
+    def evaluate(self, field_dicts: Mapping[str, Any]) -> Dict[str, Any]:
+        """
+        Evalúa un caso.
+
+        Returns:
+            Dict con status, reasons y decision_log.
+        """
+        status_rank = 0
+        reasons = []
+        decision_log = []
+        normalized: Dict[Tuple[str, str, str], Any] = {}
+        timed = self._timed
+        perf = time.perf_counter_ns
+
+        for rule in self._rules:
+            if rule.rank < status_rank:
+                continue
+
+            spec = rule.spec
+            stats = rule.stats
+            start = perf() if timed else 0
+
+            key = (spec.document, spec.field, rule.value_kind)
+            if key in normalized:
+                value = normalized[key]
+            else:
+                raw = (field_dicts.get(spec.document) or {}).get(spec.field)
+                if rule.value_kind == "text":
+                    value = _to_text(raw)
+                elif rule.value_kind == "int":
+                    value = _to_int(raw)
+                else:
+                    value = raw
+                normalized[key] = value
+
+            # Un valor numérico no interpretable no dispara la regla
+            if value is None and rule.value_kind == "int":
+                hit = False
+            else:
+                hit = rule.matches(value)
+
+            stats.evaluations += 1
+            if hit:
+                stats.hits += 1
+                status_rank = max(status_rank, rule.rank)
+                reasons.append({"code": spec.code, "message": spec.message})
+                if spec.log:
+                    decision_log.append(spec.log.format(value=value, threshold=rule.thresholds[0]))
+            if timed:
+                stats.total_ns += perf() - start
+
+        status = _STATUS_BY_RANK[status_rank]
+        if status == STATUS_APPROVED:
+            decision_log.append("Todas las reglas se cumplieron → APROBADO")
+
+        return {
+            "status": status,
+            "reasons": reasons,
+            "decision_log": decision_log,
+        }
+
+    def evaluate_many(self, casos: Iterable[Mapping[str, Any]]) -> List[Dict[str, Any]]:
+        """Evalúa varios casos con las mismas reglas compiladas."""
+        return [self.evaluate(caso) for caso in casos]
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Contadores de evaluaciones, aciertos y tiempo por regla."""
+        return {rule.spec.id: rule.stats.as_dict() for rule in self._rules}
+
+    def reset_stats(self) -> None:
+        for rule in self._rules:
+            rule.stats = RuleStats()
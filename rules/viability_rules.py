@@ -0,0 +1,97 @@
+"""
+Definición declarativa de las reglas de viabilidad del préstamo.
+
+Cada regla indica el documento y campo que evalúa, el operador, el umbral
+(literal o referencia a un setting), el estado que produce y el código de
+razón. Reglas adicionales pueden agregarse vía el setting
+``viability_rules_extra`` (variable VIABILITY_RULES_EXTRA, JSON) sin cambios
+de código.
+"""
+
+from typing import Any, Dict, List
+
+from .engine import RuleEngine
+
+
+DEFAULT_VIABILITY_RULES: List[Dict[str, Any]] = [
+    {
+        "id": "R1_MATRICULA",
+        "field": "VIV_PrestamoDireccionMatricula",
+        "operator": "missing",
+        "status": "REJECTED",
+        "code": "MISSING_MATRICULA",
+        "message": "No se encontró matrícula inmobiliaria en el estudio de títulos",
+        "log": "Regla 1: Matrícula ausente → RECHAZADO",
+    },
+    {
+        "id": "R2_CONCEPTO_DESFAVORABLE",
+        "field": "VIV_conceptoJuridico",
+        "operator": "contains",
+        "threshold": "desfavorable",
+        "status": "REJECTED",
+        "code": "CONCEPTO_DESFAVORABLE",
+        "message": "El concepto jurídico del estudio de títulos es desfavorable",
+        "log": "Regla 2: Concepto desfavorable → RECHAZADO",
+    },
+    {
+        "id": "R2_CONCEPTO_NO_CLARO",
+        "field": "VIV_conceptoJuridico",
+        "operator": "not_contains",
+        "threshold": "favorable",
+        "status": "CONDITIONAL",
+        "code": "CONCEPTO_NO_CLARO",
+        "message": "El concepto jurídico no es claro o no se encontró",
+        "log": "Regla 2: Concepto no claro → CONDICIONAL",
+    },
+    {
+        "id": "R3_EMBARGO_VIGENTE",
+        "field": "VIV_gravamenes",
+        "conditions": [
+            {"operator": "contains", "threshold": "embargo"},
+            {"operator": "not_contains", "threshold": "cancelado"},
+        ],
+        "status": "REJECTED",
+        "code": "EMBARGO_VIGENTE",
+        "message": "Existe un embargo vigente sobre el inmueble",
+        "log": "Regla 3: Embargo vigente detectado → RECHAZADO",
+        "enabled_by": "reject_if_encumbrances",
+    },
+    {
+        "id": "R4_EDAD",
+        "field": "VIV_edadSolicitante",
+        "operator": "outside_range",
+        "threshold": [
+            {"setting": "min_age", "default": 18},
+            {"setting": "max_age", "default": 75},
+        ],
+        "status": "REJECTED",
+        "code": "AGE_LIMIT",
+        "message": "Edad fuera de rango",
+        "log": "Regla 4: Edad {value} fuera de rango ({threshold[0]}-{threshold[1]}) → RECHAZADO",
+    },
+    {
+        "id": "R5_SCORE",
+        "field": "VIV_creditScore",
+        "operator": "lt",
+        "threshold": {"setting": "min_credit_score", "default": 600},
+        "status": "REJECTED",
+        "code": "CREDIT_SCORE_LOW",
+        "message": "Score insuficiente",
+        "log": "Regla 5: Score {value} < mínimo ({threshold}) → RECHAZADO",
+    },
+]
+
+
+def build_viability_engine(settings: Any) -> RuleEngine:
+    """
+    Compila las reglas por defecto más las definidas en settings.
+
+    Se llama una vez al cargar el módulo de actividades; los errores de
+    definición se reportan en ese momento y no durante la evaluación.
+    """
+    extra = list(getattr(settings, "viability_rules_extra", None) or [])
+    return RuleEngine.from_specs(
+        DEFAULT_VIABILITY_RULES + extra,
+        settings=settings,
+        timed=getattr(settings, "viability_rules_timing", False),
+    )
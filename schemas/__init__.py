@@ -2,6 +2,7 @@ from .base_schema import BaseDocumentSchema, MetadataBase
 from .estudio_titulos_schema import EstudioTitulosSchema
 from .minuta_cancelacion_schema import MinutaCancelacionSchema
 from .minuta_constitucion_schema import MinutaConstitucionSchema
+from .panel_row import PanelFieldTable, PanelRow, get_field_table
 
 __all__ = [
     "BaseDocumentSchema",
@@ -9,4 +10,7 @@ __all__ = [
     "EstudioTitulosSchema",
     "MinutaCancelacionSchema",
     "MinutaConstitucionSchema",
+    "PanelFieldTable",
+    "PanelRow",
+    "get_field_table",
 ]
@@ -0,0 +1,31 @@
+from typing import Dict, List, Optional
+from pydantic import BaseModel, Field
+
+
+class PersonaResumida(BaseModel):
+    """Propietario o parte de una anotación."""
+    nombre: str
+    identificacion: Optional[str] = Field(default=None)
+    titulo: Optional[str] = Field(default=None, description="Escritura, fecha y notaría de adquisición")
+    fecha: Optional[str] = Field(default=None)
+    anotacion: Optional[str] = Field(default=None)
+
+
+class AnotacionResumida(BaseModel):
+    """Gravamen, medida cautelar o limitación con su anotación."""
+    tipo: str
+    a_favor_de: Optional[str] = Field(default=None)
+    fecha: Optional[str] = Field(default=None)
+    anotacion: Optional[str] = Field(default=None)
+    vigente: Optional[bool] = Field(default=None)
+    cancelada_por: Optional[str] = Field(default=None, description="Anotación que la cancela")
+
+
+class NotasFragmento(BaseModel):
+    """Notas condensadas de un fragmento (fase map de la extracción map-reduce)."""
+    inmueble: Dict[str, str] = Field(default_factory=dict)
+    propietarios: List[PersonaResumida] = Field(default_factory=list)
+    gravamenes: List[AnotacionResumida] = Field(default_factory=list)
+    medidas_cautelares: List[AnotacionResumida] = Field(default_factory=list)
+    limitaciones: List[AnotacionResumida] = Field(default_factory=list)
+    otros: List[str] = Field(default_factory=list)
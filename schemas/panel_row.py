@@ -0,0 +1,308 @@
+"""
+Representación compacta en memoria de PanelFields.
+
+En el formato de transporte cada campo es un dict con las claves
+``InternalName``/``Type``/``TextValue``/``NumberValue``. ``PanelRow`` guarda
+los mismos datos en listas paralelas indexadas por un id de campo definido
+por tipo de documento (``PanelFieldTable``), de modo que la búsqueda por
+campo es O(1) y la lista se construye una sola vez por etapa. La conversión
+desde y hacia el formato de transporte es sin pérdida (orden, duplicados,
+campos desconocidos y claves ausentes se conservan).
+"""
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+
+# Bits de forma: qué claves de valor traía el item original
+_HAS_TEXT = 1
+_HAS_NUMBER = 2
+
+
+class PanelFieldTable:
+    """Tabla de ids de campo para un tipo de documento."""
+
+    __slots__ = ("name", "names", "types", "accumulate", "_ids")
+
+    def __init__(self, name: str, fields: Sequence[Tuple[str, str]], accumulate: Iterable[str] = ()):
+        self.name = name
+        self.names: Tuple[str, ...] = tuple(f[0] for f in fields)
+        self.types: Tuple[str, ...] = tuple(f[1] for f in fields)
+        # Campos tipo lista cuyo contenido puede continuar en otros fragmentos del documento
+        self.accumulate: frozenset = frozenset(accumulate)
+        self._ids: Dict[str, int] = {n: i for i, n in enumerate(self.names)}
+
+    def id_of(self, internal_name: str) -> int:
+        """Id del campo o -1 si no pertenece a la tabla."""
+        return self._ids.get(internal_name, -1)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, internal_name: str) -> bool:
+        return internal_name in self._ids
+
+
+# Campos por tipo de documento (ver prompts/)
+ESTUDIO_TITULOS_FIELDS = (
+    ("VIV_PrestamoDireccionMatricula", "Text"),
+    ("VIV_fechaExpedicionMatricula", "Text"),
+    ("VIV_PrestamoDireccion", "Text"),
+    ("VIV_tipoPredio", "Text"),
+    ("VIV_descripcionLinderos", "Text"),
+    ("VIV_Compradores", "Text"),
+    ("VIV_identificacionCompradores", "Text"),
+    ("VIV_tituloAdquisicion", "Text"),
+    ("VIV_gravamenes", "Text"),
+    ("VIV_limitacionDominio", "Text"),
+    ("VIV_afectacionDominio", "Text"),
+    ("VIV_medidaCautelar", "Text"),
+    ("VIV_tenencia", "Text"),
+    ("VIV_documentosRevisados", "Text"),
+    ("VIV_conceptoJuridico", "Text"),
+    ("VIV_avaluo_comercial", "Number"),
+)
+
+ESTUDIO_TITULOS_ACCUMULATE = (
+    "VIV_gravamenes",
+    "VIV_limitacionDominio",
+    "VIV_afectacionDominio",
+    "VIV_medidaCautelar",
+    "VIV_documentosRevisados",
+)
+
+MINUTA_CANCELACION_FIELDS = (
+    ("VIV_resolucionNombramiento", "Text"),
+    ("VIV_numeroEscrituraPublica", "Text"),
+    ("VIV_fechaEscrituraPublica", "Text"),
+    ("VIV_notariaEscrituraPublica", "Text"),
+    ("VIV_folioMatriculaInmobiliaria", "Text"),
+    ("VIV_oficinaMatriculaInmobiliaria", "Text"),
+    ("VIV_direccionInmueble", "Text"),
+)
+
+MINUTA_CONSTITUCION_FIELDS = (
+    ("TPC_ValorComercial", "Number"),
+    ("VIV_gradoHipoteca", "Text"),
+    ("GBL_Valordeprestamo", "Number"),
+    ("VIV_nombreVendedor", "Text"),
+    ("VIV_Compradores", "Text"),
+    ("VIV_valorCesantias", "Number"),
+    ("VIV_recursosPropios", "Text"),
+    ("VIV_identificacionCompradores", "Text"),
+    ("BO_Valor en letras", "Text"),
+    ("VIV_numeroCuotas", "Text"),
+    ("VIV_numeroCuotasLetras", "Text"),
+    ("VIV_valorCuotas", "Text"),
+    ("VIV_valorCuotasLetras", "Text"),
+    ("VIV_OfertaValorLetras", "Text"),
+)
+
+FIELD_TABLES: Dict[str, PanelFieldTable] = {
+    "estudio_titulos": PanelFieldTable("estudio_titulos", ESTUDIO_TITULOS_FIELDS, ESTUDIO_TITULOS_ACCUMULATE),
+    "minuta_cancelacion": PanelFieldTable("minuta_cancelacion", MINUTA_CANCELACION_FIELDS),
+    "minuta_constitucion": PanelFieldTable("minuta_constitucion", MINUTA_CONSTITUCION_FIELDS),
+}
+
+_EMPTY_TABLE = PanelFieldTable("", ())
+
+
+def get_field_table(tipo_documento: str) -> PanelFieldTable:
+    """Tabla de campos del tipo de documento (vacía si no se conoce)."""
+    return FIELD_TABLES.get(tipo_documento, _EMPTY_TABLE)
+
+
+class PanelRow:
+    """
+    Fila de PanelFields respaldada por listas paralelas.
+
+    Cada item del formato de transporte ocupa una posición (slot). Los ids de
+    campo conocidos vienen de la tabla del tipo de documento; los nombres que
+    no están en la tabla reciben ids locales a la fila. Si un campo aparece
+    más de una vez, la búsqueda devuelve la última aparición (igual que
+    construir un dict a partir de la lista).
+    """
+
+    __slots__ = (
+        "table",
+        "_ids",
+        "_types",
+        "_text",
+        "_number",
+        "_shape",
+        "_slot_by_id",
+        "_extra_ids",
+        "_extra_names",
+    )
+
+    def __init__(self, table: PanelFieldTable):
+        self.table = table
+        self._ids: List[int] = []
+        self._types: List[str] = []
+        self._text: List[Any] = []
+        self._number: List[Any] = []
+        self._shape: List[int] = []
+        self._slot_by_id: List[int] = [-1] * len(table)
+        self._extra_ids: Dict[str, int] = {}
+        self._extra_names: List[str] = []
+
+    # -------------------------------------------------
+    # Conversión con el formato de transporte
+    # -------------------------------------------------
+
+    @classmethod
+    def from_panel_fields(cls, panel_fields: Iterable[Dict[str, Any]],
+                          table: PanelFieldTable = _EMPTY_TABLE) -> "PanelRow":
+        """Construye la fila a partir de la lista PanelFields."""
+        row = cls(table)
+        for item in panel_fields or ():
+            shape = 0
+            if "TextValue" in item:
+                shape |= _HAS_TEXT
+            if "NumberValue" in item:
+                shape |= _HAS_NUMBER
+            row._append(
+                item["InternalName"],
+                item["Type"],
+                item.get("TextValue"),
+                item.get("NumberValue"),
+                shape,
+            )
+        return row
+
+    def to_panel_fields(self, prefix: str = "") -> List[Dict[str, Any]]:
+        """Materializa la lista PanelFields, opcionalmente con prefijo en InternalName."""
+        names = self.table.names
+        n_known = len(names)
+        extra = self._extra_names
+        result = []
+        for fid, ftype, text, number, shape in zip(
+            self._ids, self._types, self._text, self._number, self._shape
+        ):
+            name = names[fid] if fid < n_known else extra[fid - n_known]
+            item = {"InternalName": prefix + name if prefix else name, "Type": ftype}
+            if shape & _HAS_TEXT:
+                item["TextValue"] = text
+            if shape & _HAS_NUMBER:
+                item["NumberValue"] = number
+            result.append(item)
+        return result
+
+    # -------------------------------------------------
+    # Acceso
+    # -------------------------------------------------
+
+    def field_id(self, internal_name: str) -> int:
+        """Id del campo en esta fila, o -1 si no existe."""
+        fid = self.table.id_of(internal_name)
+        if fid >= 0:
+            return fid
+        return self._extra_ids.get(internal_name, -1)
+
+    def get_by_id(self, field_id: int, default: Any = None) -> Any:
+        """Valor del campo por id: TextValue si es Text, NumberValue si no."""
+        if field_id < 0 or field_id >= len(self._slot_by_id):
+            return default
+        slot = self._slot_by_id[field_id]
+        if slot < 0:
+            return default
+        if self._types[slot] == "Text":
+            return self._text[slot]
+        return self._number[slot]
+
+    def get(self, internal_name: str, default: Any = None) -> Any:
+        """Valor del campo por InternalName (misma semántica que un dict)."""
+        return self.get_by_id(self.field_id(internal_name), default)
+
+    def __contains__(self, internal_name: str) -> bool:
+        fid = self.field_id(internal_name)
+        return fid >= 0 and self._slot_by_id[fid] >= 0
+
+    def __getitem__(self, internal_name: str) -> Any:
+        if internal_name not in self:
+            raise KeyError(internal_name)
+        return self.get(internal_name)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __iter__(self) -> Iterator[str]:
+        """Itera los InternalName presentes (sin repetir)."""
+        seen = set()
+        for name in self._iter_names():
+            if name not in seen:
+                seen.add(name)
+                yield name
+
+    def is_filled(self, internal_name: str) -> bool:
+        """True si el campo tiene valor (no None, cadena vacía ni 0)."""
+        value = self.get(internal_name)
+        if isinstance(value, str):
+            return bool(value.strip())
+        return value is not None and value != 0
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        for name in self:
+            yield name, self.get(name)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Diccionario InternalName -> valor."""
+        return dict(self.items())
+
+    # -------------------------------------------------
+    # Modificación
+    # -------------------------------------------------
+
+    def set(self, internal_name: str, value: Any, field_type: Optional[str] = None) -> None:
+        """
+        Asigna el valor de un campo; lo agrega al final si no existía.
+
+        El tipo por defecto es el del slot existente, luego el de la tabla y
+        por último "Text".
+        """
+        fid = self.field_id(internal_name)
+        slot = self._slot_by_id[fid] if fid >= 0 else -1
+        if field_type is None:
+            if slot >= 0:
+                field_type = self._types[slot]
+            elif 0 <= fid < len(self.table):
+                field_type = self.table.types[fid]
+            else:
+                field_type = "Text"
+
+        text = value if field_type == "Text" else None
+        number = None if field_type == "Text" else value
+        shape = _HAS_TEXT if field_type == "Text" else _HAS_NUMBER
+
+        if slot >= 0:
+            self._types[slot] = field_type
+            self._text[slot] = text
+            self._number[slot] = number
+            self._shape[slot] = self._shape[slot] | shape
+        else:
+            self._append(internal_name, field_type, text, number, shape)
+
+    # -------------------------------------------------
+    # Internos
+    # -------------------------------------------------
+
+    def _append(self, name: str, ftype: str, text: Any, number: Any, shape: int) -> None:
+        fid = self.table.id_of(name)
+        if fid < 0:
+            fid = self._extra_ids.get(name, -1)
+            if fid < 0:
+                fid = len(self.table) + len(self._extra_names)
+                self._extra_ids[name] = fid
+                self._extra_names.append(name)
+                self._slot_by_id.append(-1)
+        self._slot_by_id[fid] = len(self._ids)
+        self._ids.append(fid)
+        self._types.append(ftype)
+        self._text.append(text)
+        self._number.append(number)
+        self._shape.append(shape)
+
+    def _iter_names(self) -> Iterator[str]:
+        names = self.table.names
+        n_known = len(names)
+        for fid in self._ids:
+            yield names[fid] if fid < n_known else self._extra_names[fid - n_known]
@@ -1,15 +1,23 @@
-from .base_service import BaseService
-from .document_intelligence_service import DocumentIntelligenceService
-from .azure_openai_service import AzureOpenAIService
-from .datalake_service import DataLakeService
-from .cosmos_db_service import CosmosDBService
-from .chunking_service import ChunkingService
+from utils.lazy import lazy_exports
 
-__all__ = [
-    "BaseService",
-    "DocumentIntelligenceService",
-    "AzureOpenAIService",
-    "DataLakeService",
-    "CosmosDBService",
-    "ChunkingService",
-]
+# Los submódulos (y sus SDKs) se importan al pedir cada nombre
+_EXPORTS = {
+    "BaseService": ".base_service",
+    "DocumentIntelligenceService": ".document_intelligence_service",
+    "AzureOpenAIService": ".azure_openai_service",
+    "DataLakeService": ".datalake_service",
+    "CosmosDBService": ".cosmos_db_service",
+    "create_cosmos_service": ".cosmos_db_service",
+    "CosmosNotProvisionedError": ".cosmos_db_service",
+    "SqliteCosmosDBService": ".sqlite_cosmos_service",
+    "ChunkingService": ".chunking_service",
+    "OcrResult": ".ocr_result",
+    "StorageBackend": ".storage_backends",
+    "LocalFileSystemBackend": ".storage_backends",
+    "AzureDataLakeBackend": ".storage_backends",
+    "StoredFile": ".storage_backends",
+}
+
+__getattr__ = lazy_exports(__name__, _EXPORTS)
+
+__all__ = list(_EXPORTS)
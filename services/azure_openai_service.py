@@ -1,12 +1,29 @@
-import json
+import contextvars
 import logging
-from typing import Optional, Type, List
-from openai import AzureOpenAI
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Type, List, Tuple
+from openai import AzureOpenAI, BadRequestError
 from pydantic import BaseModel, ValidationError
 
 from .base_service import BaseService
 from config import get_settings
 from .chunking_service import ChunkingService
+from utils import json_codec, json_repair, telemetry
+from prompts.extraction_prompt import ExtractionPrompt, get_extraction_prompt, pending_fields_context
+from prompts.map_reduce_prompt import MAP_SYSTEM_PROMPT, REDUCE_HEADER
+from schemas.condensed_notes import NotasFragmento
+from schemas.panel_row import PanelFieldTable, get_field_table
+from utils.panel_merge import PanelMerger
+
+
+# Despliegue de la extracción en curso; los hilos de _extract_wave lo heredan con copy_context
+_deployment: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("llm_deployment", default=None)
+
+
+def _field(obj, name: str):
+    """Atributo de un objeto del SDK o clave del mismo objeto serializado."""
+    return obj.get(name) if isinstance(obj, dict) else getattr(obj, name, None)
 
 
 class AzureOpenAIService(BaseService):
@@ -18,6 +35,10 @@ class AzureOpenAIService(BaseService):
             max_chars=self._settings.chunk_max_characters,
             overlap=self._settings.chunk_overlap
         )
+        self._token_usage = self._empty_usage()
+        self._usage_lock = threading.Lock()
+        self._structured_outputs = self._settings.azure_openai_structured_outputs
+        self._json_object_only: set = set()
         self.initialize()
 
     def initialize(self) -> None:
@@ -35,77 +56,242 @@ class AzureOpenAIService(BaseService):
     def health_check(self) -> bool:
         return self._client is not None
 
+    @staticmethod
+    def _empty_usage() -> dict:
+        return {"llamadas": 0, "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0}
+
+    def get_token_usage(self) -> dict:
+        """Tokens acumulados desde la creación del servicio o el último reset."""
+        return dict(self._token_usage)
+
+    def reset_token_usage(self) -> None:
+        self._token_usage = self._empty_usage()
+
+    def _record_usage(self, response) -> dict:
+        """
+        Acumula y registra los tokens de prompt (y cacheados) y de respuesta.
+        response es la respuesta del SDK o su cuerpo JSON (salida batch).
+        """
+        usage = _field(response, "usage")
+        if usage is None:
+            return {}
+        prompt_tokens = _field(usage, "prompt_tokens") or 0
+        completion_tokens = _field(usage, "completion_tokens") or 0
+        details = _field(usage, "prompt_tokens_details")
+        cached_tokens = (_field(details, "cached_tokens") or 0) if details else 0
+
+        with self._usage_lock:
+            self._token_usage["llamadas"] += 1
+            self._token_usage["prompt_tokens"] += prompt_tokens
+            self._token_usage["completion_tokens"] += completion_tokens
+            self._token_usage["cached_tokens"] += cached_tokens
+
+        self._log_info(
+            "Token usage: prompt=%s (cached=%s) completion=%s",
+            prompt_tokens, cached_tokens, completion_tokens,
+        )
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "cached_tokens": cached_tokens,
+        }
+
     def extract_structured_data(
         self,
         document_text: str,
         system_prompt: str,
         schema_class: Type[BaseModel],
         temperature: float = 0.1,
-        max_tokens: int = 4096
+        max_tokens: int = 4096,
+        context: str = "",
+        field_table: Optional[PanelFieldTable] = None,
+        deployment: Optional[str] = None
     ) -> dict:
         """
         Extrae datos estructurados del texto, con chunking automático si es necesario.
+
+        context se antepone al documento en el mensaje de usuario (p. ej. campos
+        ya resueltos por la pre-extracción; ver known_fields_context). Con
+        field_table y CHUNK_INCREMENTAL, cada fragmento solo pide los campos
+        que siguen vacíos. Desde MAPREDUCE_MIN_CHARACTERS se usa map-reduce.
+        deployment reemplaza a AZURE_OPENAI_DEPLOYMENT en todas las llamadas
+        de esta extracción (ruteo por nivel de modelo).
         """
+        token = _deployment.set(deployment or self._settings.azure_openai_deployment)
+        try:
+            if self._settings.mapreduce_enabled and len(document_text) >= self._settings.mapreduce_min_characters:
+                return self._extract_map_reduce(
+                    document_text, system_prompt, schema_class, temperature, max_tokens, context, field_table
+                )
+            return self._extract_text(
+                document_text, system_prompt, schema_class, temperature, max_tokens, context, field_table
+            )
+        finally:
+            _deployment.reset(token)
+
+    def _extract_text(self, document_text: str, system_prompt: str, schema_class: Type[BaseModel],
+                      temperature: float, max_tokens: int, context: str = "",
+                      field_table: Optional[PanelFieldTable] = None) -> dict:
+        """Extracción directa o con chunking según el largo del texto."""
         # Verificar si necesita chunking
         if len(document_text) > self._settings.chunk_max_characters:
             self._log_info("Texto muy largo, aplicando chunking")
             return self._extract_with_chunking(
-                document_text, system_prompt, schema_class, temperature, max_tokens
+                document_text, system_prompt, schema_class, temperature, max_tokens, context, field_table
             )
 
         # Extracción directa
-        return self._extract_single(document_text, system_prompt, schema_class, temperature, max_tokens)
+        return self._extract_single(document_text, system_prompt, schema_class, temperature, max_tokens,
+                                    context=context, expected_fields=field_table.names if field_table else None)
 
     def _extract_single(self, text: str, system_prompt: str, schema_class: Type[BaseModel],
-                        temperature: float, max_tokens: int) -> dict:
-        user_prompt = self._build_extraction_prompt(text, schema_class.model_json_schema())
-        response = self._client.chat.completions.create(
-            model=self._settings.azure_openai_deployment,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
+                        temperature: float, max_tokens: int, chunk_index: int = None,
+                        context: str = "", expected_fields: Optional[List[str]] = None) -> dict:
+        """
+        Una llamada de extracción, con reparación local de la respuesta.
+
+        Si la respuesta no es JSON válido o no valida contra el schema, se
+        repara localmente (ver utils/json_repair.py) y se vuelve a preguntar
+        solo por los campos que fallaron: items descartados y, si la
+        respuesta se cortó por max_tokens, los expected_fields que faltan.
+        La respuesta completa se vuelve a pedir solo si no hay JSON
+        recuperable. Hasta LLM_REPAIR_RETRIES re-consultas por fragmento.
+        """
+        prompt = get_extraction_prompt(system_prompt, schema_class)
+        retries = max(0, self._settings.llm_repair_retries)
+        result, failed = self._complete_and_parse(prompt, text, context, temperature, max_tokens,
+                                                  schema_class, chunk_index, expected_fields)
+        while result is None and retries > 0:
+            retries -= 1
+            result, failed = self._complete_and_parse(prompt, text, context, temperature, max_tokens,
+                                                      schema_class, chunk_index, expected_fields)
+        if result is None:
+            raise ValueError("Respuesta del modelo sin JSON recuperable")
+
+        while failed and retries > 0 and "PanelFields" in result:
+            retries -= 1
+            self._log_info("Re-consultando %s campos que no se pudieron reparar", len(failed))
+            retry, failed = self._complete_and_parse(
+                prompt, text, context + pending_fields_context(failed), temperature, max_tokens,
+                schema_class, chunk_index, failed,
+            )
+            if retry is None:
+                break
+            result = self._merge_retry(result, retry)
+        return result
+
+    def _complete_and_parse(self, prompt: ExtractionPrompt, text: str, context: str, temperature: float,
+                            max_tokens: int, schema_class: Type[BaseModel], chunk_index: Optional[int],
+                            expected_fields: Optional[List[str]]) -> Tuple[Optional[dict], List[str]]:
+        """(resultado validado o None si no hay JSON recuperable, campos a re-consultar)."""
+        with telemetry.stage_span("llm.chunk", chunk=chunk_index, characters=len(text)) as span:
+            response = self._create_completion(prompt, text, context, temperature, max_tokens)
+            usage = self._record_usage(response)
+            telemetry.set_attributes(span, **usage)
+        choice = response.choices[0]
+        truncated = getattr(choice, "finish_reason", None) == "length"
+
+        data, repaired = json_repair.parse_lenient(choice.message.content)
+        if data is None:
+            self._log_warning("Respuesta sin JSON recuperable (truncada=%s)", truncated)
+            return None, []
+        try:
+            result, failed = json_repair.validate_dropping_invalid(
+                json_repair.coerce_panel_fields(data), schema_class
+            )
+        except ValidationError as e:
+            self._log_error("Error validando respuesta del modelo", error=e)
+            return None, []
+
+        if truncated and expected_fields and "PanelFields" in result:
+            present = {item["InternalName"] for item in result["PanelFields"]}
+            failed += [n for n in expected_fields if n not in present and n not in failed]
+        if repaired or failed:
+            self._log_warning(
+                "Respuesta reparada localmente (truncada=%s, campos a re-consultar=%s)", truncated, len(failed)
+            )
+        return result, failed
+
+    def _create_completion(self, prompt: ExtractionPrompt, text: str, context: str,
+                           temperature: float, max_tokens: int):
+        """
+        Llamada al modelo con structured outputs si el schema y el despliegue
+        lo permiten; si el despliegue rechaza json_schema, se recuerda y se
+        usa json_object en adelante con ese despliegue.
+        """
+        model = _deployment.get() or self._settings.azure_openai_deployment
+        kwargs = dict(
+            model=model,
+            messages=prompt.messages(text, context),
             temperature=temperature,
             max_tokens=max_tokens,
-            response_format={"type": "json_object"}
         )
-        content = response.choices[0].message.content
-        try:
-            data = json.loads(content)
-            validated = schema_class.model_validate(data)
-            return validated.model_dump(by_alias=True, exclude_none=False)
-        except (json.JSONDecodeError, ValidationError) as e:
-            self._log_error("Error parsing/extracting single chunk", error=e)
-            raise
+        if self._structured_outputs and prompt.response_format is not None and model not in self._json_object_only:
+            try:
+                return self._client.chat.completions.create(response_format=prompt.response_format, **kwargs)
+            except BadRequestError as e:
+                if "response_format" not in str(e) and "json_schema" not in str(e):
+                    raise
+                self._log_warning("Structured outputs no soportados por %s; se usa json_object", model)
+                self._json_object_only.add(model)
+        return self._client.chat.completions.create(response_format={"type": "json_object"}, **kwargs)
+
+    @staticmethod
+    def _merge_retry(result: dict, retry: dict) -> dict:
+        """Agrega a result los items de la re-consulta (reemplazan a los del mismo InternalName)."""
+        fields = {item["InternalName"]: item for item in result["PanelFields"]}
+        fields.update((item["InternalName"], item) for item in retry.get("PanelFields", []))
+        return {**result, "PanelFields": list(fields.values())}
 
     def _extract_with_chunking(self, full_text: str, system_prompt: str,
                                schema_class: Type[BaseModel], temperature: float,
-                               max_tokens: int) -> dict:
+                               max_tokens: int, context: str = "",
+                               field_table: Optional[PanelFieldTable] = None) -> dict:
         """
         Divide el texto, extrae de cada fragmento y luego combina los resultados.
+
+        En modo incremental los fragmentos se procesan en orden, en olas de
+        CHUNK_WAVE_SIZE llamadas en paralelo. Después de cada ola solo se piden
+        los campos que siguen vacíos más los acumulables de la tabla (listas
+        que pueden continuar en otros fragmentos, p. ej. gravámenes). Se
+        termina cuando todos los demás campos tienen valor y la última ola no
+        agregó valores nuevos a los acumulables.
         """
         chunks = self.chunker.chunk_text(full_text)
-        chunk_results = []
-        for i, chunk in enumerate(chunks):
-            self._log_info(f"Procesando fragmento {i+1}/{len(chunks)}")
-            try:
-                result = self._extract_single(chunk, system_prompt, schema_class, temperature, max_tokens)
-                chunk_results.append(result)
-            except Exception as e:
-                self._log_error(f"Error en fragmento {i+1}", error=e)
-                # Continuamos con los demás fragmentos, o podríamos lanzar excepción
-                # Aquí optamos por continuar y luego combinar lo que se pudo extraer
-                chunk_results.append({})
-
-        # Combinar resultados: tomar el primer resultado no vacío como base y fusionar
-        # Estrategia simple: elegir el que tenga más campos, o pedir a OpenAI que fusione.
-        # Implementaremos una fusión por prioridad: si un campo aparece en varios, tomar el de mayor confianza (no tenemos).
-        # En su lugar, usamos un merge recursivo simple.
-        merged = {}
-        for res in chunk_results:
-            if not res:
+        incremental = self._settings.chunk_incremental and field_table is not None and len(field_table) > 0
+        wave_size = max(1, self._settings.chunk_wave_size)
+        # Fusión por InternalName con política por campo (ver utils/panel_merge.py)
+        field_table = field_table if field_table is not None else get_field_table("")
+        merger = PanelMerger(field_table, self._settings.merge_policies)
+
+        chunk_context, expected = context, (field_table.names if incremental else None)
+        processed = accumulated = 0
+        while processed < len(chunks):
+            wave = list(range(processed, min(processed + wave_size, len(chunks))))
+            for result in self._extract_wave(
+                chunks, wave, system_prompt, schema_class, temperature, max_tokens, chunk_context, expected
+            ):
+                merger.add((result or {}).get("PanelFields", []))
+            processed += len(wave)
+            if not incremental or processed == len(chunks):
                 continue
-            self._deep_merge(merged, res)
+
+            # Pendientes: campos sin valor en ningún fragmento, más los acumulables
+            # mientras la última ola les haya agregado valores
+            empty = [
+                n for n in field_table.names if n not in field_table.accumulate and not merger.is_filled(n)
+            ]
+            previous, accumulated = accumulated, merger.value_count(field_table.accumulate)
+            if not empty and accumulated == previous:
+                self._log_info(
+                    "Todos los campos con valor tras %s/%s fragmentos; se omiten los restantes",
+                    processed, len(chunks),
+                )
+                break
+            pending = [n for n in field_table.names if n in field_table.accumulate or n in empty]
+            chunk_context, expected = context + pending_fields_context(pending), pending
+
+        merged = {"PanelFields": merger.result()}
 
         # Validar contra el schema
         try:
@@ -116,38 +302,143 @@ class AzureOpenAIService(BaseService):
             # Devolvemos lo que tenemos aunque no sea válido según schema
             return merged
 
-    def _deep_merge(self, target: dict, source: dict) -> None:
-        """Fusiona source en target recursivamente."""
-        for key, value in source.items():
-            if key not in target:
-                target[key] = value
-            else:
-                if isinstance(value, dict) and isinstance(target[key], dict):
-                    self._deep_merge(target[key], value)
-                elif isinstance(value, list) and isinstance(target[key], list):
-                    # Para listas, concatenar (evitando duplicados simples)
-                    target[key].extend([x for x in value if x not in target[key]])
-                else:
-                    # Si hay conflicto, mantener el valor existente (primero)
-                    pass
-
-    def _build_extraction_prompt(self, text: str, schema: dict) -> str:
-        return f"""
-Analiza el siguiente documento y extrae la información estructurada según el schema JSON proporcionado.
-
-## DOCUMENTO:
-{text}
-
-## SCHEMA JSON ESPERADO:
-{json.dumps(schema, indent=2, ensure_ascii=False)}
-
-## INSTRUCCIONES:
-1. Extrae TODA la información relevante del documento que coincida con los campos del schema.
-2. Si un campo no se encuentra, usa null o cadena vacía.
-3. Para listas, incluye todos los elementos encontrados.
-4. Mantén los formatos originales.
-5. Responde UNICAMENTE con el JSON estructurado.
-
-## RESPUESTA JSON:
-"""
-    
\ No newline at end of file
+    def batch_request_bodies(self, document_text: str, system_prompt: str, schema_class: Type[BaseModel],
+                             temperature: float = 0.1, max_tokens: int = 4096, context: str = "",
+                             deployment: Optional[str] = None) -> List[dict]:
+        """
+        Cuerpos de /chat/completions para la extracción batch, uno por
+        fragmento. Todos los fragmentos piden todos los campos (sin olas
+        incrementales ni map-reduce: las respuestas llegan juntas).
+        """
+        prompt = get_extraction_prompt(system_prompt, schema_class)
+        if len(document_text) > self._settings.chunk_max_characters:
+            chunks = self.chunker.chunk_text(document_text)
+        else:
+            chunks = [document_text]
+        model = deployment or self._settings.azure_openai_batch_deployment or self._settings.azure_openai_deployment
+        response_format = {"type": "json_object"}
+        if self._structured_outputs and prompt.response_format is not None and model not in self._json_object_only:
+            response_format = prompt.response_format
+        return [
+            {
+                "model": model,
+                "messages": prompt.messages(chunk, context),
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+                "response_format": response_format,
+            }
+            for chunk in chunks
+        ]
+
+    def extract_from_batch(self, bodies: List[Optional[dict]], schema_class: Type[BaseModel],
+                           field_table: Optional[PanelFieldTable] = None) -> dict:
+        """
+        Resultado de un documento a partir de sus respuestas batch (cuerpos de
+        chat completion, uno por fragmento y en orden; None si el fragmento
+        falló). Cada respuesta pasa por la reparación local y se fusiona como
+        en el chunking; no hay re-consultas.
+        """
+        merger = PanelMerger(field_table if field_table is not None else get_field_table(""),
+                             self._settings.merge_policies)
+        for i, body in enumerate(bodies):
+            if not body:
+                self._log_warning("Fragmento %s sin respuesta batch", i + 1)
+                continue
+            self._record_usage(body)
+            data, _ = json_repair.parse_lenient(body["choices"][0]["message"].get("content"))
+            if data is None:
+                self._log_warning("Fragmento %s sin JSON recuperable", i + 1)
+                continue
+            try:
+                result, _ = json_repair.validate_dropping_invalid(json_repair.coerce_panel_fields(data), schema_class)
+            except ValidationError as e:
+                self._log_error("Error validando fragmento %s", i + 1, error=e)
+                continue
+            merger.add(result.get("PanelFields", []))
+
+        merged = {"PanelFields": merger.result()}
+        validated = schema_class.model_validate(merged)
+        return validated.model_dump(by_alias=True, exclude_none=False)
+
+    def _extract_map_reduce(self, full_text: str, system_prompt: str,
+                            schema_class: Type[BaseModel], temperature: float,
+                            max_tokens: int, context: str = "",
+                            field_table: Optional[PanelFieldTable] = None) -> dict:
+        """
+        Extracción map-reduce para documentos muy largos.
+
+        Map: cada fragmento de MAPREDUCE_CHUNK_CHARACTERS se condensa en notas
+        (NotasFragmento) con a lo sumo MAPREDUCE_MAP_MAX_TOKENS de salida, en
+        olas de MAPREDUCE_CONCURRENCY llamadas en paralelo. Las notas se
+        combinan sin duplicados y, si superan MAPREDUCE_REDUCE_MAX_CHARACTERS,
+        se vuelven a condensar por grupos (hasta MAPREDUCE_MAX_LEVELS niveles).
+        Reduce: el prompt del procesador sobre las notas, que llena PanelFields.
+        """
+        settings = self._settings
+        chunker = ChunkingService(max_chars=settings.mapreduce_chunk_characters, overlap=settings.chunk_overlap)
+
+        with telemetry.stage_span("llm.map_reduce", characters=len(full_text)) as span:
+            text, level = full_text, 0
+            while level < settings.mapreduce_max_levels and (
+                level == 0 or len(text) > settings.mapreduce_reduce_max_characters
+            ):
+                chunks = chunker.chunk_text(text)
+                notes = self._map_notes(chunks, temperature)
+                text = json_codec.dumps_str(notes)
+                level += 1
+                self._log_info(
+                    "Map-reduce nivel %s: %s fragmentos -> %s caracteres de notas", level, len(chunks), len(text)
+                )
+            telemetry.set_attributes(span, levels=level, notes_characters=len(text))
+
+        return self._extract_text(
+            REDUCE_HEADER + text, system_prompt, schema_class, temperature, max_tokens, context, field_table
+        )
+
+    def _map_notes(self, chunks: List[str], temperature: float) -> dict:
+        """Condensa los fragmentos y combina sus notas (listas sin duplicados, primer valor por dato del inmueble)."""
+        concurrency = max(1, self._settings.mapreduce_concurrency)
+        combined: dict = {"inmueble": {}}
+        seen = set()
+        for start in range(0, len(chunks), concurrency):
+            wave = list(range(start, min(start + concurrency, len(chunks))))
+            for notes in self._extract_wave(
+                chunks, wave, MAP_SYSTEM_PROMPT, NotasFragmento, temperature,
+                self._settings.mapreduce_map_max_tokens, "",
+            ):
+                for key, value in (notes or {}).items():
+                    if key == "inmueble":
+                        for dato, valor in (value or {}).items():
+                            if valor and not combined["inmueble"].get(dato):
+                                combined["inmueble"][dato] = valor
+                        continue
+                    for item in value or ():
+                        if isinstance(item, dict):
+                            item = {k: v for k, v in item.items() if v is not None}
+                        marker = (key, json_codec.dumps_str(item))
+                        if marker not in seen:
+                            seen.add(marker)
+                            combined.setdefault(key, []).append(item)
+        return {k: v for k, v in combined.items() if v}
+
+    def _extract_wave(self, chunks: List[str], wave: List[int], system_prompt: str,
+                      schema_class: Type[BaseModel], temperature: float, max_tokens: int,
+                      context: str, expected_fields: Optional[List[str]] = None) -> List[dict]:
+        """Extrae una ola de fragmentos (en paralelo si hay más de uno); {} para los que fallan."""
+
+        def extract(i: int) -> dict:
+            self._log_info("Procesando fragmento %s/%s", i+1, len(chunks))
+            try:
+                return self._extract_single(chunks[i], system_prompt, schema_class, temperature, max_tokens,
+                                            chunk_index=i, context=context, expected_fields=expected_fields)
+            except Exception as e:
+                self._log_error("Error en fragmento %s", i+1, error=e)
+                # Continuamos con los demás fragmentos y luego combinamos lo que se pudo extraer
+                return {}
+
+        if len(wave) == 1:
+            return [extract(wave[0])]
+        # Cada hilo con una copia del contexto (spans y log ligados al documento)
+        with ThreadPoolExecutor(max_workers=len(wave)) as executor:
+            futures = [executor.submit(contextvars.copy_context().run, extract, i) for i in wave]
+            return [f.result() for f in futures]
@@ -19,17 +19,21 @@ class BaseService(ABC):
         """Verifica que el servicio este disponible."""
         pass
 
-    def _log_info(self, message: str, **kwargs: Any) -> None:
-        """Log de informacion con contexto adicional."""
-        self.logger.info(message, extra=kwargs)
+    def _log_info(self, message: str, *args: Any, **kwargs: Any) -> None:
+        """Log de informacion con contexto adicional (args con formato diferido)."""
+        self.logger.info(message, *args, extra=kwargs)
 
-    def _log_error(self, message: str, error: Exception = None, **kwargs: Any) -> None:
+    def _log_debug(self, message: str, *args: Any, **kwargs: Any) -> None:
+        """Log de detalle por operación (deshabilitado en INFO)."""
+        self.logger.debug(message, *args, extra=kwargs)
+
+    def _log_error(self, message: str, *args: Any, error: Exception = None, **kwargs: Any) -> None:
         """Log de errores con contexto adicional."""
         if error:
-            self.logger.error(f"{message}: {str(error)}", extra=kwargs, exc_info=True)
+            self.logger.error(message + ": %s", *args, error, extra=kwargs, exc_info=True)
         else:
-            self.logger.error(message, extra=kwargs)
+            self.logger.error(message, *args, extra=kwargs)
 
-    def _log_warning(self, message: str, **kwargs: Any) -> None:
+    def _log_warning(self, message: str, *args: Any, **kwargs: Any) -> None:
         """Log de advertencias con contexto adicional."""
-        self.logger.warning(message, extra=kwargs)
+        self.logger.warning(message, *args, extra=kwargs)
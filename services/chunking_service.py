@@ -43,5 +43,5 @@ class ChunkingService:
             if start < 0:
                 start = 0
 
-        self.logger.info(f"Texto dividido en {len(chunks)} fragmentos")
+        self.logger.info("Texto dividido en %s fragmentos", len(chunks))
         return chunks
\ No newline at end of file
@@ -1,8 +1,91 @@
 import logging
-from typing import Optional, Dict, Any
-from azure.cosmos import CosmosClient, PartitionKey, exceptions
+import re
+import threading
+from contextvars import ContextVar
+from typing import Optional, Dict, Any, List, Tuple
+from azure.core import MatchConditions
+from azure.cosmos import CosmosClient, exceptions
 from .base_service import BaseService
 from config import get_settings
+from utils import telemetry
+
+
+# Sub-estado de un 404 cuando no existe la base de datos o el contenedor
+OWNER_RESOURCE_NOT_FOUND = 1003
+
+
+class CosmosNotProvisionedError(RuntimeError):
+    """La base de datos o el contenedor de Cosmos no existen."""
+
+    def __init__(self, settings):
+        super().__init__(
+            f"El contenedor Cosmos '{settings.cosmos_database_name}/{settings.cosmos_container_name}' "
+            "no existe. Ejecute 'python provision_cosmos.py' antes de iniciar la aplicación."
+        )
+
+
+_FIELD_PATH_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$")
+
+
+def validate_field_path(field: str) -> str:
+    """Valida una ruta de campo JSON ('casoId', '_etiquetas.procesador')."""
+    if not _FIELD_PATH_RE.match(field):
+        raise ValueError(f"Ruta de campo no válida: {field!r}")
+    return field
+
+
+def build_query(
+    filters: Optional[Dict[str, Any]] = None,
+    order_by: Optional[str] = None,
+    descending: bool = False,
+    limit: Optional[int] = None,
+) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Construye una consulta SQL de Cosmos parametrizada.
+
+    filters mapea ruta de campo a valor (igualdad) o lista de valores (IN).
+    """
+    clauses = []
+    parameters = []
+    for i, (field, value) in enumerate((filters or {}).items()):
+        path = f"c.{validate_field_path(field)}"
+        name = f"@p{i}"
+        if isinstance(value, (list, tuple, set)):
+            clauses.append(f"ARRAY_CONTAINS({name}, {path})")
+            value = list(value)
+        else:
+            clauses.append(f"{path} = {name}")
+        parameters.append({"name": name, "value": value})
+
+    top = f"TOP {int(limit)} " if limit else ""
+    query = f"SELECT {top}* FROM c"
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    if order_by:
+        query += f" ORDER BY c.{validate_field_path(order_by)} {'DESC' if descending else 'ASC'}"
+    return query, parameters
+
+
+def _header_charge(headers) -> float:
+    try:
+        return float((headers or {}).get("x-ms-request-charge", 0) or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class _ChargeHook:
+    """
+    response_hook que suma x-ms-request-charge de las respuestas de una
+    llamada (una por página en las consultas). A diferencia de
+    client_connection.last_response_headers, no lo pisan otros hilos.
+    """
+
+    def __init__(self):
+        self.charge = 0.0
+
+    def __call__(self, headers, _result) -> None:
+        self.charge += _header_charge(headers)
+
 
 class CosmosDBService(BaseService):
     """Servicio para interactuar con Azure Cosmos DB."""
@@ -13,30 +96,49 @@ class CosmosDBService(BaseService):
         self._database = None
         self._container = None
         self._settings = get_settings()
+        self._charges_lock = threading.Lock()
+        self._last_charge: ContextVar[float] = ContextVar(f"cosmos_request_charge_{id(self)}", default=0.0)
+        self.reset_request_charges()
         self.initialize()
 
     def initialize(self) -> None:
-        """Inicializa el cliente de Cosmos DB y asegura base de datos y contenedor."""
+        """
+        Enlaza el cliente con la base de datos y el contenedor existentes.
+
+        No hace llamadas al plano de control: la base y el contenedor se
+        crean una sola vez con ``python provision_cosmos.py``. Si faltan, la
+        primera operación falla con CosmosNotProvisionedError (o al iniciar,
+        con COSMOS_VERIFY_ON_START=true).
+        """
         try:
             self._client = CosmosClient(
                 url=self._settings.cosmos_endpoint,
                 credential=self._settings.cosmos_key
             )
-            # Crear base de datos si no existe
-            self._database = self._client.create_database_if_not_exists(
-                id=self._settings.cosmos_database_name
-            )
-            # Crear contenedor con partition key /tipo_documento o /caso_id
-            self._container = self._database.create_container_if_not_exists(
-                id=self._settings.cosmos_container_name,
-                partition_key=PartitionKey(path="/tipoDocumento"),
-                offer_throughput=400
-            )
+            self._database = self._client.get_database_client(self._settings.cosmos_database_name)
+            self._container = self._database.get_container_client(self._settings.cosmos_container_name)
+            if self._settings.cosmos_verify_on_start:
+                self.verify_provisioning()
             self._log_info("Cosmos DB client initialized successfully")
         except Exception as e:
             self._log_error("Failed to initialize Cosmos DB client", error=e)
             raise
 
+    def verify_provisioning(self) -> Dict[str, Any]:
+        """Lee las propiedades del contenedor; falla si no está aprovisionado."""
+        try:
+            return self._container.read()
+        except exceptions.CosmosResourceNotFoundError as e:
+            raise CosmosNotProvisionedError(self._settings) from e
+
+    def _check_provisioned(self, error: Exception) -> None:
+        """Convierte un 404 de recurso padre inexistente en CosmosNotProvisionedError."""
+        if (
+            isinstance(error, exceptions.CosmosResourceNotFoundError)
+            and getattr(error, "sub_status", None) == OWNER_RESOURCE_NOT_FOUND
+        ):
+            raise CosmosNotProvisionedError(self._settings) from error
+
     def health_check(self) -> bool:
         """Verifica conectividad con Cosmos DB."""
         try:
@@ -45,13 +147,60 @@ class CosmosDBService(BaseService):
         except Exception:
             return False
 
-    def upsert_document(self, document: Dict[str, Any], partition_key: str) -> str:
+    # =========================================================
+    # Request units
+    # =========================================================
+
+    def reset_request_charges(self) -> None:
+        with self._charges_lock:
+            self._request_charges: Dict[str, float] = {}
+        self._last_charge.set(0.0)
+
+    @property
+    def last_request_charge(self) -> float:
+        """Cargo de la última operación hecha desde este hilo o tarea."""
+        return self._last_charge.get()
+
+    def get_request_charges(self) -> Dict[str, Any]:
+        """RU acumuladas por operación desde la creación o el último reset."""
+        with self._charges_lock:
+            charges = dict(self._request_charges)
+        return {
+            "total": round(sum(charges.values()), 2),
+            "por_operacion": {k: round(v, 2) for k, v in charges.items()},
+        }
+
+    def _record_charge(self, operation: str, charge: float) -> float:
+        """
+        Registra el cargo de una operación y lo devuelve.
+
+        El servicio es un singleton compartido entre hilos: el último cargo
+        se guarda en un ContextVar (cada hilo o tarea ve el suyo) y los
+        totales se actualizan bajo lock.
+        """
+        self._last_charge.set(charge)
+        with self._charges_lock:
+            self._request_charges[operation] = self._request_charges.get(operation, 0.0) + charge
+        return charge
+
+    # =========================================================
+    # Operaciones
+    # =========================================================
+
+    def upsert_document(
+        self,
+        document: Dict[str, Any],
+        partition_key: str,
+        if_match: Optional[str] = None,
+    ) -> str:
         """
         Inserta o reemplaza un documento en el contenedor.
 
         Args:
             document: Documento a guardar (debe incluir un campo 'id' único).
             partition_key: Valor de la clave de partición.
+            if_match: ETag esperado; si el documento cambió desde entonces
+                falla con CosmosAccessConditionFailedError (412).
 
         Returns:
             str: ID del documento insertado.
@@ -59,20 +208,111 @@ class CosmosDBService(BaseService):
         try:
             # Agregar campo de partición si no está en el documento
             document["tipoDocumento"] = partition_key
-            result = self._container.upsert_item(body=document)
-            self._log_info(f"Document upserted with id: {result['id']}")
+            with telemetry.stage_span("cosmos.upsert", partition=partition_key) as span:
+                hook = _ChargeHook()
+                if if_match:
+                    result = self._container.upsert_item(
+                        body=document, etag=if_match, match_condition=MatchConditions.IfNotModified,
+                        response_hook=hook,
+                    )
+                else:
+                    result = self._container.upsert_item(body=document, response_hook=hook)
+                telemetry.set_attributes(span, request_charge=self._record_charge("upsert", hook.charge))
+            self._log_info("Document upserted with id: %s", result['id'])
             return result["id"]
         except Exception as e:
+            self._check_provisioned(e)
             self._log_error("Failed to upsert document in Cosmos DB", error=e)
             raise
 
+    def create_document(self, document: Dict[str, Any], partition_key: str) -> str:
+        """
+        Inserta un documento nuevo.
+
+        Raises:
+            CosmosResourceExistsError: Si ya existe un documento con ese id (409).
+        """
+        try:
+            document["tipoDocumento"] = partition_key
+            with telemetry.stage_span("cosmos.create", partition=partition_key) as span:
+                hook = _ChargeHook()
+                result = self._container.create_item(body=document, response_hook=hook)
+                telemetry.set_attributes(span, request_charge=self._record_charge("create", hook.charge))
+            self._log_info("Document created with id: %s", result['id'])
+            return result["id"]
+        except exceptions.CosmosResourceExistsError:
+            raise
+        except Exception as e:
+            self._check_provisioned(e)
+            self._log_error("Failed to create document in Cosmos DB", error=e)
+            raise
+
     def get_document(self, doc_id: str, partition_key: str) -> Optional[Dict[str, Any]]:
         """Recupera un documento por id y clave de partición."""
+        hook = _ChargeHook()
         try:
-            item = self._container.read_item(item=doc_id, partition_key=partition_key)
+            item = self._container.read_item(item=doc_id, partition_key=partition_key, response_hook=hook)
+            self._record_charge("read", hook.charge)
             return item
-        except exceptions.CosmosResourceNotFoundError:
+        except exceptions.CosmosResourceNotFoundError as e:
+            self._check_provisioned(e)
+            self._record_charge("read", _header_charge(getattr(e, "headers", None)))
             return None
         except Exception as e:
             self._log_error("Failed to read document from Cosmos DB", error=e)
-            raise
\ No newline at end of file
+            raise
+
+    def query_documents(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        partition_key: Optional[str] = None,
+        order_by: Optional[str] = None,
+        descending: bool = False,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Consulta documentos por campos JSON (ver build_query).
+
+        Args:
+            filters: Ruta de campo -> valor o lista de valores.
+            partition_key: Limita la consulta a una partición; sin ella
+                la consulta es cross-partition.
+            order_by: Ruta de campo para ordenar.
+            descending: Orden descendente.
+            limit: Máximo de documentos.
+
+        Returns:
+            list: Documentos encontrados.
+        """
+        query, parameters = build_query(filters, order_by, descending, limit)
+        try:
+            hook = _ChargeHook()
+            result = list(self._container.query_items(
+                query=query,
+                parameters=parameters,
+                partition_key=partition_key,
+                enable_cross_partition_query=partition_key is None,
+                response_hook=hook,
+            ))
+            self._record_charge("query", hook.charge)
+            return result
+        except Exception as e:
+            self._check_provisioned(e)
+            self._log_error("Failed to query documents in Cosmos DB", error=e)
+            raise
+
+    def get_documents_by_caso(self, caso_id: str) -> List[Dict[str, Any]]:
+        """Documentos de un caso en todas las particiones (tipos de documento)."""
+        return self.query_documents({"casoId": caso_id}, order_by="fechaProcesamiento")
+
+
+def create_cosmos_service():
+    """Crea el servicio configurado en COSMOS_BACKEND (azure | sqlite)."""
+    settings = get_settings()
+    backend = settings.cosmos_backend.lower()
+    if backend == "azure":
+        return CosmosDBService()
+    if backend == "sqlite":
+        from .sqlite_cosmos_service import SqliteCosmosDBService
+        return SqliteCosmosDBService(settings.cosmos_sqlite_path)
+    raise ValueError(f"Backend de Cosmos DB desconocido: {settings.cosmos_backend}")
@@ -1,36 +1,43 @@
-import json
-from typing import Optional
-from azure.storage.filedatalake import DataLakeServiceClient
+from datetime import datetime
+from typing import List, Optional
 
 from .base_service import BaseService
+from .storage_backends import StorageBackend, StoredFile, create_backend
 from config import get_settings
+from utils import json_codec, telemetry
 
 
 class DataLakeService(BaseService):
-    """Servicio para interactuar con Azure Data Lake Gen2."""
+    """
+    Servicio para interactuar con Azure Data Lake Gen2.
 
-    def __init__(self):
+    El acceso físico lo hace un backend (ver services/storage_backends.py),
+    elegido con DATALAKE_BACKEND: Azure o un directorio local.
+    """
+
+    def __init__(self, backend: Optional[StorageBackend] = None):
         super().__init__()
-        self._client: Optional[DataLakeServiceClient] = None
+        self._backend: Optional[StorageBackend] = backend
         self._settings = get_settings()
-        self.initialize()
+        if backend is None:
+            self.initialize()
 
     def initialize(self) -> None:
-        """Inicializa el cliente de Data Lake."""
+        """Inicializa el backend de almacenamiento configurado."""
         try:
-            account_url = f"https://{self._settings.datalake_account_name}.dfs.core.windows.net"
-            self._client = DataLakeServiceClient(
-                account_url=account_url,
-                credential=self._settings.datalake_account_key
-            )
-            self._log_info("Data Lake client initialized successfully")
+            self._backend = create_backend(self._settings)
+            self._log_info("Data Lake client initialized successfully (backend: %s)", self._backend.name)
         except Exception as e:
             self._log_error("Failed to initialize Data Lake client", error=e)
             raise
 
     def health_check(self) -> bool:
         """Verifica que el servicio este disponible."""
-        return self._client is not None
+        return self._backend is not None
+
+    @property
+    def backend(self) -> StorageBackend:
+        return self._backend
 
     def read_file(self, container: str, file_path: str) -> bytes:
         """
@@ -44,19 +51,37 @@ class DataLakeService(BaseService):
             bytes: Contenido del archivo.
         """
         try:
-            self._log_info(f"Reading file from {container}/{file_path}")
+            self._log_debug("Reading file from %s/%s", container, file_path)
 
-            file_system_client = self._client.get_file_system_client(container)
-            file_client = file_system_client.get_file_client(file_path)
+            with telemetry.stage_span("datalake.read", container=container) as span:
+                content = self._backend.read(container, file_path)
+                telemetry.set_attributes(span, bytes=len(content))
 
-            download = file_client.download_file()
-            content = download.readall()
-
-            self._log_info(f"File read successfully, size: {len(content)} bytes")
+            self._log_debug("File read successfully, size: %s bytes", len(content))
             return content
 
         except Exception as e:
-            self._log_error(f"Failed to read file {container}/{file_path}", error=e)
+            self._log_error("Failed to read file %s/%s", container, file_path, error=e)
+            raise
+
+    def read_range(self, container: str, file_path: str, offset: int, length: int) -> bytes:
+        """
+        Lee un rango de bytes de un archivo del Data Lake.
+
+        Args:
+            container: Nombre del contenedor (filesystem).
+            file_path: Ruta del archivo dentro del contenedor.
+            offset: Byte inicial.
+            length: Cantidad de bytes a leer.
+
+        Returns:
+            bytes: Contenido del rango (puede ser menor si el archivo es más corto).
+        """
+        try:
+            return self._backend.read_range(container, file_path, offset, length)
+
+        except Exception as e:
+            self._log_error("Failed to read range of %s/%s", container, file_path, error=e)
             raise
 
     def write_json(self, container: str, file_path: str, data: dict) -> str:
@@ -72,31 +97,38 @@ class DataLakeService(BaseService):
             str: Ruta completa del archivo guardado.
         """
         try:
-            self._log_info(f"Writing JSON to {container}/{file_path}")
+            content_bytes = json_codec.dumps(data, indent=self._settings.datalake_json_indent)
+        except Exception as e:
+            self._log_error("Failed to serialize JSON for %s/%s", container, file_path, error=e)
+            raise
 
-            json_content = json.dumps(data, indent=2, ensure_ascii=False)
-            content_bytes = json_content.encode('utf-8')
+        return self.write_bytes(container, file_path, content_bytes)
 
-            file_system_client = self._client.get_file_system_client(container)
+    def write_bytes(self, container: str, file_path: str, content_bytes: bytes) -> str:
+        """
+        Escribe un archivo binario al Data Lake, creando los directorios necesarios.
+        En el backend local la escritura es atómica (temporal + rename).
 
-            # Crear directorios si no existen
-            directory_path = "/".join(file_path.split("/")[:-1])
-            if directory_path:
-                directory_client = file_system_client.get_directory_client(directory_path)
-                try:
-                    directory_client.create_directory()
-                except Exception:
-                    pass  # El directorio ya existe
+        Args:
+            container: Nombre del contenedor (filesystem).
+            file_path: Ruta del archivo dentro del contenedor.
+            content_bytes: Contenido a guardar.
+
+        Returns:
+            str: Ruta completa del archivo guardado.
+        """
+        try:
+            self._log_debug("Writing %s bytes to %s/%s", len(content_bytes), container, file_path)
 
-            file_client = file_system_client.get_file_client(file_path)
-            file_client.upload_data(content_bytes, overwrite=True)
+            with telemetry.stage_span("datalake.write", container=container, bytes=len(content_bytes)):
+                self._backend.write(container, file_path, content_bytes)
 
             full_path = f"{container}/{file_path}"
-            self._log_info(f"JSON escrito exitosamente a {full_path}")
+            self._log_info("Archivo escrito exitosamente a %s", full_path)
             return full_path
 
         except Exception as e:
-            self._log_error(f"Failed to write JSON to {container}/{file_path}", error=e)
+            self._log_error("Failed to write %s/%s", container, file_path, error=e)
             raise
 
     def file_exists(self, container: str, file_path: str) -> bool:
@@ -111,10 +143,7 @@ class DataLakeService(BaseService):
             bool: True si el archivo existe, False en caso contrario.
         """
         try:
-            file_system_client = self._client.get_file_system_client(container)
-            file_client = file_system_client.get_file_client(file_path)
-            file_client.get_file_properties()
-            return True
+            return self._backend.exists(container, file_path)
         except Exception:
             return False
 
@@ -131,20 +160,16 @@ class DataLakeService(BaseService):
             list: Lista de rutas de archivos.
         """
         try:
-            file_system_client = self._client.get_file_system_client(container)
-            paths = file_system_client.get_paths(path=directory_path)
+            files = [
+                f.name for f in self._backend.list(container, directory_path)
+                if extension is None or f.name.lower().endswith(extension.lower())
+            ]
 
-            files = []
-            for path in paths:
-                if not path.is_directory:
-                    if extension is None or path.name.lower().endswith(extension.lower()):
-                        files.append(path.name)
-
-            self._log_info(f"Found {len(files)} files in {container}/{directory_path}")
+            self._log_debug("Found %s files in %s/%s", len(files), container, directory_path)
             return files
 
         except Exception as e:
-            self._log_error(f"Failed to list files in {container}/{directory_path}", error=e)
+            self._log_error("Failed to list files in %s/%s", container, directory_path, error=e)
             raise
 
     def delete_file(self, container: str, file_path: str) -> bool:
@@ -159,13 +184,45 @@ class DataLakeService(BaseService):
             bool: True si se elimino correctamente.
         """
         try:
-            file_system_client = self._client.get_file_system_client(container)
-            file_client = file_system_client.get_file_client(file_path)
-            file_client.delete_file()
+            self._backend.delete(container, file_path)
 
-            self._log_info(f"File deleted: {container}/{file_path}")
+            self._log_info("File deleted: %s/%s", container, file_path)
             return True
 
         except Exception as e:
-            self._log_error(f"Failed to delete file {container}/{file_path}", error=e)
+            self._log_error("Failed to delete file %s/%s", container, file_path, error=e)
+            raise
+
+    def list_file_properties(self, container: str, directory_path: str = "") -> List[StoredFile]:
+        """
+        Lista archivos con tamaño y fecha de última modificación.
+
+        Args:
+            container: Nombre del contenedor (filesystem).
+            directory_path: Ruta del directorio ("" para todo el contenedor).
+
+        Returns:
+            list: StoredFile(name, size, last_modified) por archivo.
+        """
+        try:
+            return self._backend.list(container, directory_path)
+        except Exception as e:
+            self._log_error("Failed to list files in %s/%s", container, directory_path, error=e)
+            raise
+
+    def last_modified(self, container: str, file_path: str) -> datetime:
+        """
+        Fecha de última modificación de un archivo (UTC).
+
+        Args:
+            container: Nombre del contenedor (filesystem).
+            file_path: Ruta del archivo dentro del contenedor.
+
+        Returns:
+            datetime: Última modificación.
+        """
+        try:
+            return self._backend.last_modified(container, file_path)
+        except Exception as e:
+            self._log_error("Failed to read properties of %s/%s", container, file_path, error=e)
             raise
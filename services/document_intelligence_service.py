@@ -3,7 +3,9 @@ from azure.ai.formrecognizer import DocumentAnalysisClient
 from azure.core.credentials import AzureKeyCredential
 
 from .base_service import BaseService
+from .ocr_result import OcrResult, DETAIL_CONTENT, DETAIL_LAYOUT
 from config import get_settings
+from utils import telemetry
 
 class DocumentIntelligenceService(BaseService):
     """Servicio para procesar documentos PDF usando Azure Document Intelligence."""
@@ -31,26 +33,37 @@ class DocumentIntelligenceService(BaseService):
         """Verifica que el servicio este disponible."""
         return self._client is not None
 
-    def analyze_document(self, pdf_bytes: bytes) -> dict:
+    def analyze_document(self, pdf_bytes: bytes, detail: str = DETAIL_LAYOUT,
+                         pages: Optional[str] = None) -> OcrResult:
         """
         Analiza un documento PDF usando el modelo layout.
 
         Args:
             pdf_bytes: Contenido del PDF en bytes.
+            detail: Secciones que se exponen: "content", "paragraphs" o "layout".
+            pages: Rango de páginas a analizar (p. ej. "1" o "1-3"); todas si es None.
 
         Returns:
-            dict: Resultado del analisis con texto estructurado.
+            OcrResult: Vista perezosa del resultado con texto estructurado.
         """
         try:
             self._log_info("Starting document analysis with layout model")
 
-            poller = self._client.begin_analyze_document(
-                model_id="prebuilt-layout",
-                document=pdf_bytes
-            )
-            result = poller.result()
-
-            extracted_data = self._process_analysis_result(result)
+            with telemetry.stage_span("ocr.submit", bytes=len(pdf_bytes)):
+                poller = self._client.begin_analyze_document(
+                    model_id="prebuilt-layout",
+                    document=pdf_bytes,
+                    **({"pages": pages} if pages else {}),
+                )
+            with telemetry.stage_span("ocr.poll") as span:
+                result = poller.result()
+                telemetry.set_attributes(
+                    span,
+                    pages=len(result.pages) if result.pages else 0,
+                    characters=len(result.content or ""),
+                )
+
+            extracted_data = self._process_analysis_result(result, detail)
 
             self._log_info(
                 "Document analysis completed",
@@ -64,66 +77,21 @@ class DocumentIntelligenceService(BaseService):
             self._log_error("Document analysis failed", error=e)
             raise
 
-    def _process_analysis_result(self, result) -> dict:
+    def _process_analysis_result(self, result, detail: str = DETAIL_LAYOUT) -> OcrResult:
         """
         Procesa el resultado del analisis y extrae el contenido estructurado.
 
+        Las secciones (paginas, tablas, parrafos) se convierten solo al
+        accederlas y solo si el nivel de detalle las incluye.
+
         Args:
             result: Resultado del analisis de Document Intelligence.
+            detail: Nivel de detalle solicitado.
 
         Returns:
-            dict: Contenido estructurado del documento.
+            OcrResult: Contenido estructurado del documento.
         """
-        extracted = {
-            "content": result.content,
-            "pages": [],
-            "tables": [],
-            "paragraphs": []
-        }
-
-        # Procesar paginas
-        if result.pages:
-            for page in result.pages:
-                page_data = {
-                    "page_number": page.page_number,
-                    "width": page.width,
-                    "height": page.height,
-                    "lines": []
-                }
-                if page.lines:
-                    for line in page.lines:
-                        page_data["lines"].append({
-                            "content": line.content,
-                            "polygon": [{"x": p.x, "y": p.y} for p in line.polygon] if line.polygon else []
-                        })
-                extracted["pages"].append(page_data)
-
-        # Procesar tablas
-        if result.tables:
-            for table in result.tables:
-                table_data = {
-                    "row_count": table.row_count,
-                    "column_count": table.column_count,
-                    "cells": []
-                }
-                for cell in table.cells:
-                    table_data["cells"].append({
-                        "row_index": cell.row_index,
-                        "column_index": cell.column_index,
-                        "content": cell.content,
-                        "is_header": cell.kind == "columnHeader" if hasattr(cell, 'kind') else False
-                    })
-                extracted["tables"].append(table_data)
-
-        # Procesar parrafos
-        if result.paragraphs:
-            for paragraph in result.paragraphs:
-                extracted["paragraphs"].append({
-                    "content": paragraph.content,
-                    "role": paragraph.role if hasattr(paragraph, 'role') else None
-                })
-
-        return extracted
+        return OcrResult.from_analyze_result(result, detail=detail)
 
     def get_full_text(self, pdf_bytes: bytes) -> str:
         """
@@ -135,5 +103,5 @@ class DocumentIntelligenceService(BaseService):
         Returns:
             str: Texto completo del documento.
         """
-        result = self.analyze_document(pdf_bytes)
-        return result.get("content", "")
+        result = self.analyze_document(pdf_bytes, detail=DETAIL_CONTENT)
+        return result.content
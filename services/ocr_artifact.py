@@ -0,0 +1,449 @@
+"""
+Contenedor binario compacto para artefactos de OCR.
+
+Formato (little-endian):
+
+    cabecera   MAGIC (8 bytes) | n_secciones (u32)
+    tabla      n_secciones x [nombre (8 bytes) | offset (u64) | longitud (u64)]
+    secciones  alineadas a 8 bytes
+
+Secciones:
+
+- ``meta``: JSON pequeño (versión, nivel de detalle, páginas, roles).
+- ``text``: contenido del documento en UTF-8.
+- ``xtext``: textos de líneas/celdas que no coinciden con su span en ``text``.
+- ``pages``/``lines``/``paras``/``tables``/``cells``: columnas numéricas
+  empaquetadas (``array``), una tras otra.
+- ``polys``: coordenadas de polígonos como float32 planos.
+
+Líneas y párrafos se guardan como rangos (offset, longitud) sobre el texto,
+de modo que el texto se almacena una sola vez; el texto de las celdas va en
+``xtext``. La lectura puede hacerse
+con memory mapping (``load_ocr_file``) y, si solo se necesita el texto, basta
+con leer la cabecera y la sección ``text`` (``read_ocr_text``). Desde el
+Data Lake, ``load_ocr_ranged`` lee solo las secciones del nivel de detalle
+pedido (p. ej. párrafos para la selección de páginas).
+"""
+
+import mmap
+import struct
+import sys
+from array import array
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from utils import json_codec
+from .ocr_result import (
+    OcrCell,
+    OcrLine,
+    OcrPage,
+    OcrParagraph,
+    OcrResult,
+    OcrTable,
+    DETAIL_CONTENT,
+    DETAIL_PARAGRAPHS,
+    DETAIL_LAYOUT,
+)
+
+
+MAGIC = b"EPMOCR\x00\x01"
+FORMAT_VERSION = 1
+FILE_EXTENSION = ".ocrb"
+
+_HEADER = struct.Struct("<8sI")
+_ENTRY = struct.Struct("<8sQQ")
+# Lectura inicial suficiente para la cabecera y la tabla de secciones
+HEADER_READ_SIZE = _HEADER.size + 16 * _ENTRY.size
+
+# Columnas por sección: (nombre, typecode)
+_COLUMNS = {
+    "pages": (("page_number", "I"), ("width", "f"), ("height", "f"),
+              ("line_start", "I"), ("line_count", "I")),
+    "lines": (("offset", "i"), ("length", "I"), ("poly_start", "I"), ("poly_len", "I")),
+    "paras": (("offset", "i"), ("length", "I"), ("page_number", "I"), ("role", "b")),
+    "tables": (("row_count", "I"), ("column_count", "I"), ("cell_start", "I"), ("cell_count", "I")),
+    "cells": (("row_index", "I"), ("column_index", "I"), ("is_header", "B"), ("page_number", "I"),
+              ("offset", "i"), ("length", "I"), ("poly_start", "I"), ("poly_len", "I")),
+}
+
+# Secciones que hay que leer por nivel de detalle (lectura por rangos)
+_DETAIL_ORDER = (DETAIL_CONTENT, DETAIL_PARAGRAPHS, DETAIL_LAYOUT)
+_RANGED_SECTIONS = {
+    DETAIL_CONTENT: ("meta", "text"),
+    DETAIL_PARAGRAPHS: ("meta", "text", "xtext", "paras"),
+    DETAIL_LAYOUT: ("meta", "text", "xtext", "pages", "lines", "paras", "tables", "cells", "polys"),
+}
+
+Buffer = Union[bytes, bytearray, memoryview, mmap.mmap]
+
+
+def _check_byteorder() -> None:
+    if sys.byteorder != "little":
+        raise ValueError("El formato de artefactos OCR solo está soportado en hosts little-endian")
+
+
+# =========================================================
+# Escritura
+# =========================================================
+
+class _TextRefs:
+    """Referencias de texto: rango sobre ``text`` o, si no coincide, sobre ``xtext``."""
+
+    def __init__(self, text: str):
+        self._text = text
+        self._extra: List[str] = []
+        self._extra_len = 0
+
+    def ref(self, content: str, offset: int, length: int) -> Tuple[int, int]:
+        content = content or ""
+        if offset >= 0 and length == len(content) and self._text.startswith(content, offset):
+            return offset, length
+        # Offsets negativos: -(posición en xtext + 1)
+        extra_offset = self._extra_len
+        self._extra.append(content)
+        self._extra_len += len(content)
+        return -(extra_offset + 1), len(content)
+
+    def extra_text(self) -> str:
+        return "".join(self._extra)
+
+
+def _pack_columns(section: str, columns: Dict[str, array]) -> bytes:
+    return b"".join(columns[name].tobytes() for name, _ in _COLUMNS[section])
+
+
+def _new_columns(section: str) -> Dict[str, array]:
+    return {name: array(code) for name, code in _COLUMNS[section]}
+
+
+def dump_ocr(result: OcrResult) -> bytes:
+    """Serializa un OcrResult (las secciones disponibles según su detalle)."""
+    _check_byteorder()
+    text = result.content
+    refs = _TextRefs(text)
+    polys = array("f")
+    roles: List[str] = []
+    role_ids: Dict[str, int] = {}
+
+    pages = _new_columns("pages")
+    lines = _new_columns("lines")
+    if result.has_section("pages"):
+        for page in result.pages:
+            pages["page_number"].append(page.page_number or 0)
+            pages["width"].append(page.width or 0.0)
+            pages["height"].append(page.height or 0.0)
+            pages["line_start"].append(len(lines["offset"]))
+            pages["line_count"].append(len(page.lines))
+            for line in page.lines:
+                offset, length = refs.ref(line.content, line.offset, line.length)
+                lines["offset"].append(offset)
+                lines["length"].append(length)
+                lines["poly_start"].append(len(polys))
+                lines["poly_len"].append(len(line.polygon))
+                polys.extend(line.polygon)
+
+    paras = _new_columns("paras")
+    if result.has_section("paragraphs"):
+        for paragraph in result.paragraphs:
+            offset, length = refs.ref(paragraph.content, paragraph.offset, paragraph.length)
+            paras["offset"].append(offset)
+            paras["length"].append(length)
+            paras["page_number"].append(paragraph.page_number or 0)
+            if paragraph.role is None:
+                paras["role"].append(-1)
+            else:
+                if paragraph.role not in role_ids:
+                    role_ids[paragraph.role] = len(roles)
+                    roles.append(paragraph.role)
+                paras["role"].append(role_ids[paragraph.role])
+
+    tables = _new_columns("tables")
+    cells = _new_columns("cells")
+    if result.has_section("tables"):
+        for table in result.tables:
+            tables["row_count"].append(table.row_count)
+            tables["column_count"].append(table.column_count)
+            tables["cell_start"].append(len(cells["row_index"]))
+            tables["cell_count"].append(len(table.cells))
+            for cell in table.cells:
+                offset, length = refs.ref(cell.content, -1, 0)
+                cells["row_index"].append(cell.row_index)
+                cells["column_index"].append(cell.column_index)
+                cells["is_header"].append(1 if cell.is_header else 0)
+                cells["page_number"].append(cell.page_number or 0)
+                cells["offset"].append(offset)
+                cells["length"].append(length)
+                cells["poly_start"].append(len(polys))
+                cells["poly_len"].append(len(cell.polygon))
+                polys.extend(cell.polygon)
+
+    meta = {
+        "version": FORMAT_VERSION,
+        "detail": result.detail,
+        "page_count": result.page_count,
+        "roles": roles,
+        "counts": {
+            "pages": len(pages["page_number"]),
+            "lines": len(lines["offset"]),
+            "paras": len(paras["offset"]),
+            "tables": len(tables["row_count"]),
+            "cells": len(cells["row_index"]),
+        },
+    }
+
+    sections = [
+        (b"meta", json_codec.dumps(meta)),
+        (b"text", text.encode("utf-8")),
+        (b"xtext", refs.extra_text().encode("utf-8")),
+        (b"pages", _pack_columns("pages", pages)),
+        (b"lines", _pack_columns("lines", lines)),
+        (b"paras", _pack_columns("paras", paras)),
+        (b"tables", _pack_columns("tables", tables)),
+        (b"cells", _pack_columns("cells", cells)),
+        (b"polys", polys.tobytes()),
+    ]
+
+    offset = _HEADER.size + _ENTRY.size * len(sections)
+    entries = []
+    body = []
+    for name, data in sections:
+        padding = (-offset) % 8
+        if padding:
+            body.append(b"\x00" * padding)
+            offset += padding
+        entries.append(_ENTRY.pack(name, offset, len(data)))
+        body.append(data)
+        offset += len(data)
+
+    return b"".join([_HEADER.pack(MAGIC, len(sections))] + entries + body)
+
+
+# =========================================================
+# Lectura
+# =========================================================
+
+def read_section_table(header: Buffer) -> Dict[str, Tuple[int, int]]:
+    """
+    Lee la tabla de secciones desde el inicio del archivo.
+
+    Raises:
+        ValueError: Si el buffer no es un artefacto OCR válido.
+    """
+    view = memoryview(header)
+    if len(view) < _HEADER.size:
+        raise ValueError("Artefacto OCR truncado")
+    magic, count = _HEADER.unpack_from(view, 0)
+    if magic != MAGIC:
+        raise ValueError("No es un artefacto OCR (magic inválido)")
+    if len(view) < _HEADER.size + count * _ENTRY.size:
+        raise ValueError("Artefacto OCR truncado (tabla de secciones)")
+    table = {}
+    for i in range(count):
+        name, offset, length = _ENTRY.unpack_from(view, _HEADER.size + i * _ENTRY.size)
+        table[name.rstrip(b"\x00").decode("ascii")] = (offset, length)
+    return table
+
+
+class _Reader:
+    """
+    Acceso a secciones y columnas sobre un buffer (bytes o mmap) sin copiarlo.
+
+    Con ``sections`` y ``base`` el buffer es solo un tramo del archivo que
+    empieza en ``base`` (lectura por rangos).
+    """
+
+    def __init__(self, buffer: Buffer, sections: Optional[Dict[str, Tuple[int, int]]] = None,
+                 base: int = 0):
+        _check_byteorder()
+        self._buffer = buffer
+        self._view = memoryview(buffer)
+        self._base = base
+        self.sections = sections if sections is not None else read_section_table(self._view)
+        self.meta = json_codec.loads(self.section("meta"))
+        self._xtext: Optional[str] = None
+
+    def section(self, name: str) -> memoryview:
+        offset, length = self.sections[name]
+        offset -= self._base
+        return self._view[offset:offset + length]
+
+    def text(self) -> str:
+        return str(self.section("text"), "utf-8")
+
+    def xtext(self) -> str:
+        if self._xtext is None:
+            self._xtext = str(self.section("xtext"), "utf-8") if "xtext" in self.sections else ""
+        return self._xtext
+
+    def columns(self, name: str) -> Dict[str, list]:
+        """Columnas de una sección convertidas a listas (una conversión en C por columna)."""
+        count = self.meta["counts"][name]
+        view = self.section(name)
+        result = {}
+        pos = 0
+        for column, code in _COLUMNS[name]:
+            size = array(code).itemsize * count
+            result[column] = view[pos:pos + size].cast(code).tolist()
+            pos += size
+        return result
+
+    def polygon(self, start: int, length: int) -> array:
+        """Polígono como array('f') copiado directamente desde los bytes."""
+        polygon = array("f")
+        if length:
+            offset, _ = self.sections["polys"]
+            begin = offset - self._base + start * polygon.itemsize
+            polygon.frombytes(self._view[begin:begin + length * polygon.itemsize])
+        return polygon
+
+
+def _resolve(text: str, extra: Callable[[], str], offset: int, length: int) -> str:
+    if offset >= 0:
+        return text[offset:offset + length]
+    start = -offset - 1
+    return extra()[start:start + length]
+
+
+def load_ocr(buffer: Buffer) -> OcrResult:
+    """
+    Carga un artefacto OCR. Solo el texto se decodifica de inmediato; páginas,
+    líneas, párrafos y tablas se construyen al primer acceso.
+    """
+    reader = _Reader(buffer)
+    return _load(reader, reader.meta.get("detail", DETAIL_LAYOUT))
+
+
+def _load(reader: _Reader, detail: str) -> OcrResult:
+    meta = reader.meta
+    text = reader.text()
+
+    def load_pages() -> List[OcrPage]:
+        pages = reader.columns("pages")
+        lines = reader.columns("lines")
+
+        def loader(start: int, count: int) -> Callable[[], List[OcrLine]]:
+            def load_lines() -> List[OcrLine]:
+                result = []
+                for i in range(start, start + count):
+                    offset, length = lines["offset"][i], lines["length"][i]
+                    result.append(OcrLine(
+                        _resolve(text, reader.xtext, offset, length),
+                        reader.polygon(lines["poly_start"][i], lines["poly_len"][i]),
+                        offset,
+                        length,
+                    ))
+                return result
+            return load_lines
+
+        return [
+            OcrPage(
+                pages["page_number"][i],
+                pages["width"][i],
+                pages["height"][i],
+                load_lines=loader(pages["line_start"][i], pages["line_count"][i]),
+            )
+            for i in range(len(pages["page_number"]))
+        ]
+
+    def load_paragraphs() -> List[OcrParagraph]:
+        paras = reader.columns("paras")
+        roles = meta.get("roles", [])
+        return [
+            OcrParagraph(
+                _resolve(text, reader.xtext, paras["offset"][i], paras["length"][i]),
+                roles[paras["role"][i]] if paras["role"][i] >= 0 else None,
+                paras["offset"][i],
+                paras["length"][i],
+                paras["page_number"][i],
+            )
+            for i in range(len(paras["offset"]))
+        ]
+
+    def load_tables() -> List[OcrTable]:
+        tables = reader.columns("tables")
+        cells = reader.columns("cells")
+        result = []
+        for t in range(len(tables["row_count"])):
+            start = tables["cell_start"][t]
+            table_cells = []
+            for i in range(start, start + tables["cell_count"][t]):
+                table_cells.append(OcrCell(
+                    cells["row_index"][i],
+                    cells["column_index"][i],
+                    _resolve(text, reader.xtext, cells["offset"][i], cells["length"][i]),
+                    bool(cells["is_header"][i]),
+                    cells["page_number"][i],
+                    reader.polygon(cells["poly_start"][i], cells["poly_len"][i]),
+                ))
+            result.append(OcrTable(tables["row_count"][t], tables["column_count"][t], table_cells))
+        return result
+
+    return OcrResult(
+        text,
+        meta["page_count"],
+        detail=detail,
+        loaders={"pages": load_pages, "paragraphs": load_paragraphs, "tables": load_tables},
+    )
+
+
+def load_ocr_file(path: str) -> OcrResult:
+    """Carga un artefacto desde disco con memory mapping (el mmap vive con el resultado)."""
+    with open(path, "rb") as handle:
+        mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    return load_ocr(mapped)
+
+
+def read_ocr_text(source: Union[Buffer, str]) -> str:
+    """
+    Lee solo el texto de un artefacto (buffer en memoria o ruta local).
+    Con una ruta se mapea el archivo y solo se tocan la cabecera y la sección de texto.
+    """
+    if isinstance(source, str):
+        with open(source, "rb") as handle:
+            with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return read_ocr_text(mapped)
+    with memoryview(source) as view:
+        offset, length = read_section_table(view)["text"]
+        with view[offset:offset + length] as text_view:
+            return str(text_view, "utf-8")
+
+
+def text_range(header: Buffer) -> Tuple[int, int]:
+    """(offset, longitud) de la sección de texto, para lecturas por rango remotas."""
+    return read_section_table(header)["text"]
+
+
+def read_ocr_text_ranged(read_range: Callable[[int, int], bytes]) -> str:
+    """
+    Lee solo el texto de un artefacto remoto usando lecturas por rango
+    (p. ej. ``lambda o, n: datalake.read_range(container, path, o, n)``):
+    una lectura para la cabecera y otra para la sección de texto.
+    """
+    offset, length = text_range(read_range(0, HEADER_READ_SIZE))
+    if length == 0:
+        return ""
+    return str(read_range(offset, length), "utf-8")
+
+
+def load_ocr_ranged(read_range: Callable[[int, int], bytes], detail: str = DETAIL_CONTENT) -> OcrResult:
+    """
+    Carga un artefacto remoto con dos lecturas por rango: la cabecera y el
+    tramo que cubre las secciones del nivel de detalle pedido (el de
+    contenido lee solo ``meta`` y ``text``; el de párrafos agrega ``xtext``
+    y ``paras``). El resultado no pasa del nivel con que se guardó.
+    """
+    table = read_section_table(read_range(0, HEADER_READ_SIZE))
+    names = [name for name in _RANGED_SECTIONS[detail] if name in table]
+    start = min(table[name][0] for name in names)
+    end = max(table[name][0] + table[name][1] for name in names)
+    reader = _Reader(read_range(start, end - start), {name: table[name] for name in names}, base=start)
+    stored = reader.meta.get("detail", DETAIL_LAYOUT)
+    return _load(reader, min(detail, stored, key=_DETAIL_ORDER.index))
+
+
+def load_ocr_content_ranged(read_range: Callable[[int, int], bytes]) -> OcrResult:
+    """
+    Como ``read_ocr_text_ranged`` pero devuelve un OcrResult de nivel
+    contenido (texto y número de páginas). ``meta`` y ``text`` son
+    contiguas, así que basta una segunda lectura.
+    """
+    return load_ocr_ranged(read_range, DETAIL_CONTENT)
@@ -0,0 +1,293 @@
+"""
+Resultado de OCR basado en vistas perezosas.
+
+``OcrResult`` envuelve la respuesta de Document Intelligence y solo convierte
+cada sección (páginas/líneas, párrafos, tablas) la primera vez que se accede.
+Los polígonos se guardan como arreglos planos ``array('f')`` (x0, y0, x1, y1,
+...) en lugar de una lista de dicts por punto. El nivel de detalle limita qué
+secciones quedan disponibles:
+
+- ``content``: solo texto y número de páginas.
+- ``paragraphs``: además párrafos (con rol y offsets).
+- ``layout``: además páginas con líneas y tablas.
+"""
+
+from array import array
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+
+DETAIL_CONTENT = "content"
+DETAIL_PARAGRAPHS = "paragraphs"
+DETAIL_LAYOUT = "layout"
+
+_DETAIL_SECTIONS = {
+    DETAIL_CONTENT: frozenset(),
+    DETAIL_PARAGRAPHS: frozenset({"paragraphs"}),
+    DETAIL_LAYOUT: frozenset({"paragraphs", "pages", "tables"}),
+}
+
+
+def flat_polygon(points: Optional[Sequence[Any]]) -> array:
+    """Convierte una secuencia de puntos con x/y en un array('f') plano."""
+    coords = array("f")
+    if points:
+        append = coords.append
+        for p in points:
+            append(p.x)
+            append(p.y)
+    return coords
+
+
+def polygon_points(polygon: array) -> List[Dict[str, float]]:
+    """Formato anterior: lista de {"x", "y"}."""
+    return [{"x": polygon[i], "y": polygon[i + 1]} for i in range(0, len(polygon) - 1, 2)]
+
+
+def _first_span(obj: Any) -> tuple:
+    spans = getattr(obj, "spans", None)
+    if spans:
+        return spans[0].offset, spans[0].length
+    return -1, 0
+
+
+def _first_region(obj: Any, with_polygon: bool = True) -> tuple:
+    regions = getattr(obj, "bounding_regions", None)
+    if regions:
+        polygon = flat_polygon(regions[0].polygon) if with_polygon else None
+        return regions[0].page_number, polygon
+    return 0, array("f") if with_polygon else None
+
+
+# =========================================================
+# Vistas
+# =========================================================
+
+class OcrLine:
+    __slots__ = ("content", "polygon", "offset", "length")
+
+    def __init__(self, content: str, polygon: array, offset: int = -1, length: int = 0):
+        self.content = content
+        self.polygon = polygon
+        self.offset = offset
+        self.length = length
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"content": self.content, "polygon": polygon_points(self.polygon)}
+
+
+class OcrPage:
+    """Página con líneas que se convierten al primer acceso."""
+
+    __slots__ = ("page_number", "width", "height", "_lines", "_load_lines")
+
+    def __init__(self, page_number: int, width: float, height: float,
+                 lines: Optional[List[OcrLine]] = None,
+                 load_lines: Optional[Callable[[], List[OcrLine]]] = None):
+        self.page_number = page_number
+        self.width = width
+        self.height = height
+        self._lines = lines
+        self._load_lines = load_lines
+
+    @property
+    def lines(self) -> List[OcrLine]:
+        if self._lines is None:
+            self._lines = self._load_lines() if self._load_lines else []
+            self._load_lines = None
+        return self._lines
+
+    @property
+    def text(self) -> str:
+        return "\n".join(line.content for line in self.lines)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "page_number": self.page_number,
+            "width": self.width,
+            "height": self.height,
+            "lines": [line.to_dict() for line in self.lines],
+        }
+
+
+class OcrParagraph:
+    __slots__ = ("content", "role", "offset", "length", "page_number")
+
+    def __init__(self, content: str, role: Optional[str], offset: int = -1,
+                 length: int = 0, page_number: int = 0):
+        self.content = content
+        self.role = role
+        self.offset = offset
+        self.length = length
+        self.page_number = page_number
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"content": self.content, "role": self.role}
+
+
+class OcrCell:
+    __slots__ = ("row_index", "column_index", "content", "is_header", "page_number", "polygon")
+
+    def __init__(self, row_index: int, column_index: int, content: str, is_header: bool,
+                 page_number: int = 0, polygon: Optional[array] = None):
+        self.row_index = row_index
+        self.column_index = column_index
+        self.content = content
+        self.is_header = is_header
+        self.page_number = page_number
+        self.polygon = polygon if polygon is not None else array("f")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "row_index": self.row_index,
+            "column_index": self.column_index,
+            "content": self.content,
+            "is_header": self.is_header,
+        }
+
+
+class OcrTable:
+    __slots__ = ("row_count", "column_count", "cells")
+
+    def __init__(self, row_count: int, column_count: int, cells: List[OcrCell]):
+        self.row_count = row_count
+        self.column_count = column_count
+        self.cells = cells
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "row_count": self.row_count,
+            "column_count": self.column_count,
+            "cells": [cell.to_dict() for cell in self.cells],
+        }
+
+
+# =========================================================
+# Resultado
+# =========================================================
+
+class OcrResult:
+    """
+    Resultado de OCR con secciones perezosas.
+
+    Se puede usar como el dict anterior en lectura (``get``/``[]`` con
+    "content", "pages", "tables", "paragraphs"); ``to_dict()`` materializa
+    el formato completo anterior.
+    """
+
+    def __init__(
+        self,
+        content: str,
+        page_count: int,
+        detail: str = DETAIL_LAYOUT,
+        loaders: Optional[Dict[str, Callable[[], list]]] = None,
+    ):
+        if detail not in _DETAIL_SECTIONS:
+            raise ValueError(f"Nivel de detalle OCR desconocido: {detail}")
+        self.content = content or ""
+        self.page_count = page_count
+        self.detail = detail
+        allowed = _DETAIL_SECTIONS[detail]
+        self._loaders = {k: v for k, v in (loaders or {}).items() if k in allowed}
+        self._sections: Dict[str, list] = {}
+
+    @classmethod
+    def from_analyze_result(cls, result: Any, detail: str = DETAIL_LAYOUT) -> "OcrResult":
+        """Crea la vista sobre un AnalyzeResult del SDK sin convertir nada todavía."""
+        sdk_pages = result.pages or []
+        loaders = {
+            "pages": lambda: [_page_from_sdk(p) for p in sdk_pages],
+            "tables": lambda: [_table_from_sdk(t) for t in (result.tables or [])],
+            "paragraphs": lambda: [_paragraph_from_sdk(p) for p in (result.paragraphs or [])],
+        }
+        return cls(result.content, len(sdk_pages), detail=detail, loaders=loaders)
+
+    def _section(self, name: str) -> list:
+        section = self._sections.get(name)
+        if section is None:
+            loader = self._loaders.pop(name, None)
+            section = loader() if loader else []
+            self._sections[name] = section
+        return section
+
+    @property
+    def pages(self) -> List[OcrPage]:
+        return self._section("pages")
+
+    @property
+    def tables(self) -> List[OcrTable]:
+        return self._section("tables")
+
+    @property
+    def paragraphs(self) -> List[OcrParagraph]:
+        return self._section("paragraphs")
+
+    def has_section(self, name: str) -> bool:
+        return name in self._sections or name in self._loaders
+
+    # Compatibilidad de lectura con el dict anterior
+    _KEYS = ("content", "pages", "tables", "paragraphs")
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key not in self._KEYS:
+            return default
+        return getattr(self, key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._KEYS
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Formato completo anterior (polígonos como lista de {"x", "y"})."""
+        return {
+            "content": self.content,
+            "pages": [page.to_dict() for page in self.pages],
+            "tables": [table.to_dict() for table in self.tables],
+            "paragraphs": [paragraph.to_dict() for paragraph in self.paragraphs],
+        }
+
+
+# =========================================================
+# Conversión desde objetos del SDK
+# =========================================================
+
+def _page_from_sdk(page: Any) -> OcrPage:
+    sdk_lines = page.lines or []
+
+    def load_lines() -> List[OcrLine]:
+        return [
+            OcrLine(line.content, flat_polygon(line.polygon), *_first_span(line))
+            for line in sdk_lines
+        ]
+
+    return OcrPage(page.page_number, page.width, page.height, load_lines=load_lines)
+
+
+def _paragraph_from_sdk(paragraph: Any) -> OcrParagraph:
+    offset, length = _first_span(paragraph)
+    page_number, _ = _first_region(paragraph, with_polygon=False)
+    return OcrParagraph(
+        paragraph.content,
+        getattr(paragraph, "role", None),
+        offset,
+        length,
+        page_number,
+    )
+
+
+def _table_from_sdk(table: Any) -> OcrTable:
+    cells = []
+    for cell in table.cells:
+        page_number, polygon = _first_region(cell)
+        cells.append(OcrCell(
+            cell.row_index,
+            cell.column_index,
+            cell.content,
+            getattr(cell, "kind", None) == "columnHeader",
+            page_number,
+            polygon,
+        ))
+    return OcrTable(table.row_count, table.column_count, cells)
@@ -0,0 +1,250 @@
+"""
+Sustituto embebido de CosmosDBService sobre SQLite.
+
+Implementa la misma interfaz (upsert con ETag, lectura puntual, consultas
+por campos JSON dentro de una partición o cross-partition y conteo de
+request units) guardando cada documento como JSON en una tabla SQLite,
+para probar la orquestación y la búsqueda de casos con miles de casos sin
+tocar la cuenta real.
+
+Las RU son una estimación para comparar patrones de consulta entre sí,
+no una réplica del cobro de Cosmos:
+
+- lectura puntual: 1 RU por KB (mínimo 1);
+- upsert: 5.5 RU por KB (mínimo 5.5), por la indexación por defecto;
+- consulta: 2.8 RU base + 1 RU por KB devuelto + 2.8 RU por cada
+  partición lógica adicional que recorre una consulta cross-partition.
+"""
+
+import math
+import sqlite3
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from azure.cosmos import exceptions
+
+from .base_service import BaseService
+from .cosmos_db_service import validate_field_path
+from utils import json_codec, telemetry
+
+
+POINT_READ_RU_PER_KB = 1.0
+WRITE_RU_PER_KB = 5.5
+QUERY_BASE_RU = 2.8
+QUERY_RU_PER_KB = 1.0
+PARTITION_FANOUT_RU = 2.8
+
+# Campos con índice de expresión (consultas frecuentes del pipeline)
+INDEXED_FIELDS = ("casoId", "procesoId", "fechaProcesamiento")
+
+
+def _kb(size: int) -> float:
+    return max(1.0, math.ceil(size / 1024))
+
+
+class SqliteCosmosDBService(BaseService):
+    """CosmosDBService sobre un archivo SQLite (o ':memory:')."""
+
+    def __init__(self, path: str = ":memory:"):
+        super().__init__()
+        self._path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._charges_lock = threading.Lock()
+        self._last_charge: ContextVar[float] = ContextVar(f"sqlite_request_charge_{id(self)}", default=0.0)
+        self.reset_request_charges()
+        self.initialize()
+
+    def initialize(self) -> None:
+        """Abre la base y crea la tabla e índices si no existen."""
+        try:
+            self._conn = sqlite3.connect(self._path, check_same_thread=False, isolation_level=None)
+            if self._path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS items ("
+                " pk TEXT NOT NULL, id TEXT NOT NULL, body TEXT NOT NULL,"
+                " etag TEXT NOT NULL, ts INTEGER NOT NULL, PRIMARY KEY (pk, id))"
+            )
+            for field in INDEXED_FIELDS:
+                self._conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS ix_{field} ON items (json_extract(body, '$.{field}'))"
+                )
+            self._log_info("SQLite Cosmos stand-in initialized at %s", self._path)
+        except Exception as e:
+            self._log_error("Failed to initialize SQLite Cosmos stand-in", error=e)
+            raise
+
+    def health_check(self) -> bool:
+        try:
+            self._conn.execute("SELECT 1")
+            return True
+        except Exception:
+            return False
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    # =========================================================
+    # Request units
+    # =========================================================
+
+    def reset_request_charges(self) -> None:
+        with self._charges_lock:
+            self._request_charges: Dict[str, float] = {}
+        self._last_charge.set(0.0)
+
+    @property
+    def last_request_charge(self) -> float:
+        """Cargo de la última operación hecha desde este hilo o tarea."""
+        return self._last_charge.get()
+
+    def get_request_charges(self) -> Dict[str, Any]:
+        """RU simuladas acumuladas por operación."""
+        with self._charges_lock:
+            charges = dict(self._request_charges)
+        return {
+            "total": round(sum(charges.values()), 2),
+            "por_operacion": {k: round(v, 2) for k, v in charges.items()},
+        }
+
+    def _record_charge(self, operation: str, charge: float) -> float:
+        """Igual que CosmosDBService._record_charge: último cargo por contexto y totales bajo lock."""
+        last = round(charge, 2)
+        self._last_charge.set(last)
+        with self._charges_lock:
+            self._request_charges[operation] = self._request_charges.get(operation, 0.0) + charge
+        return last
+
+    # =========================================================
+    # Operaciones
+    # =========================================================
+
+    @staticmethod
+    def _document(body: str, etag: str, ts: int) -> Dict[str, Any]:
+        document = json_codec.loads(body)
+        document["_etag"] = etag
+        document["_ts"] = ts
+        return document
+
+    def upsert_document(
+        self,
+        document: Dict[str, Any],
+        partition_key: str,
+        if_match: Optional[str] = None,
+    ) -> str:
+        """Inserta o reemplaza un documento; con if_match exige que el ETag no haya cambiado."""
+        try:
+            document["tipoDocumento"] = partition_key
+            stored = {k: v for k, v in document.items() if k not in ("_etag", "_ts")}
+            body = json_codec.dumps_str(stored)
+            etag = f'"{uuid.uuid4()}"'
+            ts = int(time.time())
+            with telemetry.stage_span("cosmos.upsert", partition=partition_key) as span, self._lock:
+                if if_match:
+                    row = self._conn.execute(
+                        "SELECT etag FROM items WHERE pk = ? AND id = ?",
+                        (partition_key, document["id"]),
+                    ).fetchone()
+                    if row is None or row[0] != if_match:
+                        raise exceptions.CosmosAccessConditionFailedError(
+                            status_code=412, message="The condition specified using ETag was not met"
+                        )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO items (pk, id, body, etag, ts) VALUES (?, ?, ?, ?, ?)",
+                    (partition_key, document["id"], body, etag, ts),
+                )
+                charge = self._record_charge("upsert", WRITE_RU_PER_KB * _kb(len(body)))
+                telemetry.set_attributes(span, request_charge=charge)
+            self._log_info("Document upserted with id: %s", document['id'])
+            return document["id"]
+        except exceptions.CosmosAccessConditionFailedError:
+            raise
+        except Exception as e:
+            self._log_error("Failed to upsert document in SQLite Cosmos stand-in", error=e)
+            raise
+
+    def create_document(self, document: Dict[str, Any], partition_key: str) -> str:
+        """Inserta un documento nuevo; si el id ya existe falla con CosmosResourceExistsError (409)."""
+        document["tipoDocumento"] = partition_key
+        stored = {k: v for k, v in document.items() if k not in ("_etag", "_ts")}
+        body = json_codec.dumps_str(stored)
+        with telemetry.stage_span("cosmos.create", partition=partition_key) as span, self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT INTO items (pk, id, body, etag, ts) VALUES (?, ?, ?, ?, ?)",
+                    (partition_key, document["id"], body, f'"{uuid.uuid4()}"', int(time.time())),
+                )
+            except sqlite3.IntegrityError:
+                raise exceptions.CosmosResourceExistsError(
+                    status_code=409, message="Entity with the specified id already exists in the system."
+                )
+            charge = self._record_charge("create", WRITE_RU_PER_KB * _kb(len(body)))
+            telemetry.set_attributes(span, request_charge=charge)
+        self._log_info("Document created with id: %s", document['id'])
+        return document["id"]
+
+    def get_document(self, doc_id: str, partition_key: str) -> Optional[Dict[str, Any]]:
+        """Lectura puntual por id y clave de partición."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, etag, ts FROM items WHERE pk = ? AND id = ?",
+                (partition_key, doc_id),
+            ).fetchone()
+            self._record_charge("read", POINT_READ_RU_PER_KB * _kb(len(row[0]) if row else 0))
+        return self._document(*row) if row else None
+
+    def query_documents(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        partition_key: Optional[str] = None,
+        order_by: Optional[str] = None,
+        descending: bool = False,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Consulta por campos JSON con la misma semántica que CosmosDBService.query_documents."""
+        clauses = []
+        params: List[Any] = []
+        if partition_key is not None:
+            clauses.append("pk = ?")
+            params.append(partition_key)
+        for field, value in (filters or {}).items():
+            path = f"json_extract(body, '$.{validate_field_path(field)}')"
+            if isinstance(value, (list, tuple, set)):
+                values = list(value)
+                clauses.append(f"{path} IN ({', '.join('?' * len(values))})" if values else "0")
+                params.extend(values)
+            else:
+                clauses.append(f"{path} = ?")
+                params.append(value)
+
+        sql = "SELECT body, etag, ts, pk FROM items"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        if order_by:
+            sql += f" ORDER BY json_extract(body, '$.{validate_field_path(order_by)}') {'DESC' if descending else 'ASC'}"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+
+        try:
+            with self._lock:
+                rows = self._conn.execute(sql, params).fetchall()
+                charge = QUERY_BASE_RU + QUERY_RU_PER_KB * sum(len(r[0]) for r in rows) / 1024
+                if partition_key is None:
+                    partitions = self._conn.execute("SELECT COUNT(DISTINCT pk) FROM items").fetchone()[0]
+                    charge += PARTITION_FANOUT_RU * max(0, partitions - 1)
+                self._record_charge("query", charge)
+            return [self._document(body, etag, ts) for body, etag, ts, _ in rows]
+        except Exception as e:
+            self._log_error("Failed to query documents in SQLite Cosmos stand-in", error=e)
+            raise
+
+    def get_documents_by_caso(self, caso_id: str) -> List[Dict[str, Any]]:
+        """Documentos de un caso en todas las particiones (tipos de documento)."""
+        return self.query_documents({"casoId": caso_id}, order_by="fechaProcesamiento")
@@ -0,0 +1,223 @@
+"""
+Backends de almacenamiento para DataLakeService.
+
+``DataLakeService`` mantiene la API del pipeline (contenedores + rutas
+relativas) y delega el acceso físico a un backend:
+
+- ``AzureDataLakeBackend``: Azure Data Lake Gen2 (por defecto).
+- ``LocalFileSystemBackend``: directorio local que replica contenedores y
+  rutas (``{raíz}/{contenedor}/{ruta}``), para pruebas de carga y trabajos
+  masivos sin conexión. Las escrituras van a un temporal en el mismo
+  directorio y se publican con ``os.replace``, así un lector nunca ve un
+  archivo a medio escribir.
+
+El backend se elige con ``DATALAKE_BACKEND`` (``azure`` | ``local``).
+"""
+
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import List, Optional
+
+
+@dataclass(frozen=True)
+class StoredFile:
+    """Archivo listado: ruta relativa al contenedor, tamaño y última modificación (UTC)."""
+    name: str
+    size: int
+    last_modified: Optional[datetime]
+
+
+class StorageBackend(ABC):
+    """Operaciones de almacenamiento sobre (contenedor, ruta)."""
+
+    name: str = ""
+
+    @abstractmethod
+    def read(self, container: str, file_path: str) -> bytes:
+        pass
+
+    @abstractmethod
+    def read_range(self, container: str, file_path: str, offset: int, length: int) -> bytes:
+        pass
+
+    @abstractmethod
+    def write(self, container: str, file_path: str, content_bytes: bytes) -> None:
+        pass
+
+    @abstractmethod
+    def exists(self, container: str, file_path: str) -> bool:
+        pass
+
+    @abstractmethod
+    def list(self, container: str, directory_path: str) -> List[StoredFile]:
+        """Archivos bajo directory_path (recursivo); vacío si el directorio no existe."""
+        pass
+
+    @abstractmethod
+    def delete(self, container: str, file_path: str) -> None:
+        pass
+
+    @abstractmethod
+    def last_modified(self, container: str, file_path: str) -> datetime:
+        pass
+
+
+# =========================================================
+# Azure Data Lake Gen2
+# =========================================================
+
+class AzureDataLakeBackend(StorageBackend):
+    """Backend sobre DataLakeServiceClient."""
+
+    name = "azure"
+
+    def __init__(self, account_name: str, account_key: str):
+        from azure.storage.filedatalake import DataLakeServiceClient
+
+        self.client = DataLakeServiceClient(
+            account_url=f"https://{account_name}.dfs.core.windows.net",
+            credential=account_key,
+        )
+
+    def _file(self, container: str, file_path: str):
+        return self.client.get_file_system_client(container).get_file_client(file_path)
+
+    def read(self, container: str, file_path: str) -> bytes:
+        return self._file(container, file_path).download_file().readall()
+
+    def read_range(self, container: str, file_path: str, offset: int, length: int) -> bytes:
+        return self._file(container, file_path).download_file(offset=offset, length=length).readall()
+
+    def write(self, container: str, file_path: str, content_bytes: bytes) -> None:
+        file_system_client = self.client.get_file_system_client(container)
+
+        # Crear directorios si no existen
+        directory_path = "/".join(file_path.split("/")[:-1])
+        if directory_path:
+            directory_client = file_system_client.get_directory_client(directory_path)
+            try:
+                directory_client.create_directory()
+            except Exception:
+                pass  # El directorio ya existe
+
+        file_system_client.get_file_client(file_path).upload_data(content_bytes, overwrite=True)
+
+    def exists(self, container: str, file_path: str) -> bool:
+        try:
+            self._file(container, file_path).get_file_properties()
+            return True
+        except Exception:
+            return False
+
+    def list(self, container: str, directory_path: str) -> List[StoredFile]:
+        from azure.core.exceptions import ResourceNotFoundError
+
+        file_system_client = self.client.get_file_system_client(container)
+        try:
+            # get_paths es perezoso: el 404 de un directorio inexistente llega al iterar
+            return [
+                StoredFile(path.name, path.content_length or 0, path.last_modified)
+                for path in file_system_client.get_paths(path=directory_path or None, recursive=True)
+                if not path.is_directory
+            ]
+        except ResourceNotFoundError:
+            return []
+
+    def delete(self, container: str, file_path: str) -> None:
+        self._file(container, file_path).delete_file()
+
+    def last_modified(self, container: str, file_path: str) -> datetime:
+        return self._file(container, file_path).get_file_properties().last_modified
+
+
+# =========================================================
+# Sistema de archivos local
+# =========================================================
+
+class LocalFileSystemBackend(StorageBackend):
+    """Contenedores como directorios bajo una raíz local."""
+
+    name = "local"
+
+    def __init__(self, root: str, fsync: bool = False):
+        self.root = os.path.abspath(root)
+        self.fsync = fsync
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, container: str, file_path: str) -> str:
+        base = os.path.join(self.root, container)
+        path = os.path.normpath(os.path.join(base, *file_path.strip("/").split("/")))
+        if path != base and not path.startswith(base + os.sep):
+            raise ValueError(f"Ruta fuera del contenedor: {container}/{file_path}")
+        return path
+
+    def read(self, container: str, file_path: str) -> bytes:
+        with open(self._path(container, file_path), "rb") as handle:
+            return handle.read()
+
+    def read_range(self, container: str, file_path: str, offset: int, length: int) -> bytes:
+        with open(self._path(container, file_path), "rb") as handle:
+            handle.seek(offset)
+            return handle.read(length)
+
+    def write(self, container: str, file_path: str, content_bytes: bytes) -> None:
+        path = self._path(container, file_path)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(content_bytes)
+                if self.fsync:
+                    handle.flush()
+                    os.fsync(handle.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def exists(self, container: str, file_path: str) -> bool:
+        return os.path.isfile(self._path(container, file_path))
+
+    def list(self, container: str, directory_path: str) -> List[StoredFile]:
+        base = os.path.join(self.root, container)
+        top = self._path(container, directory_path) if directory_path else base
+        files = []
+        for dirpath, dirnames, filenames in os.walk(top):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                if filename.startswith(".tmp-"):
+                    continue  # escritura en curso
+                full = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(full)
+                except FileNotFoundError:
+                    continue
+                files.append(StoredFile(
+                    os.path.relpath(full, base).replace(os.sep, "/"),
+                    stat.st_size,
+                    datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc),
+                ))
+        return files
+
+    def delete(self, container: str, file_path: str) -> None:
+        os.remove(self._path(container, file_path))
+
+    def last_modified(self, container: str, file_path: str) -> datetime:
+        return datetime.fromtimestamp(os.stat(self._path(container, file_path)).st_mtime, tz=timezone.utc)
+
+
+def create_backend(settings) -> StorageBackend:
+    """Crea el backend configurado en DATALAKE_BACKEND."""
+    backend = settings.datalake_backend.lower()
+    if backend == "azure":
+        return AzureDataLakeBackend(settings.datalake_account_name, settings.datalake_account_key)
+    if backend == "local":
+        return LocalFileSystemBackend(settings.datalake_local_root, fsync=settings.datalake_local_fsync)
+    raise ValueError(f"Backend de Data Lake desconocido: {settings.datalake_backend}")
@@ -0,0 +1,156 @@
+import json
+from types import SimpleNamespace as NS
+from unittest.mock import patch
+
+import httpx
+from openai import BadRequestError
+
+from prompts.extraction_prompt import PENDING_HEADER
+from schemas.panel_row import get_field_table
+from schemas.panel_schemas import EstudioTitulosPlano, MinutaCancelacionPlano
+from services.azure_openai_service import AzureOpenAIService
+from services.chunking_service import ChunkingService
+
+
+def _service(respuestas):
+    """Servicio con fragmentos de ~100 caracteres y un cliente que responde por fragmento."""
+    service = AzureOpenAIService()
+    service._settings = service._settings.model_copy(update={
+        "chunk_max_characters": 100, "chunk_incremental": True, "chunk_wave_size": 1,
+    })
+    service.chunker = ChunkingService(max_chars=100, overlap=0)
+    llamadas = []
+
+    def create(messages, **kwargs):
+        llamadas.append(messages[1]["content"])
+        campos = respuestas[len(llamadas) - 1]
+        content = json.dumps({"PanelFields": [
+            {"InternalName": n, "Type": "Text", "TextValue": v} for n, v in campos.items()
+        ]})
+        return NS(choices=[NS(message=NS(content=content))], usage=None)
+
+    service._client.chat.completions.create.side_effect = create
+    return service, llamadas
+
+
+def _texto(fragmentos: int) -> str:
+    return " ".join(f"fragmento{i} " + "x" * 80 + "." for i in range(fragmentos))
+
+
+@patch("services.azure_openai_service.AzureOpenAI")
+def test_incremental_pide_solo_pendientes_y_corta_al_completar(_):
+    table = get_field_table("minuta_cancelacion")
+    primeros, resto = table.names[:4], table.names[4:]
+    service, llamadas = _service([
+        {n: "valor" for n in primeros},
+        {n: "valor" for n in resto},
+        {},
+    ])
+
+    result = service.extract_structured_data(
+        _texto(3), "prompt", MinutaCancelacionPlano, field_table=table
+    )
+
+    assert len(llamadas) == 2  # el tercer fragmento no se envía
+    assert PENDING_HEADER not in llamadas[0]
+    pendientes = llamadas[1].split(PENDING_HEADER)[1].split("\n\n")[0]
+    assert all(n in pendientes for n in resto) and not any(n in pendientes for n in primeros)
+    assert {f["InternalName"] for f in result["PanelFields"]} == set(table.names)
+
+
+@patch("services.azure_openai_service.AzureOpenAI")
+def test_campos_acumulables_se_piden_mientras_aparecen_valores_nuevos(_):
+    table = get_field_table("estudio_titulos")
+    completos = {n: "valor" for n in table.names}
+    service, llamadas = _service([completos, {"VIV_gravamenes": "Embargo"}, {"VIV_gravamenes": "embargo"}, {}])
+
+    result = service.extract_structured_data(_texto(4), "prompt", EstudioTitulosPlano, field_table=table)
+
+    # La tercera ola no agrega valores nuevos: el cuarto fragmento no se envía
+    assert len(llamadas) == 3
+    assert "VIV_gravamenes" in llamadas[2] and "VIV_Compradores" not in llamadas[2]
+    gravamenes = next(f for f in result["PanelFields"] if f["InternalName"] == "VIV_gravamenes")
+    assert gravamenes["TextValue"] == "valor; Embargo"
+
+
+@patch("services.azure_openai_service.AzureOpenAI")
+def test_map_reduce_extrae_sobre_las_notas_condensadas(_):
+    service = AzureOpenAIService()
+    service._settings = service._settings.model_copy(update={
+        "mapreduce_enabled": True, "mapreduce_min_characters": 200, "mapreduce_chunk_characters": 100,
+        "chunk_overlap": 0, "mapreduce_concurrency": 2, "mapreduce_reduce_max_characters": 10000,
+    })
+    llamadas = []
+
+    def create(messages, **kwargs):
+        llamadas.append(messages)
+        if "Condénsalo en notas" in messages[0]["content"]:
+            texto = messages[1]["content"]
+            n = texto.split("fragmento")[1][0]
+            content = {"gravamenes": [{"tipo": "HIPOTECA", "a_favor_de": "BANCO A", "anotacion": "3"}],
+                       "propietarios": [{"nombre": f"PROPIETARIO {n}"}]}
+        else:
+            content = {"PanelFields": [{"InternalName": "VIV_gravamenes", "Type": "Text", "TextValue": "Hipoteca"}]}
+        return NS(choices=[NS(message=NS(content=json.dumps(content)))], usage=None)
+
+    service._client.chat.completions.create.side_effect = create
+
+    result = service.extract_structured_data(_texto(4), "prompt", EstudioTitulosPlano)
+
+    assert len(llamadas) == 5  # 4 fragmentos en la fase map + 1 reduce
+    reduce = llamadas[-1][1]["content"]
+    assert "x" * 80 not in reduce
+    assert reduce.count("BANCO A") == 1  # gravamen repetido en los fragmentos, una sola vez
+    assert all(f"PROPIETARIO {i}" in reduce for i in range(4))
+    assert result["PanelFields"][0]["TextValue"] == "Hipoteca"
+
+
+@patch("services.azure_openai_service.AzureOpenAI")
+def test_respuesta_truncada_se_repara_y_solo_se_repreguntan_los_faltantes(_):
+    table = get_field_table("minuta_cancelacion")
+    primero, resto = table.names[0], list(table.names[1:])
+    service = AzureOpenAIService()
+    llamadas = []
+    cortada = (
+        '{"PanelFields": [{"InternalName": "%s", "Type": "Text", "TextValue": "uno"}, '
+        '{"InternalName": "%s", "Type": "Te' % (primero, resto[0])
+    )
+    completa = json.dumps({"PanelFields": [
+        {"InternalName": n, "Type": "Text", "TextValue": "valor"} for n in resto
+    ]})
+
+    def create(messages, **kwargs):
+        llamadas.append(messages[1]["content"])
+        if len(llamadas) == 1:
+            return NS(choices=[NS(message=NS(content=cortada), finish_reason="length")], usage=None)
+        return NS(choices=[NS(message=NS(content=completa), finish_reason="stop")], usage=None)
+
+    service._client.chat.completions.create.side_effect = create
+
+    result = service.extract_structured_data("texto corto", "prompt", MinutaCancelacionPlano, field_table=table)
+
+    assert len(llamadas) == 2
+    pendientes = llamadas[1].split(PENDING_HEADER)[1].split("\n\n")[0]
+    assert all(n in pendientes for n in resto) and primero not in pendientes
+    assert {f["InternalName"] for f in result["PanelFields"]} == set(table.names)
+
+
+@patch("services.azure_openai_service.AzureOpenAI")
+def test_structured_outputs_con_respaldo_a_json_object(_):
+    service = AzureOpenAIService()
+    service._structured_outputs = True
+    formatos = []
+
+    def create(messages, response_format, **kwargs):
+        formatos.append(response_format["type"])
+        if response_format["type"] == "json_schema":
+            response = httpx.Response(400, request=httpx.Request("POST", "https://example.test"))
+            raise BadRequestError("response_format json_schema not supported", response=response, body=None)
+        return NS(choices=[NS(message=NS(content='{"PanelFields": []}'))], usage=None)
+
+    service._client.chat.completions.create.side_effect = create
+
+    service.extract_structured_data("texto", "prompt", MinutaCancelacionPlano)
+    service.extract_structured_data("texto", "prompt", MinutaCancelacionPlano)
+
+    assert formatos == ["json_schema", "json_object", "json_object"]
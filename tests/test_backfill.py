@@ -0,0 +1,147 @@
+from unittest.mock import MagicMock, patch
+
+import backfill
+import function_app
+from services.ocr_artifact import dump_ocr
+from services.ocr_result import OcrParagraph, OcrResult, DETAIL_CONTENT, DETAIL_PARAGRAPHS
+from utils import json_codec
+
+
+SUBPATH = "conecta/vivienda/estudio-titulos"
+
+
+class FakeDataLake:
+    """Data Lake en memoria con las operaciones que usa el backfill."""
+
+    def __init__(self, files):
+        self.files = dict(files)
+
+    def list_files(self, container, directory_path, extension=None):
+        return [p for p in self.files if p.startswith(directory_path) and p.endswith(extension or "")]
+
+    def file_exists(self, container, file_path):
+        return file_path in self.files
+
+    def read_file(self, container, file_path):
+        return self.files[file_path]
+
+    def read_range(self, container, file_path, offset, length):
+        return self.files[file_path][offset:offset + length]
+
+    def write_json(self, container, file_path, data):
+        self.files[file_path] = json_codec.dumps(data)
+        return f"{container}/{file_path}"
+
+
+def _fake_lake():
+    parrafos = [OcrParagraph("texto del", None, 0, 9, 1), OcrParagraph("documento", None, 10, 9, 2)]
+    artefacto = dump_ocr(OcrResult("texto del documento", 2, detail=DETAIL_PARAGRAPHS,
+                                   loaders={"paragraphs": lambda: parrafos}))
+    return FakeDataLake({
+        f"{SUBPATH}/caso-1/VIV-a.ocrb": artefacto,
+        f"{SUBPATH}/caso-1/VIV-a.json": json_codec.dumps(
+            {"metadata": {"version_extraccion": "v1", "archivo_origen": "a.pdf"}}
+        ),
+        f"{SUBPATH}/caso-2/VIV-b.ocrb": artefacto,
+        f"{SUBPATH}/caso-2/VIV-b.json": json_codec.dumps(
+            {"metadata": {"version_extraccion": "v0", "archivo_origen": "b.pdf", "caso_id": "caso-2"}}
+        ),
+    })
+
+
+def test_run_backfill_reextrae_solo_desactualizados_y_reanuda():
+    lake = _fake_lake()
+    processor = MagicMock()
+    processor.extraction_version = "v1"
+    processor.ocr_detail = DETAIL_PARAGRAPHS
+    processor.process_ocr_result.return_value = {"PanelFields": []}
+    tipo_map = {"EstudioTitulos": ("estudio_titulos", MagicMock(return_value=processor), "VIV", SUBPATH)}
+
+    with patch.object(function_app, "datalake", lake), \
+            patch.dict(function_app.BLOB_TIPO_MAP, tipo_map, clear=True), \
+            patch("function_app.persistir_resultados") as mock_persist:
+        resumen = backfill.run_backfill(concurrency=2)
+
+        assert resumen["reextraidos"] == 1
+        assert resumen["al_dia"] == 1
+        assert resumen["pendientes"] == 0
+
+        ocr_result = processor.process_ocr_result.call_args.args[0]
+        assert ocr_result.content == "texto del documento"
+        assert ocr_result.page_count == 2
+        # Con los párrafos la selección de páginas puede aplicarse
+        assert [(p.content, p.page_number) for p in ocr_result.paragraphs] == [("texto del", 1), ("documento", 2)]
+
+        kwargs = mock_persist.call_args.kwargs
+        assert kwargs["process_id"] == "VIV-b"
+        assert kwargs["caso_id"] == "caso-2"
+        assert kwargs["archivo_origen"] == "b.pdf"
+        assert kwargs["version_extraccion"] == "v1"
+        assert kwargs["origen"] == "backfill"
+
+        # Segunda ejecución: el checkpoint marca ambos documentos como hechos
+        resumen = backfill.run_backfill(concurrency=2)
+        assert resumen["procesados"] == 0
+        assert mock_persist.call_count == 1
+
+
+def test_run_backfill_omite_errores_agotados_en_lotes_siguientes():
+    lake = _fake_lake()
+    lake.files[f"{SUBPATH}/caso-1/VIV-a.json"] = json_codec.dumps(
+        {"metadata": {"version_extraccion": "v0", "archivo_origen": "a.pdf"}}
+    )
+
+    def extraer(ocr_result, archivo_origen):
+        if archivo_origen == "a.pdf":
+            raise RuntimeError("timeout")
+        return {"PanelFields": []}
+
+    processor = MagicMock()
+    processor.extraction_version = "v1"
+    processor.ocr_detail = DETAIL_CONTENT
+    processor.process_ocr_result.side_effect = extraer
+    tipo_map = {"EstudioTitulos": ("estudio_titulos", MagicMock(return_value=processor), "VIV", SUBPATH)}
+
+    with patch.object(function_app, "datalake", lake), \
+            patch.dict(function_app.BLOB_TIPO_MAP, tipo_map, clear=True), \
+            patch("function_app.persistir_resultados") as mock_persist:
+        # Mismo bucle que el orquestador, de un documento por lote
+        lotes = []
+        while True:
+            resumen = backfill.run_backfill(concurrency=1, max_documents=1)
+            lotes.append(resumen)
+            if resumen["pendientes"] == 0 or resumen["procesados"] == 0:
+                break
+
+    # El primero falla, el segundo se procesa antes del reintento y el
+    # primero se omite tras BACKFILL_MAX_ATTEMPTS (3) intentos
+    assert [l["errores"] for l in lotes] == [1, 0, 1, 1]
+    assert lotes[1]["reextraidos"] == 1
+    assert lotes[-1] == {**lotes[-1], "agotados": 1, "pendientes": 0}
+    assert mock_persist.call_args.kwargs["process_id"] == "VIV-b"
+
+    checkpoint = json_codec.loads(lake.files[f"{backfill.CHECKPOINT_DIR}/{resumen['run_id']}.json"])
+    assert checkpoint["errores"][f"{SUBPATH}/caso-1/VIV-a.ocrb"]["intentos"] == 3
+
+
+def test_lotes_leen_la_lista_de_artefactos_sin_volver_a_listar():
+    lake = _fake_lake()
+    lake.list_files = MagicMock(side_effect=lake.list_files)
+    for caso in ("caso-3", "caso-4"):
+        lake.files[f"{SUBPATH}/{caso}/VIV-{caso}.ocrb"] = lake.files[f"{SUBPATH}/caso-2/VIV-b.ocrb"]
+    processor = MagicMock()
+    processor.extraction_version = "v1"
+    processor.ocr_detail = DETAIL_CONTENT
+    processor.process_ocr_result.return_value = {"PanelFields": []}
+    tipo_map = {"EstudioTitulos": ("estudio_titulos", MagicMock(return_value=processor), "VIV", SUBPATH)}
+
+    with patch.object(function_app, "datalake", lake), \
+            patch.dict(function_app.BLOB_TIPO_MAP, tipo_map, clear=True), \
+            patch("function_app.persistir_resultados") as mock_persist:
+        lotes = [backfill.run_backfill(concurrency=1, max_documents=2) for _ in range(3)]
+
+    assert lake.list_files.call_count == 1
+    assert [(l["procesados"], l["pendientes"]) for l in lotes] == [(2, 2), (2, 0), (0, 0)]
+    assert [c.kwargs["process_id"] for c in mock_persist.call_args_list] == ["VIV-b", "VIV-caso-3", "VIV-caso-4"]
+    checkpoint = json_codec.loads(lake.files[f"{backfill.CHECKPOINT_DIR}/{lotes[0]['run_id']}.json"])
+    assert checkpoint["cursor"] == 4
@@ -0,0 +1,65 @@
+import json
+from types import SimpleNamespace as NS
+from unittest.mock import patch
+
+import batch_extraction
+import function_app
+from services.ocr_artifact import dump_ocr
+from services.ocr_result import OcrResult, DETAIL_CONTENT
+from utils import json_codec
+
+from tests.test_backfill import FakeDataLake
+
+SUBPATH = "conecta/vivienda/minuta-cancelacion"
+
+
+class FakeBatchLake(FakeDataLake):
+    def write_bytes(self, container, file_path, content_bytes):
+        self.files[file_path] = content_bytes
+        return f"{container}/{file_path}"
+
+
+@patch("function_app.registrar_costos")
+@patch("function_app.persistir_resultados")
+@patch("services.azure_openai_service.AzureOpenAI")
+@patch("processors.base_processor.DocumentIntelligenceService")
+def test_preparar_ejecutar_local_e_ingerir(_, mock_openai, mock_persist, __):
+    lake = FakeBatchLake({
+        f"{SUBPATH}/caso-1/CAN-a.ocrb": dump_ocr(OcrResult("minuta sin datos fijos", 1, detail=DETAIL_CONTENT)),
+        f"{SUBPATH}/caso-2/CAN-b.ocrb": dump_ocr(OcrResult("otra minuta", 1, detail=DETAIL_CONTENT)),
+    })
+    content = json.dumps({"PanelFields": [
+        {"InternalName": "VIV_numeroEscrituraPublica", "Type": "Text", "TextValue": "123"},
+    ]})
+
+    def create(**body):
+        assert body["response_format"]["type"] == "json_schema"
+        return NS(model=body["model"], choices=[NS(message=NS(content=content), finish_reason="stop")],
+                  usage=NS(prompt_tokens=1000, completion_tokens=100, prompt_tokens_details=None))
+
+    mock_openai.return_value.chat.completions.create.side_effect = create
+    tipo_map = {"MinutaCancelacion": (
+        "CAN", function_app.BLOB_TIPO_MAP["MinutaCancelacion"][1], "CAN", SUBPATH,
+    )}
+
+    with patch.object(function_app, "datalake", lake), \
+            patch.dict(function_app.BLOB_TIPO_MAP, tipo_map, clear=True):
+        preparado = batch_extraction.preparar_lote(run_id="lote-1")
+        lineas = [json_codec.loads(l) for l in lake.files[preparado["archivos"][0]].splitlines()]
+        assert preparado["solicitudes"] == 2
+        assert lineas[0]["custom_id"] == "MinutaCancelacion:caso-1:CAN-a:0"
+        assert lineas[0]["url"] == "/chat/completions"
+
+        batch_extraction.ejecutar_local("lote-1", concurrency=2)
+        resumen = batch_extraction.ingerir_lote("lote-1")
+        assert resumen == {"run_id": "lote-1", "documentos": 2, "ingeridos": 2, "errores": 0}
+        # Reingerir no vuelve a persistir
+        batch_extraction.ingerir_lote("lote-1")
+
+    assert mock_persist.call_count == 2
+    kwargs = mock_persist.call_args.kwargs
+    assert kwargs["origen"] == "batch"
+    valores = {f["InternalName"]: f["TextValue"] for f in kwargs["extracted_data"]["PanelFields"]}
+    assert valores["VIV_numeroEscrituraPublica"] == "123"
+    costos = kwargs["costos"]
+    assert costos.info["ruteo"] == "batch" and costos.totals()["prompt_tokens"] == 1000
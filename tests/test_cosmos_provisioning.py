@@ -0,0 +1,70 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+from azure.cosmos import exceptions
+
+import provision_cosmos
+from services.cosmos_db_service import CosmosDBService, CosmosNotProvisionedError
+
+SETTINGS = SimpleNamespace(
+    cosmos_endpoint="https://cuenta.documents.azure.com/",
+    cosmos_key="clave",
+    cosmos_database_name="conecta-db",
+    cosmos_container_name="procesamientos",
+    cosmos_throughput_mode="autoscale",
+    cosmos_throughput=1000,
+    cosmos_verify_on_start=False,
+)
+
+
+def _not_found(sub_status=None):
+    return exceptions.CosmosResourceNotFoundError(status_code=404, message="NotFound", sub_status=sub_status)
+
+
+@pytest.fixture
+def service():
+    with patch("services.cosmos_db_service.CosmosClient") as client_cls, \
+            patch("services.cosmos_db_service.get_settings", return_value=SETTINGS):
+        svc = CosmosDBService()
+    svc.client_mock = client_cls.return_value
+    return svc
+
+
+def test_runtime_binds_without_control_plane_calls(service):
+    service.client_mock.create_database_if_not_exists.assert_not_called()
+    service.client_mock.get_database_client.assert_called_once_with("conecta-db")
+    service.client_mock.get_database_client.return_value.create_container_if_not_exists.assert_not_called()
+
+
+def test_missing_container_fails_with_clear_error(service):
+    service._container.upsert_item.side_effect = _not_found(sub_status=1003)
+    with pytest.raises(CosmosNotProvisionedError, match="provision_cosmos.py"):
+        service.upsert_document({"id": "1"}, partition_key="estudio_titulos")
+
+    # Un 404 del propio documento sigue siendo "no encontrado"
+    service._container.read_item.side_effect = _not_found()
+    assert service.get_document("1", "estudio_titulos") is None
+
+
+def test_provision_creates_container_with_policy_and_autoscale():
+    client = MagicMock()
+    database = client.get_database_client.return_value
+    database.get_container_client.return_value.read.side_effect = _not_found()
+
+    acciones = provision_cosmos.provision(SETTINGS, client=client)
+
+    assert acciones == ["crear contenedor procesamientos (/tipoDocumento, autoscale (máx 1000 RU/s))"]
+    kwargs = database.create_container_if_not_exists.call_args.kwargs
+    assert kwargs["offer_throughput"].auto_scale_max_throughput == 1000
+    assert {"path": "/casoId/?"} in kwargs["indexing_policy"]["includedPaths"]
+    assert {"path": "/*"} in kwargs["indexing_policy"]["excludedPaths"]
+
+
+def test_provision_rejects_other_partition_key():
+    client = MagicMock()
+    container = client.get_database_client.return_value.get_container_client.return_value
+    container.read.return_value = {"id": "procesamientos", "partitionKey": {"paths": ["/casoId"]}}
+
+    with pytest.raises(RuntimeError, match="partition key"):
+        provision_cosmos.provision(SETTINGS, client=client, dry_run=True)
@@ -0,0 +1,42 @@
+from utils.cost_ledger import CostLedger, add_to_aggregate, estimate_cost, sum_totals
+
+PRICES = {"prompt_1k": 0.002, "cached_1k": 0.001, "completion_1k": 0.01, "ocr_page": 0.01, "ru_1m": 0.25}
+
+
+def _ledger():
+    ledger = CostLedger(info={"chunking": "100000/1000"})
+    ledger.record("ocr", ocr_pages=10, latency_ms=1200)
+    ledger.record_tokens("extraction", {"prompt_tokens": 3000, "completion_tokens": 500, "cached_tokens": 1000})
+    ledger.record("cosmos.upsert", request_units=12.4)
+    return ledger
+
+
+def test_totals_and_estimate():
+    totales = _ledger().totals()
+
+    assert totales["ocr_pages"] == 10
+    assert totales["prompt_tokens"] == 3000
+    assert totales["request_units"] == 12.4
+    # 2000 sin caché * 0.002 + 1000 cacheados * 0.001 + 500 * 0.01 + 10 páginas * 0.01 + RU
+    assert estimate_cost(totales, PRICES) == round(0.004 + 0.001 + 0.005 + 0.1 + 12.4 / 1e6 * 0.25, 6)
+
+
+def test_roundtrip_keeps_stages_and_info():
+    data = _ledger().to_dict(PRICES)
+    restored = CostLedger.from_dict(data)
+
+    assert restored.info == {"chunking": "100000/1000"}
+    assert restored.totals() == data["totales"]
+    assert sum_totals([data, None, data], PRICES)["documentos"] == 2
+
+
+def test_add_to_aggregate_groups():
+    agregado = {}
+    grupos = {"tipo_documento": "estudio_titulos", "chunking": "100000/1000"}
+    add_to_aggregate(agregado, _ledger(), PRICES, grupos)
+    add_to_aggregate(agregado, _ledger(), PRICES, {**grupos, "tipo_documento": "minuta_cancelacion"})
+
+    assert agregado["documentos"] == 2
+    assert agregado["totales"]["ocr_pages"] == 20
+    assert set(agregado["por_tipo_documento"]) == {"estudio_titulos", "minuta_cancelacion"}
+    assert agregado["por_chunking"]["100000/1000"]["documentos"] == 2
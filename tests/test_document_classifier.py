@@ -0,0 +1,103 @@
+from unittest.mock import patch
+
+import pytest
+
+import function_app
+from utils.document_classifier import TfidfClassifier, native_first_page_text
+
+ESTUDIO = (
+    "ESTUDIO DE TÍTULOS. Concepto jurídico sobre el inmueble con folio de matrícula "
+    "inmobiliaria 050C-1234567. Revisado el certificado de tradición y libertad, "
+    "el propietario actual adquirió por compraventa. Anotaciones vigentes."
+)
+CANCELACION = (
+    "MINUTA DE CANCELACIÓN DE HIPOTECA. El acreedor hipotecario declara cancelada la "
+    "hipoteca por encontrarse la obligación a paz y salvo."
+)
+CONSTITUCION = (
+    "MINUTA DE CONSTITUCIÓN DE HIPOTECA ABIERTA DE PRIMER GRADO SIN LÍMITE DE CUANTÍA. "
+    "El hipotecante constituye garantía hipotecaria para el crédito de vivienda."
+)
+
+
+@pytest.mark.parametrize("texto,esperado", [
+    (ESTUDIO, "EstudioTitulos"),
+    (CANCELACION, "MinutaCancelacion"),
+    (CONSTITUCION, "MinutaConstitucion"),
+    ("Factura de servicios públicos. Valor a pagar 120.000 pesos.", None),
+])
+def test_classify(texto, esperado):
+    assert TfidfClassifier().classify(texto).tipo_key == esperado
+
+
+def _pdf_con_texto(texto: str) -> bytes:
+    """PDF mínimo de una página con capa de texto (Helvetica)."""
+    stream = f"BT /F1 12 Tf 72 720 Td ({texto}) Tj ET".encode("latin-1")
+    objetos = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+        b"/Resources << /Font << /F1 5 0 R >> >> /Contents 4 0 R >>",
+        b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    pdf, offsets = b"%PDF-1.4\n", []
+    for i, obj in enumerate(objetos, start=1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n" % i + obj + b"\nendobj\n"
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objetos) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % o for o in offsets)
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objetos) + 1, xref)
+    return pdf
+
+
+def test_native_first_page_text():
+    pytest.importorskip("pypdf")
+    assert "MINUTA DE CANCELACION" in native_first_page_text(_pdf_con_texto("MINUTA DE CANCELACION"))
+    assert native_first_page_text(b"no es un pdf") == ""
+
+
+class _Blob:
+    def __init__(self, name, content=b"%PDF-1.4"):
+        self.name = name
+        self._content = content
+
+    def read(self):
+        return self._content
+
+
+@patch("function_app.process_blob")
+@patch("function_app.native_first_page_text", return_value=CANCELACION * 3)
+def test_blob_sin_tipo_se_enruta_por_contenido(mock_texto, mock_process):
+    blob = _Blob("bronze/conecta/vivienda/1/escaneo_0042.pdf")
+    function_app.procesar_documento_blob(blob)
+
+    mock_process.assert_called_once_with(blob, "MinutaCancelacion", pdf_bytes=b"%PDF-1.4")
+
+
+@patch("function_app.datalake")
+@patch("function_app.process_blob")
+@patch("function_app.native_first_page_text", return_value="Factura de servicios públicos. " * 20)
+def test_blob_sin_tipo_va_a_cuarentena(mock_texto, mock_process, mock_datalake):
+    function_app.procesar_documento_blob(_Blob("bronze/conecta/vivienda/1/escaneo_0043.pdf"))
+
+    mock_process.assert_not_called()
+    mock_datalake.write_bytes.assert_called_once_with(
+        "bronze", "conecta/vivienda/cuarentena/escaneo_0043.pdf", b"%PDF-1.4"
+    )
+    reporte = mock_datalake.write_json.call_args.args[2]
+    assert reporte["clasificacion"]["tipo"] is None
+
+
+@patch("function_app.datalake")
+def test_cuarentena_conserva_la_ruta_relativa(mock_datalake):
+    rutas = [
+        function_app.poner_en_cuarentena(b"%PDF-1.4", f"bronze/conecta/vivienda/1/{caso}/escaneo.pdf", None)
+        for caso in ("caso-1", "caso-2")
+    ]
+
+    assert rutas == [
+        "conecta/vivienda/cuarentena/caso-1/escaneo.pdf",
+        "conecta/vivienda/cuarentena/caso-2/escaneo.pdf",
+    ]
@@ -2,6 +2,7 @@ import pytest
 from unittest.mock import MagicMock, patch
 
 import function_app
+from processors import EstudioTitulosProcessor
 
 
 # =========================================================
@@ -23,6 +24,17 @@ def test_detectar_tipo_por_nombre(nombre, esperado):
     assert resultado == esperado
 
 
+def test_lazy_service_no_se_construye_al_parchear():
+    factory = MagicMock(side_effect=AssertionError("no debe construirse"))
+    proxy = function_app.LazyService(factory, "cosmos")
+
+    with patch.object(function_app, "cosmos", proxy), patch("function_app.cosmos"):
+        pass
+
+    assert not hasattr(proxy, "__code__") and not hasattr(proxy, "_privado")
+    factory.assert_not_called()
+
+
 # =========================================================
 # Test persistir_resultados
 # =========================================================
@@ -80,7 +92,7 @@ def test_process_blob_success(mock_doc_intelligence, mock_persist):
     mock_doc_intelligence.return_value = mock_doc_intelligence_instance
 
     # Mock del processor
-    processor = MagicMock(spec=function_app.EstudioTitulosProcessor)
+    processor = MagicMock(spec=EstudioTitulosProcessor)
     processor.process.return_value = {"resultado": "ok"}
     
     # Creamos una clase mock que devuelva nuestra instancia de processor
@@ -179,7 +191,7 @@ def test_process_blob_error(mock_doc_intelligence, mock_persist):
     mock_doc_intelligence.return_value = mock_doc_intelligence_instance
 
     # Mock del processor que lanza excepción
-    processor = MagicMock(spec=function_app.EstudioTitulosProcessor)
+    processor = MagicMock(spec=EstudioTitulosProcessor)
     processor.process.side_effect = Exception("Error simulado en procesamiento")
     
     # Creamos una clase mock que devuelva nuestra instancia de processor
@@ -224,4 +236,83 @@ def test_process_blob_error(mock_doc_intelligence, mock_persist):
 )
 def test_detectar_tipo_por_nombre_casos_borde(nombre, esperado):
     resultado = function_app.detectar_tipo_por_nombre(nombre)
-    assert resultado == esperado
\ No newline at end of file
+    assert resultado == esperado
+
+def test_registrar_costos_concurrente_no_pierde_documentos():
+    from concurrent.futures import ThreadPoolExecutor
+
+    from services.sqlite_cosmos_service import SqliteCosmosDBService
+    from utils.cost_ledger import CostLedger
+
+    cosmos = SqliteCosmosDBService(":memory:")
+    costos = CostLedger(info={"ruteo": "rapido"})
+    costos.record("ocr", ocr_pages=2)
+    with patch.object(function_app, "cosmos", cosmos):
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            for i in range(20):
+                pool.submit(function_app.registrar_costos, costos, "caso-1", "estudio_titulos",
+                            fecha="2024-01-01", process_id=f"p{i}")
+        function_app.registrar_costos(costos, "caso-2", "minuta_cancelacion", fecha="2024-01-02")
+
+        por_caso = function_app.consultar_costos(caso_id="caso-1")
+        por_dia = function_app.consultar_costos(fecha="2024-01-01")
+
+    for agregado in (por_caso, por_dia):
+        assert agregado["documentos"] == 20
+        assert agregado["totales"]["ocr_pages"] == 40
+        assert agregado["por_ruteo"]["rapido"]["documentos"] == 20
+        assert agregado["por_tipo_documento"].keys() == {"estudio_titulos"}
+    with pytest.raises(ValueError):
+        function_app.consultar_costos()
+
+
+class _ContextoOrquestador:
+    """DurableOrchestrationContext mínimo: la actividad devuelve resúmenes fijos."""
+
+    def __init__(self, entrada, resumen):
+        self.entrada = entrada
+        self.resumen = resumen
+        self.llamadas = []
+        self.continua_con = None
+
+    def get_input(self):
+        return self.entrada
+
+    def call_activity(self, nombre, params):
+        self.llamadas.append((nombre, dict(params)))
+        return self.resumen
+
+    def continue_as_new(self, entrada):
+        self.continua_con = entrada
+
+
+def _orquestar(contexto):
+    orquestador = function_app.backfill_reextraccion_orchestrator._function.get_user_function().orchestrator_function
+    generador = orquestador(contexto)
+    pedido = next(generador)
+    try:
+        generador.send(pedido)
+    except StopIteration as fin:
+        return fin.value
+
+
+def test_orquestador_backfill_un_lote_por_instancia_con_continue_as_new():
+    resumen = {"run_id": "r1", "procesados": 50, "reextraidos": 40, "al_dia": 8, "errores": 2, "pendientes": 10}
+    contexto = _ContextoOrquestador({"reintentar_errores": True}, resumen)
+
+    assert _orquestar(contexto) is None
+    assert len(contexto.llamadas) == 1
+    assert contexto.llamadas[0][1] == {"reintentar_errores": True, "max_documents": 50}
+    siguiente = contexto.continua_con
+    assert siguiente["run_id"] == "r1" and "reintentar_errores" not in siguiente
+    assert siguiente["acumulado"] == {"lotes": 1, "procesados": 50, "reextraidos": 40, "al_dia": 8, "errores": 2}
+
+    # La instancia siguiente termina y devuelve el último resumen con los conteos de todos los lotes
+    ultimo = {**resumen, "procesados": 10, "reextraidos": 10, "al_dia": 0, "errores": 0, "pendientes": 0}
+    contexto = _ContextoOrquestador(siguiente, ultimo)
+    resultado = _orquestar(contexto)
+
+    assert contexto.continua_con is None
+    assert "acumulado" not in contexto.llamadas[0][1]
+    assert resultado == {**ultimo, "acumulado": {"lotes": 2, "procesados": 60, "reextraidos": 50, "al_dia": 8,
+                                                 "errores": 2}}
@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from utils import json_codec
+
+
+@pytest.fixture(params=json_codec.available_backends())
+def codec(request):
+    anterior = json_codec.get_codec().name
+    yield json_codec.set_backend(request.param)
+    json_codec.set_backend(anterior)
+
+
+DOCUMENTO = {"caso_id": "caso-1", "nombre": "Peña Núñez", "montos": [1, 2.5, None], "ok": True}
+
+
+def test_roundtrip_bytes_str_y_memoryview(codec):
+    data = json_codec.dumps(DOCUMENTO)
+
+    assert isinstance(data, bytes)
+    assert "Peña".encode("utf-8") in data
+    assert json_codec.loads(data) == DOCUMENTO
+    assert json_codec.loads(data.decode("utf-8")) == DOCUMENTO
+    assert json_codec.loads(bytearray(data)) == DOCUMENTO
+    assert json_codec.loads(memoryview(data)) == DOCUMENTO
+    assert json_codec.loads(memoryview(b"xx" + data)[2:]) == DOCUMENTO
+
+
+def test_dumps_str_e_indentacion(codec):
+    assert json_codec.dumps_str({"a": 1}) == '{"a":1}'
+    assert json_codec.dumps_str({"a": 1}, indent=True) == '{\n  "a": 1\n}'
+
+
+def test_loads_invalido_lanza_jsondecodeerror(codec):
+    with pytest.raises(json.JSONDecodeError):
+        json_codec.loads(b"{no es json")
+
+
+def test_orjson_delega_en_stdlib_con_tipos_no_soportados():
+    pytest.importorskip("orjson")
+    anterior = json_codec.get_codec().name
+    try:
+        json_codec.set_backend("orjson")
+        # orjson no serializa enteros de más de 64 bits
+        assert json_codec.loads(json_codec.dumps({"n": 2 ** 70})) == {"n": 2 ** 70}
+        assert json_codec.dumps({"n": 2 ** 70}, indent=True) == b'{\n  "n": 1180591620717411303424\n}'
+    finally:
+        json_codec.set_backend(anterior)
+
+
+def test_set_backend_auto_y_desconocido():
+    anterior = json_codec.get_codec().name
+    try:
+        esperado = "orjson" if "orjson" in json_codec.available_backends() else "stdlib"
+        assert json_codec.set_backend("auto").name == esperado
+        assert json_codec.set_backend("stdlib") is json_codec.STDLIB_CODEC
+
+        with pytest.raises(ValueError):
+            json_codec.set_backend("simdjson")
+        # Un backend desconocido no cambia el activo
+        assert json_codec.get_codec() is json_codec.STDLIB_CODEC
+    finally:
+        json_codec.set_backend(anterior)
@@ -0,0 +1,42 @@
+import pytest
+from pydantic import ValidationError
+
+from schemas.panel_schemas import MinutaCancelacionPlano
+from utils.json_repair import coerce_panel_fields, complete_truncated, parse_lenient, validate_dropping_invalid
+
+
+def test_parse_lenient_quita_markdown_y_texto_alrededor():
+    data, reparado = parse_lenient('Claro:\n```json\n{"PanelFields": []}\n```')
+    assert data == {"PanelFields": []} and reparado
+
+
+def test_completa_respuesta_truncada_en_el_ultimo_item_completo():
+    texto = (
+        '{"PanelFields": [{"InternalName": "A", "Type": "Text", "TextValue": "uno"}, '
+        '{"InternalName": "B", "Type": "Text", "TextValue": "dos, con } y ] en el te'
+    )
+    data = complete_truncated(texto)
+    assert data == {"PanelFields": [{"InternalName": "A", "Type": "Text", "TextValue": "uno"}]}
+    assert complete_truncated("sin json") is None
+
+
+def test_coercion_de_tipos_y_descarte_de_items_invalidos():
+    data = coerce_panel_fields({"PanelFields": [
+        {"InternalName": "GBL_Valordeprestamo", "Type": "number", "NumberValue": "$ 120.000.000,50"},
+        {"InternalName": "GBL_escritura", "TextValue": 1234},
+        {"Type": "Text", "TextValue": "sin nombre"},
+        {"InternalName": "GBL_notaria", "Type": "Text", "TextValue": {"x": 1}},
+    ]})
+    items = {f["InternalName"]: f for f in data["PanelFields"]}
+    assert items["GBL_Valordeprestamo"]["NumberValue"] == 120000000.5
+    assert items["GBL_escritura"] == {"InternalName": "GBL_escritura", "TextValue": "1234",
+                                      "Type": "Text", "NumberValue": None}
+    assert len(items) == 3
+
+    data["PanelFields"].append({"InternalName": "GBL_fecha", "Type": "Text", "NumberValue": [1]})
+    result, fallidos = validate_dropping_invalid(data, MinutaCancelacionPlano)
+    assert fallidos == ["GBL_fecha"]
+    assert len(result["PanelFields"]) == 3
+
+    with pytest.raises(ValidationError):
+        validate_dropping_invalid({"otro": 1}, MinutaCancelacionPlano)
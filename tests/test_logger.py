@@ -0,0 +1,93 @@
+import io
+import json
+import logging
+
+from utils import logger as log_module
+from utils.logger import ContextFilter, JsonFormatter, RateLimitFilter, bind_context
+
+
+def _capture(*filters):
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(JsonFormatter())
+    for f in filters:
+        handler.addFilter(f)
+    log = logging.getLogger("test_logger")
+    log.handlers = [handler]
+    log.propagate = False
+    log.setLevel(logging.INFO)
+    return log, stream
+
+
+def _lines(stream):
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_json_includes_bound_context_and_extra():
+    log, stream = _capture(ContextFilter())
+    with bind_context(caso_id="caso-1", process_id="p-1"), bind_context(stage="ocr"):
+        log.info("Leyendo %s", "bronze/a.pdf", extra={"bytes": 10})
+    log.info("fuera")
+
+    dentro, fuera = _lines(stream)
+    assert dentro["message"] == "Leyendo bronze/a.pdf"
+    assert dentro["caso_id"] == "caso-1" and dentro["stage"] == "ocr" and dentro["bytes"] == 10
+    assert "caso_id" not in fuera
+
+
+def test_rate_limit_reports_suppressed(monkeypatch):
+    reloj = [0.0]
+    monkeypatch.setattr(log_module.time, "monotonic", lambda: reloj[0])
+    log, stream = _capture(RateLimitFilter(limit=2, window_s=60))
+
+    for i in range(5):
+        log.info("Procesando fragmento %s", i)
+    log.warning("siempre %s", 1)
+    reloj[0] = 61.0
+    log.info("Procesando fragmento %s", 99)
+
+    mensajes = _lines(stream)
+    assert [m["message"] for m in mensajes] == [
+        "Procesando fragmento 0", "Procesando fragmento 1", "siempre 1", "Procesando fragmento 99",
+    ]
+    assert mensajes[-1]["suppressed"] == 3
+
+
+def test_queue_handler_keeps_context(capsys):
+    root = logging.getLogger()
+    previos, nivel = root.handlers[:], root.level
+    try:
+        root.handlers[:] = []
+        log_module.setup_logging(json_format=True, use_queue=True)
+        with bind_context(caso_id="caso-q"):
+            logging.getLogger("test_logger_queue").info("en cola %s", 1)
+        log_module._stop_listener()
+    finally:
+        root.handlers[:] = previos
+        root.setLevel(nivel)
+
+    linea = json.loads(capsys.readouterr().out.strip().splitlines()[-1])
+    assert linea["message"] == "en cola 1"
+    assert linea["caso_id"] == "caso-q"
+
+
+def test_setup_logging_keeps_host_handler():
+    root = logging.getLogger()
+    previos, nivel = root.handlers[:], root.level
+    stream = io.StringIO()
+    host = logging.StreamHandler(stream)
+    host.setFormatter(JsonFormatter())
+    try:
+        root.handlers[:] = [host]
+        log_module.setup_logging(use_queue=True)
+        log_module.setup_logging(use_queue=True)
+        with bind_context(caso_id="caso-h"):
+            logging.getLogger("test_logger_host").info("host %s", 1)
+        assert root.handlers == [host]
+        assert sum(isinstance(f, ContextFilter) for f in host.filters) == 1
+    finally:
+        root.handlers[:] = previos
+        root.setLevel(nivel)
+
+    linea = _lines(stream)[-1]
+    assert linea["message"] == "host 1" and linea["caso_id"] == "caso-h"
@@ -0,0 +1,61 @@
+from unittest.mock import patch
+
+from processors import MinutaCancelacionProcessor, MinutaConstitucionProcessor
+from services.ocr_result import OcrResult
+from utils.model_routing import ESCALATED, FAST, LARGE, RoutingPolicy, route
+
+POLICY = RoutingPolicy(max_characters=1000, max_pages=5, critical_fields=("VIV_Compradores",))
+
+
+def test_route_por_tamano_y_sin_despliegue_rapido():
+    assert route(POLICY, 500, 2, "mini", "grande").tier == FAST
+    assert route(POLICY, 5000, 2, "mini", "grande").deployment == "grande"
+    assert route(POLICY, 500, 9, "mini", "grande").reason == "paginas>5"
+    assert route(POLICY, 500, 2, "", "grande").tier == LARGE
+    assert POLICY.with_overrides({"max_characters": 10}).max_characters == 10
+
+
+@patch("processors.base_processor.AzureOpenAIService")
+@patch("processors.base_processor.DocumentIntelligenceService")
+def test_escala_al_modelo_grande_si_faltan_campos_criticos(mock_di, mock_openai):
+    mock_openai.return_value.get_token_usage.return_value = {"llamadas": 1}
+
+    def extract(deployment, **kwargs):
+        if deployment == "mini":
+            return {"PanelFields": [{"InternalName": "TPC_ValorComercial", "Type": "Number", "NumberValue": 1.0}]}
+        return {"PanelFields": [
+            {"InternalName": "VIV_Compradores", "Type": "Text", "TextValue": "ANA"},
+            {"InternalName": "TPC_ValorComercial", "Type": "Number", "NumberValue": 1.0},
+        ]}
+
+    mock_openai.return_value.extract_structured_data.side_effect = extract
+    processor = MinutaConstitucionProcessor()
+    processor._settings = processor._settings.model_copy(update={"azure_openai_fast_deployment": "mini"})
+
+    result = processor.process_ocr_result(OcrResult("minuta de constitución", 1), "bronze/minuta.pdf")
+
+    llamadas = mock_openai.return_value.extract_structured_data.call_args_list
+    assert [c.kwargs["deployment"] for c in llamadas] == ["mini", processor._settings.azure_openai_deployment]
+    ruteo = result["_procesamiento"]["ruteo_modelo"]
+    assert ruteo["nivel"] == ESCALATED and ruteo["campos_faltantes"] == ["VIV_Compradores"]
+    costos = result["_procesamiento"]["costos"]
+    assert costos["ruteo"] == ESCALATED and "extraction.descartada" in costos["etapas"]
+
+
+@patch("processors.base_processor.AzureOpenAIService")
+@patch("processors.base_processor.DocumentIntelligenceService")
+def test_cancelacion_sin_escritura_no_escala(mock_di, mock_openai):
+    mock_openai.return_value.get_token_usage.return_value = {"llamadas": 1}
+    mock_openai.return_value.extract_structured_data.return_value = {"PanelFields": [
+        {"InternalName": "VIV_folioMatriculaInmobiliaria", "Type": "Text", "TextValue": "050C-1234"},
+        {"InternalName": "VIV_numeroEscrituraPublica", "Type": "Text", "TextValue": None},
+    ]}
+    processor = MinutaCancelacionProcessor()
+    processor._settings = processor._settings.model_copy(update={
+        "azure_openai_fast_deployment": "mini", "preextraction_enabled": False,
+    })
+
+    result = processor.process_ocr_result(OcrResult("minuta de cancelación", 1), "bronze/minuta.pdf")
+
+    assert mock_openai.return_value.extract_structured_data.call_count == 1
+    assert result["_procesamiento"]["ruteo_modelo"]["nivel"] == FAST
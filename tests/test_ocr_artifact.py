@@ -0,0 +1,111 @@
+from array import array
+
+import pytest
+
+from services.ocr_artifact import (
+    dump_ocr, load_ocr, load_ocr_content_ranged, load_ocr_file, load_ocr_ranged, read_ocr_text,
+)
+from services.ocr_result import (
+    DETAIL_CONTENT, DETAIL_LAYOUT, DETAIL_PARAGRAPHS,
+    OcrCell, OcrLine, OcrPage, OcrParagraph, OcrResult, OcrTable,
+)
+
+TITULO = "CERTIFICADO DE TRADICIÓN Y LIBERTAD"
+MATRICULA = "Matrícula 050C-1234 — Bogotá"
+ANOTACION = "ANOTACIÓN Nro 1: COMPRAVENTA a Peña Núñez"
+TEXTO = "\n".join([TITULO, MATRICULA, ANOTACION])
+
+
+def _offset(fragmento):
+    return TEXTO.index(fragmento)
+
+
+def _layout():
+    """Resultado de nivel layout con texto no ASCII en todas las secciones."""
+    poligono = array("f", [0.5, 1.0, 7.25, 1.0, 7.25, 1.5, 0.5, 1.5])
+    pages = [
+        OcrPage(1, 8.5, 11.0, lines=[
+            OcrLine(TITULO, poligono, _offset(TITULO), len(TITULO)),
+            OcrLine(MATRICULA, array("f"), _offset(MATRICULA), len(MATRICULA)),
+        ]),
+        OcrPage(2, 8.5, 11.0, lines=[
+            # Contenido que no coincide con su span: va a xtext
+            OcrLine("ANOTACIÓN Nº 1 (corregida)", array("f", [1.0, 2.0]), 0, 5),
+        ]),
+    ]
+    paragraphs = [
+        OcrParagraph(TITULO, "title", _offset(TITULO), len(TITULO), 1),
+        OcrParagraph(MATRICULA, None, _offset(MATRICULA), len(MATRICULA), 1),
+        OcrParagraph(ANOTACION, "sectionHeading", _offset(ANOTACION), len(ANOTACION), 2),
+    ]
+    tables = [OcrTable(2, 2, [
+        OcrCell(0, 0, "Señor", True, 2, array("f", [0.25, 0.75])),
+        OcrCell(0, 1, "Acción", True, 2),
+        OcrCell(1, 0, "Núñez", False, 2),
+        OcrCell(1, 1, "", False, 2),
+    ])]
+    return OcrResult(TEXTO, 2, detail=DETAIL_LAYOUT, loaders={
+        "pages": lambda: pages, "paragraphs": lambda: paragraphs, "tables": lambda: tables,
+    })
+
+
+def _detalle(resultado):
+    """to_dict más los campos que to_dict omite (páginas y polígonos de celdas y párrafos)."""
+    data = resultado.to_dict()
+    data["page_count"] = resultado.page_count
+    data["paragraph_pages"] = [p.page_number for p in resultado.paragraphs]
+    data["cells"] = [(c.page_number, c.polygon.tolist()) for t in resultado.tables for c in t.cells]
+    return data
+
+
+def _ranged(binario):
+    lecturas = []
+
+    def read_range(offset, length):
+        lecturas.append((offset, length))
+        return binario[offset:offset + length]
+
+    return read_range, lecturas
+
+
+@pytest.fixture
+def binario():
+    return dump_ocr(_layout())
+
+
+def test_roundtrip_layout_en_memoria_y_mmap(binario, tmp_path):
+    esperado = _detalle(_layout())
+    ruta = tmp_path / "doc.ocrb"
+    ruta.write_bytes(binario)
+
+    for cargado in (load_ocr(binario), load_ocr_file(str(ruta))):
+        assert cargado.detail == DETAIL_LAYOUT
+        assert _detalle(cargado) == esperado
+    assert read_ocr_text(str(ruta)) == TEXTO
+
+
+def test_roundtrip_por_rangos(binario):
+    esperado = _detalle(_layout())
+
+    read_range, lecturas = _ranged(binario)
+    contenido = load_ocr_content_ranged(read_range)
+    assert (contenido.content, contenido.page_count, contenido.detail) == (TEXTO, 2, DETAIL_CONTENT)
+    assert not contenido.has_section("paragraphs")
+    assert len(lecturas) == 2
+
+    parrafos = load_ocr_ranged(_ranged(binario)[0], DETAIL_PARAGRAPHS)
+    assert parrafos.detail == DETAIL_PARAGRAPHS
+    assert [p.to_dict() for p in parrafos.paragraphs] == esperado["paragraphs"]
+    assert [p.page_number for p in parrafos.paragraphs] == [1, 1, 2]
+    assert parrafos.pages == []
+
+    assert _detalle(load_ocr_ranged(_ranged(binario)[0], DETAIL_LAYOUT)) == esperado
+
+
+def test_por_rangos_no_supera_el_detalle_guardado():
+    binario = dump_ocr(OcrResult("Peña", 1, detail=DETAIL_CONTENT))
+
+    cargado = load_ocr_ranged(_ranged(binario)[0], DETAIL_PARAGRAPHS)
+    assert cargado.detail == DETAIL_CONTENT
+    assert cargado.content == "Peña"
+    assert cargado.paragraphs == []
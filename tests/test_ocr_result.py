@@ -0,0 +1,122 @@
+from array import array
+
+import pytest
+
+from benchmarks.ocr_fixtures import build_analyze_result
+from services.ocr_result import DETAIL_CONTENT, DETAIL_LAYOUT, DETAIL_PARAGRAPHS, OcrResult
+
+
+def _formato_anterior(result) -> dict:
+    """Copia de DocumentIntelligenceService._process_analysis_result previo a OcrResult."""
+    return {
+        "content": result.content,
+        "pages": [
+            {
+                "page_number": page.page_number,
+                "width": page.width,
+                "height": page.height,
+                "lines": [
+                    {
+                        "content": line.content,
+                        "polygon": [{"x": p.x, "y": p.y} for p in line.polygon] if line.polygon else [],
+                    }
+                    for line in page.lines or []
+                ],
+            }
+            for page in result.pages or []
+        ],
+        "tables": [
+            {
+                "row_count": table.row_count,
+                "column_count": table.column_count,
+                "cells": [
+                    {
+                        "row_index": cell.row_index,
+                        "column_index": cell.column_index,
+                        "content": cell.content,
+                        "is_header": cell.kind == "columnHeader" if hasattr(cell, "kind") else False,
+                    }
+                    for cell in table.cells
+                ],
+            }
+            for table in result.tables or []
+        ],
+        "paragraphs": [
+            {"content": p.content, "role": p.role if hasattr(p, "role") else None}
+            for p in result.paragraphs or []
+        ],
+    }
+
+
+def _float32(value: float) -> float:
+    return array("f", [value])[0]
+
+
+class _Contado(list):
+    """Lista que cuenta cuántas veces se recorre."""
+
+    recorridos = 0
+
+    def __iter__(self):
+        self.recorridos += 1
+        return super().__iter__()
+
+
+def test_to_dict_igual_al_formato_anterior_salvo_float32():
+    sdk = build_analyze_result(pages=3, lines_per_page=5, tables=2)
+    anterior = _formato_anterior(sdk)
+
+    nuevo = OcrResult.from_analyze_result(sdk).to_dict()
+
+    assert nuevo.keys() == anterior.keys()
+    # Los polígonos se guardan en float32: difieren del SDK solo por redondeo
+    assert nuevo != anterior
+    for page in anterior["pages"]:
+        for line in page["lines"]:
+            line["polygon"] = [{"x": _float32(p["x"]), "y": _float32(p["y"])} for p in line["polygon"]]
+    assert nuevo == anterior
+
+
+def test_secciones_se_convierten_una_vez_al_primer_acceso():
+    sdk = build_analyze_result(pages=2, lines_per_page=3, tables=1)
+    sdk.paragraphs = _Contado(sdk.paragraphs)
+
+    resultado = OcrResult.from_analyze_result(sdk, detail=DETAIL_PARAGRAPHS)
+    assert sdk.paragraphs.recorridos == 0
+
+    primero = resultado.paragraphs
+    assert resultado.paragraphs is primero
+    assert sdk.paragraphs.recorridos == 1
+    assert [p.page_number for p in primero[:4]] == [1, 1, 1, 2]
+    assert primero[0].role == "pageHeader"
+
+
+@pytest.mark.parametrize("detail,secciones", [
+    (DETAIL_CONTENT, set()),
+    (DETAIL_PARAGRAPHS, {"paragraphs"}),
+    (DETAIL_LAYOUT, {"pages", "paragraphs", "tables"}),
+])
+def test_nivel_de_detalle_limita_las_secciones(detail, secciones):
+    resultado = OcrResult.from_analyze_result(build_analyze_result(pages=2, lines_per_page=3), detail=detail)
+
+    assert resultado.content and resultado.page_count == 2
+    for nombre in ("pages", "paragraphs", "tables"):
+        assert resultado.has_section(nombre) == (nombre in secciones)
+        # Fuera del nivel, la sección queda vacía (como un documento sin ella)
+        assert bool(getattr(resultado, nombre)) == (nombre in secciones)
+    assert resultado.to_dict()["content"] == resultado["content"] == resultado.content
+
+
+def test_nivel_de_detalle_desconocido():
+    with pytest.raises(ValueError):
+        OcrResult("texto", 1, detail="todo")
+
+
+def test_compatibilidad_de_lectura_como_dict():
+    resultado = OcrResult.from_analyze_result(build_analyze_result(pages=1, lines_per_page=2, tables=0))
+
+    assert "pages" in resultado and "otra" not in resultado
+    assert resultado.get("otra", "x") == "x"
+    assert resultado["pages"][0].lines[1].content.startswith("ESPECIFICACION")
+    with pytest.raises(KeyError):
+        resultado["otra"]
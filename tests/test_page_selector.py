@@ -0,0 +1,116 @@
+import json
+from types import SimpleNamespace as NS
+from unittest.mock import patch
+
+from processors import EstudioTitulosProcessor
+from services.ocr_result import DETAIL_PARAGRAPHS, OcrParagraph, OcrResult
+from utils.page_selector import PageSelector
+
+ENCABEZADO = "OFICINA DE REGISTRO DE INSTRUMENTOS PUBLICOS DE BOGOTA - CERTIFICADO"
+AVISO = (
+    "La validez de este documento podrá verificarse en la página web. Este certificado "
+    "se expide de conformidad con la ley y no requiere firma autógrafa. " * 3
+)
+ANOTACION = (
+    "ANOTACION: Nro 3 Fecha: 12-03-2015 Radicación: 2015-1234. ESPECIFICACION: COMPRAVENTA. "
+    "PERSONAS QUE INTERVIENEN EN EL ACTO. DE: PEREZ GOMEZ JUAN A: BANCO EJEMPLO. " * 2
+)
+
+
+def _ocr(paginas):
+    """paginas: lista de listas de (contenido, rol)."""
+    paragraphs, content = [], []
+    for numero, parrafos in enumerate(paginas, start=1):
+        for texto, rol in parrafos:
+            paragraphs.append(OcrParagraph(texto, rol, page_number=numero))
+            content.append(texto)
+    return OcrResult("\n".join(content), len(paginas), detail=DETAIL_PARAGRAPHS,
+                     loaders={"paragraphs": lambda: paragraphs})
+
+
+def _certificado():
+    return _ocr([
+        [(ENCABEZADO, None), ("MATRICULA INMOBILIARIA 050C-1234 LINDEROS: norte con lote 4. " * 2, None)],
+        [(ENCABEZADO, None), (ANOTACION, None), ("Página 2", "pageNumber")],
+        [(ENCABEZADO, None), ("AVISO LEGAL", "sectionHeading"), (AVISO, None)],
+        [(ENCABEZADO, None), ("", None)],
+    ])
+
+
+def test_dentro_del_presupuesto_conserva_todas_las_paginas():
+    seleccion = PageSelector(token_budget=10000).select(_certificado())
+
+    assert seleccion.kept == [1, 2, 3]
+    assert seleccion.summarized == []
+    assert seleccion.dropped == [4]
+    assert ENCABEZADO not in seleccion.text
+    assert "Página 2" not in seleccion.text
+
+
+def test_descarta_encabezados_blancos_y_relleno():
+    seleccion = PageSelector(token_budget=150).select(_certificado())
+
+    assert seleccion.kept == [1, 2]
+    assert seleccion.summarized == [3]
+    assert seleccion.dropped == [4]
+    assert ENCABEZADO not in seleccion.text
+    assert "[Página 3 omitida: AVISO LEGAL]" in seleccion.text
+    assert seleccion.tokens_saved > 0
+
+
+def test_sobre_el_presupuesto_conserva_primera_pagina_y_las_relevantes():
+    ocr = _ocr([
+        [("CERTIFICADO DE TRADICION Y LIBERTAD " * 4, None)],
+        [("texto general del acto " * 20, None)],
+        [(ANOTACION, None)],
+    ])
+    seleccion = PageSelector(token_budget=120).select(ocr)
+
+    assert seleccion.kept == [1, 3]
+    assert seleccion.summarized == [2]
+
+
+def test_paginas_relevantes_pasan_aunque_superen_el_presupuesto():
+    ocr = _ocr([[(ENCABEZADO, None), (ANOTACION.replace("Nro 3", f"Nro {n}"), None)] for n in range(1, 41)])
+    seleccion = PageSelector(token_budget=500).select(ocr)
+
+    assert seleccion.kept == list(range(1, 41))
+    assert seleccion.summarized == []
+    assert seleccion.tokens_after > 500
+    assert all(f"Nro {n} " in seleccion.text for n in range(1, 41))
+
+
+def test_sin_texto_por_pagina_no_aplica():
+    assert PageSelector().select(OcrResult("texto completo", 1)) is None
+
+
+@patch("services.azure_openai_service.AzureOpenAI")
+@patch("processors.base_processor.DocumentIntelligenceService")
+def test_certificado_largo_va_a_map_reduce_sin_seleccion(mock_di, _):
+    # Con los encabezados fuera, el texto seleccionado queda bajo el umbral
+    # de map-reduce aunque el OCR lo supere: la decisión va sobre el OCR
+    ocr = _ocr([[(ENCABEZADO * 4, "pageHeader"), (ANOTACION.replace("Nro 3", f"Nro {n}"), None)]
+                for n in range(1, 11)])
+    processor = EstudioTitulosProcessor()
+    ajustes = {"mapreduce_enabled": True, "mapreduce_min_characters": 4000, "mapreduce_chunk_characters": 2000,
+               "chunk_overlap": 0, "page_selection_token_budget": 100, "preextraction_enabled": False}
+    processor._settings = processor._settings.model_copy(update=ajustes)
+    processor._openai._settings = processor._openai._settings.model_copy(update=ajustes)
+    sistemas = []
+
+    def create(messages, **kwargs):
+        sistemas.append(messages[0]["content"])
+        if "Condénsalo en notas" in messages[0]["content"]:
+            content = {"gravamenes": [{"tipo": "HIPOTECA", "a_favor_de": "BANCO EJEMPLO", "anotacion": "3"}]}
+        else:
+            content = {"PanelFields": []}
+        return NS(choices=[NS(message=NS(content=json.dumps(content)))], usage=None)
+
+    processor._openai._client.chat.completions.create.side_effect = create
+
+    assert len(PageSelector(token_budget=100).select(ocr).text) < 4000 <= len(ocr.content)
+    result = processor.process_ocr_result(ocr, "bronze/estudio.pdf")
+
+    mapas = sum("Condénsalo en notas" in s for s in sistemas)
+    assert mapas >= 2 and len(sistemas) == mapas + 1
+    assert "seleccion_paginas" not in result["_procesamiento"]
@@ -0,0 +1,71 @@
+import pytest
+
+from schemas.panel_row import get_field_table
+from utils.panel_merge import PanelMerger, merge_panel_fields
+
+
+def _text(name, value):
+    return {"InternalName": name, "Type": "Text", "TextValue": value, "NumberValue": None}
+
+
+def _number(name, value):
+    return {"InternalName": name, "Type": "Number", "TextValue": None, "NumberValue": value}
+
+
+TABLE = get_field_table("estudio_titulos")
+
+
+def test_un_item_por_campo_con_politica_por_defecto():
+    merged = merge_panel_fields([
+        [_text("VIV_Compradores", ""), _text("VIV_tipoPredio", "Apartamento"), _text("Extra", "a")],
+        [_text("VIV_Compradores", "JUAN PEREZ"), _text("VIV_tipoPredio", "Casa")],
+        [_text("VIV_Compradores", "ANA ROJAS"), _number("VIV_avaluo_comercial", 0)],
+    ], TABLE)
+
+    assert [f["InternalName"] for f in merged] == [
+        "VIV_tipoPredio", "VIV_Compradores", "VIV_avaluo_comercial", "Extra",
+    ]
+    valores = {f["InternalName"]: f["TextValue"] or f["NumberValue"] for f in merged}
+    assert valores["VIV_Compradores"] == "JUAN PEREZ"  # first: primer valor no vacío
+    assert valores["VIV_tipoPredio"] == "Apartamento"
+    assert valores["VIV_avaluo_comercial"] == 0
+
+
+def test_concat_longest_y_most_frequent():
+    merged = merge_panel_fields([
+        [_text("VIV_gravamenes", "Hipoteca a favor de BANCO A"),
+         _text("VIV_PrestamoDireccionMatricula", "050C-1"),
+         _text("VIV_conceptoJuridico", "Favorable")],
+        [_text("VIV_gravamenes", "hipoteca  a favor de banco a"),
+         _text("VIV_PrestamoDireccionMatricula", "050C-2"),
+         _text("VIV_conceptoJuridico", "Favorable, sujeto a cancelar la hipoteca")],
+        [_text("VIV_gravamenes", "Embargo del Juzgado 3"),
+         _text("VIV_PrestamoDireccionMatricula", "050C-2")],
+    ], TABLE)
+
+    valores = {f["InternalName"]: f["TextValue"] for f in merged}
+    assert valores["VIV_gravamenes"] == "Hipoteca a favor de BANCO A; Embargo del Juzgado 3"
+    assert valores["VIV_PrestamoDireccionMatricula"] == "050C-2"
+    assert valores["VIV_conceptoJuridico"] == "Favorable, sujeto a cancelar la hipoteca"
+
+
+def test_politica_configurada_y_desconocida():
+    resultados = [[_text("VIV_tipoPredio", "Casa")], [_text("VIV_tipoPredio", "Casa lote")]]
+    merged = merge_panel_fields(resultados, TABLE, {"VIV_tipoPredio": "longest"})
+    assert merged[0]["TextValue"] == "Casa lote"
+
+    with pytest.raises(ValueError):
+        merge_panel_fields(resultados, TABLE, {"VIV_tipoPredio": "promedio"})
+
+
+def test_cero_es_un_valor_y_no_un_campo_vacio():
+    merger = PanelMerger(TABLE)
+    merger.add([_number("VIV_avaluo_comercial", 0), _number("GBL_Valordeprestamo", 0), _number("Saldo", None)])
+    merger.add([_number("VIV_avaluo_comercial", 5), _number("GBL_Valordeprestamo", 0), _number("Saldo", 0)])
+    merger.add([_number("VIV_avaluo_comercial", 5), _number("GBL_Valordeprestamo", 9)])
+
+    assert merger.is_filled("VIV_avaluo_comercial") and merger.is_filled("Saldo")
+    valores = {f["InternalName"]: f["NumberValue"] for f in merger.result()}
+    assert valores["GBL_Valordeprestamo"] == 0  # most_frequent
+    assert valores["VIV_avaluo_comercial"] == 5
+    assert valores["Saldo"] == 0  # first: el None no cuenta, el 0 sí
@@ -0,0 +1,42 @@
+from schemas.panel_row import PanelRow, get_field_table
+
+
+PANEL = [
+    {"InternalName": "VIV_PrestamoDireccionMatricula", "Type": "Text", "TextValue": "050C-1", "NumberValue": None},
+    {"InternalName": "VIV_avaluo_comercial", "Type": "Number", "TextValue": None, "NumberValue": 1500.5},
+    {"InternalName": "VIV_campoNuevo", "Type": "Text", "TextValue": "x"},
+    {"InternalName": "VIV_Compradores", "Type": "Text", "TextValue": "A"},
+    {"InternalName": "VIV_Compradores", "Type": "Text", "TextValue": "B"},
+]
+
+
+def test_round_trip_sin_perdida():
+    row = PanelRow.from_panel_fields(PANEL, get_field_table("estudio_titulos"))
+
+    assert row.to_panel_fields() == PANEL
+
+
+def test_busqueda_equivalente_a_dict():
+    row = PanelRow.from_panel_fields(PANEL, get_field_table("estudio_titulos"))
+    esperado = {
+        "VIV_PrestamoDireccionMatricula": "050C-1",
+        "VIV_avaluo_comercial": 1500.5,
+        "VIV_campoNuevo": "x",
+        "VIV_Compradores": "B",
+    }
+
+    assert row.to_dict() == esperado
+    assert row.get("VIV_gravamenes") is None
+    assert "VIV_campoNuevo" in row
+    assert row.get_by_id(row.field_id("VIV_avaluo_comercial")) == 1500.5
+
+
+def test_prefijo_y_asignacion():
+    row = PanelRow.from_panel_fields(PANEL[:1], get_field_table("estudio_titulos"))
+    row.set("VIV_avaluo_comercial", 10)
+
+    assert row.to_panel_fields(prefix="3_") == [
+        {"InternalName": "3_VIV_PrestamoDireccionMatricula", "Type": "Text",
+         "TextValue": "050C-1", "NumberValue": None},
+        {"InternalName": "3_VIV_avaluo_comercial", "Type": "Number", "NumberValue": 10},
+    ]
@@ -0,0 +1,80 @@
+from unittest.mock import patch
+
+from processors import MinutaCancelacionProcessor
+from prompts.extraction_prompt import HINTS_HEADER
+from services.ocr_result import OcrResult
+from schemas.panel_row import get_field_table
+from utils.regex_extractor import (
+    ESCRITURA, MATRICULA, FieldRule, RegexPreExtractor, digits, merge_into_panel_fields, normalize_matricula,
+)
+
+MINUTA = """ESCRITURA PÚBLICA NÚMERO 2.345 DE FECHA 15 de marzo de 2023 otorgada en la Notaría 45 del Círculo de Bogotá, D.C.
+Comparece MARIA LOPEZ, identificada con cédula de ciudadanía No. 52.123.456, quien actúa según Resolución No. 1234
+de 2021, en nombre del BANCO EJEMPLO S.A. y declara cancelada la hipoteca sobre el inmueble ubicado en la Calle 100
+# 15-20 Apartamento 501, identificado con matrícula inmobiliaria No. 050C-12345678 de la Oficina de Registro de
+Instrumentos Públicos de Bogotá Zona Centro.
+"""
+
+
+def test_valor_unico_es_confiable_y_varios_son_pistas():
+    rules = (
+        FieldRule("VIV_folioMatriculaInmobiliaria", MATRICULA, normalize=normalize_matricula),
+        FieldRule("VIV_numeroEscrituraPublica", ESCRITURA, normalize=digits),
+    )
+    texto = MINUTA + "La hipoteca se constituyó por escritura pública No. 987 y consta en la matrícula 050C - 12345678."
+    matches = RegexPreExtractor(rules).extract(texto)
+
+    matricula = matches["VIV_folioMatriculaInmobiliaria"]
+    assert matricula.confident and matricula.value == "050C-12345678"
+    assert "050C-12345678" in matricula.snippet
+
+    escritura = matches["VIV_numeroEscrituraPublica"]
+    assert not escritura.confident
+    assert escritura.candidates == ["2345", "987"]
+
+
+def test_merge_reemplaza_valor_del_llm_y_ordena_por_tabla():
+    table = get_field_table("minuta_cancelacion")
+    matches = RegexPreExtractor(
+        (FieldRule("VIV_folioMatriculaInmobiliaria", MATRICULA, normalize=normalize_matricula),)
+    ).extract(MINUTA)
+    llm = [
+        {"InternalName": "VIV_direccionInmueble", "Type": "Text", "TextValue": "Calle 100"},
+        {"InternalName": "VIV_folioMatriculaInmobiliaria", "Type": "Text", "TextValue": "50C-1234567"},
+        {"InternalName": "VIV_numeroEscrituraPublica", "Type": "Text", "TextValue": "2345"},
+    ]
+    fields = merge_into_panel_fields(llm, matches, table)
+
+    assert [f["InternalName"] for f in fields] == [
+        "VIV_numeroEscrituraPublica", "VIV_folioMatriculaInmobiliaria", "VIV_direccionInmueble",
+    ]
+    assert fields[1]["TextValue"] == "050C-12345678"
+
+
+CANCELACION_BORRADOR = """ESCRITURA PÚBLICA NÚMERO ______ DE FECHA ______.
+El BANCO EJEMPLO S.A., según Resolución No. 1234 de 2021, declara cancelada la hipoteca constituida mediante
+escritura pública No. 4.321 del 12 de marzo de 2015 otorgada en la Notaría 15 del Círculo de Medellín, sobre el
+inmueble ubicado en la Calle 100 # 15-20, identificado con matrícula inmobiliaria No. 001-987654 de la Oficina de
+Registro de Instrumentos Públicos de Medellín Zona Sur.
+"""
+
+
+@patch("processors.base_processor.AzureOpenAIService")
+@patch("processors.base_processor.DocumentIntelligenceService")
+def test_escritura_de_constitucion_citada_no_se_toma_como_la_de_cancelacion(mock_di, mock_openai):
+    mock_openai.return_value.get_token_usage.return_value = {"llamadas": 1}
+    mock_openai.return_value.extract_structured_data.return_value = {"PanelFields": []}
+    processor = MinutaCancelacionProcessor()
+    processor._settings = processor._settings.model_copy(update={"preextraction_skip_llm": True})
+
+    result = processor.process_ocr_result(OcrResult(CANCELACION_BORRADOR, 1), "bronze/minuta_cancelacion.pdf")
+
+    # Las reglas no cubren la tabla: se llama al LLM con la escritura citada solo como candidata
+    context = mock_openai.return_value.extract_structured_data.call_args.kwargs["context"]
+    resueltos, candidatos = context.split(HINTS_HEADER)
+    assert "4321" in candidatos and "4321" not in resueltos
+    assert "Notaría 15 del Círculo de Medellín" in candidatos
+    valores = {f["InternalName"]: f["TextValue"] for f in result["PanelFields"]}
+    assert "VIV_numeroEscrituraPublica" not in valores and "VIV_notariaEscrituraPublica" not in valores
+    assert valores["VIV_folioMatriculaInmobiliaria"] == "001-987654"
+    assert not result["_procesamiento"]["preextraccion"]["VIV_fechaEscrituraPublica"]["confiable"]
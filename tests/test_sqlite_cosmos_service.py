@@ -0,0 +1,96 @@
+import threading
+
+import pytest
+from azure.cosmos import exceptions
+
+from services.sqlite_cosmos_service import SqliteCosmosDBService
+
+
+@pytest.fixture
+def cosmos():
+    service = SqliteCosmosDBService(":memory:")
+    yield service
+    service.close()
+
+
+def _doc(doc_id, caso_id, fecha, procesador="EstudioTitulosProcessor"):
+    return {
+        "id": doc_id,
+        "casoId": caso_id,
+        "fechaProcesamiento": fecha,
+        "_etiquetas": {"procesador": procesador},
+    }
+
+
+def test_upsert_and_point_read_with_etag(cosmos):
+    assert cosmos.upsert_document(_doc("p1", "caso-1", "2024-01-01"), "estudio_titulos") == "p1"
+
+    leido = cosmos.get_document("p1", "estudio_titulos")
+    assert leido["tipoDocumento"] == "estudio_titulos"
+    assert leido["_etag"]
+    assert cosmos.get_document("p1", "minuta_cancelacion") is None
+
+    # Con el ETag vigente se acepta; con uno viejo falla con 412
+    cosmos.upsert_document({**leido, "casoId": "caso-1b"}, "estudio_titulos", if_match=leido["_etag"])
+    with pytest.raises(exceptions.CosmosAccessConditionFailedError):
+        cosmos.upsert_document(leido, "estudio_titulos", if_match=leido["_etag"])
+    assert cosmos.get_document("p1", "estudio_titulos")["casoId"] == "caso-1b"
+
+
+def test_queries_partition_scoped_and_cross_partition(cosmos):
+    cosmos.upsert_document(_doc("a", "caso-1", "2024-01-02"), "estudio_titulos")
+    cosmos.upsert_document(_doc("b", "caso-1", "2024-01-01", "MinutaCancelacionProcessor"), "minuta_cancelacion")
+    cosmos.upsert_document(_doc("c", "caso-2", "2024-01-03"), "estudio_titulos")
+
+    assert [d["id"] for d in cosmos.get_documents_by_caso("caso-1")] == ["b", "a"]
+    assert [d["id"] for d in cosmos.query_documents({"casoId": "caso-1"}, partition_key="estudio_titulos")] == ["a"]
+    assert [d["id"] for d in cosmos.query_documents({"_etiquetas.procesador": "MinutaCancelacionProcessor"})] == ["b"]
+    assert [d["id"] for d in cosmos.query_documents({"casoId": ["caso-1", "caso-2"]}, order_by="fechaProcesamiento",
+                                                   descending=True, limit=2)] == ["c", "a"]
+
+    with pytest.raises(ValueError):
+        cosmos.query_documents({"casoId') OR 1=1 --": "x"})
+
+
+def test_request_charges_cross_partition_costs_more(cosmos):
+    cosmos.upsert_document(_doc("a", "caso-1", "2024-01-01"), "estudio_titulos")
+    cosmos.upsert_document(_doc("b", "caso-1", "2024-01-01"), "minuta_cancelacion")
+    cosmos.reset_request_charges()
+
+    cosmos.query_documents({"casoId": "caso-1"}, partition_key="estudio_titulos")
+    scoped = cosmos.last_request_charge
+    cosmos.query_documents({"casoId": "caso-1"})
+    cross = cosmos.last_request_charge
+    cosmos.get_document("a", "estudio_titulos")
+
+    assert cross > scoped
+    assert cosmos.last_request_charge == 1.0
+    assert cosmos.get_request_charges()["por_operacion"].keys() == {"query", "read"}
+
+
+def test_ultimo_cargo_es_por_hilo_y_los_totales_no_se_pierden(cosmos):
+    # El hilo A escribe, el B escribe un documento más grande y recién
+    # entonces A lee su último cargo: debe ver el suyo, no el de B.
+    escribio_a, escribio_b = threading.Event(), threading.Event()
+    cargos = {}
+
+    def hilo_a():
+        cosmos.upsert_document(_doc("a", "caso-1", "2024-01-01"), "estudio_titulos")
+        escribio_a.set()
+        escribio_b.wait(5)
+        cargos["a"] = cosmos.last_request_charge
+
+    def hilo_b():
+        escribio_a.wait(5)
+        cosmos.upsert_document({**_doc("b", "caso-1", "2024-01-01"), "texto": "x" * 5000}, "estudio_titulos")
+        cargos["b"] = cosmos.last_request_charge
+        escribio_b.set()
+
+    hilos = [threading.Thread(target=hilo_a), threading.Thread(target=hilo_b)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert cargos["a"] < cargos["b"]
+    assert cosmos.get_request_charges()["total"] == round(cargos["a"] + cargos["b"], 2)
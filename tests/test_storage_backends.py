@@ -0,0 +1,147 @@
+import os
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from azure.core.exceptions import ResourceNotFoundError
+
+from services.datalake_service import DataLakeService
+from services.storage_backends import AzureDataLakeBackend, LocalFileSystemBackend
+
+
+@pytest.fixture
+def datalake(tmp_path):
+    return DataLakeService(backend=LocalFileSystemBackend(str(tmp_path)))
+
+
+def test_local_backend_roundtrip(datalake, tmp_path):
+    ruta = datalake.write_json("silver", "conecta/vivienda/caso-1/doc.json", {"a": 1})
+
+    assert ruta == "silver/conecta/vivienda/caso-1/doc.json"
+    assert (tmp_path / "silver" / "conecta" / "vivienda" / "caso-1" / "doc.json").is_file()
+    assert datalake.file_exists("silver", "conecta/vivienda/caso-1/doc.json")
+    assert b'"a"' in datalake.read_file("silver", "conecta/vivienda/caso-1/doc.json")
+    assert datalake.read_range("silver", "conecta/vivienda/caso-1/doc.json", 0, 1) == b"{"
+
+    modificado = datalake.last_modified("silver", "conecta/vivienda/caso-1/doc.json")
+    assert modificado.tzinfo is timezone.utc
+    assert abs((datetime.now(timezone.utc) - modificado).total_seconds()) < 60
+
+
+def test_local_backend_list_and_delete(datalake):
+    datalake.write_bytes("silver", "conecta/a/1.ocrb", b"x")
+    datalake.write_json("silver", "conecta/a/1.json", {})
+    datalake.write_json("silver", "conecta/b/2.json", {})
+
+    assert datalake.list_files("silver", "conecta", extension=".json") == ["conecta/a/1.json", "conecta/b/2.json"]
+    assert datalake.list_files("silver", "conecta/a") == ["conecta/a/1.json", "conecta/a/1.ocrb"]
+    assert datalake.list_files("silver", "no/existe") == []
+    assert [f.size for f in datalake.list_file_properties("silver", "conecta/a")] == [2, 1]
+
+    assert datalake.delete_file("silver", "conecta/a/1.ocrb")
+    assert not datalake.file_exists("silver", "conecta/a/1.ocrb")
+
+
+def test_local_backend_atomic_overwrite_leaves_no_temp_files(datalake, tmp_path):
+    for i in range(3):
+        datalake.write_bytes("bronze", "doc.pdf", bytes([i]) * 10)
+
+    assert datalake.read_file("bronze", "doc.pdf") == b"\x02" * 10
+    assert os.listdir(tmp_path / "bronze") == ["doc.pdf"]
+
+
+def test_local_backend_rejects_paths_outside_container(datalake):
+    with pytest.raises(ValueError):
+        datalake.write_bytes("silver", "../gold/x.json", b"{}")
+
+
+# =========================================================
+# Contrato común a los backends
+# =========================================================
+
+class _FakeFileSystemClient:
+    """Lo que usa AzureDataLakeBackend de FileSystemClient, en memoria y con los errores del SDK."""
+
+    def __init__(self):
+        self.files = {}
+
+    def get_file_client(self, file_path):
+        return _FakeFileClient(self.files, file_path)
+
+    def get_directory_client(self, directory_path):
+        return SimpleNamespace(create_directory=lambda: None)
+
+    def get_paths(self, path=None, recursive=True):
+        prefix = f"{path.strip('/')}/" if path else ""
+        names = sorted(n for n in self.files if n.startswith(prefix))
+        if path and not names:
+            raise ResourceNotFoundError("The specified path does not exist.")
+        for name in names:
+            yield SimpleNamespace(name=name.rsplit("/", 1)[0], is_directory=True,
+                                  content_length=None, last_modified=None)
+            yield SimpleNamespace(name=name, is_directory=False, content_length=len(self.files[name]),
+                                  last_modified=datetime.now(timezone.utc))
+
+
+class _FakeFileClient:
+    def __init__(self, files, file_path):
+        self.files, self.file_path = files, file_path
+
+    def _content(self):
+        if self.file_path not in self.files:
+            raise ResourceNotFoundError("The specified path does not exist.")
+        return self.files[self.file_path]
+
+    def upload_data(self, content, overwrite=False):
+        self.files[self.file_path] = bytes(content)
+
+    def download_file(self, offset=None, length=None):
+        content = self._content()
+        if offset is not None:
+            content = content[offset:offset + length]
+        return SimpleNamespace(readall=lambda: content)
+
+    def get_file_properties(self):
+        return SimpleNamespace(size=len(self._content()), last_modified=datetime.now(timezone.utc))
+
+    def delete_file(self):
+        self._content()
+        del self.files[self.file_path]
+
+
+def _azure_backend():
+    backend = AzureDataLakeBackend.__new__(AzureDataLakeBackend)
+    file_systems = {}
+    backend.client = SimpleNamespace(
+        get_file_system_client=lambda container: file_systems.setdefault(container, _FakeFileSystemClient())
+    )
+    return backend
+
+
+@pytest.fixture(params=["local", "azure"])
+def backend(request, tmp_path):
+    return LocalFileSystemBackend(str(tmp_path)) if request.param == "local" else _azure_backend()
+
+
+def test_contrato_lectura_escritura_y_borrado(backend):
+    backend.write("silver", "conecta/a/1.json", b'{"a": 1}')
+
+    assert backend.exists("silver", "conecta/a/1.json")
+    assert not backend.exists("silver", "conecta/a/2.json")
+    assert backend.read("silver", "conecta/a/1.json") == b'{"a": 1}'
+    assert backend.read_range("silver", "conecta/a/1.json", 2, 1) == b"a"
+    assert backend.last_modified("silver", "conecta/a/1.json").tzinfo is not None
+
+    backend.delete("silver", "conecta/a/1.json")
+    assert not backend.exists("silver", "conecta/a/1.json")
+
+
+def test_contrato_listado_recursivo_y_directorio_inexistente(backend):
+    backend.write("silver", "conecta/a/1.ocrb", b"x")
+    backend.write("silver", "conecta/a/b/2.json", b"{}")
+
+    assert sorted((f.name, f.size) for f in backend.list("silver", "conecta")) == [
+        ("conecta/a/1.ocrb", 1), ("conecta/a/b/2.json", 2),
+    ]
+    assert backend.list("silver", "conecta/no-existe") == []
+    assert DataLakeService(backend=backend).list_files("silver", "otro/tipo", extension=".ocrb") == []
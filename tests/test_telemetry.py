@@ -0,0 +1,68 @@
+import pytest
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from utils import telemetry
+
+
+_exporter = InMemorySpanExporter()
+
+
+@pytest.fixture(scope="module", autouse=True)
+def provider():
+    tracer_provider = TracerProvider()
+    tracer_provider.add_span_processor(SimpleSpanProcessor(_exporter))
+    trace.set_tracer_provider(tracer_provider)
+
+
+@pytest.fixture(autouse=True)
+def clear_spans():
+    _exporter.clear()
+
+
+def _spans():
+    return {s.name: s for s in _exporter.get_finished_spans()}
+
+
+def test_stage_span_carries_bound_context_and_nests():
+    with telemetry.bind_context(caso_id="caso-1", process_id="VIV-1", tipo_documento="estudio_titulos"):
+        with telemetry.stage_span("process_blob"):
+            with telemetry.stage_span("llm.chunk", chunk=0, characters=10, ignorado=None) as span:
+                telemetry.set_attributes(span, prompt_tokens=5)
+
+    spans = _spans()
+    chunk = spans["llm.chunk"]
+    assert chunk.parent.span_id == spans["process_blob"].context.span_id
+    assert chunk.attributes["caso_id"] == "caso-1"
+    assert chunk.attributes["process_id"] == "VIV-1"
+    assert chunk.attributes["prompt_tokens"] == 5
+    assert "ignorado" not in chunk.attributes
+    assert telemetry.bound_context() == {}
+
+
+def test_stage_span_marks_errors():
+    with pytest.raises(ValueError):
+        with telemetry.stage_span("validation"):
+            raise ValueError("falla")
+
+    assert _spans()["validation"].status.status_code == trace.StatusCode.ERROR
+
+
+def test_context_propagates_through_activity_payload():
+    with telemetry.bind_context(caso_id="caso-2"), telemetry.stage_span("orquestacion.inicio"):
+        payload = telemetry.wrap_payload("caso-2")
+
+    caso_id, carrier = telemetry.unwrap_payload(payload)
+    with telemetry.extract_context(carrier), telemetry.stage_span("activity.leer_resultados"):
+        pass
+
+    spans = _spans()
+    activity = spans["activity.leer_resultados"]
+    assert caso_id == "caso-2"
+    assert activity.context.trace_id == spans["orquestacion.inicio"].context.trace_id
+    assert activity.attributes["caso_id"] == "caso-2"
+
+    # Inputs sin envolver (formato anterior) siguen funcionando
+    assert telemetry.unwrap_payload("caso-3") == ("caso-3", None)
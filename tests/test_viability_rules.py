@@ -0,0 +1,148 @@
+import pytest
+from types import SimpleNamespace
+
+from rules import RuleEngine, build_viability_engine
+
+
+def _settings(**overrides):
+    base = {"reject_if_encumbrances": True, "viability_rules_extra": []}
+    base.update(overrides)
+    return SimpleNamespace(**base)
+
+
+def _caso(**campos):
+    base = {
+        "VIV_PrestamoDireccionMatricula": "050C-12345678",
+        "VIV_conceptoJuridico": "Favorable",
+    }
+    base.update(campos)
+    return {"estudio_titulos": base}
+
+
+# =========================================================
+# Test reglas por defecto
+# =========================================================
+
+def test_caso_aprobado():
+    engine = build_viability_engine(_settings())
+    decision = engine.evaluate(_caso())
+
+    assert decision["status"] == "APPROVED"
+    assert decision["reasons"] == []
+    assert decision["decision_log"] == ["Todas las reglas se cumplieron → APROBADO"]
+
+
+def test_matricula_ausente_no_agrega_concepto_no_claro():
+    engine = build_viability_engine(_settings())
+    decision = engine.evaluate({"estudio_titulos": {}})
+
+    assert decision["status"] == "REJECTED"
+    assert [r["code"] for r in decision["reasons"]] == ["MISSING_MATRICULA"]
+
+
+@pytest.mark.parametrize(
+    "concepto,status,codigo",
+    [
+        ("DESFAVORABLE", "REJECTED", "CONCEPTO_DESFAVORABLE"),
+        ("pendiente", "CONDITIONAL", "CONCEPTO_NO_CLARO"),
+        (None, "CONDITIONAL", "CONCEPTO_NO_CLARO"),
+    ],
+)
+def test_concepto_juridico(concepto, status, codigo):
+    engine = build_viability_engine(_settings())
+    decision = engine.evaluate(_caso(VIV_conceptoJuridico=concepto))
+
+    assert decision["status"] == status
+    assert [r["code"] for r in decision["reasons"]] == [codigo]
+
+
+@pytest.mark.parametrize(
+    "gravamenes,rechaza,habilitado",
+    [
+        ("Embargo ejecutivo vigente", True, True),
+        ("Embargo cancelado", False, True),
+        ("Embargo ejecutivo vigente", False, False),
+    ],
+)
+def test_embargo_vigente(gravamenes, rechaza, habilitado):
+    engine = build_viability_engine(_settings(reject_if_encumbrances=habilitado))
+    decision = engine.evaluate(_caso(VIV_gravamenes=gravamenes))
+
+    assert (decision["status"] == "REJECTED") is rechaza
+
+
+def test_umbrales_desde_settings():
+    engine = build_viability_engine(_settings(min_age=21, max_age=70, min_credit_score=700))
+
+    decision = engine.evaluate(_caso(VIV_edadSolicitante="20", VIV_creditScore="650"))
+
+    assert [r["code"] for r in decision["reasons"]] == ["AGE_LIMIT", "CREDIT_SCORE_LOW"]
+    assert "Regla 4: Edad 20 fuera de rango (21-70) → RECHAZADO" in decision["decision_log"]
+    assert "Regla 5: Score 650 < mínimo (700) → RECHAZADO" in decision["decision_log"]
+
+
+def test_valor_numerico_invalido_no_dispara_regla():
+    engine = build_viability_engine(_settings())
+    decision = engine.evaluate(_caso(VIV_edadSolicitante="no aplica"))
+
+    assert decision["status"] == "APPROVED"
+
+
+# =========================================================
+# Test reglas adicionales, validación y estadísticas
+# =========================================================
+
+def test_regla_adicional_desde_settings():
+    extra = [{
+        "id": "R6_MEDIDA_CAUTELAR",
+        "field": "VIV_medidaCautelar",
+        "operator": "present",
+        "status": "CONDITIONAL",
+        "code": "MEDIDA_CAUTELAR",
+        "message": "Existen medidas cautelares",
+    }]
+    engine = build_viability_engine(_settings(viability_rules_extra=extra))
+
+    decision = engine.evaluate(_caso(VIV_medidaCautelar="Demanda en proceso"))
+
+    assert decision["status"] == "CONDITIONAL"
+    assert decision["reasons"][0]["code"] == "MEDIDA_CAUTELAR"
+
+
+@pytest.mark.parametrize(
+    "spec",
+    [
+        {"id": "X", "field": "f", "operator": "equals", "threshold": 1,
+         "status": "REJECTED", "code": "C", "message": "m"},
+        {"id": "X", "field": "f", "operator": "lt",
+         "status": "REJECTED", "code": "C", "message": "m"},
+        {"id": "X", "field": "f", "operator": "missing",
+         "status": "APPROVED", "code": "C", "message": "m"},
+        {"id": "X", "field": "f", "operator": "lt", "threshold": "alto",
+         "status": "REJECTED", "code": "C", "message": "m"},
+    ],
+)
+def test_reglas_invalidas_fallan_al_compilar(spec):
+    with pytest.raises(ValueError):
+        RuleEngine.from_specs([spec])
+
+
+def test_evaluate_many_y_estadisticas():
+    engine = build_viability_engine(_settings(viability_rules_timing=True))
+
+    decisiones = engine.evaluate_many([_caso(), {"estudio_titulos": {}}])
+    stats = engine.stats()
+
+    assert [d["status"] for d in decisiones] == ["APPROVED", "REJECTED"]
+    assert stats["R1_MATRICULA"]["evaluations"] == 2
+    assert stats["R1_MATRICULA"]["hits"] == 1
+    assert stats["R1_MATRICULA"]["total_ms"] > 0
+    assert "R3_EMBARGO_VIGENTE" in stats
+
+    # Sin VIABILITY_RULES_TIMING solo se cuentan evaluaciones
+    sin_tiempo = build_viability_engine(_settings())
+    sin_tiempo.evaluate(_caso())
+    assert sin_tiempo.stats()["R1_MATRICULA"] == {**sin_tiempo.stats()["R1_MATRICULA"], "evaluations": 1, "total_ms": 0}
+
+    engine.reset_stats()
+    assert engine.stats()["R1_MATRICULA"]["evaluations"] == 0
@@ -1,10 +1,13 @@
 from .json_cleaner import JsonCleaner
-from .logger import setup_logging, get_logger
+from .logger import setup_logging, configure_logging, get_logger, bind_context, ContextLogger
 from .business_days import business_days_between
 
 __all__ = [
     "JsonCleaner",
     "setup_logging",
+    "configure_logging",
     "get_logger",
+    "bind_context",
+    "ContextLogger",
     "business_days_between",
 ]
@@ -0,0 +1,153 @@
+"""
+Registro de costos por documento: tokens, páginas de OCR y request units.
+
+Cada etapa acumula sus consumos y su latencia en un ``CostLedger``. El
+registro viaja en ``_procesamiento["costos"]``, se guarda en el documento de
+Cosmos y se suma por caso (metadata del master) y por día
+(documentos agregados en Cosmos), desglosado por tipo de documento y por
+configuración de chunking.
+
+El costo estimado usa los precios de ``COST_PRICES`` (USD):
+``prompt_1k``, ``cached_1k`` y ``completion_1k`` por cada mil tokens,
+``ocr_page`` por página analizada y ``ru_1m`` por millón de RU. Los tokens
+de documentos extraídos en batch (``ruteo == "batch"``) se cobran por
+``batch_factor``.
+"""
+
+from typing import Any, Dict, Iterable, Optional
+
+
+METRICS = ("prompt_tokens", "completion_tokens", "cached_tokens", "ocr_pages", "request_units", "latency_ms")
+
+
+def _empty() -> Dict[str, float]:
+    return {m: 0 for m in METRICS}
+
+
+def estimate_cost(totals: Dict[str, float], prices: Dict[str, float], token_factor: float = 1.0) -> float:
+    """
+    Costo estimado en USD de unos totales. Los tokens cacheados se cobran a
+    su tarifa; token_factor escala el costo de los tokens (p. ej. batch).
+    """
+    cached = totals.get("cached_tokens", 0)
+    uncached = max(0, totals.get("prompt_tokens", 0) - cached)
+    cost = (
+        token_factor * (
+            uncached / 1000 * prices.get("prompt_1k", 0)
+            + cached / 1000 * prices.get("cached_1k", prices.get("prompt_1k", 0))
+            + totals.get("completion_tokens", 0) / 1000 * prices.get("completion_1k", 0)
+        )
+        + totals.get("ocr_pages", 0) * prices.get("ocr_page", 0)
+        + totals.get("request_units", 0) / 1_000_000 * prices.get("ru_1m", 0)
+    )
+    return round(cost, 6)
+
+
+class CostLedger:
+    """Consumos de un documento por etapa."""
+
+    def __init__(self, stages: Optional[Dict[str, Dict[str, float]]] = None,
+                 info: Optional[Dict[str, Any]] = None):
+        self.stages: Dict[str, Dict[str, float]] = {k: {**_empty(), **v} for k, v in (stages or {}).items()}
+        self.info: Dict[str, Any] = dict(info or {})
+
+    def record(
+        self,
+        stage: str,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        cached_tokens: int = 0,
+        ocr_pages: int = 0,
+        request_units: float = 0.0,
+        latency_ms: float = 0.0,
+    ) -> None:
+        """Suma consumos a una etapa."""
+        entry = self.stages.setdefault(stage, _empty())
+        entry["prompt_tokens"] += prompt_tokens
+        entry["completion_tokens"] += completion_tokens
+        entry["cached_tokens"] += cached_tokens
+        entry["ocr_pages"] += ocr_pages
+        entry["request_units"] = round(entry["request_units"] + request_units, 2)
+        entry["latency_ms"] = round(entry["latency_ms"] + latency_ms, 1)
+
+    def record_tokens(self, stage: str, usage: Dict[str, int], latency_ms: float = 0.0) -> None:
+        """Suma el uso de tokens en el formato de AzureOpenAIService.get_token_usage()."""
+        self.record(
+            stage,
+            prompt_tokens=usage.get("prompt_tokens", 0),
+            completion_tokens=usage.get("completion_tokens", 0),
+            cached_tokens=usage.get("cached_tokens", 0),
+            latency_ms=latency_ms,
+        )
+
+    def totals(self) -> Dict[str, float]:
+        totals = _empty()
+        for entry in self.stages.values():
+            for metric in METRICS:
+                totals[metric] += entry.get(metric, 0)
+        totals["request_units"] = round(totals["request_units"], 2)
+        totals["latency_ms"] = round(totals["latency_ms"], 1)
+        return totals
+
+    def estimate(self, prices: Dict[str, float]) -> float:
+        """Costo estimado del documento (con la tarifa batch si se extrajo en batch)."""
+        factor = prices.get("batch_factor", 1.0) if self.info.get("ruteo") == "batch" else 1.0
+        return estimate_cost(self.totals(), prices, token_factor=factor)
+
+    def to_dict(self, prices: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        totals = self.totals()
+        data = {"etapas": self.stages, "totales": totals, **self.info}
+        if prices is not None:
+            data["costo_estimado"] = self.estimate(prices)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> "CostLedger":
+        if not data:
+            return cls()
+        info = {k: v for k, v in data.items() if k not in ("etapas", "totales", "costo_estimado")}
+        return cls(data.get("etapas"), info)
+
+
+def sum_totals(ledgers: Iterable[Optional[Dict[str, Any]]], prices: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+    """Suma los totales de varios registros serializados (p. ej. los documentos de un caso)."""
+    totals = _empty()
+    documentos = 0
+    cost = 0.0
+    for data in ledgers:
+        if not data:
+            continue
+        documentos += 1
+        ledger = CostLedger.from_dict(data)
+        for metric, value in ledger.totals().items():
+            totals[metric] += value
+        if prices is not None:
+            cost += ledger.estimate(prices)
+    totals["request_units"] = round(totals["request_units"], 2)
+    totals["latency_ms"] = round(totals["latency_ms"], 1)
+    result = {"documentos": documentos, "totales": totals}
+    if prices is not None:
+        result["costo_estimado"] = round(cost, 6)
+    return result
+
+
+def add_to_aggregate(aggregate: Dict[str, Any], ledger: CostLedger, prices: Dict[str, float],
+                     groups: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Suma un documento a un agregado (por caso o por día) con desglose por
+    grupo, p. ej. {"tipo_documento": "estudio_titulos", "chunking": "100000/1000"}.
+    """
+    totals = ledger.totals()
+    cost = ledger.estimate(prices)
+
+    def add(target: Dict[str, Any]) -> None:
+        target["documentos"] = target.get("documentos", 0) + 1
+        acc = target.setdefault("totales", _empty())
+        for metric in METRICS:
+            acc[metric] = round(acc.get(metric, 0) + totals[metric], 2)
+        target["costo_estimado"] = round(target.get("costo_estimado", 0.0) + cost, 6)
+
+    add(aggregate)
+    for group, value in groups.items():
+        add(aggregate.setdefault(f"por_{group}", {}).setdefault(value, {}))
+    return aggregate
@@ -0,0 +1,156 @@
+"""
+Clasificador de tipo de documento por contenido (primera página).
+
+Respaldo de ``detectar_tipo_por_nombre`` para PDFs cuyo nombre no indica el
+tipo. Compara el texto de la primera página con un perfil de palabras clave
+por tipo usando TF-IDF (unigramas y bigramas) y similitud coseno. El modelo
+se construye en memoria a partir de los perfiles: no hay entrenamiento ni
+llamadas al LLM, y clasificar una página toma menos de un milisegundo.
+
+El texto se toma de la capa de texto nativa del PDF (pypdf, si está
+instalado) o, en PDFs escaneados, del OCR de la página 1 (ver
+function_app.clasificar_por_contenido).
+"""
+
+import io
+import math
+import re
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Mapping, Optional
+
+# Perfiles por tipo (claves de BLOB_TIPO_MAP). Frases típicas del encabezado
+# y la primera página de cada documento.
+DEFAULT_PROFILES: Dict[str, List[str]] = {
+    "EstudioTitulos": [
+        "estudio de titulos", "concepto juridico", "titulos del inmueble",
+        "certificado de tradicion y libertad", "folio de matricula inmobiliaria",
+        "matricula inmobiliaria", "anotaciones", "tradicion", "propietario actual",
+        "titulo de adquisicion", "limitaciones al dominio", "gravamenes vigentes",
+        "viabilidad juridica", "abogado", "revision de titulos", "cadena de titulos",
+    ],
+    "MinutaCancelacion": [
+        "minuta de cancelacion", "cancelacion de hipoteca", "cancelacion", "cancela",
+        "cancelar la hipoteca", "levantamiento del gravamen", "paz y salvo",
+        "obligacion cancelada", "libera el inmueble", "acreedor hipotecario",
+        "declara cancelada", "extincion de la hipoteca",
+    ],
+    "MinutaConstitucion": [
+        "minuta de constitucion", "constitucion de hipoteca", "constitucion", "constituye",
+        "hipoteca abierta", "sin limite de cuantia", "hipoteca de primer grado",
+        "hipotecante", "garantia hipotecaria", "credito de vivienda", "mutuo",
+        "desembolso", "compraventa",
+    ],
+}
+
+_STOPWORDS = frozenset(
+    "de la el los las del al en y a o que se por con para su sus un una es como "
+    "este esta estos estas lo le les no sin sobre entre ya ser fue han hay".split()
+)
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize_tokens(text: str) -> List[str]:
+    """Minúsculas sin tildes, sin stopwords ni tokens de menos de 3 caracteres."""
+    text = unicodedata.normalize("NFKD", text.lower()).encode("ascii", "ignore").decode("ascii")
+    return [t for t in _TOKEN_RE.findall(text) if len(t) > 2 and t not in _STOPWORDS]
+
+
+def features(text: str) -> Counter:
+    """Unigramas y bigramas (sobre los tokens normalizados)."""
+    tokens = normalize_tokens(text)
+    counts = Counter(tokens)
+    counts.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+    return counts
+
+
+@dataclass
+class Classification:
+    """Resultado de clasificar un texto."""
+    tipo_key: Optional[str]
+    score: float
+    margin: float
+    scores: Dict[str, float] = field(default_factory=dict)
+    matched_terms: int = 0
+    source: str = "texto"
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "tipo": self.tipo_key,
+            "score": round(self.score, 4),
+            "margen": round(self.margin, 4),
+            "scores": {k: round(v, 4) for k, v in self.scores.items()},
+            "terminos": self.matched_terms,
+            "fuente": self.source,
+        }
+
+
+class TfidfClassifier:
+    """
+    TF-IDF sobre los perfiles de cada tipo.
+
+    Solo cuentan los términos del vocabulario de los perfiles: el resto del
+    texto no diluye la similitud. Un documento se enruta si el mejor puntaje
+    supera ``min_score``, le saca al segundo al menos ``min_margin`` y
+    coincide en al menos ``min_terms`` términos.
+    """
+
+    def __init__(self, profiles: Mapping[str, Iterable[str]] = DEFAULT_PROFILES,
+                 min_score: float = 0.3, min_margin: float = 0.1, min_terms: int = 2):
+        self.min_score = min_score
+        self.min_margin = min_margin
+        self.min_terms = min_terms
+
+        profile_features = {tipo: features(" . ".join(frases)) for tipo, frases in profiles.items()}
+        n = len(profile_features)
+        df = Counter(term for counts in profile_features.values() for term in counts)
+        self.idf = {term: math.log((1 + n) / (1 + count)) + 1.0 for term, count in df.items()}
+        self.vectors = {tipo: self._vector(counts) for tipo, counts in profile_features.items()}
+
+    def _vector(self, counts: Mapping[str, int]) -> Dict[str, float]:
+        vector = {
+            term: (1.0 + math.log(count)) * self.idf[term]
+            for term, count in counts.items() if term in self.idf
+        }
+        norm = math.sqrt(sum(v * v for v in vector.values())) or 1.0
+        return {term: v / norm for term, v in vector.items()}
+
+    def classify(self, text: str, source: str = "texto") -> Classification:
+        query = self._vector(features(text))
+        scores = {
+            tipo: sum(weight * profile.get(term, 0.0) for term, weight in query.items())
+            for tipo, profile in self.vectors.items()
+        }
+        ranking = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+        best_tipo, best = ranking[0]
+        margin = best - (ranking[1][1] if len(ranking) > 1 else 0.0)
+
+        routed = best >= self.min_score and margin >= self.min_margin and len(query) >= self.min_terms
+        return Classification(
+            tipo_key=best_tipo if routed else None,
+            score=best,
+            margin=margin,
+            scores=scores,
+            matched_terms=len(query),
+            source=source,
+        )
+
+
+def native_first_page_text(pdf_bytes: bytes) -> str:
+    """
+    Texto de la capa nativa de la primera página; cadena vacía si pypdf no
+    está instalado, el PDF no tiene texto (escaneado) o no se puede leer.
+    """
+    # Import diferido: pypdf tarda ~100 ms en cargar y solo se usa en blobs sin tipo
+    try:
+        import pypdf
+    except ImportError:  # pragma: no cover - depende del entorno
+        return ""
+    try:
+        reader = pypdf.PdfReader(io.BytesIO(pdf_bytes))
+        if not reader.pages:
+            return ""
+        return reader.pages[0].extract_text() or ""
+    except Exception:
+        return ""
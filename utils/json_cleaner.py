@@ -3,6 +3,15 @@ import json
 from typing import Any, Dict, List, Optional, Union
 
 
+# Patrones compilados una sola vez a nivel de modulo
+_WHITESPACE_RE = re.compile(r'\s+')
+_NON_AMOUNT_RE = re.compile(r'[^\d.,]')
+_NON_ID_RE = re.compile(r'[^\d\-]')
+_DATE_FILLER_RE = re.compile(r'\s*(del|de|ano|año)\s*', flags=re.IGNORECASE)
+_JSON_OBJECT_RE = re.compile(r'\{[\s\S]*\}')
+_MARKDOWN_JSON_RE = re.compile(r'```(?:json)?\s*([\s\S]*?)\s*```')
+
+
 class JsonCleaner:
     """Utilidad para limpiar y normalizar datos JSON extraidos de documentos."""
 
@@ -20,10 +29,21 @@ class JsonCleaner:
         if not value:
             return None
 
-        # Remover espacios multiples
-        cleaned = re.sub(r'\s+', ' ', str(value))
-        # Remover espacios al inicio y final
-        cleaned = cleaned.strip()
+        text = value if isinstance(value, str) else str(value)
+
+        # Camino rapido: el texto ya esta limpio, se retorna sin copiarlo.
+        # isprintable() es falso para cualquier espacio distinto de ' '
+        # (tabs, saltos de linea, espacios Unicode).
+        if (
+            text[0] != " "
+            and text[-1] != " "
+            and "  " not in text
+            and text.isprintable()
+        ):
+            return text
+
+        # Remover espacios multiples y espacios al inicio y final
+        cleaned = " ".join(text.split())
         # Retornar None si quedo vacio
         return cleaned if cleaned else None
 
@@ -67,17 +87,18 @@ class JsonCleaner:
         original = str(value).strip()
 
         # Detectar moneda
+        upper = original.upper()
         moneda = "COP"  # Default
-        if "USD" in original.upper() or "DOLAR" in original.upper():
+        if "USD" in upper or "DOLAR" in upper:
             moneda = "USD"
-        elif "UVR" in original.upper():
+        elif "UVR" in upper:
             moneda = "UVR"
-        elif "EUR" in original.upper():
+        elif "EUR" in upper:
             moneda = "EUR"
 
         # Extraer valor numerico
         # Remover simbolo de moneda y texto
-        numero = re.sub(r'[^\d.,]', '', original)
+        numero = _NON_AMOUNT_RE.sub('', original)
 
         # Normalizar separadores (Colombia usa . para miles y , para decimales)
         # Detectar formato
@@ -120,8 +141,8 @@ class JsonCleaner:
         cleaned = str(value).strip()
 
         # Remover texto adicional comun
-        cleaned = re.sub(r'\s*(del|de|ano|año)\s*', ' ', cleaned, flags=re.IGNORECASE)
-        cleaned = re.sub(r'\s+', ' ', cleaned).strip()
+        cleaned = _DATE_FILLER_RE.sub(' ', cleaned)
+        cleaned = _WHITESPACE_RE.sub(' ', cleaned).strip()
 
         return cleaned if cleaned else None
 
@@ -153,7 +174,7 @@ class JsonCleaner:
             tipo = "PASAPORTE"
 
         # Extraer numero
-        numero = re.sub(r'[^\d\-]', '', original)
+        numero = _NON_ID_RE.sub('', original)
 
         return {
             "tipo": tipo,
@@ -176,7 +197,7 @@ class JsonCleaner:
             return None
 
         # Extraer numero y agregar %
-        numero = re.sub(r'[^\d.,]', '', str(value))
+        numero = _NON_AMOUNT_RE.sub('', str(value))
         if numero:
             # Normalizar decimal
             numero = numero.replace(',', '.')
@@ -195,21 +216,7 @@ class JsonCleaner:
         Returns:
             Diccionario limpio.
         """
-        cleaned = {}
-
-        for key, value in data.items():
-            if value is None:
-                cleaned[key] = None
-            elif isinstance(value, str):
-                cleaned[key] = JsonCleaner.clean_string(value)
-            elif isinstance(value, dict) and deep:
-                cleaned[key] = JsonCleaner.clean_dict(value, deep=True)
-            elif isinstance(value, list) and deep:
-                cleaned[key] = JsonCleaner.clean_list(value, deep=True)
-            else:
-                cleaned[key] = value
-
-        return cleaned
+        return JsonCleaner._clean_tree(data, {}, deep)
 
     @staticmethod
     def clean_list(data: List[Any], deep: bool = True) -> List[Any]:
@@ -223,23 +230,60 @@ class JsonCleaner:
         Returns:
             Lista limpia.
         """
-        cleaned = []
-
-        for item in data:
-            if item is None:
-                continue  # Omitir None en listas
-            elif isinstance(item, str):
-                clean_item = JsonCleaner.clean_string(item)
-                if clean_item:
-                    cleaned.append(clean_item)
-            elif isinstance(item, dict) and deep:
-                cleaned.append(JsonCleaner.clean_dict(item, deep=True))
-            elif isinstance(item, list) and deep:
-                cleaned.append(JsonCleaner.clean_list(item, deep=True))
-            else:
-                cleaned.append(item)
+        return JsonCleaner._clean_tree(data, [], deep)
 
-        return cleaned
+    @staticmethod
+    def _clean_tree(data: Union[Dict, List], root: Union[Dict, List], deep: bool) -> Union[Dict, List]:
+        """
+        Recorre la estructura con una pila explicita (sin recursion).
+
+        Los contenedores hijos se crean e insertan en su posicion antes de
+        procesarse, por lo que se conserva el orden original. En diccionarios
+        los valores None se mantienen; en listas se omiten, igual que las
+        cadenas que quedan vacias.
+        """
+        clean_string = JsonCleaner.clean_string
+        stack = [(data, root)]
+
+        while stack:
+            source, target = stack.pop()
+
+            if isinstance(target, dict):
+                for key, value in source.items():
+                    if value is None:
+                        target[key] = None
+                    elif isinstance(value, str):
+                        target[key] = clean_string(value)
+                    elif deep and isinstance(value, dict):
+                        child = {}
+                        target[key] = child
+                        stack.append((value, child))
+                    elif deep and isinstance(value, list):
+                        child = []
+                        target[key] = child
+                        stack.append((value, child))
+                    else:
+                        target[key] = value
+            else:
+                for item in source:
+                    if item is None:
+                        continue  # Omitir None en listas
+                    elif isinstance(item, str):
+                        clean_item = clean_string(item)
+                        if clean_item:
+                            target.append(clean_item)
+                    elif deep and isinstance(item, dict):
+                        child = {}
+                        target.append(child)
+                        stack.append((item, child))
+                    elif deep and isinstance(item, list):
+                        child = []
+                        target.append(child)
+                        stack.append((item, child))
+                    else:
+                        target.append(item)
+
+        return root
 
     @staticmethod
     def remove_empty_values(data: Union[Dict, List]) -> Union[Dict, List]:
@@ -288,7 +332,7 @@ class JsonCleaner:
             pass
 
         # Buscar JSON entre llaves
-        match = re.search(r'\{[\s\S]*\}', text)
+        match = _JSON_OBJECT_RE.search(text)
         if match:
             try:
                 return json.loads(match.group())
@@ -296,7 +340,7 @@ class JsonCleaner:
                 pass
 
         # Buscar JSON en bloques de codigo markdown
-        match = re.search(r'```(?:json)?\s*([\s\S]*?)\s*```', text)
+        match = _MARKDOWN_JSON_RE.search(text)
         if match:
             try:
                 return json.loads(match.group(1))
@@ -0,0 +1,129 @@
+"""
+Codec JSON único para persistencia, actividades y prompts.
+
+Usa orjson cuando está instalado y la biblioteca estándar en caso contrario.
+``dumps`` devuelve siempre bytes UTF-8 (lo que espera el Data Lake) para
+evitar la copia str -> bytes; ``dumps_str`` existe para los puntos que
+necesitan texto (prompts). ``loads`` acepta bytes o str.
+"""
+
+import json
+import logging
+from typing import Any, Callable, Dict, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende del entorno
+    orjson = None
+
+
+logger = logging.getLogger(__name__)
+
+
+class JsonCodec:
+    """Par de funciones de codificación/decodificación con nombre."""
+
+    def __init__(
+        self,
+        name: str,
+        dumps: Callable[[Any, bool], bytes],
+        loads: Callable[[Union[bytes, str]], Any],
+    ):
+        self.name = name
+        self._dumps = dumps
+        self._loads = loads
+
+    def dumps(self, obj: Any, indent: bool = False) -> bytes:
+        return self._dumps(obj, indent)
+
+    def dumps_str(self, obj: Any, indent: bool = False) -> str:
+        return self._dumps(obj, indent).decode("utf-8")
+
+    def loads(self, data: Union[bytes, bytearray, memoryview, str]) -> Any:
+        return self._loads(data)
+
+
+# =========================================================
+# Backends
+# =========================================================
+
+def _stdlib_dumps(obj: Any, indent: bool) -> bytes:
+    if indent:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _stdlib_loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+STDLIB_CODEC = JsonCodec("stdlib", _stdlib_dumps, _stdlib_loads)
+
+_BACKENDS: Dict[str, JsonCodec] = {"stdlib": STDLIB_CODEC}
+
+if orjson is not None:
+    _ORJSON_OPTS = orjson.OPT_NON_STR_KEYS
+    _ORJSON_INDENT_OPTS = _ORJSON_OPTS | orjson.OPT_INDENT_2
+
+    def _orjson_dumps(obj: Any, indent: bool) -> bytes:
+        try:
+            return orjson.dumps(obj, option=_ORJSON_INDENT_OPTS if indent else _ORJSON_OPTS)
+        except TypeError:
+            # Tipos que orjson no soporta (p. ej. enteros > 64 bits): se delega a stdlib
+            return _stdlib_dumps(obj, indent)
+
+    _BACKENDS["orjson"] = JsonCodec("orjson", _orjson_dumps, orjson.loads)
+
+
+_codec: JsonCodec = _BACKENDS.get("orjson", STDLIB_CODEC)
+
+
+# =========================================================
+# API del módulo
+# =========================================================
+
+def available_backends() -> list:
+    return list(_BACKENDS)
+
+
+def register_backend(codec: JsonCodec) -> None:
+    """Registra un backend adicional (se selecciona con set_backend)."""
+    _BACKENDS[codec.name] = codec
+
+
+def set_backend(name: str) -> JsonCodec:
+    """
+    Selecciona el backend activo ("auto", "orjson", "stdlib" o uno registrado).
+
+    Raises:
+        ValueError: Si el backend no está disponible.
+    """
+    global _codec
+    if name == "auto":
+        name = "orjson" if "orjson" in _BACKENDS else "stdlib"
+    if name not in _BACKENDS:
+        raise ValueError(f"Backend JSON no disponible: {name}")
+    _codec = _BACKENDS[name]
+    logger.debug("Backend JSON activo: %s", name)
+    return _codec
+
+
+def get_codec() -> JsonCodec:
+    return _codec
+
+
+def dumps(obj: Any, indent: bool = False) -> bytes:
+    """Serializa a bytes UTF-8 (indentación de 2 espacios si indent=True)."""
+    return _codec.dumps(obj, indent)
+
+
+def dumps_str(obj: Any, indent: bool = False) -> str:
+    """Serializa a str, para contenido que se embebe en texto."""
+    return _codec.dumps_str(obj, indent)
+
+
+def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    """Deserializa bytes o str. Los errores son subclases de json.JSONDecodeError."""
+    return _codec.loads(data)
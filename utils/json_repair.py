@@ -0,0 +1,160 @@
+"""
+Reparación local de respuestas JSON del LLM.
+
+Antes de descartar un fragmento por ``JSONDecodeError``/``ValidationError``:
+
+1. ``parse_lenient``: JSON directo, luego ``JsonCleaner.extract_json_from_text``
+   (texto alrededor, bloques markdown) y por último ``complete_truncated``,
+   que corta una respuesta truncada (``finish_reason == "length"``) en el
+   último valor completo y cierra los corchetes abiertos.
+2. ``coerce_panel_fields``: corrige tipos en PanelFields (montos como texto
+   en ``NumberValue``, números en ``TextValue``, ``Type`` ausente o en
+   minúsculas) y descarta items sin ``InternalName``.
+3. ``validate_dropping_invalid``: valida contra el schema quitando los
+   elementos de lista que no validan, y devuelve los ``InternalName`` de los
+   items descartados para volver a pedir solo esos campos.
+"""
+
+import json
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+
+from utils import json_codec
+from utils.json_cleaner import JsonCleaner
+
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def complete_truncated(text: str, max_attempts: int = 20) -> Optional[Any]:
+    """
+    JSON de una respuesta truncada: corta después del último objeto o lista
+    cerrados y cierra los que quedaron abiertos. None si no hay nada útil.
+    """
+    start = text.find("{")
+    if start < 0:
+        return None
+    stack: List[str] = []
+    cuts: List[Tuple[int, str]] = []  # (posición tras un cierre, cierres pendientes)
+    in_string = escape = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in _CLOSERS:
+            stack.append(_CLOSERS[ch])
+        elif ch in "}]":
+            if not stack or stack[-1] != ch:
+                break
+            stack.pop()
+            if not stack:
+                return _loads(text[start:i + 1])
+            cuts.append((i + 1, "".join(reversed(stack))))
+
+    # Del corte más reciente al más antiguo
+    for end, closers in reversed(cuts[-max_attempts:]):
+        data = _loads(text[start:end].rstrip().rstrip(",") + closers)
+        if data is not None:
+            return data
+    return None
+
+
+def _loads(text: str) -> Optional[Any]:
+    try:
+        return json_codec.loads(text)
+    except (json.JSONDecodeError, ValueError):
+        return None
+
+
+def parse_lenient(content: Optional[str]) -> Tuple[Optional[Any], bool]:
+    """(datos, reparado): datos es None si no se pudo recuperar ningún JSON."""
+    if not content:
+        return None, False
+    data = _loads(content)
+    if data is not None:
+        return data, False
+    data = JsonCleaner.extract_json_from_text(content)
+    if data is not None:
+        return data, True
+    return complete_truncated(content), True
+
+
+def coerce_panel_fields(data: Any) -> Any:
+    """Corrige tipos en los items de PanelFields (si los hay); el resto queda igual."""
+    if not isinstance(data, dict) or not isinstance(data.get("PanelFields"), list):
+        return data
+    items = []
+    for item in data["PanelFields"]:
+        if not isinstance(item, dict) or not isinstance(item.get("InternalName"), str):
+            continue
+        item = dict(item)
+        text, number = item.get("TextValue"), item.get("NumberValue")
+
+        field_type = str(item.get("Type") or "").capitalize()
+        if field_type not in ("Text", "Number"):
+            field_type = "Number" if number is not None and text is None else "Text"
+        item["Type"] = field_type
+
+        if field_type == "Number":
+            if isinstance(number, str):
+                number = JsonCleaner.clean_currency(number)["valor"]
+            elif number is None and isinstance(text, str):
+                number = JsonCleaner.clean_currency(text)["valor"]
+            item["NumberValue"] = number
+            item.setdefault("TextValue", None)
+        else:
+            if isinstance(text, (int, float)) and not isinstance(text, bool):
+                text = str(text)
+            elif isinstance(text, list):
+                text = "; ".join(str(v) for v in text if v not in (None, ""))
+            elif isinstance(text, dict):
+                text = json_codec.dumps_str(text)
+            item["TextValue"] = text
+            item.setdefault("NumberValue", None)
+        items.append(item)
+    return {**data, "PanelFields": items}
+
+
+def validate_dropping_invalid(data: Any, schema_class: Type[BaseModel],
+                              max_rounds: int = 3) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Valida contra schema_class quitando los elementos de lista que fallan.
+
+    Devuelve el dict validado y los InternalName de los items de PanelFields
+    descartados. Lanza ValidationError si el error no está dentro de una
+    lista (p. ej. falta la clave raíz).
+    """
+    failed: List[str] = []
+    for _ in range(max_rounds):
+        try:
+            validated = schema_class.model_validate(data)
+            return validated.model_dump(by_alias=True, exclude_none=False), failed
+        except ValidationError as e:
+            to_drop = set()
+            for error in e.errors():
+                loc = error["loc"]
+                if len(loc) >= 2 and isinstance(loc[0], str) and isinstance(loc[1], int):
+                    to_drop.add((loc[0], loc[1]))
+            if not to_drop or not isinstance(data, dict):
+                raise
+            data = dict(data)
+            for key in {k for k, _ in to_drop}:
+                indices = {i for k, i in to_drop if k == key}
+                items = data.get(key) or []
+                for i in indices:
+                    if key == "PanelFields" and i < len(items) and isinstance(items[i], dict):
+                        name = items[i].get("InternalName")
+                        if isinstance(name, str):
+                            failed.append(name)
+                data[key] = [item for i, item in enumerate(items) if i not in indices]
+    validated = schema_class.model_validate(data)
+    return validated.model_dump(by_alias=True, exclude_none=False), failed
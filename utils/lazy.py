@@ -0,0 +1,90 @@
+"""
+Importación y construcción diferidas, para reducir el arranque en frío.
+
+- ``lazy_exports``: ``__getattr__`` de paquete (PEP 562) que importa el
+  submódulo de un nombre exportado la primera vez que se pide.
+- ``LazyImport``: referencia a ``"paquete.modulo:Nombre"`` que se resuelve
+  al llamarla; sirve para tablas de configuración que mencionan clases
+  pesadas sin importarlas.
+- ``LazyService``: proxy que construye el servicio en el primer acceso a un
+  atributo. Así la importación de ``function_app`` no crea clientes ni hace
+  llamadas de red; las funciones que no usan un servicio no lo pagan.
+"""
+
+import importlib
+import threading
+from typing import Any, Callable, Dict, Optional
+
+
+def lazy_exports(package: str, exports: Dict[str, str]) -> Callable[[str], Any]:
+    """
+    Construye el ``__getattr__`` de un paquete.
+
+    Args:
+        package: __name__ del paquete.
+        exports: nombre exportado -> submódulo relativo (p. ej. ".datalake_service").
+    """
+
+    def __getattr__(name: str) -> Any:
+        module_name = exports.get(name)
+        if module_name is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(module_name, package), name)
+        setattr(importlib.import_module(package), name, value)
+        return value
+
+    return __getattr__
+
+
+class LazyImport:
+    """Referencia diferida a un objeto de otro módulo."""
+
+    def __init__(self, target: str):
+        self.target = target
+        self._value: Any = None
+
+    def resolve(self) -> Any:
+        if self._value is None:
+            module_name, _, attr = self.target.partition(":")
+            self._value = getattr(importlib.import_module(module_name), attr)
+        return self._value
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        return self.resolve()(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        return f"LazyImport({self.target!r})"
+
+
+class LazyService:
+    """Proxy que crea el servicio (factory()) en el primer uso, una sola vez."""
+
+    def __init__(self, factory: Callable[[], Any], name: str = ""):
+        self._factory = factory
+        self._name = name
+        self._instance: Optional[Any] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._instance is not None
+
+    def get(self) -> Any:
+        instance = self._instance
+        if instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._factory()
+                instance = self._instance
+        return instance
+
+    def __getattr__(self, name: str) -> Any:
+        # Dunders y privados no crean el servicio: mock.patch, copy o pickle
+        # los consultan con hasattr y no deben abrir conexiones
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.get(), name)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.loaded else "pending"
+        return f"LazyService({self._name or self._factory!r}, {state})"
@@ -1,39 +1,259 @@
+"""
+Logging estructurado del pipeline.
+
+- Formato: texto (por defecto) o JSON por línea (``LOG_FORMAT=json``) con
+  ``ts``, ``level``, ``logger``, ``message``, el contexto ligado y los
+  campos pasados en ``extra``.
+- Contexto: ``bind_context`` (o ``telemetry.bind_context``/``stage_span``,
+  que lo llaman) fija ``caso_id``, ``process_id``, ``tipo_documento`` y
+  ``stage`` para todos los logs emitidos dentro, sin pasarlos a mano.
+- Formateo diferido: los mensajes usan ``%s`` y argumentos
+  (``logger.info("Leyendo %s", ruta)``); si el nivel está deshabilitado no
+  se construye el texto.
+- Límite de repetición (desactivado por defecto): con ``LOG_RATE_LIMIT`` > 0
+  cada plantilla de mensaje (INFO o menor) se emite como máximo
+  ``LOG_RATE_LIMIT`` veces por ventana de ``LOG_RATE_WINDOW_S`` segundos;
+  el primer mensaje de la ventana siguiente indica cuántos se descartaron
+  (``suppressed``). WARNING y superiores nunca se descartan.
+- Sin bloqueo: con ``LOG_QUEUE=true`` los registros se encolan
+  (``QueueHandler``) y un hilo de fondo los formatea y escribe.
+"""
+
+import atexit
+import copy
+import json
 import logging
+import logging.handlers
+import queue
 import sys
-from typing import Optional
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Optional
+
+
+CONTEXT_KEYS = ("caso_id", "process_id", "tipo_documento", "stage")
+
+_context: ContextVar[Dict[str, Any]] = ContextVar("log_context", default={})
+_listener: Optional[logging.handlers.QueueListener] = None
+# Marca de los handlers y filtros instalados por setup_logging
+_OWN_MARK = "_pipeline_logging"
+
+# Atributos estándar de LogRecord (lo demás viene de extra)
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+# =========================================================
+# Contexto ligado
+# =========================================================
+
+@contextmanager
+def bind_context(**values: Any) -> Iterator[None]:
+    """Agrega valores al contexto de log mientras dure el bloque."""
+    token = _context.set({**_context.get(), **{k: v for k, v in values.items() if v is not None}})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+def current_context() -> Dict[str, Any]:
+    """Contexto de log actualmente ligado."""
+    return dict(_context.get())
+
+
+class ContextFilter(logging.Filter):
+    """
+    Copia el contexto ligado al registro. Debe correr en el hilo que emite
+    el log (antes de la cola), porque el contexto vive en contextvars.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        ctx = _context.get()
+        for key, value in ctx.items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+
+class RateLimitFilter(logging.Filter):
+    """Máximo de registros por plantilla de mensaje y ventana de tiempo."""
+
+    def __init__(self, limit: int, window_s: float = 60.0, max_level: int = logging.INFO):
+        super().__init__()
+        self.limit = limit
+        self.window_s = window_s
+        self.max_level = max_level
+        self._lock = threading.Lock()
+        self._windows: Dict[tuple, list] = {}  # clave -> [inicio, emitidos, descartados]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.limit <= 0 or record.levelno > self.max_level:
+            return True
+        key = (record.name, record.msg if isinstance(record.msg, str) else id(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.window_s:
+                suppressed = window[2] if window else 0
+                self._windows[key] = [now, 1, 0]
+                if suppressed:
+                    record.suppressed = suppressed
+                return True
+            if window[1] < self.limit:
+                window[1] += 1
+                return True
+            window[2] += 1
+            return False
+
+
+# =========================================================
+# Formatos
+# =========================================================
+
+class JsonFormatter(logging.Formatter):
+    """Un objeto JSON por línea."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                data[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data["exception"] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Formato de texto con el contexto ligado como prefijo [k=v ...]."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        ctx = " ".join(f"{k}={getattr(record, k)}" for k in CONTEXT_KEYS if hasattr(record, k))
+        suppressed = getattr(record, "suppressed", None)
+        if suppressed:
+            ctx = f"{ctx} suppressed={suppressed}".strip()
+        return f"{line} [{ctx}]" if ctx else line
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler que solo resuelve el mensaje antes de encolar; el formato
+    completo (JSON o texto) se hace en el hilo del listener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
 
 
+# =========================================================
+# Configuración
+# =========================================================
+
 def setup_logging(
     level: int = logging.INFO,
-    format_string: Optional[str] = None
+    format_string: Optional[str] = None,
+    json_format: bool = False,
+    use_queue: bool = False,
+    rate_limit: int = 0,
+    rate_window_s: float = 60.0,
 ) -> None:
     """
     Configura el logging para la aplicacion.
 
+    Si el root logger ya tiene handlers de otro origen (p. ej. el del worker
+    de Azure Functions, que envía los logs al host y a Application Insights
+    con la correlación de la invocación), se conservan tal cual y solo se
+    les agregan los filtros de contexto y de límite; no se instala el
+    handler propio ni la cola. Llamarla de nuevo reemplaza lo instalado
+    antes por esta función.
+
     Args:
         level: Nivel de logging (default: INFO).
-        format_string: Formato personalizado para los logs.
+        format_string: Formato personalizado para los logs de texto.
+        json_format: Emitir JSON por línea en lugar de texto.
+        use_queue: Escribir desde un hilo de fondo (QueueHandler/QueueListener).
+        rate_limit: Máximo por plantilla de mensaje y ventana (0 = sin límite).
+        rate_window_s: Duración de la ventana del límite, en segundos.
     """
+    global _listener
+
     if format_string is None:
         format_string = (
             "%(asctime)s | %(levelname)-8s | %(name)s | %(message)s"
         )
 
-    # Configurar handler para stdout
-    handler = logging.StreamHandler(sys.stdout)
-    handler.setLevel(level)
-    handler.setFormatter(logging.Formatter(format_string))
-
     # Configurar root logger
     root_logger = logging.getLogger()
     root_logger.setLevel(level)
 
-    # Remover handlers existentes
+    # Quitar solo lo instalado por una llamada anterior (y detener su cola)
     for existing_handler in root_logger.handlers[:]:
-        root_logger.removeHandler(existing_handler)
+        if getattr(existing_handler, _OWN_MARK, False):
+            root_logger.removeHandler(existing_handler)
+        else:
+            for f in [f for f in existing_handler.filters if getattr(f, _OWN_MARK, False)]:
+                existing_handler.removeFilter(f)
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+    def own(obj):
+        setattr(obj, _OWN_MARK, True)
+        return obj
+
+    def pipeline_filters():
+        filters = [own(ContextFilter())]
+        if rate_limit > 0:
+            filters.append(own(RateLimitFilter(rate_limit, rate_window_s)))
+        return filters
+
+    host_handlers = root_logger.handlers[:]
+    if host_handlers:
+        # Los filtros corren en el hilo que emite (el contexto está en contextvars)
+        for existing_handler in host_handlers:
+            for f in pipeline_filters():
+                existing_handler.addFilter(f)
+        _quiet_libraries()
+        return
+
+    # Configurar handler para stdout
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setLevel(level)
+    handler.setFormatter(JsonFormatter() if json_format else TextFormatter(format_string))
+
+    if use_queue:
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        _listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_stop_listener)
+        front = _QueueHandler(log_queue)
+    else:
+        front = handler
 
-    root_logger.addHandler(handler)
+    # Los filtros corren en el hilo que emite (el contexto está en contextvars)
+    for f in pipeline_filters():
+        front.addFilter(f)
+    root_logger.addHandler(own(front))
+    _quiet_libraries()
 
+
+def _quiet_libraries() -> None:
     # Reducir verbosidad de librerias externas
     logging.getLogger("azure").setLevel(logging.WARNING)
     logging.getLogger("urllib3").setLevel(logging.WARNING)
@@ -41,6 +261,24 @@ def setup_logging(
     logging.getLogger("openai").setLevel(logging.WARNING)
 
 
+def _stop_listener() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def configure_logging(settings) -> None:
+    """setup_logging con LOG_LEVEL, LOG_FORMAT, LOG_QUEUE y LOG_RATE_LIMIT/LOG_RATE_WINDOW_S."""
+    setup_logging(
+        level=logging.getLevelName(settings.log_level.upper()),
+        json_format=settings.log_format.lower() == "json",
+        use_queue=settings.log_queue,
+        rate_limit=settings.log_rate_limit,
+        rate_window_s=settings.log_rate_window_s,
+    )
+
+
 def get_logger(name: str) -> logging.Logger:
     """
     Obtiene un logger configurado para un modulo.
@@ -54,8 +292,13 @@ def get_logger(name: str) -> logging.Logger:
     return logging.getLogger(name)
 
 
-class ContextLogger:
-    """Logger con contexto adicional para tracking de procesamiento."""
+class ContextLogger(logging.LoggerAdapter):
+    """
+    Logger con contexto propio, además del ligado con bind_context.
+
+    Acepta argumentos diferidos como cualquier logger:
+    ``ContextLogger(logger, {"caso_id": c}).info("Leyendo %s", ruta)``.
+    """
 
     def __init__(self, logger: logging.Logger, context: dict = None):
         """
@@ -65,40 +308,16 @@ class ContextLogger:
             logger: Logger base.
             context: Diccionario con contexto adicional.
         """
-        self._logger = logger
-        self._context = context or {}
+        super().__init__(logger, dict(context or {}))
 
-    def _format_message(self, message: str) -> str:
-        """Formatea el mensaje con el contexto."""
-        if self._context:
-            context_str = " | ".join(f"{k}={v}" for k, v in self._context.items())
-            return f"[{context_str}] {message}"
-        return message
+    def process(self, msg, kwargs):
+        kwargs["extra"] = {**self.extra, **kwargs.get("extra", {})}
+        return msg, kwargs
 
     def set_context(self, **kwargs) -> None:
         """Actualiza el contexto."""
-        self._context.update(kwargs)
+        self.extra.update(kwargs)
 
     def clear_context(self) -> None:
         """Limpia el contexto."""
-        self._context.clear()
-
-    def info(self, message: str, **kwargs) -> None:
-        """Log de nivel INFO."""
-        self._logger.info(self._format_message(message), **kwargs)
-
-    def warning(self, message: str, **kwargs) -> None:
-        """Log de nivel WARNING."""
-        self._logger.warning(self._format_message(message), **kwargs)
-
-    def error(self, message: str, exc_info: bool = False, **kwargs) -> None:
-        """Log de nivel ERROR."""
-        self._logger.error(self._format_message(message), exc_info=exc_info, **kwargs)
-
-    def debug(self, message: str, **kwargs) -> None:
-        """Log de nivel DEBUG."""
-        self._logger.debug(self._format_message(message), **kwargs)
-
-    def exception(self, message: str, **kwargs) -> None:
-        """Log de excepcion."""
-        self._logger.exception(self._format_message(message), **kwargs)
+        self.extra.clear()
@@ -0,0 +1,90 @@
+"""
+Ruteo de la extracción por nivel de modelo.
+
+Las minutas cortas no necesitan el despliegue grande. Cada procesador
+declara una ``RoutingPolicy``: los documentos por debajo de sus umbrales
+(caracteres enviados al LLM y páginas) van al despliegue rápido
+(``AZURE_OPENAI_FAST_DEPLOYMENT``) y el resto al grande
+(``AZURE_OPENAI_DEPLOYMENT``). Si tras la extracción rápida falta algún
+campo crítico, se repite con el despliegue grande (escalamiento).
+
+La decisión queda en ``_procesamiento["ruteo_modelo"]`` y en los costos
+(``ruteo``: ``rapido``, ``grande``, ``escalado`` o ``batch``), que se
+agregan por caso y por día para calcular la tasa de escalamiento y ajustar
+los umbrales (``MODEL_ROUTING_THRESHOLDS``).
+"""
+
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from schemas.panel_row import PanelRow
+
+
+FAST = "rapido"
+LARGE = "grande"
+ESCALATED = "escalado"
+# Extracción diferida con el endpoint batch (ver batch_extraction.py)
+BATCH = "batch"
+
+
+@dataclass(frozen=True)
+class RoutingPolicy:
+    """
+    Umbrales para usar el despliegue rápido y campos que, si faltan,
+    obligan a escalar al grande.
+    """
+    max_characters: int = 20000
+    max_pages: int = 10
+    critical_fields: Tuple[str, ...] = ()
+
+    def with_overrides(self, overrides: Optional[Mapping[str, Any]]) -> "RoutingPolicy":
+        """Política con los umbrales configurados (MODEL_ROUTING_THRESHOLDS) para el procesador."""
+        if not overrides:
+            return self
+        return replace(self, **{
+            k: v for k, v in overrides.items() if k in ("max_characters", "max_pages")
+        })
+
+
+@dataclass
+class RoutingDecision:
+    """Despliegue elegido para un documento y por qué."""
+    tier: str
+    deployment: str
+    reason: str
+    escalated: bool = False
+    missing: List[str] = field(default_factory=list)
+
+    @property
+    def label(self) -> str:
+        return ESCALATED if self.escalated else self.tier
+
+    def escalate(self, deployment: str, missing: Sequence[str]) -> None:
+        self.tier, self.deployment, self.escalated = LARGE, deployment, True
+        self.missing = list(missing)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "nivel": self.label,
+            "despliegue": self.deployment,
+            "motivo": self.reason,
+            "escalado": self.escalated,
+            "campos_faltantes": self.missing,
+        }
+
+
+def route(policy: Optional[RoutingPolicy], characters: int, pages: int,
+          fast_deployment: str, large_deployment: str) -> RoutingDecision:
+    """Nivel de modelo según el tamaño del documento."""
+    if policy is None or not fast_deployment:
+        return RoutingDecision(LARGE, large_deployment, "sin_politica")
+    if characters > policy.max_characters:
+        return RoutingDecision(LARGE, large_deployment, f"caracteres>{policy.max_characters}")
+    if pages > policy.max_pages:
+        return RoutingDecision(LARGE, large_deployment, f"paginas>{policy.max_pages}")
+    return RoutingDecision(FAST, fast_deployment, "bajo_umbral")
+
+
+def missing_critical(panel: PanelRow, fields: Sequence[str]) -> List[str]:
+    """Campos críticos sin valor."""
+    return [name for name in fields if not panel.get(name)]
@@ -0,0 +1,236 @@
+"""
+Selección de páginas relevantes antes de la extracción con el LLM.
+
+Los certificados de tradición traen páginas de relleno (avisos legales,
+páginas en blanco, encabezados repetidos) que se enviaban completas al
+modelo. ``PageSelector`` arma el texto por página a partir de los párrafos
+del OCR (o de las líneas, si no hay párrafos) y:
+
+- descarta párrafos con rol ``pageHeader``/``pageFooter``/``pageNumber`` y
+  líneas que se repiten en la mayoría de las páginas;
+- descarta páginas en blanco;
+- puntúa cada página por los términos clave que contiene (anotaciones,
+  matrícula, linderos, propietarios...); los títulos de sección pesan más;
+- si las páginas restantes caben en el presupuesto de tokens, las conserva
+  todas; si no, conserva la primera y todas las relevantes (puntaje > 0),
+  aunque superen el presupuesto, y reemplaza las demás por un resumen de
+  una línea con sus títulos. Un certificado largo con muchas anotaciones
+  sigue completo hacia el chunking o map-reduce: perder una anotación
+  cuesta más que los tokens que ahorra.
+
+El resultado incluye los tokens estimados antes y después, para reportar el
+ahorro por documento.
+"""
+
+import re
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+from services.ocr_result import OcrResult
+
+
+# Estimación de tokens sin tokenizador (español, texto de OCR)
+CHARS_PER_TOKEN = 4.0
+
+# Términos de las secciones que alimentan la extracción de un certificado
+CERTIFICADO_TERMS: Dict[str, float] = {
+    "anotacion": 3.0,
+    "matricula": 3.0,
+    "folio": 1.0,
+    "linderos": 3.0,
+    "cabida": 2.0,
+    "area": 1.0,
+    "propietario": 3.0,
+    "comprador": 1.5,
+    "vendedor": 1.5,
+    "titular": 2.0,
+    "personas que intervienen": 3.0,
+    "especificacion": 2.0,
+    "hipoteca": 2.0,
+    "compraventa": 2.0,
+    "gravamen": 2.0,
+    "embargo": 2.0,
+    "afectacion": 1.5,
+    "patrimonio de familia": 2.0,
+    "cancelacion": 1.5,
+    "direccion del inmueble": 2.0,
+    "cedula catastral": 1.5,
+    "escritura": 1.0,
+    "radicacion": 1.0,
+    "tradicion": 1.0,
+    "inmueble": 1.0,
+}
+
+_SKIP_ROLES = frozenset({"pageHeader", "pageFooter", "pageNumber"})
+_HEADING_ROLES = frozenset({"title", "sectionHeading"})
+
+
+def _normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text.lower()).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def estimate_tokens(text: str) -> int:
+    return int(len(text) / CHARS_PER_TOKEN + 0.5)
+
+
+@dataclass
+class _Page:
+    number: int
+    lines: List[str] = field(default_factory=list)
+    headings: List[str] = field(default_factory=list)
+    score: float = 0.0
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.lines)
+
+
+@dataclass
+class PageSelection:
+    """Texto resultante y cómo se obtuvo."""
+    text: str
+    kept: List[int]
+    summarized: List[int]
+    dropped: List[int]
+    tokens_before: int
+    tokens_after: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(0, self.tokens_before - self.tokens_after)
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "paginas_conservadas": self.kept,
+            "paginas_resumidas": self.summarized,
+            "paginas_descartadas": self.dropped,
+            "tokens_antes": self.tokens_before,
+            "tokens_despues": self.tokens_after,
+            "tokens_ahorrados": self.tokens_saved,
+        }
+
+
+class PageSelector:
+    """Puntúa páginas por términos clave y arma el texto dentro de un presupuesto de tokens."""
+
+    def __init__(self, terms: Dict[str, float] = CERTIFICADO_TERMS, token_budget: int = 30000,
+                 min_page_chars: int = 40, repeated_line_ratio: float = 0.6,
+                 heading_weight: float = 2.0):
+        self.terms = {_normalize(t): w for t, w in terms.items()}
+        self.token_budget = token_budget
+        self.min_page_chars = min_page_chars
+        self.repeated_line_ratio = repeated_line_ratio
+        self.heading_weight = heading_weight
+        self._pattern = re.compile(
+            r"\b(" + "|".join(re.escape(t) for t in sorted(self.terms, key=len, reverse=True)) + r")"
+        )
+
+    # ---------------------------------------------------------
+    # Páginas
+    # ---------------------------------------------------------
+
+    def _pages(self, ocr_result: OcrResult) -> List[_Page]:
+        """Texto por página desde los párrafos (con roles) o, si no hay, desde las líneas."""
+        pages: Dict[int, _Page] = {}
+        if ocr_result.has_section("paragraphs") and ocr_result.paragraphs:
+            for paragraph in ocr_result.paragraphs:
+                page = pages.setdefault(paragraph.page_number, _Page(paragraph.page_number))
+                if paragraph.role in _SKIP_ROLES:
+                    continue
+                page.lines.append(paragraph.content)
+                if paragraph.role in _HEADING_ROLES:
+                    page.headings.append(paragraph.content)
+        elif ocr_result.has_section("pages"):
+            for ocr_page in ocr_result.pages:
+                pages[ocr_page.page_number] = _Page(
+                    ocr_page.page_number, [line.content for line in ocr_page.lines]
+                )
+        return [pages[n] for n in sorted(pages)]
+
+    def _strip_repeated(self, pages: Sequence[_Page], edge: int = 3) -> None:
+        """
+        Quita encabezados y pies sin rol: líneas entre las primeras o últimas
+        ``edge`` de la página que se repiten en la mayoría de las páginas.
+        """
+        if len(pages) < 3:
+            return
+
+        def edges(page: _Page) -> set:
+            return {_normalize(l) for l in page.lines[:edge] + page.lines[-edge:]}
+
+        counts = Counter(line for page in pages for line in edges(page))
+        limit = self.repeated_line_ratio * len(pages)
+        repeated = {line for line, n in counts.items() if n >= limit}
+        if not repeated:
+            return
+        for page in pages:
+            n = len(page.lines)
+            page.lines = [
+                l for i, l in enumerate(page.lines)
+                if not (i < edge or i >= n - edge) or _normalize(l) not in repeated
+            ]
+
+    def _score(self, page: _Page) -> float:
+        score = sum(self.terms[m] for m in self._pattern.findall(_normalize(page.text)))
+        for heading in page.headings:
+            score += self.heading_weight * sum(self.terms[m] for m in self._pattern.findall(_normalize(heading)))
+        return score
+
+    @staticmethod
+    def _summary(page: _Page) -> str:
+        titulos = "; ".join(h.strip() for h in page.headings[:3] if h.strip())
+        return f"[Página {page.number} omitida{': ' + titulos if titulos else ''}]"
+
+    # ---------------------------------------------------------
+    # Selección
+    # ---------------------------------------------------------
+
+    def select(self, ocr_result: OcrResult) -> Optional[PageSelection]:
+        """
+        Selección de páginas del documento; None si el OCR no trae texto por
+        página (nivel de detalle "content") y hay que usar el texto completo.
+        """
+        pages = self._pages(ocr_result)
+        if not pages:
+            return None
+
+        tokens_before = estimate_tokens(ocr_result.content)
+        self._strip_repeated(pages)
+
+        dropped = [p.number for p in pages if len(p.text.strip()) < self.min_page_chars]
+        candidates = [p for p in pages if p.number not in dropped]
+        if not candidates:
+            return None
+        for page in candidates:
+            page.score = self._score(page)
+
+        costs = {p.number: estimate_tokens(p.text) for p in candidates}
+        if sum(costs.values()) <= self.token_budget:
+            # Todo cabe: no se resume nada, aunque una página no tenga términos
+            kept = {p.number for p in candidates}
+        else:
+            # Solo se resumen las páginas sin términos clave; las relevantes
+            # pasan aunque superen el presupuesto
+            kept = {p.number for p in candidates if p.score > 0 or p is candidates[0]}
+
+        parts, summarized = [], []
+        for page in candidates:
+            if page.number in kept:
+                parts.append(page.text)
+            else:
+                summarized.append(page.number)
+                parts.append(self._summary(page))
+        text = "\n".join(parts)
+
+        return PageSelection(
+            text=text,
+            kept=sorted(kept),
+            summarized=summarized,
+            dropped=dropped,
+            tokens_before=tokens_before,
+            tokens_after=estimate_tokens(text),
+        )
+
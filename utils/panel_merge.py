@@ -0,0 +1,146 @@
+"""
+Fusión de PanelFields de varios fragmentos.
+
+Los resultados de cada fragmento se indexan por ``InternalName`` en un
+diccionario (costo lineal en el total de items) y cada campo se resuelve con
+una política de conflicto:
+
+- ``first``: primer valor no vacío (por defecto).
+- ``longest``: el valor más largo (en Number, el mayor).
+- ``concat``: valores distintos unidos con ``"; "``, en orden de aparición
+  (campos tipo lista como ``VIV_gravamenes``).
+- ``most_frequent``: el valor que más se repite entre fragmentos; en empate,
+  el primero.
+
+El resultado tiene exactamente un item por campo, en el orden de la tabla
+del tipo de documento y luego los campos desconocidos por orden de aparición.
+Los campos acumulables de la tabla usan ``concat`` salvo que se configure
+otra política (``MERGE_POLICIES``).
+"""
+
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+from schemas.panel_row import PanelFieldTable
+
+
+FIRST = "first"
+LONGEST = "longest"
+CONCAT = "concat"
+MOST_FREQUENT = "most_frequent"
+POLICIES = (FIRST, LONGEST, CONCAT, MOST_FREQUENT)
+
+CONCAT_SEPARATOR = "; "
+
+# Políticas por defecto además de concat para los campos acumulables
+DEFAULT_POLICIES: Dict[str, str] = {
+    "VIV_PrestamoDireccionMatricula": MOST_FREQUENT,
+    "VIV_folioMatriculaInmobiliaria": MOST_FREQUENT,
+    "VIV_descripcionLinderos": LONGEST,
+    "VIV_conceptoJuridico": LONGEST,
+    "VIV_avaluo_comercial": MOST_FREQUENT,
+    "TPC_ValorComercial": MOST_FREQUENT,
+    "GBL_Valordeprestamo": MOST_FREQUENT,
+}
+
+
+def _is_empty(value: Any) -> bool:
+    """None o texto en blanco; un NumberValue de 0 es un valor válido."""
+    if isinstance(value, str):
+        return not value.strip()
+    return value is None
+
+
+def _key(value: Any) -> Any:
+    """Clave de comparación: texto sin diferencias de espacios ni mayúsculas."""
+    if isinstance(value, str):
+        return " ".join(value.split()).casefold()
+    return value
+
+
+class _Field:
+    __slots__ = ("type", "empty", "values", "counts")
+
+    def __init__(self, field_type: str, empty: Any):
+        self.type = field_type
+        self.empty = empty          # primer valor vacío visto (conserva "" o None)
+        self.values: List[Any] = []  # valores no vacíos en orden, sin repetir
+        self.counts: Counter = Counter()
+
+
+class PanelMerger:
+    """Acumula PanelFields de varios fragmentos y los resuelve por política."""
+
+    def __init__(self, table: PanelFieldTable, policies: Optional[Mapping[str, str]] = None):
+        self.table = table
+        self.policies: Dict[str, str] = {name: CONCAT for name in table.accumulate}
+        self.policies.update(DEFAULT_POLICIES)
+        self.policies.update(policies or {})
+        for name, policy in self.policies.items():
+            if policy not in POLICIES:
+                raise ValueError(f"Política de fusión desconocida para {name}: {policy}")
+        self._fields: Dict[str, _Field] = {}
+
+    def add(self, panel_fields: Iterable[Dict[str, Any]]) -> None:
+        """Agrega los items de un fragmento."""
+        for item in panel_fields or ():
+            name = item["InternalName"]
+            field_type = item.get("Type", "Text")
+            value = item.get("TextValue") if field_type == "Text" else item.get("NumberValue")
+            entry = self._fields.get(name)
+            if entry is None:
+                entry = self._fields[name] = _Field(field_type, value if _is_empty(value) else None)
+            if _is_empty(value):
+                continue
+            key = _key(value)
+            if key not in entry.counts:
+                entry.values.append(value)
+            entry.counts[key] += 1
+
+    def is_filled(self, name: str) -> bool:
+        entry = self._fields.get(name)
+        return entry is not None and bool(entry.values)
+
+    def value_count(self, names: Iterable[str]) -> int:
+        """Valores distintos acumulados en los campos indicados."""
+        return sum(len(self._fields[n].values) for n in names if n in self._fields)
+
+    def _resolve(self, name: str, entry: _Field) -> Any:
+        if not entry.values:
+            return entry.empty
+        policy = self.policies.get(name, FIRST)
+        if policy == LONGEST:
+            if entry.type == "Text":
+                return max(entry.values, key=lambda v: len(str(v)))
+            return max(entry.values)
+        if policy == CONCAT and entry.type == "Text":
+            return CONCAT_SEPARATOR.join(" ".join(str(v).split()) for v in entry.values)
+        if policy == MOST_FREQUENT:
+            best = max(entry.counts.values())
+            return next(v for v in entry.values if entry.counts[_key(v)] == best)
+        return entry.values[0]
+
+    def result(self) -> List[Dict[str, Any]]:
+        """Un item por campo: primero los de la tabla (en su orden), luego los desconocidos."""
+        known = [n for n in self.table.names if n in self._fields]
+        unknown = [n for n in self._fields if n not in self.table]
+        merged = []
+        for name in known + unknown:
+            entry = self._fields[name]
+            value = self._resolve(name, entry)
+            merged.append({
+                "InternalName": name,
+                "Type": entry.type,
+                "TextValue": value if entry.type == "Text" else None,
+                "NumberValue": None if entry.type == "Text" else value,
+            })
+        return merged
+
+
+def merge_panel_fields(results: Iterable[Iterable[Dict[str, Any]]], table: PanelFieldTable,
+                       policies: Optional[Mapping[str, str]] = None) -> List[Dict[str, Any]]:
+    """Fusiona las listas PanelFields de varios fragmentos."""
+    merger = PanelMerger(table, policies)
+    for panel_fields in results:
+        merger.add(panel_fields)
+    return merger.result()
@@ -0,0 +1,227 @@
+"""
+Pre-extracción determinista de campos con patrones rígidos.
+
+Matrículas (``050C-12345678``), números de escritura, notarías, cédulas y NIT
+siguen formatos fijos que una expresión regular compilada encuentra en
+microsegundos. Cada procesador declara sus ``FieldRule`` y, antes de llamar
+al LLM:
+
+- un campo es **confiable** si todas las coincidencias del documento dan el
+  mismo valor normalizado; se agrega a PanelFields y se le pide al modelo
+  que no lo devuelva;
+- si hay valores distintos (p. ej. la escritura de cancelación y la de
+  constitución) los candidatos se envían como pista y decide el modelo;
+- si todos los campos del tipo de documento quedan resueltos, no se llama
+  al LLM.
+
+La procedencia de cada valor (posición y fragmento del texto, candidatos y
+si fue confiable) queda en ``_procesamiento["preextraccion"]``.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from schemas.panel_row import PanelFieldTable, PanelRow
+
+
+_FLAGS = re.IGNORECASE | re.UNICODE
+
+# Fragmentos reutilizables
+_NUMERO = r"(?:No\.?|N[°º]\.?|n[uú]mero|nro\.?)"
+_FECHA_LARGA = r"\d{1,2}\s+de\s+[a-záéíóú]+\s+(?:de|del)\s+\d{4}"
+_FECHA_CORTA = r"\d{1,2}[/-]\d{1,2}[/-]\d{4}"
+
+
+def normalize_spaces(value: str) -> str:
+    return re.sub(r"\s+", " ", value).strip(" .,;:")
+
+
+def digits(value: str) -> str:
+    return re.sub(r"[^\d]", "", value)
+
+
+def normalize_matricula(value: str) -> str:
+    return re.sub(r"\s+", "", value).upper()
+
+
+def normalize_grado(value: str) -> str:
+    return f"{value.capitalize()} grado"
+
+
+@dataclass(frozen=True)
+class FieldRule:
+    """
+    Patrón de un campo de PanelFields.
+
+    ``group`` es el grupo de captura con el valor. Con ``hint_only`` el
+    campo nunca se da por resuelto (p. ej. cédulas, que aparecen de varias
+    personas); sus valores solo se envían como pista.
+    """
+    field: str
+    pattern: str
+    group: int = 1
+    normalize: Optional[Callable[[str], str]] = normalize_spaces
+    field_type: str = "Text"
+    hint_only: bool = False
+    max_candidates: int = 5
+
+    def compiled(self) -> "re.Pattern":
+        return _compile(self.pattern)
+
+
+_COMPILED: Dict[str, "re.Pattern"] = {}
+
+
+def _compile(pattern: str) -> "re.Pattern":
+    compiled = _COMPILED.get(pattern)
+    if compiled is None:
+        compiled = _COMPILED[pattern] = re.compile(pattern, _FLAGS)
+    return compiled
+
+
+@dataclass
+class FieldMatch:
+    """Resultado de una regla sobre el documento."""
+    field: str
+    value: Optional[str]
+    confident: bool
+    candidates: List[str] = field(default_factory=list)
+    span: Optional[Tuple[int, int]] = None
+    snippet: str = ""
+    field_type: str = "Text"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "valor": self.value,
+            "confiable": self.confident,
+            "candidatos": self.candidates,
+            "fuente": "regex",
+            "posicion": list(self.span) if self.span else None,
+            "fragmento": self.snippet,
+        }
+
+
+# =========================================================
+# Reglas comunes
+# =========================================================
+
+MATRICULA = (
+    r"matr[ií]cula(?:\s+inmobiliaria)?\s*(?:" + _NUMERO + r")?\s*[:.]?\s*"
+    r"(\d{2,3}[a-z]?\s*-\s*\d{3,8})\b"
+)
+ESCRITURA = r"escritura\s+p[uú]blica\s*" + _NUMERO + r"?\s*[:.]?\s*(\d{1,3}(?:\.\d{3})*|\d+)\b"
+FECHA_ESCRITURA = (
+    r"escritura\s+p[uú]blica\s*" + _NUMERO + r"?\s*[:.]?\s*[\d.]+\s*,?\s*(?:de\s+fecha|del|de)\s+"
+    r"(" + _FECHA_LARGA + "|" + _FECHA_CORTA + r")"
+)
+NOTARIA = (
+    r"(notar[ií]a\s+(?:\d{1,3}|[a-záéíóú]+)\s*(?:\(\d{1,3}\)\s*)?(?:del?\s+)?c[ií]rculo\s+de\s+"
+    r"[a-záéíóúñ]+(?:\s+[a-záéíóúñ]+){0,2}?)(?=\s*[,.;:\n(]|\s+(?:y|con|se|el|la|mediante)\b|$)"
+)
+OFICINA_REGISTRO = (
+    r"oficina\s+de\s+registro\s+de\s+instrumentos\s+p[uú]blicos\s+de\s+"
+    r"([a-záéíóúñ]+(?:\s+[a-záéíóúñ]+){0,2}?)(?=\s*[,.;:\n(\-]|\s+(?:zona|con|bajo|y|el|la)\b|$)"
+)
+RESOLUCION = (
+    r"(resoluci[oó]n\s*" + _NUMERO + r"?\s*[\d.]+\s+(?:de|del)\s+(?:" + _FECHA_LARGA + "|" + _FECHA_CORTA + r"|\d{4}))"
+)
+DIRECCION = (
+    r"(?:ubicad[oa]\s+en\s+(?:la\s+)?|direcci[oó]n\s*(?:catastral)?\s*[:.]?\s*)"
+    r"((?:calle|carrera|avenida|diagonal|transversal|cl|cra|kr|av|dg|tv)\.?\s*\d+\s*[a-z]?(?:\s*bis)?\s*"
+    r"(?:#|no\.?|n[uú]mero)\s*\d+\s*[a-z]?\s*-\s*\d+(?:\s*(?:apartamento|apto|interior|int|casa|torre|bloque)\.?\s*[\w-]+)*)"
+)
+CEDULA = (
+    r"(?:c[eé]dula\s+de\s+ciudadan[ií]a|c\.\s?c\.|\bcc\b)\s*" + _NUMERO + r"?\s*[:.]?\s*"
+    r"(\d{1,3}(?:\.\d{3}){1,3}|\d{6,10})\b"
+)
+NIT = r"\bnit\.?\s*" + _NUMERO + r"?\s*[:.]?\s*(\d{3}\.?\d{3}\.?\d{3}\s*-\s*\d)\b"
+GRADO_HIPOTECA = r"hipoteca\s+(?:abierta\s+)?(?:sin\s+l[ií]mite\s+de\s+cuant[ií]a\s+)?de\s+(primer|segundo|tercer)\s+grado"
+
+
+# =========================================================
+# Extractor
+# =========================================================
+
+class RegexPreExtractor:
+    """Aplica las reglas de un procesador sobre el texto del documento."""
+
+    def __init__(self, rules: Sequence[FieldRule], snippet_chars: int = 40):
+        self.rules = tuple(rules)
+        self.snippet_chars = snippet_chars
+        for rule in self.rules:
+            rule.compiled()
+
+    def extract(self, text: str) -> Dict[str, FieldMatch]:
+        """Coincidencias por campo (solo campos con al menos una coincidencia)."""
+        matches: Dict[str, FieldMatch] = {}
+        for rule in self.rules:
+            values: List[str] = []
+            first = None
+            for m in rule.compiled().finditer(text):
+                raw = m.group(rule.group)
+                if not raw:
+                    continue
+                value = rule.normalize(raw) if rule.normalize else raw
+                if value not in values:
+                    values.append(value)
+                if first is None:
+                    first = m
+                if len(values) > rule.max_candidates:
+                    break
+            if not values:
+                continue
+
+            confident = len(values) == 1 and not rule.hint_only
+            start, end = first.span(rule.group)
+            previous = matches.get(rule.field)
+            # Varias reglas por campo: gana la confiable; las pistas se acumulan
+            if previous is not None and (previous.confident or not confident):
+                if not previous.confident:
+                    previous.candidates.extend(v for v in values if v not in previous.candidates)
+                    del previous.candidates[rule.max_candidates:]
+                continue
+            matches[rule.field] = FieldMatch(
+                field=rule.field,
+                value=values[0] if confident else None,
+                confident=confident,
+                candidates=values[:rule.max_candidates],
+                span=(start, end),
+                snippet=normalize_spaces(text[max(0, start - self.snippet_chars):end + self.snippet_chars]),
+                field_type=rule.field_type,
+            )
+        return matches
+
+
+def resolved_values(matches: Dict[str, FieldMatch]) -> Dict[str, str]:
+    return {name: m.value for name, m in matches.items() if m.confident}
+
+
+def hint_values(matches: Dict[str, FieldMatch]) -> Dict[str, List[str]]:
+    return {name: m.candidates for name, m in matches.items() if not m.confident}
+
+
+def covers_table(matches: Dict[str, FieldMatch], table: PanelFieldTable) -> bool:
+    """True si todos los campos del tipo de documento quedaron resueltos."""
+    return len(table) > 0 and all(
+        name in matches and matches[name].confident for name in table.names
+    )
+
+
+def merge_into_panel_fields(panel_fields: Iterable[Dict[str, Any]], matches: Dict[str, FieldMatch],
+                            table: PanelFieldTable) -> List[Dict[str, Any]]:
+    """
+    Agrega los valores confiables a PanelFields (reemplazan al del LLM) y
+    ordena los campos según la tabla del tipo de documento.
+    """
+    row = PanelRow.from_panel_fields(panel_fields, table)
+    for name, match in matches.items():
+        if match.confident:
+            value = match.value
+            if match.field_type == "Number":
+                value = float(digits(value)) if digits(value) else None
+            row.set(name, value, match.field_type)
+    unknown = len(table)
+    fields = row.to_panel_fields()
+    fields.sort(key=lambda f: table.id_of(f["InternalName"]) if f["InternalName"] in table else unknown)
+    return fields
@@ -0,0 +1,192 @@
+"""
+Trazas y métricas del pipeline con OpenTelemetry.
+
+Cada etapa (lectura del blob, OCR, llamadas al LLM, limpieza, validación,
+escrituras en Data Lake y Cosmos) se envuelve en ``stage_span``. Esto abre
+un span hijo del span actual y copia a sus atributos el contexto del
+documento (``caso_id``, ``process_id``, ``tipo_documento``), que se fija una
+vez con ``bind_context`` (que también lo liga a los logs, ver
+utils/logger.py). También registra la duración en el histograma
+``pipeline.stage.duration`` (ms, atributo ``stage``).
+
+Sin ``configure_telemetry`` (o con ``TELEMETRY_EXPORTER=none``) la API de
+OpenTelemetry queda en modo no-op y el costo es despreciable. Con
+``console`` o ``file`` se exportan spans y métricas como JSON por línea para
+análisis offline.
+
+Entre el starter HTTP, el orquestador y las actividades Durable el contexto
+viaja dentro del input (``inject_context``/``extract_context``, formato W3C
+traceparent + baggage).
+"""
+
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from opentelemetry import baggage, context as otel_context, metrics, trace
+from opentelemetry.propagate import extract, inject
+from opentelemetry.trace import Status, StatusCode
+
+from utils import logger as log_context
+
+
+INSTRUMENTATION_NAME = "conecta.pipeline"
+CONTEXT_KEYS = ("caso_id", "process_id", "tipo_documento")
+TRACE_KEY = "_trace"
+
+_tracer = trace.get_tracer(INSTRUMENTATION_NAME)
+_meter = metrics.get_meter(INSTRUMENTATION_NAME)
+_stage_duration = _meter.create_histogram(
+    "pipeline.stage.duration",
+    unit="ms",
+    description="Duración de cada etapa del pipeline",
+)
+
+_configured = False
+_configure_lock = threading.Lock()
+
+
+# =========================================================
+# Configuración de exportadores
+# =========================================================
+
+def _json_line(span) -> str:
+    return json.dumps(json.loads(span.to_json()), ensure_ascii=False) + "\n"
+
+
+def configure_telemetry(settings) -> bool:
+    """
+    Instala el SDK con el exportador configurado (una sola vez por proceso).
+
+    TELEMETRY_EXPORTER: none | console | file (TELEMETRY_FILE_PATH).
+
+    Returns:
+        bool: True si se instaló un exportador.
+    """
+    global _configured
+    exporter_name = (settings.telemetry_exporter or "none").lower()
+    if exporter_name == "none":
+        return False
+
+    with _configure_lock:
+        if _configured:
+            return True
+
+        from opentelemetry.sdk.metrics import MeterProvider
+        from opentelemetry.sdk.metrics.export import ConsoleMetricExporter, PeriodicExportingMetricReader
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+
+        if exporter_name == "console":
+            out = sys.stdout
+        elif exporter_name == "file":
+            out = open(settings.telemetry_file_path, "a", encoding="utf-8", buffering=1)
+        else:
+            raise ValueError(f"Exportador de telemetría desconocido: {settings.telemetry_exporter}")
+
+        resource = Resource.create({"service.name": settings.telemetry_service_name})
+
+        tracer_provider = TracerProvider(resource=resource)
+        tracer_provider.add_span_processor(
+            BatchSpanProcessor(ConsoleSpanExporter(out=out, formatter=_json_line))
+        )
+        trace.set_tracer_provider(tracer_provider)
+
+        reader = PeriodicExportingMetricReader(
+            ConsoleMetricExporter(out=out, formatter=lambda m: m.to_json(indent=None) + "\n"),
+            export_interval_millis=settings.telemetry_metrics_interval_ms,
+        )
+        metrics.set_meter_provider(MeterProvider(resource=resource, metric_readers=[reader]))
+
+        _configured = True
+        return True
+
+
+# =========================================================
+# Contexto del documento
+# =========================================================
+
+@contextmanager
+def bind_context(**values: Any) -> Iterator[None]:
+    """Fija caso_id/process_id/... (baggage y logs) para los spans que se abran dentro."""
+    ctx = otel_context.get_current()
+    for key, value in values.items():
+        if value is not None:
+            ctx = baggage.set_baggage(key, str(value), context=ctx)
+    token = otel_context.attach(ctx)
+    try:
+        with log_context.bind_context(**values):
+            yield
+    finally:
+        otel_context.detach(token)
+
+
+def bound_context() -> Dict[str, str]:
+    """Contexto del documento actualmente fijado."""
+    return {k: v for k, v in baggage.get_all().items() if k in CONTEXT_KEYS}
+
+
+@contextmanager
+def stage_span(stage: str, **attributes: Any) -> Iterator[trace.Span]:
+    """
+    Span de una etapa con el contexto del documento como atributos y su
+    duración en el histograma. Los atributos con valor None se omiten.
+    """
+    attrs = {"stage": stage, **bound_context()}
+    attrs.update({k: v for k, v in attributes.items() if v is not None})
+    start = time.perf_counter()
+    with _tracer.start_as_current_span(stage, attributes=attrs, record_exception=True) as span, \
+            log_context.bind_context(stage=stage):
+        try:
+            yield span
+        except Exception as e:
+            span.set_status(Status(StatusCode.ERROR, str(e)))
+            raise
+        finally:
+            _stage_duration.record((time.perf_counter() - start) * 1000.0, {"stage": stage})
+
+
+def set_attributes(span: trace.Span, **attributes: Any) -> None:
+    """Agrega atributos a un span omitiendo los None."""
+    if span.is_recording():
+        span.set_attributes({k: v for k, v in attributes.items() if v is not None})
+
+
+# =========================================================
+# Propagación hacia actividades Durable
+# =========================================================
+
+def inject_context() -> Dict[str, str]:
+    """Carrier W3C (traceparent + baggage) del contexto actual."""
+    carrier: Dict[str, str] = {}
+    inject(carrier)
+    return carrier
+
+
+@contextmanager
+def extract_context(carrier: Optional[Dict[str, str]]) -> Iterator[None]:
+    """Continúa la traza recibida en el input de una actividad."""
+    if not carrier:
+        yield
+        return
+    token = otel_context.attach(extract(carrier))
+    try:
+        yield
+    finally:
+        otel_context.detach(token)
+
+
+def wrap_payload(payload: Any) -> Dict[str, Any]:
+    """Input de actividad con el contexto de traza adjunto."""
+    return {"payload": payload, TRACE_KEY: inject_context()}
+
+
+def unwrap_payload(data: Any):
+    """(payload, carrier) desde un input envuelto o el formato sin envolver."""
+    if isinstance(data, dict) and TRACE_KEY in data and "payload" in data:
+        return data["payload"], data[TRACE_KEY]
+    return data, None